@@ -0,0 +1,54 @@
+"""
+Alembic environment - migrates the database configured by DATABASE_URL
+"""
+from alembic import context
+
+from app.core.database import Base, engine, import_all_models
+from app.modules.crm.search import SEARCH_INDEXES
+
+import_all_models()
+target_metadata = Base.metadata
+
+# FTS5 tables and their shadow tables are maintained by the search module, not by models
+_SEARCH_TABLES = tuple(index.fts_name for index in SEARCH_INDEXES)
+
+def include_name(name, type_, parent_names):
+    """Keep autogenerate from proposing to drop the search tables"""
+    return not (type_ == "table" and name.startswith(_SEARCH_TABLES))
+
+def run_migrations_offline():
+    """Emit the migration SQL without connecting (alembic upgrade head --sql)"""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        include_name=include_name,
+        literal_binds=True,
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def _run_on(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    """Run migrations on a connection from the application's engine, or on one passed in
+    through ``config.attributes["connection"]``"""
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        _run_on(connection)
+        return
+    with engine.connect() as connection:
+        _run_on(connection)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
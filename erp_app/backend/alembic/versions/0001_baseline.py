@@ -0,0 +1,935 @@
+"""Baseline schema
+
+Databases so far were created by Base.metadata.create_all() at startup. This
+revision creates the same tables, as they were when migrations were
+introduced, so an empty database can be upgraded from nothing. Tables that
+already exist are left alone.
+
+The definitions are written out here rather than taken from the models, so
+later model changes cannot rewrite this revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "accounts" not in existing:
+        op.create_table(
+            "accounts",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("code", sa.String(length=20), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("type", sa.String(length=50), nullable=True),
+            sa.Column("parent_id", sa.Integer(), nullable=True),
+            sa.Column("balance", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["parent_id"], ["accounts.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("code"),
+        )
+        op.create_index("ix_accounts_id", "accounts", ["id"])
+
+    if "categories" not in existing:
+        op.create_table(
+            "categories",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("parent_id", sa.Integer(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["parent_id"], ["categories.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name"),
+        )
+        op.create_index("ix_categories_id", "categories", ["id"])
+
+    if "contacts" not in existing:
+        op.create_table(
+            "contacts",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("type", sa.Enum("INDIVIDUAL", "COMPANY", name="contacttype"), nullable=True),
+            sa.Column("first_name", sa.String(length=50), nullable=True),
+            sa.Column("last_name", sa.String(length=50), nullable=True),
+            sa.Column("company_name", sa.String(length=100), nullable=True),
+            sa.Column("email", sa.String(length=100), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("mobile", sa.String(length=20), nullable=True),
+            sa.Column("website", sa.String(length=200), nullable=True),
+            sa.Column("address", sa.Text(), nullable=True),
+            sa.Column("city", sa.String(length=50), nullable=True),
+            sa.Column("state", sa.String(length=50), nullable=True),
+            sa.Column("country", sa.String(length=50), nullable=True),
+            sa.Column("postal_code", sa.String(length=20), nullable=True),
+            sa.Column("job_title", sa.String(length=100), nullable=True),
+            sa.Column("department", sa.String(length=100), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_contacts_email", "contacts", ["email"], unique=True)
+        op.create_index("ix_contacts_id", "contacts", ["id"])
+
+    if "customers" not in existing:
+        op.create_table(
+            "customers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("customer_number", sa.String(length=50), nullable=True),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("address", sa.Text(), nullable=True),
+            sa.Column("city", sa.String(length=50), nullable=True),
+            sa.Column("state", sa.String(length=50), nullable=True),
+            sa.Column("country", sa.String(length=50), nullable=True),
+            sa.Column("postal_code", sa.String(length=20), nullable=True),
+            sa.Column("tax_number", sa.String(length=50), nullable=True),
+            sa.Column("credit_limit", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("payment_terms", sa.String(length=100), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("customer_number"),
+        )
+        op.create_index("ix_customers_id", "customers", ["id"])
+
+    if "daily_rollups" not in existing:
+        op.create_table(
+            "daily_rollups",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("module", sa.String(length=50), nullable=False),
+            sa.Column("metric", sa.String(length=50), nullable=False),
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("amount", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("metric", "day", name="uq_daily_rollups_metric_day"),
+        )
+        op.create_index("ix_daily_rollups_id", "daily_rollups", ["id"])
+
+    if "departments" not in existing:
+        op.create_table(
+            "departments",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("code", sa.String(length=20), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("manager_id", sa.Integer(), nullable=True),
+            sa.Column("budget", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["manager_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("code"),
+            sa.UniqueConstraint("name"),
+        )
+        op.create_index("ix_departments_id", "departments", ["id"])
+
+    if "employees" not in existing:
+        op.create_table(
+            "employees",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("employee_id", sa.String(length=50), nullable=False),
+            sa.Column("first_name", sa.String(length=50), nullable=False),
+            sa.Column("last_name", sa.String(length=50), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("date_of_birth", sa.Date(), nullable=True),
+            sa.Column("gender", sa.String(length=10), nullable=True),
+            sa.Column("address", sa.Text(), nullable=True),
+            sa.Column("city", sa.String(length=50), nullable=True),
+            sa.Column("state", sa.String(length=50), nullable=True),
+            sa.Column("country", sa.String(length=50), nullable=True),
+            sa.Column("postal_code", sa.String(length=20), nullable=True),
+            sa.Column("hire_date", sa.Date(), nullable=False),
+            sa.Column("termination_date", sa.Date(), nullable=True),
+            sa.Column("department_id", sa.Integer(), nullable=True),
+            sa.Column("position_id", sa.Integer(), nullable=True),
+            sa.Column("manager_id", sa.Integer(), nullable=True),
+            sa.Column("status", sa.Enum("ACTIVE", "INACTIVE", "TERMINATED", "ON_LEAVE", name="employeestatus"), nullable=True),
+            sa.Column("salary", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("pay_frequency", sa.String(length=20), nullable=True),
+            sa.Column("emergency_contact_name", sa.String(length=100), nullable=True),
+            sa.Column("emergency_contact_phone", sa.String(length=20), nullable=True),
+            sa.Column("national_id", sa.String(length=50), nullable=True),
+            sa.Column("passport_number", sa.String(length=50), nullable=True),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["department_id"], ["departments.id"]),
+            sa.ForeignKeyConstraint(["manager_id"], ["employees.id"]),
+            sa.ForeignKeyConstraint(["position_id"], ["positions.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("email"),
+            sa.UniqueConstraint("employee_id"),
+        )
+        op.create_index("ix_employees_id", "employees", ["id"])
+
+    if "permissions" not in existing:
+        op.create_table(
+            "permissions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("description", sa.String(length=500), nullable=True),
+            sa.Column("module", sa.String(length=50), nullable=True),
+            sa.Column("action", sa.String(length=50), nullable=True),
+            sa.Column("resource", sa.String(length=50), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name"),
+        )
+        op.create_index("ix_permissions_id", "permissions", ["id"])
+
+    if "positions" not in existing:
+        op.create_table(
+            "positions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(length=100), nullable=False),
+            sa.Column("department_id", sa.Integer(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("requirements", sa.Text(), nullable=True),
+            sa.Column("min_salary", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("max_salary", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["department_id"], ["departments.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_positions_id", "positions", ["id"])
+
+    if "roles" not in existing:
+        op.create_table(
+            "roles",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("description", sa.String(length=500), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("name"),
+        )
+        op.create_index("ix_roles_id", "roles", ["id"])
+
+    if "suppliers" not in existing:
+        op.create_table(
+            "suppliers",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("contact_person", sa.String(length=100), nullable=True),
+            sa.Column("email", sa.String(length=100), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("website", sa.String(length=200), nullable=True),
+            sa.Column("address", sa.Text(), nullable=True),
+            sa.Column("city", sa.String(length=50), nullable=True),
+            sa.Column("state", sa.String(length=50), nullable=True),
+            sa.Column("country", sa.String(length=50), nullable=True),
+            sa.Column("postal_code", sa.String(length=20), nullable=True),
+            sa.Column("tax_number", sa.String(length=50), nullable=True),
+            sa.Column("payment_terms", sa.String(length=100), nullable=True),
+            sa.Column("credit_limit", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_suppliers_id", "suppliers", ["id"])
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("username", sa.String(length=50), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=False),
+            sa.Column("full_name", sa.String(length=200), nullable=False),
+            sa.Column("hashed_password", sa.String(length=255), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("is_verified", sa.Boolean(), nullable=True),
+            sa.Column("role", sa.Enum("SUPER_ADMIN", "ADMIN", "MANAGER", "EMPLOYEE", "SALES_REP", "ACCOUNTANT", "HR_MANAGER", "VIEWER", name="userrole"), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("avatar_url", sa.String(length=500), nullable=True),
+            sa.Column("timezone", sa.String(length=50), nullable=True),
+            sa.Column("language", sa.String(length=10), nullable=True),
+            sa.Column("last_login", sa.DateTime(), nullable=True),
+            sa.Column("password_changed_at", sa.DateTime(), nullable=True),
+            sa.Column("failed_login_attempts", sa.Integer(), nullable=True),
+            sa.Column("locked_until", sa.DateTime(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    if "warehouses" not in existing:
+        op.create_table(
+            "warehouses",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=100), nullable=False),
+            sa.Column("code", sa.String(length=20), nullable=False),
+            sa.Column("address", sa.Text(), nullable=True),
+            sa.Column("city", sa.String(length=50), nullable=True),
+            sa.Column("state", sa.String(length=50), nullable=True),
+            sa.Column("country", sa.String(length=50), nullable=True),
+            sa.Column("postal_code", sa.String(length=20), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("email", sa.String(length=100), nullable=True),
+            sa.Column("manager_name", sa.String(length=100), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("code"),
+        )
+        op.create_index("ix_warehouses_id", "warehouses", ["id"])
+
+    if "attendance" not in existing:
+        op.create_table(
+            "attendance",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("employee_id", sa.Integer(), nullable=True),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("check_in", sa.DateTime(), nullable=True),
+            sa.Column("check_out", sa.DateTime(), nullable=True),
+            sa.Column("break_duration", sa.Integer(), nullable=True),
+            sa.Column("total_hours", sa.Numeric(precision=4, scale=2), nullable=True),
+            sa.Column("overtime_hours", sa.Numeric(precision=4, scale=2), nullable=True),
+            sa.Column("status", sa.Enum("PRESENT", "ABSENT", "LATE", "HALF_DAY", name="attendancestatus"), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("check_in_location", sa.String(length=200), nullable=True),
+            sa.Column("check_out_location", sa.String(length=200), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["employee_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_attendance_id", "attendance", ["id"])
+
+    if "audit_logs" not in existing:
+        op.create_table(
+            "audit_logs",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("action", sa.String(length=50), nullable=False),
+            sa.Column("table_name", sa.String(length=50), nullable=True),
+            sa.Column("record_id", sa.String(length=50), nullable=True),
+            sa.Column("old_values", sa.Text(), nullable=True),
+            sa.Column("new_values", sa.Text(), nullable=True),
+            sa.Column("ip_address", sa.String(length=45), nullable=True),
+            sa.Column("user_agent", sa.String(length=500), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+    if "deals" not in existing:
+        op.create_table(
+            "deals",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("contact_id", sa.Integer(), nullable=True),
+            sa.Column("amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("stage", sa.Enum("PROSPECTING", "QUALIFICATION", "PROPOSAL", "NEGOTIATION", "CLOSED_WON", "CLOSED_LOST", name="dealstage"), nullable=True),
+            sa.Column("probability", sa.Integer(), nullable=True),
+            sa.Column("expected_close_date", sa.DateTime(), nullable=True),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("assigned_to", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["assigned_to"], ["users.id"]),
+            sa.ForeignKeyConstraint(["contact_id"], ["contacts.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_deals_id", "deals", ["id"])
+
+    if "expenses" not in existing:
+        op.create_table(
+            "expenses",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("expense_number", sa.String(length=50), nullable=True),
+            sa.Column("date", sa.DateTime(), nullable=False),
+            sa.Column("vendor", sa.String(length=200), nullable=True),
+            sa.Column("category", sa.String(length=100), nullable=True),
+            sa.Column("description", sa.String(length=500), nullable=False),
+            sa.Column("amount", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("payment_method", sa.String(length=50), nullable=True),
+            sa.Column("reference_number", sa.String(length=100), nullable=True),
+            sa.Column("receipt_url", sa.String(length=500), nullable=True),
+            sa.Column("is_approved", sa.Boolean(), nullable=True),
+            sa.Column("approved_by", sa.Integer(), nullable=True),
+            sa.Column("approved_at", sa.DateTime(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["approved_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("expense_number"),
+        )
+        op.create_index("ix_expenses_id", "expenses", ["id"])
+
+    if "file_uploads" not in existing:
+        op.create_table(
+            "file_uploads",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("filename", sa.String(length=255), nullable=False),
+            sa.Column("original_filename", sa.String(length=255), nullable=False),
+            sa.Column("file_path", sa.String(length=500), nullable=False),
+            sa.Column("file_size", sa.Integer(), nullable=True),
+            sa.Column("mime_type", sa.String(length=100), nullable=True),
+            sa.Column("related_table", sa.String(length=50), nullable=True),
+            sa.Column("related_id", sa.Integer(), nullable=True),
+            sa.Column("uploaded_by", sa.Integer(), nullable=True),
+            sa.Column("uploaded_at", sa.DateTime(), nullable=True),
+            sa.Column("is_public", sa.Boolean(), nullable=True),
+            sa.Column("is_deleted", sa.Boolean(), nullable=True),
+            sa.ForeignKeyConstraint(["uploaded_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_file_uploads_id", "file_uploads", ["id"])
+
+    if "invoices" not in existing:
+        op.create_table(
+            "invoices",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("invoice_number", sa.String(length=50), nullable=False),
+            sa.Column("customer_id", sa.Integer(), nullable=True),
+            sa.Column("issue_date", sa.DateTime(), nullable=False),
+            sa.Column("due_date", sa.DateTime(), nullable=False),
+            sa.Column("subtotal", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("discount_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("total_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("paid_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("balance_due", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("status", sa.Enum("DRAFT", "SENT", "PAID", "OVERDUE", "CANCELLED", name="invoicestatus"), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("terms_and_conditions", sa.Text(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["customer_id"], ["customers.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("invoice_number"),
+        )
+        op.create_index("ix_invoices_id", "invoices", ["id"])
+
+    if "leads" not in existing:
+        op.create_table(
+            "leads",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("first_name", sa.String(length=50), nullable=False),
+            sa.Column("last_name", sa.String(length=50), nullable=False),
+            sa.Column("email", sa.String(length=100), nullable=True),
+            sa.Column("phone", sa.String(length=20), nullable=True),
+            sa.Column("company", sa.String(length=100), nullable=True),
+            sa.Column("job_title", sa.String(length=100), nullable=True),
+            sa.Column("status", sa.Enum("NEW", "CONTACTED", "QUALIFIED", "CONVERTED", "LOST", name="leadstatus"), nullable=True),
+            sa.Column("source", sa.String(length=50), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("assigned_to", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["assigned_to"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_leads_email", "leads", ["email"], unique=True)
+        op.create_index("ix_leads_id", "leads", ["id"])
+
+    if "leave_requests" not in existing:
+        op.create_table(
+            "leave_requests",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("employee_id", sa.Integer(), nullable=True),
+            sa.Column("leave_type", sa.Enum("ANNUAL", "SICK", "PERSONAL", "MATERNITY", "PATERNITY", "EMERGENCY", name="leavetype"), nullable=False),
+            sa.Column("start_date", sa.Date(), nullable=False),
+            sa.Column("end_date", sa.Date(), nullable=False),
+            sa.Column("days_requested", sa.Integer(), nullable=False),
+            sa.Column("reason", sa.Text(), nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "APPROVED", "REJECTED", "CANCELLED", name="leavestatus"), nullable=True),
+            sa.Column("approved_by", sa.Integer(), nullable=True),
+            sa.Column("approved_at", sa.DateTime(), nullable=True),
+            sa.Column("approval_comments", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["approved_by"], ["employees.id"]),
+            sa.ForeignKeyConstraint(["employee_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_leave_requests_id", "leave_requests", ["id"])
+
+    if "notifications" not in existing:
+        op.create_table(
+            "notifications",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("title", sa.String(length=200), nullable=False),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("type", sa.String(length=50), nullable=True),
+            sa.Column("is_read", sa.Boolean(), nullable=True),
+            sa.Column("is_deleted", sa.Boolean(), nullable=True),
+            sa.Column("related_table", sa.String(length=50), nullable=True),
+            sa.Column("related_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("read_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_notifications_id", "notifications", ["id"])
+
+    if "payroll" not in existing:
+        op.create_table(
+            "payroll",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("employee_id", sa.Integer(), nullable=True),
+            sa.Column("pay_period_start", sa.Date(), nullable=False),
+            sa.Column("pay_period_end", sa.Date(), nullable=False),
+            sa.Column("pay_date", sa.Date(), nullable=False),
+            sa.Column("basic_salary", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("overtime_pay", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("bonus", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("allowances", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("gross_pay", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("tax_deduction", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("insurance_deduction", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("other_deductions", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("total_deductions", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("net_pay", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("is_processed", sa.Boolean(), nullable=True),
+            sa.Column("processed_by", sa.Integer(), nullable=True),
+            sa.Column("processed_at", sa.DateTime(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["employee_id"], ["employees.id"]),
+            sa.ForeignKeyConstraint(["processed_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_payroll_id", "payroll", ["id"])
+
+    if "products" not in existing:
+        op.create_table(
+            "products",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("sku", sa.String(length=50), nullable=False),
+            sa.Column("name", sa.String(length=200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("type", sa.Enum("GOODS", "SERVICE", "DIGITAL", name="producttype"), nullable=True),
+            sa.Column("category_id", sa.Integer(), nullable=True),
+            sa.Column("brand", sa.String(length=100), nullable=True),
+            sa.Column("cost_price", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("selling_price", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("track_inventory", sa.Boolean(), nullable=True),
+            sa.Column("current_stock", sa.Integer(), nullable=True),
+            sa.Column("minimum_stock", sa.Integer(), nullable=True),
+            sa.Column("maximum_stock", sa.Integer(), nullable=True),
+            sa.Column("reorder_level", sa.Integer(), nullable=True),
+            sa.Column("weight", sa.Numeric(precision=8, scale=2), nullable=True),
+            sa.Column("dimensions", sa.String(length=100), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+            sa.Column("is_featured", sa.Boolean(), nullable=True),
+            sa.Column("image_url", sa.String(length=500), nullable=True),
+            sa.Column("barcode", sa.String(length=50), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["category_id"], ["categories.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_products_id", "products", ["id"])
+        op.create_index("ix_products_sku", "products", ["sku"], unique=True)
+
+    if "quotes" not in existing:
+        op.create_table(
+            "quotes",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("quote_number", sa.String(length=50), nullable=False),
+            sa.Column("customer_id", sa.Integer(), nullable=True),
+            sa.Column("contact_id", sa.Integer(), nullable=True),
+            sa.Column("quote_date", sa.DateTime(), nullable=False),
+            sa.Column("valid_until", sa.DateTime(), nullable=False),
+            sa.Column("subtotal", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("discount_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("total_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("status", sa.Enum("DRAFT", "SENT", "ACCEPTED", "REJECTED", "EXPIRED", name="quotestatus"), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("terms_and_conditions", sa.Text(), nullable=True),
+            sa.Column("sales_rep_id", sa.Integer(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["contact_id"], ["contacts.id"]),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["customer_id"], ["customers.id"]),
+            sa.ForeignKeyConstraint(["sales_rep_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("quote_number"),
+        )
+        op.create_index("ix_quotes_id", "quotes", ["id"])
+
+    if "role_permissions" not in existing:
+        op.create_table(
+            "role_permissions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("role_id", sa.Integer(), nullable=True),
+            sa.Column("permission_id", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["permission_id"], ["permissions.id"]),
+            sa.ForeignKeyConstraint(["role_id"], ["roles.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_role_permissions_id", "role_permissions", ["id"])
+
+    if "sales_targets" not in existing:
+        op.create_table(
+            "sales_targets",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("sales_rep_id", sa.Integer(), nullable=True),
+            sa.Column("year", sa.Integer(), nullable=False),
+            sa.Column("month", sa.Integer(), nullable=False),
+            sa.Column("target_amount", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("achieved_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["sales_rep_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_sales_targets_id", "sales_targets", ["id"])
+
+    if "system_settings" not in existing:
+        op.create_table(
+            "system_settings",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("key", sa.String(length=100), nullable=False),
+            sa.Column("value", sa.Text(), nullable=True),
+            sa.Column("description", sa.String(length=500), nullable=True),
+            sa.Column("is_encrypted", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_by", sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(["updated_by"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("key"),
+        )
+        op.create_index("ix_system_settings_id", "system_settings", ["id"])
+
+    if "user_roles" not in existing:
+        op.create_table(
+            "user_roles",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("user_id", sa.Integer(), nullable=True),
+            sa.Column("role_id", sa.Integer(), nullable=True),
+            sa.Column("assigned_by", sa.Integer(), nullable=True),
+            sa.Column("assigned_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["assigned_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["role_id"], ["roles.id"]),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_user_roles_id", "user_roles", ["id"])
+
+    if "activities" not in existing:
+        op.create_table(
+            "activities",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("type", sa.String(length=50), nullable=True),
+            sa.Column("subject", sa.String(length=200), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("scheduled_at", sa.DateTime(), nullable=True),
+            sa.Column("completed_at", sa.DateTime(), nullable=True),
+            sa.Column("is_completed", sa.Boolean(), nullable=True),
+            sa.Column("lead_id", sa.Integer(), nullable=True),
+            sa.Column("contact_id", sa.Integer(), nullable=True),
+            sa.Column("deal_id", sa.Integer(), nullable=True),
+            sa.Column("assigned_to", sa.Integer(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["assigned_to"], ["users.id"]),
+            sa.ForeignKeyConstraint(["contact_id"], ["contacts.id"]),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["deal_id"], ["deals.id"]),
+            sa.ForeignKeyConstraint(["lead_id"], ["leads.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_activities_id", "activities", ["id"])
+
+    if "invoice_items" not in existing:
+        op.create_table(
+            "invoice_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("invoice_id", sa.Integer(), nullable=True),
+            sa.Column("product_id", sa.Integer(), nullable=True),
+            sa.Column("description", sa.String(length=500), nullable=False),
+            sa.Column("quantity", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("unit_price", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("total_price", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("tax_rate", sa.Numeric(precision=5, scale=2), nullable=True),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.ForeignKeyConstraint(["invoice_id"], ["invoices.id"]),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_invoice_items_id", "invoice_items", ["id"])
+
+    if "payments" not in existing:
+        op.create_table(
+            "payments",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("payment_number", sa.String(length=50), nullable=True),
+            sa.Column("invoice_id", sa.Integer(), nullable=True),
+            sa.Column("amount", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("payment_date", sa.DateTime(), nullable=False),
+            sa.Column("payment_method", sa.String(length=50), nullable=True),
+            sa.Column("reference_number", sa.String(length=100), nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "COMPLETED", "FAILED", "REFUNDED", name="paymentstatus"), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["invoice_id"], ["invoices.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("payment_number"),
+        )
+        op.create_index("ix_payments_id", "payments", ["id"])
+
+    if "quote_items" not in existing:
+        op.create_table(
+            "quote_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("quote_id", sa.Integer(), nullable=True),
+            sa.Column("product_id", sa.Integer(), nullable=True),
+            sa.Column("description", sa.String(length=500), nullable=False),
+            sa.Column("quantity", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("unit_price", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("total_price", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("tax_rate", sa.Numeric(precision=5, scale=2), nullable=True),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("discount_percentage", sa.Numeric(precision=5, scale=2), nullable=True),
+            sa.Column("discount_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.ForeignKeyConstraint(["quote_id"], ["quotes.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_quote_items_id", "quote_items", ["id"])
+
+    if "sales_orders" not in existing:
+        op.create_table(
+            "sales_orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_number", sa.String(length=50), nullable=False),
+            sa.Column("customer_id", sa.Integer(), nullable=True),
+            sa.Column("contact_id", sa.Integer(), nullable=True),
+            sa.Column("quote_id", sa.Integer(), nullable=True),
+            sa.Column("order_date", sa.DateTime(), nullable=False),
+            sa.Column("required_date", sa.DateTime(), nullable=True),
+            sa.Column("shipped_date", sa.DateTime(), nullable=True),
+            sa.Column("subtotal", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("shipping_cost", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("discount_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("total_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("status", sa.Enum("PENDING", "CONFIRMED", "PROCESSING", "SHIPPED", "DELIVERED", "CANCELLED", name="orderstatus"), nullable=True),
+            sa.Column("shipping_address", sa.Text(), nullable=True),
+            sa.Column("shipping_city", sa.String(length=50), nullable=True),
+            sa.Column("shipping_state", sa.String(length=50), nullable=True),
+            sa.Column("shipping_country", sa.String(length=50), nullable=True),
+            sa.Column("shipping_postal_code", sa.String(length=20), nullable=True),
+            sa.Column("shipping_method", sa.String(length=100), nullable=True),
+            sa.Column("tracking_number", sa.String(length=100), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("internal_notes", sa.Text(), nullable=True),
+            sa.Column("sales_rep_id", sa.Integer(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["contact_id"], ["contacts.id"]),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["customer_id"], ["customers.id"]),
+            sa.ForeignKeyConstraint(["quote_id"], ["quotes.id"]),
+            sa.ForeignKeyConstraint(["sales_rep_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("order_number"),
+        )
+        op.create_index("ix_sales_orders_id", "sales_orders", ["id"])
+
+    if "stock_movements" not in existing:
+        op.create_table(
+            "stock_movements",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("product_id", sa.Integer(), nullable=True),
+            sa.Column("warehouse_id", sa.Integer(), nullable=True),
+            sa.Column("movement_type", sa.Enum("IN", "OUT", "ADJUSTMENT", name="stockmovementtype"), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("reference_number", sa.String(length=50), nullable=True),
+            sa.Column("reason", sa.String(length=200), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("quantity_before", sa.Integer(), nullable=True),
+            sa.Column("quantity_after", sa.Integer(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_stock_movements_id", "stock_movements", ["id"])
+
+    if "transactions" not in existing:
+        op.create_table(
+            "transactions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("transaction_number", sa.String(length=50), nullable=True),
+            sa.Column("date", sa.DateTime(), nullable=False),
+            sa.Column("type", sa.Enum("INCOME", "EXPENSE", name="transactiontype"), nullable=False),
+            sa.Column("account_id", sa.Integer(), nullable=True),
+            sa.Column("amount", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("description", sa.String(length=500), nullable=False),
+            sa.Column("reference_number", sa.String(length=100), nullable=True),
+            sa.Column("invoice_id", sa.Integer(), nullable=True),
+            sa.Column("expense_id", sa.Integer(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["account_id"], ["accounts.id"]),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["expense_id"], ["expenses.id"]),
+            sa.ForeignKeyConstraint(["invoice_id"], ["invoices.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("transaction_number"),
+        )
+        op.create_index("ix_transactions_id", "transactions", ["id"])
+
+    if "warehouse_stocks" not in existing:
+        op.create_table(
+            "warehouse_stocks",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("warehouse_id", sa.Integer(), nullable=True),
+            sa.Column("product_id", sa.Integer(), nullable=True),
+            sa.Column("quantity", sa.Integer(), nullable=True),
+            sa.Column("reserved_quantity", sa.Integer(), nullable=True),
+            sa.Column("available_quantity", sa.Integer(), nullable=True),
+            sa.Column("location", sa.String(length=50), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_warehouse_stocks_id", "warehouse_stocks", ["id"])
+
+    if "commissions" not in existing:
+        op.create_table(
+            "commissions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("sales_rep_id", sa.Integer(), nullable=True),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("commission_rate", sa.Numeric(precision=5, scale=2), nullable=False),
+            sa.Column("commission_amount", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("currency", sa.String(length=3), nullable=True),
+            sa.Column("is_paid", sa.Boolean(), nullable=True),
+            sa.Column("paid_date", sa.DateTime(), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["sales_orders.id"]),
+            sa.ForeignKeyConstraint(["sales_rep_id"], ["employees.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_commissions_id", "commissions", ["id"])
+
+    if "sales_order_items" not in existing:
+        op.create_table(
+            "sales_order_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("product_id", sa.Integer(), nullable=True),
+            sa.Column("description", sa.String(length=500), nullable=False),
+            sa.Column("quantity", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("unit_price", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("total_price", sa.Numeric(precision=15, scale=2), nullable=False),
+            sa.Column("tax_rate", sa.Numeric(precision=5, scale=2), nullable=True),
+            sa.Column("tax_amount", sa.Numeric(precision=15, scale=2), nullable=True),
+            sa.Column("quantity_shipped", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("quantity_remaining", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.ForeignKeyConstraint(["order_id"], ["sales_orders.id"]),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_sales_order_items_id", "sales_order_items", ["id"])
+
+    if "shipments" not in existing:
+        op.create_table(
+            "shipments",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("shipment_number", sa.String(length=50), nullable=False),
+            sa.Column("order_id", sa.Integer(), nullable=True),
+            sa.Column("warehouse_id", sa.Integer(), nullable=True),
+            sa.Column("ship_date", sa.DateTime(), nullable=False),
+            sa.Column("expected_delivery", sa.DateTime(), nullable=True),
+            sa.Column("actual_delivery", sa.DateTime(), nullable=True),
+            sa.Column("carrier", sa.String(length=100), nullable=True),
+            sa.Column("tracking_number", sa.String(length=100), nullable=True),
+            sa.Column("shipping_cost", sa.Numeric(precision=10, scale=2), nullable=True),
+            sa.Column("weight", sa.Numeric(precision=8, scale=2), nullable=True),
+            sa.Column("shipping_address", sa.Text(), nullable=True),
+            sa.Column("shipping_city", sa.String(length=50), nullable=True),
+            sa.Column("shipping_state", sa.String(length=50), nullable=True),
+            sa.Column("shipping_country", sa.String(length=50), nullable=True),
+            sa.Column("shipping_postal_code", sa.String(length=20), nullable=True),
+            sa.Column("notes", sa.Text(), nullable=True),
+            sa.Column("created_by", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+            sa.ForeignKeyConstraint(["order_id"], ["sales_orders.id"]),
+            sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("shipment_number"),
+        )
+        op.create_index("ix_shipments_id", "shipments", ["id"])
+
+    if "shipment_items" not in existing:
+        op.create_table(
+            "shipment_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("shipment_id", sa.Integer(), nullable=True),
+            sa.Column("product_id", sa.Integer(), nullable=True),
+            sa.Column("quantity", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+            sa.ForeignKeyConstraint(["shipment_id"], ["shipments.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_shipment_items_id", "shipment_items", ["id"])
+
+
+def downgrade():
+    # Dropping every table is not a migration; restore from a backup instead
+    pass
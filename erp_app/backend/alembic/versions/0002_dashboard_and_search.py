@@ -0,0 +1,115 @@
+"""Dashboard rollups, revenue covering index and CRM search indexes
+
+Brings databases created before these existed up to date. daily_rollups
+itself comes from the baseline; it is filled here if empty. The rollup and
+search definitions are copied as they were at this revision.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (module, metric, table, day column, amount column, filter) as the rollups were defined here
+ROLLUPS = [
+    ("crm", "leads", "leads", "created_at", None, None),
+    ("crm", "contacts", "contacts", "created_at", None, None),
+    ("crm", "deals", "deals", "created_at", "amount", None),
+    ("accounting", "active_customers", "customers", "created_at", None, "is_active"),
+    ("accounting", "invoices", "invoices", "issue_date", None, None),
+    ("accounting", "paid_invoices", "invoices", "issue_date", "total_amount", "status IN ('PAID')"),
+    ("accounting", "outstanding_invoices", "invoices", "issue_date", "balance_due", "status IN ('SENT', 'OVERDUE')"),
+    ("sales", "orders", "sales_orders", "order_date", None, None),
+]
+
+# (table, indexed columns) for CRM search
+SEARCH_INDEXES = [
+    ("leads", ("first_name", "last_name", "email", "company")),
+    ("contacts", ("first_name", "last_name", "email", "company_name")),
+]
+
+
+def rollup_statement(module, metric, table, day, amount, condition):
+    """INSERT ... SELECT of one metric's per-day count and sum"""
+    total = f"coalesce(sum({amount}), 0)" if amount else "0"
+    where = f"{day} IS NOT NULL" + (f" AND {condition}" if condition else "")
+    return (
+        f"INSERT INTO daily_rollups (module, metric, day, count, amount) "
+        f"SELECT '{module}', '{metric}', date({day}), count(*), {total} FROM {table} "
+        f"WHERE {where} GROUP BY date({day})"
+    )
+
+
+def sqlite_search_ddl(base, columns):
+    """FTS5 external-content table plus the triggers that keep it in step with the base table"""
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    fts = f"{base}_fts"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{base}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {base} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {base} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {base} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def postgresql_search_ddl(base, columns):
+    """GIN indexes over the concatenated columns: tsvector for words, trigrams for substrings"""
+    document = " || ' ' || ".join(f"coalesce({c}, '')" for c in columns)
+    return [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        f"CREATE INDEX IF NOT EXISTS ix_{base}_search_tsv ON {base} "
+        f"USING gin (to_tsvector('simple', {document}))",
+        f"CREATE INDEX IF NOT EXISTS ix_{base}_search_trgm ON {base} "
+        f"USING gin (({document}) gin_trgm_ops)",
+    ]
+
+
+def upgrade():
+    op.create_index(
+        "ix_invoices_status_issue_date_total", "invoices",
+        ["status", "issue_date", "total_amount"], if_not_exists=True,
+    )
+
+    connection = op.get_bind()
+    # Offline scripts are written for a new database, whose rollups are empty
+    if context.is_offline_mode() or not connection.scalar(sa.text("SELECT COUNT(*) FROM daily_rollups")):
+        for rollup in ROLLUPS:
+            op.execute(rollup_statement(*rollup))
+
+    for base, columns in SEARCH_INDEXES:
+        if connection.dialect.name == "sqlite":
+            statements = sqlite_search_ddl(base, columns)
+        elif connection.dialect.name == "postgresql":
+            statements = postgresql_search_ddl(base, columns)
+        else:
+            statements = []
+        for statement in statements:
+            op.execute(statement)
+
+
+def downgrade():
+    connection = op.get_bind()
+    for base, _ in SEARCH_INDEXES:
+        if connection.dialect.name == "sqlite":
+            op.execute(f"DROP TABLE IF EXISTS {base}_fts")
+            for suffix in ("ai", "ad", "au"):
+                op.execute(f"DROP TRIGGER IF EXISTS {base}_fts_{suffix}")
+        elif connection.dialect.name == "postgresql":
+            op.drop_index(f"ix_{base}_search_tsv", table_name=base, if_exists=True)
+            op.drop_index(f"ix_{base}_search_trgm", table_name=base, if_exists=True)
+    op.drop_index("ix_invoices_status_issue_date_total", table_name="invoices", if_exists=True)
@@ -0,0 +1,43 @@
+"""Composite indexes for the list endpoints' filter + keyset order
+
+Each index leads with the endpoint's equality filter and continues with its
+sort keys, so a filtered page is a range read with no sort. On Postgres they
+are built CONCURRENTLY to keep the tables writable.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_invoices_status_created_at", "invoices", ["status", "created_at", "id"]),
+    ("ix_sales_orders_status_created_at", "sales_orders", ["status", "created_at", "id"]),
+    ("ix_stock_movements_product_created_at", "stock_movements", ["product_id", "created_at", "id"]),
+    ("ix_attendance_employee_date", "attendance", ["employee_id", "date", "id"]),
+    ("ix_leave_requests_status_created_at", "leave_requests", ["status", "created_at", "id"]),
+    ("ix_products_category_active", "products", ["category_id", "is_active", "id"]),
+    ("ix_deals_stage_amount", "deals", ["stage", "amount"]),
+    ("ix_leads_status", "leads", ["status", "id"]),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
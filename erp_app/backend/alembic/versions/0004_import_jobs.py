@@ -0,0 +1,45 @@
+"""Import jobs
+
+Background CSV/XLSX imports record their progress and row errors here.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "import_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("resource", sa.String(50), nullable=False),
+        sa.Column("filename", sa.String(255), nullable=False),
+        sa.Column("status", sa.Enum("PENDING", "RUNNING", "COMPLETED", "FAILED", name="importstatus")),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("processed_rows", sa.Integer()),
+        sa.Column("inserted_rows", sa.Integer()),
+        sa.Column("failed_rows", sa.Integer()),
+        sa.Column("errors", sa.Text()),
+        sa.Column("message", sa.Text()),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index("ix_import_jobs_id", "import_jobs", ["id"], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index("ix_import_jobs_id", table_name="import_jobs", if_exists=True)
+    op.drop_table("import_jobs")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP TYPE IF EXISTS importstatus")
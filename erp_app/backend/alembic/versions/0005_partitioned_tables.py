@@ -0,0 +1,193 @@
+"""Monthly partitions for high-growth tables
+
+Rebuilds stock_movements, audit_logs, attendance and notifications as
+range-partitioned tables on Postgres, copying their rows and keeping their
+ids. The copy locks each table while it runs, so upgrade large
+databases in a maintenance window. Other databases are left as they are.
+
+The partitioned tables are defined here as they were at this revision,
+with their primary keys extended by the partition key.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from datetime import date
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Months created ahead of today; the partition maintenance job keeps going from there
+PREMAKE_MONTHS = 3
+
+
+def create_stock_movements():
+    op.create_table(
+        "stock_movements",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=True),
+        sa.Column("warehouse_id", sa.Integer(), nullable=True),
+        sa.Column("movement_type", postgresql.ENUM(name="stockmovementtype", create_type=False), nullable=True),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column("reference_number", sa.String(length=50), nullable=True),
+        sa.Column("reason", sa.String(length=200), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("quantity_before", sa.Integer(), nullable=True),
+        sa.Column("quantity_after", sa.Integer(), nullable=True),
+        sa.Column("created_by", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["product_id"], ["products.id"]),
+        sa.ForeignKeyConstraint(["warehouse_id"], ["warehouses.id"]),
+        sa.ForeignKeyConstraint(["created_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index("ix_stock_movements_id", "stock_movements", ["id"])
+    op.create_index("ix_stock_movements_product_created_at", "stock_movements", ["product_id", "created_at", "id"])
+
+
+def create_audit_logs():
+    op.create_table(
+        "audit_logs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("action", sa.String(length=50), nullable=False),
+        sa.Column("table_name", sa.String(length=50), nullable=True),
+        sa.Column("record_id", sa.String(length=50), nullable=True),
+        sa.Column("old_values", sa.Text(), nullable=True),
+        sa.Column("new_values", sa.Text(), nullable=True),
+        sa.Column("ip_address", sa.String(length=45), nullable=True),
+        sa.Column("user_agent", sa.String(length=500), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id", "timestamp"),
+        postgresql_partition_by="RANGE (timestamp)",
+    )
+    op.create_index("ix_audit_logs_id", "audit_logs", ["id"])
+
+
+def create_attendance():
+    op.create_table(
+        "attendance",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("check_in", sa.DateTime(), nullable=True),
+        sa.Column("check_out", sa.DateTime(), nullable=True),
+        sa.Column("break_duration", sa.Integer(), nullable=True),
+        sa.Column("total_hours", sa.Numeric(precision=4, scale=2), nullable=True),
+        sa.Column("overtime_hours", sa.Numeric(precision=4, scale=2), nullable=True),
+        sa.Column("status", postgresql.ENUM(name="attendancestatus", create_type=False), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("check_in_location", sa.String(length=200), nullable=True),
+        sa.Column("check_out_location", sa.String(length=200), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["employee_id"], ["employees.id"]),
+        sa.PrimaryKeyConstraint("id", "date"),
+        postgresql_partition_by="RANGE (date)",
+    )
+    op.create_index("ix_attendance_id", "attendance", ["id"])
+    op.create_index("ix_attendance_employee_date", "attendance", ["employee_id", "date", "id"])
+
+
+def create_notifications():
+    op.create_table(
+        "notifications",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(length=200), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("type", sa.String(length=50), nullable=True),
+        sa.Column("is_read", sa.Boolean(), nullable=True),
+        sa.Column("is_deleted", sa.Boolean(), nullable=True),
+        sa.Column("related_table", sa.String(length=50), nullable=True),
+        sa.Column("related_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("read_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    op.create_index("ix_notifications_id", "notifications", ["id"])
+
+
+# table -> (partition key, creates the partitioned table and its indexes)
+PARTITIONED_TABLES = {
+    "stock_movements": ("created_at", create_stock_movements),
+    "audit_logs": ("timestamp", create_audit_logs),
+    "attendance": ("date", create_attendance),
+    "notifications": ("created_at", create_notifications),
+}
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def convert(connection, base, key, create):
+    """Rebuild a plain table as a partitioned one, keeping its rows and ids"""
+    kind = connection.scalar(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": base})
+    if kind != "r":
+        # Missing, or already partitioned
+        return
+    old = f"{base}_unpartitioned"
+    columns = ", ".join(column["name"] for column in sa.inspect(connection).get_columns(base))
+
+    # Move the old table, its indexes and its id sequence out of the way of the new names
+    indexes = connection.scalars(
+        sa.text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :name"),
+        {"name": base},
+    ).all()
+    sequence = connection.scalar(sa.text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": base})
+    op.execute(f"ALTER TABLE {base} RENAME TO {old}")
+    for index in indexes:
+        op.execute(f'ALTER INDEX "{index}" RENAME TO "{index[:48]}_unpartitioned"')
+    if sequence:
+        op.execute(f"ALTER SEQUENCE {sequence} RENAME TO {base}_id_seq_unpartitioned")
+
+    create()
+    op.execute(f"CREATE TABLE {base}_default PARTITION OF {base} DEFAULT")
+    oldest, newest = connection.execute(sa.text(f"SELECT MIN({key}), MAX({key}) FROM {old}")).one()
+    today = month_start(date.today())
+    month = min(month_start(oldest), today) if oldest is not None else today
+    last = add_months(max(month_start(newest), today) if newest is not None else today, PREMAKE_MONTHS)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {base}_p{month:%Y%m} PARTITION OF {base} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        month = add_months(month, 1)
+
+    op.execute(f"INSERT INTO {base} ({columns}) SELECT {columns} FROM {old}")
+    op.execute(f"SELECT setval(pg_get_serial_sequence('{base}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {base}")
+    op.execute(f"DROP TABLE {old}")
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name != "postgresql":
+        return
+    if context.is_offline_mode():
+        # The rebuild reads the existing rows, indexes and sequences
+        op.execute("-- 0005: partitioning needs a database connection; run this revision online")
+        return
+    for base, (key, create) in PARTITIONED_TABLES.items():
+        convert(connection, base, key, create)
+
+
+def downgrade():
+    # The partitioned tables answer the same queries as the plain ones; merging them back
+    # would be another full copy, so they are kept
+    pass
@@ -0,0 +1,46 @@
+"""One warehouse stock row per product and warehouse
+
+The stock ledger upserts warehouse_stocks on (warehouse_id, product_id).
+Duplicate rows are merged into the oldest one before the unique index is
+built.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    duplicated = (
+        "SELECT MIN(id) FROM warehouse_stocks GROUP BY warehouse_id, product_id HAVING COUNT(*) > 1"
+    )
+    same_key = (
+        "FROM warehouse_stocks d WHERE d.warehouse_id = warehouse_stocks.warehouse_id "
+        "AND d.product_id = warehouse_stocks.product_id"
+    )
+    op.execute(
+        f"UPDATE warehouse_stocks SET "
+        f"quantity = (SELECT SUM(d.quantity) {same_key}), "
+        f"reserved_quantity = (SELECT SUM(d.reserved_quantity) {same_key}), "
+        f"available_quantity = (SELECT SUM(d.available_quantity) {same_key}) "
+        f"WHERE id IN ({duplicated})"
+    )
+    op.execute(
+        "DELETE FROM warehouse_stocks WHERE id NOT IN "
+        "(SELECT MIN(id) FROM warehouse_stocks GROUP BY warehouse_id, product_id)"
+    )
+    op.create_index(
+        "ix_warehouse_stocks_warehouse_product", "warehouse_stocks",
+        ["warehouse_id", "product_id"], unique=True, if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_warehouse_stocks_warehouse_product", table_name="warehouse_stocks", if_exists=True)
@@ -0,0 +1,38 @@
+"""Partial index of low-stock products
+
+Holds only tracked products at or below their reorder level, which is what
+the dashboard's low-stock count reads. Built CONCURRENTLY on Postgres.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Written the way each dialect compiles the model's predicate, so the query planner matches it
+LOW_STOCK = {
+    "postgresql": sa.text("track_inventory = true AND current_stock <= reorder_level"),
+    "sqlite": sa.text("track_inventory = 1 AND current_stock <= reorder_level"),
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_products_low_stock", "products", ["id"], if_not_exists=True,
+                postgresql_where=LOW_STOCK["postgresql"], postgresql_concurrently=True,
+            )
+    else:
+        op.create_index("ix_products_low_stock", "products", ["id"], if_not_exists=True, sqlite_where=LOW_STOCK["sqlite"])
+
+
+def downgrade():
+    op.drop_index("ix_products_low_stock", table_name="products", if_exists=True)
@@ -0,0 +1,34 @@
+"""Import job owner and heartbeat
+
+Each import job records the process running it and a heartbeat it
+refreshes, so workers only fail the jobs whose process is gone.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created at startup already have the columns
+    existing = set() if context.is_offline_mode() else {
+        column["name"] for column in sa.inspect(op.get_bind()).get_columns("import_jobs")
+    }
+    if "worker_id" not in existing:
+        op.add_column("import_jobs", sa.Column("worker_id", sa.String(100), nullable=True))
+    if "heartbeat_at" not in existing:
+        op.add_column("import_jobs", sa.Column("heartbeat_at", sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("import_jobs") as batch:
+        batch.drop_column("heartbeat_at")
+        batch.drop_column("worker_id")
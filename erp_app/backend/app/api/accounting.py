@@ -1,57 +1,56 @@
 """
 Accounting API Routes
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, Body, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 
-from ..core.database import get_db
-from ..core.models import User
+from ..core.bulk import bulk_create, BULK_SPECS
+from ..core.database import get_async_db
+from ..core.export import export_response, ExportFormat
+from ..core.fields import select_fields
+from ..core.pagination import paginate, TotalMode
+from ..core.responses import FastJSONResponse
 from ..modules.accounting.models import Invoice, Customer, Payment, Expense
-from .auth import get_current_user
+from .auth import get_current_user, CurrentUser
 
 router = APIRouter()
 
+INVOICE_LIST_COLUMNS = (
+    Invoice.id, Invoice.invoice_number, Invoice.customer_id, Invoice.issue_date, Invoice.due_date,
+    Invoice.total_amount, Invoice.paid_amount, Invoice.balance_due, Invoice.status,
+)
+
 @router.get("/invoices")
 async def get_invoices(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     status: Optional[str] = None
 ):
     """Get all invoices"""
-    query = db.query(Invoice)
+    query = select(*select_fields(INVOICE_LIST_COLUMNS, fields))
     
     if status:
-        query = query.filter(Invoice.status == status)
+        query = query.where(Invoice.status == status)
     
-    invoices = query.order_by(Invoice.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
+    page = await paginate(
+        db, query, (Invoice.created_at, Invoice.id),
+        skip=skip, limit=limit, cursor=cursor, total=total
+    )
     
-    return {
-        "invoices": [
-            {
-                "id": invoice.id,
-                "invoice_number": invoice.invoice_number,
-                "customer_id": invoice.customer_id,
-                "issue_date": invoice.issue_date,
-                "due_date": invoice.due_date,
-                "total_amount": float(invoice.total_amount),
-                "paid_amount": float(invoice.paid_amount),
-                "balance_due": float(invoice.balance_due),
-                "status": invoice.status
-            }
-            for invoice in invoices
-        ],
-        "total": total
-    }
+    return FastJSONResponse({"invoices": page.items, **page.meta()})
 
 @router.post("/invoices")
 async def create_invoice(
     invoice_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new invoice"""
     new_invoice = Invoice(
@@ -68,43 +67,49 @@ async def create_invoice(
     )
     
     db.add(new_invoice)
-    db.commit()
-    db.refresh(new_invoice)
+    await db.commit()
+    await db.refresh(new_invoice)
     
     return {"message": "Invoice created successfully", "invoice_id": new_invoice.id}
 
+@router.post("/invoices/bulk")
+async def create_invoices_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_MAX_ITEMS invoices in one transaction, with a result per item"""
+    return await bulk_create(db, BULK_SPECS["invoices"], items, current_user.id)
+
+CUSTOMER_LIST_COLUMNS = (
+    Customer.id, Customer.customer_number, Customer.name, Customer.email, Customer.phone,
+    func.coalesce(Customer.credit_limit, 0).label("credit_limit"), Customer.created_at,
+)
+
 @router.get("/customers")
 async def get_customers(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     """Get all customers"""
-    customers = db.query(Customer).filter(Customer.is_active == True).offset(skip).limit(limit).all()
-    total = db.query(Customer).filter(Customer.is_active == True).count()
+    query = select(*select_fields(CUSTOMER_LIST_COLUMNS, fields)).where(Customer.is_active == True)
+    page = await paginate(
+        db, query, (Customer.id,),
+        skip=skip, limit=limit, cursor=cursor, total=total, descending=False
+    )
     
-    return {
-        "customers": [
-            {
-                "id": customer.id,
-                "customer_number": customer.customer_number,
-                "name": customer.name,
-                "email": customer.email,
-                "phone": customer.phone,
-                "credit_limit": float(customer.credit_limit) if customer.credit_limit else 0,
-                "created_at": customer.created_at
-            }
-            for customer in customers
-        ],
-        "total": total
-    }
+    return FastJSONResponse({"customers": page.items, **page.meta()})
 
 @router.post("/customers")
 async def create_customer(
     customer_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new customer"""
     new_customer = Customer(
@@ -119,58 +124,115 @@ async def create_customer(
     )
     
     db.add(new_customer)
-    db.commit()
-    db.refresh(new_customer)
+    await db.commit()
+    await db.refresh(new_customer)
     
     return {"message": "Customer created successfully", "customer_id": new_customer.id}
 
+PAYMENT_LIST_COLUMNS = (
+    Payment.id, Payment.payment_number, Payment.invoice_id, Payment.amount, Payment.payment_date,
+    Payment.payment_method, Payment.status,
+)
+
 @router.get("/payments")
 async def get_payments(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     """Get all payments"""
-    payments = db.query(Payment).order_by(Payment.created_at.desc()).offset(skip).limit(limit).all()
+    query = select(*select_fields(PAYMENT_LIST_COLUMNS, fields))
+    page = await paginate(
+        db, query, (Payment.created_at, Payment.id),
+        skip=skip, limit=limit, cursor=cursor, total=total, count=False
+    )
     
-    return {
-        "payments": [
-            {
-                "id": payment.id,
-                "payment_number": payment.payment_number,
-                "invoice_id": payment.invoice_id,
-                "amount": float(payment.amount),
-                "payment_date": payment.payment_date,
-                "payment_method": payment.payment_method,
-                "status": payment.status
-            }
-            for payment in payments
-        ]
-    }
+    return FastJSONResponse({"payments": page.items, **page.meta()})
+
+EXPENSE_LIST_COLUMNS = (
+    Expense.id, Expense.expense_number, Expense.date, Expense.vendor, Expense.category,
+    Expense.description, Expense.amount, Expense.is_approved,
+)
 
 @router.get("/expenses")
 async def get_expenses(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     """Get all expenses"""
-    expenses = db.query(Expense).order_by(Expense.created_at.desc()).offset(skip).limit(limit).all()
+    query = select(*select_fields(EXPENSE_LIST_COLUMNS, fields))
+    page = await paginate(
+        db, query, (Expense.created_at, Expense.id),
+        skip=skip, limit=limit, cursor=cursor, total=total, count=False
+    )
+    
+    return FastJSONResponse({"expenses": page.items, **page.meta()})
+
+@router.get("/invoices/export")
+async def export_invoices(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[str] = None
+):
+    """Export invoices as CSV or XLSX"""
+    query = select(
+        Invoice.id, Invoice.invoice_number, Invoice.customer_id, Invoice.issue_date, Invoice.due_date,
+        Invoice.total_amount, Invoice.paid_amount, Invoice.balance_due, Invoice.status
+    ).order_by(Invoice.created_at.desc(), Invoice.id.desc())
+    
+    if status:
+        query = query.where(Invoice.status == status)
+    
+    return export_response(db, query, "invoices", format)
+
+@router.get("/customers/export")
+async def export_customers(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export customers as CSV or XLSX"""
+    query = select(
+        Customer.id, Customer.customer_number, Customer.name, Customer.email, Customer.phone,
+        Customer.credit_limit, Customer.created_at
+    ).where(Customer.is_active == True).order_by(Customer.id)
+    
+    return export_response(db, query, "customers", format)
+
+@router.get("/payments/export")
+async def export_payments(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export payments as CSV or XLSX"""
+    query = select(
+        Payment.id, Payment.payment_number, Payment.invoice_id, Payment.amount, Payment.payment_date,
+        Payment.payment_method, Payment.status
+    ).order_by(Payment.created_at.desc(), Payment.id.desc())
+    
+    return export_response(db, query, "payments", format)
+
+@router.get("/expenses/export")
+async def export_expenses(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export expenses as CSV or XLSX"""
+    query = select(
+        Expense.id, Expense.expense_number, Expense.date, Expense.vendor, Expense.category,
+        Expense.description, Expense.amount, Expense.is_approved
+    ).order_by(Expense.created_at.desc(), Expense.id.desc())
     
-    return {
-        "expenses": [
-            {
-                "id": expense.id,
-                "expense_number": expense.expense_number,
-                "date": expense.date,
-                "vendor": expense.vendor,
-                "category": expense.category,
-                "description": expense.description,
-                "amount": float(expense.amount),
-                "is_approved": expense.is_approved
-            }
-            for expense in expenses
-        ]
-    }
+    return export_response(db, query, "expenses", format)
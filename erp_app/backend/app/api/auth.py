@@ -1,20 +1,75 @@
 """
 Authentication API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import select, event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from typing import Optional
 
-from ..core.database import get_db
-from ..core.security import verify_password, create_access_token, verify_token, get_password_hash
+from ..core.audit import set_audit_actor
+from ..core.shared_cache import Cache
+from ..core.database import get_async_db
+from ..core.security import verify_password_async, create_access_token, verify_token, get_password_hash_async
 from ..core.models import User
 from ..core.config import settings
 
 router = APIRouter()
 security = HTTPBearer()
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Detached snapshot of the authenticated user, safe to share between requests"""
+    id: int
+    username: str
+    email: str
+    full_name: str
+    role: str
+    is_active: bool
+    last_login: Optional[datetime]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            # The plain value: the shared cache pickles snapshots, and models.UserRole names two classes
+            role=user.role.value if user.role is not None else None,
+            is_active=user.is_active,
+            last_login=user.last_login,
+            created_at=user.created_at,
+        )
+
+# Resolved principals keyed by token subject (username)
+user_cache = Cache("auth_user", ttl=settings.AUTH_USER_CACHE_TTL_SECONDS, maxsize=settings.AUTH_USER_CACHE_SIZE)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    """Drop cached principals on any user change (deactivation, role, password...)"""
+    usernames = {target.username, *(inspect(target).attrs.username.history.deleted or ())}
+    user_cache.delete_nowait(*usernames)
+    # Evict again on commit so a concurrent miss cannot re-cache the pre-commit row
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_usernames", set()).update(usernames)
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_users(session):
+    usernames = session.info.pop("stale_usernames", None)
+    if usernames:
+        user_cache.delete_nowait(*usernames)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_users(session):
+    session.info.pop("stale_usernames", None)
+
 class UserCreate:
     def __init__(self, username: str, email: str, full_name: str, password: str, role: str = "employee"):
         self.username = username
@@ -33,21 +88,24 @@ class Token:
         self.access_token = access_token
         self.token_type = token_type
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate user with username/email and password"""
-    user = db.query(User).filter(
-        (User.username == username) | (User.email == username)
-    ).first()
+    user = await db.scalar(
+        select(User).where((User.username == username) | (User.email == username)).limit(1)
+    )
+    # Hand the connection back to the pool while bcrypt runs
+    await db.commit()
     
-    if not user or not verify_password(password, user.hashed_password):
+    if not user or not await verify_password_async(password, user.hashed_password):
         return None
     
     return user
 
-def get_current_user(
+async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
     """Get current authenticated user"""
     token = credentials.credentials
     payload = verify_token(token)
@@ -59,23 +117,37 @@ def get_current_user(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    async def load_user() -> CurrentUser:
+        user = await db.scalar(select(User).where(User.username == username).limit(1))
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        return CurrentUser.from_user(user)
+    
+    current_user = await user_cache.get_or_set(username, load_user)
+    
+    if not current_user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            detail="Account is deactivated"
         )
     
-    return user
+    # Changes this request flushes are audited as this user's
+    set_audit_actor(current_user.id, request)
+    return current_user
 
 @router.post("/register")
-async def register(user_data: dict, db: Session = Depends(get_db)):
+async def register(user_data: dict, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = db.query(User).filter(
-        (User.username == user_data["username"]) | 
-        (User.email == user_data["email"])
-    ).first()
+    existing_user = await db.scalar(
+        select(User).where(
+            (User.username == user_data["username"]) |
+            (User.email == user_data["email"])
+        ).limit(1)
+    )
     
     if existing_user:
         raise HTTPException(
@@ -83,8 +155,9 @@ async def register(user_data: dict, db: Session = Depends(get_db)):
             detail="Username or email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data["password"])
+    # Create new user (connection goes back to the pool while bcrypt runs)
+    await db.commit()
+    hashed_password = await get_password_hash_async(user_data["password"])
     new_user = User(
         username=user_data["username"],
         email=user_data["email"],
@@ -94,15 +167,15 @@ async def register(user_data: dict, db: Session = Depends(get_db)):
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     return {"message": "User created successfully", "user_id": new_user.id}
 
 @router.post("/login")
-async def login(login_data: dict, db: Session = Depends(get_db)):
+async def login(login_data: dict, db: AsyncSession = Depends(get_async_db)):
     """Login user and return access token"""
-    user = authenticate_user(db, login_data["username"], login_data["password"])
+    user = await authenticate_user(db, login_data["username"], login_data["password"])
     
     if not user:
         raise HTTPException(
@@ -127,7 +200,7 @@ async def login(login_data: dict, db: Session = Depends(get_db)):
     from sqlalchemy.sql import func
     user.last_login = func.now()
     user.failed_login_attempts = 0
-    db.commit()
+    await db.commit()
     
     return {
         "access_token": access_token,
@@ -142,7 +215,7 @@ async def login(login_data: dict, db: Session = Depends(get_db)):
     }
 
 @router.get("/me")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: CurrentUser = Depends(get_current_user)):
     """Get current user information"""
     return {
         "id": current_user.id,
@@ -158,7 +231,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
 @router.post("/refresh")
 async def refresh_token(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Refresh access token"""
     token = credentials.credentials
@@ -171,7 +244,7 @@ async def refresh_token(
             detail="Could not validate credentials"
         )
     
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username).limit(1))
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -191,6 +264,6 @@ async def refresh_token(
     }
 
 @router.post("/logout")
-async def logout(current_user: User = Depends(get_current_user)):
+async def logout(current_user: CurrentUser = Depends(get_current_user)):
     """Logout user (client should remove token)"""
     return {"message": "Successfully logged out"}
@@ -1,18 +1,24 @@
 """
 CRM API Routes
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr
 import logging
 
-from ..core.database import get_db
-from ..core.models import User
+from ..core.bulk import bulk_create, BULK_SPECS
+from ..core.database import get_async_db
+from ..core.export import export_response, ExportFormat
+from ..core.fields import select_fields
+from ..core.pagination import paginate, TotalMode
+from ..core.responses import FastJSONResponse
 from ..modules.crm.models import Lead, Contact, Deal, Activity
-from .auth import get_current_user
+from ..modules.crm.search import lead_search, contact_search
+from .auth import get_current_user, CurrentUser
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -64,62 +70,52 @@ class ActivityCreate(BaseModel):
     contact_id: Optional[int] = None
     deal_id: Optional[int] = None
 
+LEAD_LIST_COLUMNS = (
+    Lead.id, Lead.first_name, Lead.last_name, Lead.email, Lead.phone, Lead.company,
+    Lead.status, Lead.source, Lead.notes, Lead.created_at, Lead.updated_at,
+)
+
 @router.get("/leads", status_code=status.HTTP_200_OK)
 async def get_leads(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     status_filter: Optional[str] = Query(None, alias="status"),
     company: Optional[str] = None,
     search: Optional[str] = None
 ):
     """Get all leads with optional filtering and search"""
     try:
-        query = db.query(Lead)
+        query = select(*select_fields(LEAD_LIST_COLUMNS, fields))
         
         # Apply filters
         if status_filter:
-            query = query.filter(Lead.status == status_filter)
+            query = query.where(Lead.status == status_filter)
         
         if company:
-            query = query.filter(Lead.company.ilike(f"%{company}%"))
+            query = query.where(Lead.company.ilike(f"%{company}%"))
         
+        # Search results come best match first, ties broken by id
+        keys = (Lead.id,)
         if search:
-            search_filter = f"%{search}%"
-            query = query.filter(
-                (Lead.first_name.ilike(search_filter)) |
-                (Lead.last_name.ilike(search_filter)) |
-                (Lead.email.ilike(search_filter)) |
-                (Lead.company.ilike(search_filter))
-            )
+            query, rank = lead_search.apply(query, search, db.bind.dialect.name)
+            if rank is not None:
+                keys = (rank, Lead.id)
         
-        total = query.count()
-        leads = query.offset(skip).limit(limit).all()
+        page = await paginate(
+            db, query, keys,
+            skip=skip, limit=limit, cursor=cursor, total=total, descending=False
+        )
         
-        logger.info(f"Retrieved {len(leads)} leads for user {current_user.username}")
+        logger.info(f"Retrieved {len(page.items)} leads for user {current_user.username}")
         
-        return {
-            "leads": [
-                {
-                    "id": lead.id,
-                    "first_name": lead.first_name,
-                    "last_name": lead.last_name,
-                    "email": lead.email,
-                    "phone": lead.phone,
-                    "company": lead.company,
-                    "status": lead.status,
-                    "source": lead.source,
-                    "notes": lead.notes,
-                    "created_at": lead.created_at,
-                    "updated_at": lead.updated_at
-                }
-                for lead in leads
-            ],
-            "total": total,
-            "skip": skip,
-            "limit": limit
-        }
+        return FastJSONResponse({"leads": page.items, **page.meta()})
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving leads: {str(e)}")
         raise HTTPException(
@@ -130,13 +126,13 @@ async def get_leads(
 @router.post("/leads", status_code=status.HTTP_201_CREATED)
 async def create_lead(
     lead_data: LeadCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new lead"""
     try:
         # Check if lead with same email already exists
-        existing_lead = db.query(Lead).filter(Lead.email == lead_data.email).first()
+        existing_lead = await db.scalar(select(Lead).where(Lead.email == lead_data.email).limit(1))
         if existing_lead:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -152,12 +148,12 @@ async def create_lead(
             status=lead_data.status,
             source=lead_data.source,
             notes=lead_data.notes,
-            created_by=current_user.id
+            assigned_to=current_user.id
         )
         
         db.add(new_lead)
-        db.commit()
-        db.refresh(new_lead)
+        await db.commit()
+        await db.refresh(new_lead)
         
         logger.info(f"Created new lead {new_lead.id} by user {current_user.username}")
         
@@ -176,14 +172,14 @@ async def create_lead(
     except HTTPException:
         raise
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Database integrity error creating lead: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Data integrity error"
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating lead: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -193,8 +189,8 @@ async def create_lead(
 @router.post("/leads")
 async def create_lead(
     lead_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new lead"""
     new_lead = Lead(
@@ -210,44 +206,55 @@ async def create_lead(
     )
     
     db.add(new_lead)
-    db.commit()
-    db.refresh(new_lead)
+    await db.commit()
+    await db.refresh(new_lead)
     
     return {"message": "Lead created successfully", "lead_id": new_lead.id}
 
+@router.post("/leads/bulk")
+async def create_leads_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_MAX_ITEMS leads in one transaction, with a result per item"""
+    return await bulk_create(db, BULK_SPECS["leads"], items, current_user.id)
+
+CONTACT_LIST_COLUMNS = (
+    Contact.id, Contact.type, Contact.first_name, Contact.last_name, Contact.company_name,
+    Contact.email, Contact.phone, Contact.created_at,
+)
+
 @router.get("/contacts")
 async def get_contacts(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
+    search: Optional[str] = None
 ):
-    """Get all contacts"""
-    contacts = db.query(Contact).filter(Contact.is_active == True).offset(skip).limit(limit).all()
-    total = db.query(Contact).filter(Contact.is_active == True).count()
+    """Get all contacts with optional search"""
+    query = select(*select_fields(CONTACT_LIST_COLUMNS, fields)).where(Contact.is_active == True)
+    keys = (Contact.id,)
+    if search:
+        query, rank = contact_search.apply(query, search, db.bind.dialect.name)
+        if rank is not None:
+            keys = (rank, Contact.id)
+    page = await paginate(
+        db, query, keys,
+        skip=skip, limit=limit, cursor=cursor, total=total, descending=False
+    )
     
-    return {
-        "contacts": [
-            {
-                "id": contact.id,
-                "type": contact.type,
-                "first_name": contact.first_name,
-                "last_name": contact.last_name,
-                "company_name": contact.company_name,
-                "email": contact.email,
-                "phone": contact.phone,
-                "created_at": contact.created_at
-            }
-            for contact in contacts
-        ],
-        "total": total
-    }
+    return FastJSONResponse({"contacts": page.items, **page.meta()})
 
 @router.post("/contacts")
 async def create_contact(
     contact_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new contact"""
     new_contact = Contact(
@@ -263,43 +270,40 @@ async def create_contact(
     )
     
     db.add(new_contact)
-    db.commit()
-    db.refresh(new_contact)
+    await db.commit()
+    await db.refresh(new_contact)
     
     return {"message": "Contact created successfully", "contact_id": new_contact.id}
 
+DEAL_LIST_COLUMNS = (
+    Deal.id, Deal.name, func.coalesce(Deal.amount, 0).label("amount"), Deal.stage,
+    Deal.probability, Deal.expected_close_date, Deal.created_at,
+)
+
 @router.get("/deals")
 async def get_deals(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     """Get all deals"""
-    deals = db.query(Deal).offset(skip).limit(limit).all()
-    total = db.query(Deal).count()
+    query = select(*select_fields(DEAL_LIST_COLUMNS, fields))
+    page = await paginate(
+        db, query, (Deal.id,),
+        skip=skip, limit=limit, cursor=cursor, total=total, descending=False
+    )
     
-    return {
-        "deals": [
-            {
-                "id": deal.id,
-                "name": deal.name,
-                "amount": float(deal.amount) if deal.amount else 0,
-                "stage": deal.stage,
-                "probability": deal.probability,
-                "expected_close_date": deal.expected_close_date,
-                "created_at": deal.created_at
-            }
-            for deal in deals
-        ],
-        "total": total
-    }
+    return FastJSONResponse({"deals": page.items, **page.meta()})
 
 @router.post("/deals")
 async def create_deal(
     deal_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new deal"""
     new_deal = Deal(
@@ -315,7 +319,71 @@ async def create_deal(
     )
     
     db.add(new_deal)
-    db.commit()
-    db.refresh(new_deal)
+    await db.commit()
+    await db.refresh(new_deal)
     
     return {"message": "Deal created successfully", "deal_id": new_deal.id}
+
+@router.get("/leads/export")
+async def export_leads(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    company: Optional[str] = None,
+    search: Optional[str] = None
+):
+    """Export leads as CSV or XLSX, with the same filters and search as the list"""
+    query = select(
+        Lead.id, Lead.first_name, Lead.last_name, Lead.email, Lead.phone, Lead.company,
+        Lead.job_title, Lead.status, Lead.source, Lead.created_at
+    )
+    
+    if status_filter:
+        query = query.where(Lead.status == status_filter)
+    
+    if company:
+        query = query.where(Lead.company.ilike(f"%{company}%"))
+    
+    keys = (Lead.id,)
+    if search:
+        query, rank = lead_search.apply(query, search, db.bind.dialect.name)
+        if rank is not None:
+            keys = (rank, Lead.id)
+    
+    return export_response(db, query.order_by(*keys), "leads", format)
+
+@router.get("/contacts/export")
+async def export_contacts(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    search: Optional[str] = None
+):
+    """Export contacts as CSV or XLSX, with the same search as the list"""
+    query = select(
+        Contact.id, Contact.type, Contact.first_name, Contact.last_name, Contact.company_name,
+        Contact.email, Contact.phone, Contact.created_at
+    ).where(Contact.is_active == True)
+    
+    keys = (Contact.id,)
+    if search:
+        query, rank = contact_search.apply(query, search, db.bind.dialect.name)
+        if rank is not None:
+            keys = (rank, Contact.id)
+    
+    return export_response(db, query.order_by(*keys), "contacts", format)
+
+@router.get("/deals/export")
+async def export_deals(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export deals as CSV or XLSX"""
+    query = select(
+        Deal.id, Deal.name, Deal.amount, Deal.stage, Deal.probability, Deal.expected_close_date,
+        Deal.created_at
+    ).order_by(Deal.id)
+    
+    return export_response(db, query, "deals", format)
@@ -2,114 +2,117 @@
 Dashboard API Routes
 """
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import datetime, timedelta
+from sqlalchemy import select, func, and_, case, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from datetime import date, datetime
 from typing import Dict, Any
 
-from ..core.database import get_db
-from ..core.models import User
+from ..core.config import settings
+from ..core.database import get_async_db
+from ..core.models import DailyRollup
+from ..core.response_cache import cached_response, CachedResponse
+from ..core.shared_cache import Cache, table_tags
+from ..core.sql import month_bucket, month_label
+from ..core import rollups  # noqa: F401 - registers the rollup flush listener
 from ..modules.crm.models import Lead, Contact, Deal
-from ..modules.inventory.models import Product
+from ..modules.inventory.models import LOW_STOCK, Product
 from ..modules.accounting.models import Invoice, Customer
 from ..modules.hr.models import Employee
 from ..modules.sales.models import SalesOrder
-from .auth import get_current_user
+from .auth import get_current_user, CurrentUser
 
 router = APIRouter()
 
-@router.get("/stats")
-async def get_dashboard_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-) -> Dict[str, Any]:
-    """Get dashboard statistics"""
-    
-    # Date ranges
-    today = datetime.now().date()
-    this_month_start = today.replace(day=1)
-    last_month_start = (this_month_start - timedelta(days=1)).replace(day=1)
-    
-    # CRM Stats
-    total_leads = db.query(Lead).count()
-    new_leads_this_month = db.query(Lead).filter(
-        func.date(Lead.created_at) >= this_month_start
-    ).count()
-    
-    total_contacts = db.query(Contact).count()
-    total_deals = db.query(Deal).count()
-    
-    # Calculate total deal value
-    total_deal_value = db.query(func.sum(Deal.amount)).scalar() or 0
-    
-    # Inventory Stats
-    total_products = db.query(Product).filter(Product.is_active == True).count()
-    low_stock_products = db.query(Product).filter(
-        and_(Product.track_inventory == True, Product.current_stock <= Product.reorder_level)
-    ).count()
-    
-    # Accounting Stats
-    total_customers = db.query(Customer).filter(Customer.is_active == True).count()
-    total_invoices = db.query(Invoice).count()
-    
-    # Calculate revenue
-    total_revenue = db.query(func.sum(Invoice.total_amount)).filter(
-        Invoice.status == "paid"
-    ).scalar() or 0
-    
-    this_month_revenue = db.query(func.sum(Invoice.total_amount)).filter(
-        and_(
-            Invoice.status == "paid",
-            func.date(Invoice.issue_date) >= this_month_start
-        )
-    ).scalar() or 0
-    
-    # Outstanding amount
-    outstanding_amount = db.query(func.sum(Invoice.balance_due)).filter(
-        Invoice.status.in_(["sent", "overdue"])
-    ).scalar() or 0
-    
-    # HR Stats
-    total_employees = db.query(Employee).filter(Employee.status == "active").count()
-    
-    # Sales Stats
-    total_orders = db.query(SalesOrder).count()
-    this_month_orders = db.query(SalesOrder).filter(
-        func.date(SalesOrder.order_date) >= this_month_start
-    ).count()
-    
-    return {
+# Aggregates are shared by every user; any write to these tables invalidates them
+STATS_TABLES = (
+    Lead.__tablename__, Contact.__tablename__, Deal.__tablename__, Product.__tablename__,
+    Customer.__tablename__, Invoice.__tablename__, Employee.__tablename__, SalesOrder.__tablename__,
+)
+STATS_TAGS = table_tags(*STATS_TABLES)
+dashboard_cache = Cache("dashboard", ttl=settings.DASHBOARD_CACHE_TTL_SECONDS, maxsize=16)
+
+def _this_month() -> date:
+    return datetime.now().date().replace(day=1)
+
+def _count_where(condition):
+    return func.count(case((condition, 1)))
+
+def _sum_where(condition, column):
+    return func.coalesce(func.sum(case((condition, column))), 0)
+
+def rollup_stats_query(month_start: date):
+    """Per-metric totals and this-month totals from daily_rollups - O(days), not O(rows)"""
+    this_month = DailyRollup.day >= month_start
+    return select(
+        DailyRollup.metric,
+        func.sum(DailyRollup.count).label("count"),
+        func.sum(DailyRollup.amount).label("amount"),
+        _sum_where(this_month, DailyRollup.count).label("month_count"),
+        _sum_where(this_month, DailyRollup.amount).label("month_amount"),
+    ).group_by(DailyRollup.metric)
+
+def live_stats_query():
+    """Inventory and HR figures are current-state counts over small master tables"""
+    products = select(_count_where(Product.is_active == True).label("total_products")).subquery()
+    # Its own query, so it is answered from the ix_products_low_stock partial index
+    low_stock = select(func.count().label("low_stock_products")).where(LOW_STOCK).subquery()
+    employees = select(_count_where(Employee.status == "active").label("total_employees")).subquery()
+    return select(products, low_stock, employees).select_from(
+        products.join(low_stock, true()).join(employees, true())
+    )
+
+async def compute_dashboard_stats(db: AsyncSession, this_month_start: date) -> Dict[str, Any]:
+    empty = {"count": 0, "amount": 0, "month_count": 0, "month_amount": 0}
+    totals = defaultdict(lambda: empty)
+    for row in (await db.execute(rollup_stats_query(this_month_start))).mappings():
+        totals[row["metric"]] = row
+    live = (await db.execute(live_stats_query())).one()
+    
+    stats = {
         "crm": {
-            "total_leads": total_leads,
-            "new_leads_this_month": new_leads_this_month,
-            "total_contacts": total_contacts,
-            "total_deals": total_deals,
-            "total_deal_value": float(total_deal_value)
+            "total_leads": totals["leads"]["count"],
+            "new_leads_this_month": totals["leads"]["month_count"],
+            "total_contacts": totals["contacts"]["count"],
+            "total_deals": totals["deals"]["count"],
+            "total_deal_value": float(totals["deals"]["amount"])
         },
         "inventory": {
-            "total_products": total_products,
-            "low_stock_products": low_stock_products
+            "total_products": live.total_products,
+            "low_stock_products": live.low_stock_products
         },
         "accounting": {
-            "total_customers": total_customers,
-            "total_invoices": total_invoices,
-            "total_revenue": float(total_revenue),
-            "this_month_revenue": float(this_month_revenue),
-            "outstanding_amount": float(outstanding_amount)
+            "total_customers": totals["active_customers"]["count"],
+            "total_invoices": totals["invoices"]["count"],
+            "total_revenue": float(totals["paid_invoices"]["amount"]),
+            "this_month_revenue": float(totals["paid_invoices"]["month_amount"]),
+            "outstanding_amount": float(totals["outstanding_invoices"]["amount"])
         },
         "hr": {
-            "total_employees": total_employees
+            "total_employees": live.total_employees
         },
         "sales": {
-            "total_orders": total_orders,
-            "this_month_orders": this_month_orders
+            "total_orders": totals["orders"]["count"],
+            "this_month_orders": totals["orders"]["month_count"]
         }
     }
+    return stats
+
+@router.get("/stats")
+async def get_dashboard_stats(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> Dict[str, Any]:
+    """Get dashboard statistics"""
+    this_month_start = _this_month()
+    return await dashboard_cache.get_or_set(
+        ("stats", this_month_start), lambda: compute_dashboard_stats(db, this_month_start), tags=STATS_TAGS
+    )
 
 @router.get("/recent-activities")
 async def get_recent_activities(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = 10
 ):
     """Get recent activities across all modules"""
@@ -117,7 +120,7 @@ async def get_recent_activities(
     activities = []
     
     # Recent leads
-    recent_leads = db.query(Lead).order_by(Lead.created_at.desc()).limit(5).all()
+    recent_leads = (await db.scalars(select(Lead).order_by(Lead.created_at.desc()).limit(5))).all()
     for lead in recent_leads:
         activities.append({
             "type": "lead_created",
@@ -128,7 +131,7 @@ async def get_recent_activities(
         })
     
     # Recent orders
-    recent_orders = db.query(SalesOrder).order_by(SalesOrder.created_at.desc()).limit(5).all()
+    recent_orders = (await db.scalars(select(SalesOrder).order_by(SalesOrder.created_at.desc()).limit(5))).all()
     for order in recent_orders:
         activities.append({
             "type": "order_created",
@@ -139,7 +142,7 @@ async def get_recent_activities(
         })
     
     # Recent invoices
-    recent_invoices = db.query(Invoice).order_by(Invoice.created_at.desc()).limit(5).all()
+    recent_invoices = (await db.scalars(select(Invoice).order_by(Invoice.created_at.desc()).limit(5))).all()
     for invoice in recent_invoices:
         activities.append({
             "type": "invoice_created",
@@ -155,48 +158,55 @@ async def get_recent_activities(
 
 @router.get("/charts/revenue")
 async def get_revenue_chart_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cache: CachedResponse = Depends(cached_response(Invoice.__tablename__, vary=_this_month)),
     months: int = 12
 ):
     """Get revenue chart data for the last N months"""
+    if (cached := await cache.lookup()) is not None:
+        return cached
     
-    end_date = datetime.now().date()
-    start_date = end_date - timedelta(days=months * 30)
+    # Whole months: the current one plus the N-1 before it
+    today = datetime.now().date()
+    start_month = today.year * 12 + today.month - max(months, 1)
+    start_date = datetime(start_month // 12, start_month % 12 + 1, 1)
     
     # Query monthly revenue
-    monthly_revenue = db.query(
-        func.strftime('%Y-%m', Invoice.issue_date).label('month'),
+    month = month_bucket(Invoice.issue_date)
+    monthly_revenue = (await db.execute(select(
+        month.label('month'),
         func.sum(Invoice.total_amount).label('revenue')
-    ).filter(
+    ).where(
         and_(
             Invoice.status == "paid",
             Invoice.issue_date >= start_date
         )
-    ).group_by(
-        func.strftime('%Y-%m', Invoice.issue_date)
-    ).order_by('month').all()
+    ).group_by(month).order_by(month))).all()
     
-    return {
-        "labels": [row.month for row in monthly_revenue],
+    return await cache.store({
+        "labels": [month_label(row.month) for row in monthly_revenue],
         "data": [float(row.revenue) for row in monthly_revenue]
-    }
+    })
 
 @router.get("/charts/sales-pipeline")
 async def get_sales_pipeline_data(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cache: CachedResponse = Depends(cached_response(Deal.__tablename__))
 ):
     """Get sales pipeline data"""
+    if (cached := await cache.lookup()) is not None:
+        return cached
     
-    pipeline_data = db.query(
+    pipeline_data = (await db.execute(select(
         Deal.stage,
         func.count(Deal.id).label('count'),
         func.sum(Deal.amount).label('total_value')
-    ).group_by(Deal.stage).all()
+    ).group_by(Deal.stage))).all()
     
-    return {
+    return await cache.store({
         "stages": [row.stage for row in pipeline_data],
         "counts": [row.count for row in pipeline_data],
         "values": [float(row.total_value or 0) for row in pipeline_data]
-    }
+    })
@@ -1,14 +1,21 @@
 """
 Health check and monitoring endpoints
 """
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Response, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-import sys
-import os
-import psutil
 
-from ..core.database import get_db
+from ..core.audit import audit_writer
+from ..core.config import settings
+from ..core.database import get_async_db, async_engine, pool_monitor
+from ..core.health import health_sampler
+from ..core.instrumentation import query_metrics
+from ..core.pagination import count_cache
+from ..core.response_cache import response_cache
+from ..core.security import password_hasher
+from .auth import user_cache
+from .dashboard import dashboard_cache
 
 router = APIRouter()
 
@@ -21,60 +28,54 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@router.get("/health/live", status_code=status.HTTP_200_OK)
+async def liveness():
+    """Liveness probe: the process is serving requests (no I/O)"""
+    return {"status": "alive"}
+
+@router.get("/health/ready", status_code=status.HTTP_200_OK)
+async def readiness(response: Response):
+    """Readiness probe: the database answered a recent ping (503 otherwise)"""
+    ready = await health_sampler.ping_database(max_age=settings.HEALTH_READY_MAX_AGE_SECONDS)
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"status": "ready" if ready else "unavailable", "database": health_sampler.database}
+
 @router.get("/health/detailed", status_code=status.HTTP_200_OK)
-async def detailed_health_check(db: Session = Depends(get_db)):
-    """Detailed health check with system information"""
-    try:
-        # Check database connection
-        db.execute("SELECT 1")
-        db_status = "healthy"
-    except Exception as e:
-        db_status = f"unhealthy: {str(e)}"
-    
-    # Get system information
-    system_info = {
-        "python_version": sys.version,
-        "platform": sys.platform,
-        "cpu_count": os.cpu_count(),
-        "memory_usage": {
-            "total": psutil.virtual_memory().total,
-            "available": psutil.virtual_memory().available,
-            "percent": psutil.virtual_memory().percent
-        },
-        "disk_usage": {
-            "total": psutil.disk_usage('/').total,
-            "free": psutil.disk_usage('/').free,
-            "percent": psutil.disk_usage('/').percent
-        }
-    }
+async def detailed_health_check():
+    """Detailed health check with system information, from the background sampler"""
+    if health_sampler.sampled_at is None:
+        await health_sampler.sample()
     
     return {
-        "status": "healthy" if db_status == "healthy" else "degraded",
+        **health_sampler.snapshot(),
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0",
-        "database": db_status,
-        "system": system_info
+        "version": "1.0.0"
     }
 
 @router.get("/metrics", status_code=status.HTTP_200_OK)
-async def get_metrics(db: Session = Depends(get_db)):
+async def get_metrics(db: AsyncSession = Depends(get_async_db)):
     """Get application metrics"""
+    stats = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "database_pool": pool_monitor.snapshot(async_engine.pool),
+        "auth_user_cache": user_cache.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "pagination_count_cache": count_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "audit_writer": audit_writer.stats(),
+        "queries": query_metrics.snapshot()
+    }
     try:
         # Count records in main tables (simplified example)
-        metrics = {
-            "users_count": db.execute("SELECT COUNT(*) FROM users").scalar(),
-            "leads_count": db.execute("SELECT COUNT(*) FROM leads").scalar(),
-            "contacts_count": db.execute("SELECT COUNT(*) FROM contacts").scalar(),
-            "deals_count": db.execute("SELECT COUNT(*) FROM deals").scalar(),
-            "products_count": db.execute("SELECT COUNT(*) FROM products").scalar(),
-        }
-        
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "metrics": metrics
+        stats["metrics"] = {
+            "users_count": await db.scalar(text("SELECT COUNT(*) FROM users")),
+            "leads_count": await db.scalar(text("SELECT COUNT(*) FROM leads")),
+            "contacts_count": await db.scalar(text("SELECT COUNT(*) FROM contacts")),
+            "deals_count": await db.scalar(text("SELECT COUNT(*) FROM deals")),
+            "products_count": await db.scalar(text("SELECT COUNT(*) FROM products")),
         }
     except Exception as e:
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "error": f"Unable to retrieve metrics: {str(e)}"
-        }
+        stats["error"] = f"Unable to retrieve metrics: {str(e)}"
+    return stats
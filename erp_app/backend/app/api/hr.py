@@ -1,58 +1,59 @@
 """
 HR API Routes
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Body, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 
-from ..core.database import get_db
-from ..core.models import User
+from ..core.bulk import bulk_create, BULK_SPECS
+from ..core.database import get_async_db
+from ..core.export import export_response, ExportFormat
+from ..core.fields import select_fields
+from ..core.pagination import paginate, TotalMode
+from ..core.responses import FastJSONResponse
+from ..core.response_cache import cached_response, CachedResponse
 from ..modules.hr.models import Employee, Department, Attendance, LeaveRequest
-from .auth import get_current_user
+from .auth import get_current_user, CurrentUser
 
 router = APIRouter()
 
+EMPLOYEE_LIST_COLUMNS = (
+    Employee.id, Employee.employee_id, Employee.first_name, Employee.last_name, Employee.email,
+    Employee.phone, Employee.hire_date, Employee.department_id, Employee.position_id,
+    Employee.status,
+)
+
 @router.get("/employees")
 async def get_employees(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     department_id: Optional[int] = None
 ):
     """Get all employees"""
-    query = db.query(Employee).filter(Employee.status == "active")
+    query = select(*select_fields(EMPLOYEE_LIST_COLUMNS, fields)).where(Employee.status == "active")
     
     if department_id:
-        query = query.filter(Employee.department_id == department_id)
+        query = query.where(Employee.department_id == department_id)
     
-    employees = query.offset(skip).limit(limit).all()
-    total = query.count()
+    page = await paginate(
+        db, query, (Employee.id,),
+        skip=skip, limit=limit, cursor=cursor, total=total, descending=False
+    )
     
-    return {
-        "employees": [
-            {
-                "id": employee.id,
-                "employee_id": employee.employee_id,
-                "first_name": employee.first_name,
-                "last_name": employee.last_name,
-                "email": employee.email,
-                "phone": employee.phone,
-                "hire_date": employee.hire_date,
-                "department_id": employee.department_id,
-                "position_id": employee.position_id,
-                "status": employee.status
-            }
-            for employee in employees
-        ],
-        "total": total
-    }
+    return FastJSONResponse({"employees": page.items, **page.meta()})
 
 @router.post("/employees")
 async def create_employee(
     employee_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new employee"""
     new_employee = Employee(
@@ -70,20 +71,33 @@ async def create_employee(
     )
     
     db.add(new_employee)
-    db.commit()
-    db.refresh(new_employee)
+    await db.commit()
+    await db.refresh(new_employee)
     
     return {"message": "Employee created successfully", "employee_id": new_employee.id}
 
+@router.post("/employees/bulk")
+async def create_employees_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_MAX_ITEMS employees in one transaction, with a result per item"""
+    return await bulk_create(db, BULK_SPECS["employees"], items, current_user.id)
+
 @router.get("/departments")
 async def get_departments(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cache: CachedResponse = Depends(cached_response(Department.__tablename__))
 ):
     """Get all departments"""
-    departments = db.query(Department).filter(Department.is_active == True).all()
+    if (cached := await cache.lookup()) is not None:
+        return cached
+    
+    departments = (await db.scalars(select(Department).where(Department.is_active == True))).all()
     
-    return {
+    return await cache.store({
         "departments": [
             {
                 "id": dept.id,
@@ -94,67 +108,137 @@ async def get_departments(
             }
             for dept in departments
         ]
-    }
+    })
+
+ATTENDANCE_LIST_COLUMNS = (
+    Attendance.id, Attendance.employee_id, Attendance.date, Attendance.check_in,
+    Attendance.check_out, func.coalesce(Attendance.total_hours, 0).label("total_hours"),
+    Attendance.status,
+)
 
 @router.get("/attendance")
 async def get_attendance(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    employee_id: Optional[int] = None
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
+    employee_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
 ):
-    """Get attendance records"""
-    query = db.query(Attendance)
+    """Get attendance records, optionally between two dates (inclusive)"""
+    query = select(*select_fields(ATTENDANCE_LIST_COLUMNS, fields))
     
     if employee_id:
-        query = query.filter(Attendance.employee_id == employee_id)
+        query = query.where(Attendance.employee_id == employee_id)
+    # Bounds on date limit the scan to those months' partitions
+    if date_from:
+        query = query.where(Attendance.date >= date_from)
+    if date_to:
+        query = query.where(Attendance.date <= date_to)
     
-    records = query.order_by(Attendance.date.desc()).offset(skip).limit(limit).all()
+    page = await paginate(
+        db, query, (Attendance.date, Attendance.id),
+        skip=skip, limit=limit, cursor=cursor, total=total, count=False
+    )
     
-    return {
-        "attendance": [
-            {
-                "id": record.id,
-                "employee_id": record.employee_id,
-                "date": record.date,
-                "check_in": record.check_in,
-                "check_out": record.check_out,
-                "total_hours": float(record.total_hours) if record.total_hours else 0,
-                "status": record.status
-            }
-            for record in records
-        ]
-    }
+    return FastJSONResponse({"attendance": page.items, **page.meta()})
+
+LEAVE_REQUEST_LIST_COLUMNS = (
+    LeaveRequest.id, LeaveRequest.employee_id, LeaveRequest.leave_type, LeaveRequest.start_date,
+    LeaveRequest.end_date, LeaveRequest.days_requested, LeaveRequest.reason, LeaveRequest.status,
+)
 
 @router.get("/leave-requests")
 async def get_leave_requests(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     status: Optional[str] = None
 ):
     """Get leave requests"""
-    query = db.query(LeaveRequest)
+    query = select(*select_fields(LEAVE_REQUEST_LIST_COLUMNS, fields))
     
     if status:
-        query = query.filter(LeaveRequest.status == status)
+        query = query.where(LeaveRequest.status == status)
     
-    requests = query.order_by(LeaveRequest.created_at.desc()).offset(skip).limit(limit).all()
+    page = await paginate(
+        db, query, (LeaveRequest.created_at, LeaveRequest.id),
+        skip=skip, limit=limit, cursor=cursor, total=total, count=False
+    )
     
-    return {
-        "leave_requests": [
-            {
-                "id": request.id,
-                "employee_id": request.employee_id,
-                "leave_type": request.leave_type,
-                "start_date": request.start_date,
-                "end_date": request.end_date,
-                "days_requested": request.days_requested,
-                "reason": request.reason,
-                "status": request.status
-            }
-            for request in requests
-        ]
-    }
+    return FastJSONResponse({"leave_requests": page.items, **page.meta()})
+
+@router.get("/employees/export")
+async def export_employees(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    department_id: Optional[int] = None
+):
+    """Export active employees as CSV or XLSX"""
+    query = select(
+        Employee.id, Employee.employee_id, Employee.first_name, Employee.last_name, Employee.email,
+        Employee.phone, Employee.hire_date, Employee.department_id, Employee.position_id, Employee.status
+    ).where(Employee.status == "active").order_by(Employee.id)
+    
+    if department_id:
+        query = query.where(Employee.department_id == department_id)
+    
+    return export_response(db, query, "employees", format)
+
+@router.get("/departments/export")
+async def export_departments(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export departments as CSV or XLSX"""
+    query = select(
+        Department.id, Department.name, Department.code, Department.description, Department.manager_id
+    ).where(Department.is_active == True).order_by(Department.id)
+    
+    return export_response(db, query, "departments", format)
+
+@router.get("/attendance/export")
+async def export_attendance(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    employee_id: Optional[int] = None
+):
+    """Export attendance records as CSV or XLSX"""
+    query = select(
+        Attendance.id, Attendance.employee_id, Attendance.date, Attendance.check_in, Attendance.check_out,
+        Attendance.total_hours, Attendance.status
+    ).order_by(Attendance.date.desc(), Attendance.id.desc())
+    
+    if employee_id:
+        query = query.where(Attendance.employee_id == employee_id)
+    
+    return export_response(db, query, "attendance", format)
+
+@router.get("/leave-requests/export")
+async def export_leave_requests(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[str] = None
+):
+    """Export leave requests as CSV or XLSX"""
+    query = select(
+        LeaveRequest.id, LeaveRequest.employee_id, LeaveRequest.leave_type, LeaveRequest.start_date,
+        LeaveRequest.end_date, LeaveRequest.days_requested, LeaveRequest.reason, LeaveRequest.status
+    ).order_by(LeaveRequest.created_at.desc(), LeaveRequest.id.desc())
+    
+    if status:
+        query = query.where(LeaveRequest.status == status)
+    
+    return export_response(db, query, "leave-requests", format)
@@ -0,0 +1,111 @@
+"""
+Bulk import API Routes
+"""
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import json
+import os
+import tempfile
+
+from ..core.config import settings
+from ..core.database import get_async_db
+from ..core.imports import IMPORT_SPECS, WORKER_ID, ImportFormat, start_import
+from ..core.models import ImportJob
+from .auth import get_current_user, CurrentUser
+
+router = APIRouter()
+
+# CurrentUser.role holds the plain value (models.UserRole names both the enum and a table)
+SUPER_ADMIN = "super_admin"
+
+async def save_upload(file: UploadFile, suffix: str) -> str:
+    """Copy an upload to UPLOAD_DIR/imports, refusing files over IMPORT_MAX_FILE_SIZE"""
+    directory = os.path.join(settings.UPLOAD_DIR, "imports")
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=directory)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(1024 * 1024):
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Import files are limited to {settings.IMPORT_MAX_FILE_SIZE} bytes"
+                    )
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+@router.post("/{resource}", status_code=status.HTTP_202_ACCEPTED)
+async def create_import(
+    resource: str,
+    file: UploadFile = File(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Start importing a CSV or XLSX file of products, customers, leads or employees"""
+    spec = IMPORT_SPECS.get(resource)
+    if spec is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Imports are available for: {', '.join(IMPORT_SPECS)}"
+        )
+
+    suffix = os.path.splitext(file.filename or "")[1].lower()
+    try:
+        format = ImportFormat(suffix.lstrip("."))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Upload a .csv or .xlsx file"
+        )
+
+    path = await save_upload(file, suffix)
+    job = ImportJob(
+        resource=resource, filename=file.filename, created_by=current_user.id,
+        worker_id=WORKER_ID, heartbeat_at=datetime.utcnow(),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    start_import(db.bind, spec, job.id, path, format, current_user.id)
+
+    return {"message": "Import started", "job_id": job.id, "status_url": f"/api/imports/{job.id}"}
+
+@router.get("/{job_id}")
+async def get_import(
+    job_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the progress and row errors of an import started by the current user"""
+    query = select(ImportJob).where(ImportJob.id == job_id)
+    if current_user.role != SUPER_ADMIN:
+        # Other users' jobs are reported as missing, so their ids reveal nothing
+        query = query.where(ImportJob.created_by == current_user.id)
+    job = await db.scalar(query)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+
+    return {
+        "id": job.id,
+        "resource": job.resource,
+        "filename": job.filename,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "processed_rows": job.processed_rows,
+        "inserted_rows": job.inserted_rows,
+        "failed_rows": job.failed_rows,
+        "progress": round(job.processed_rows / job.total_rows, 4) if job.total_rows else None,
+        "errors": json.loads(job.errors) if job.errors else [],
+        "message": job.message,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
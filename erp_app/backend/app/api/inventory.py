@@ -1,57 +1,62 @@
 """
 Inventory API Routes
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from datetime import date, datetime, time, timedelta
+from fastapi import APIRouter, Body, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 
-from ..core.database import get_db
-from ..core.models import User
+from ..core.bulk import bulk_create, BULK_SPECS
+from ..core.database import get_async_db
+from ..core.export import export_response, ExportFormat
+from ..core.fields import select_fields
+from ..core.pagination import paginate, TotalMode
+from ..core.responses import FastJSONResponse
+from ..core.response_cache import cached_response, CachedResponse
+from ..modules.inventory.ledger import MovementLine, post_movements
 from ..modules.inventory.models import Product, Category, Warehouse, StockMovement
-from .auth import get_current_user
+from ..modules.inventory.reorder import reorder_suggestions
+from .auth import get_current_user, CurrentUser
 
 router = APIRouter()
 
+PRODUCT_LIST_COLUMNS = (
+    Product.id, Product.sku, Product.name, Product.type,
+    func.coalesce(Product.cost_price, 0).label("cost_price"),
+    func.coalesce(Product.selling_price, 0).label("selling_price"),
+    Product.current_stock, Product.minimum_stock, Product.is_active,
+)
+
 @router.get("/products")
 async def get_products(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     category_id: Optional[int] = None
 ):
     """Get all products with optional filtering"""
-    query = db.query(Product).filter(Product.is_active == True)
+    query = select(*select_fields(PRODUCT_LIST_COLUMNS, fields)).where(Product.is_active == True)
     
     if category_id:
-        query = query.filter(Product.category_id == category_id)
+        query = query.where(Product.category_id == category_id)
     
-    products = query.offset(skip).limit(limit).all()
-    total = query.count()
+    page = await paginate(
+        db, query, (Product.id,),
+        skip=skip, limit=limit, cursor=cursor, total=total, descending=False
+    )
     
-    return {
-        "products": [
-            {
-                "id": product.id,
-                "sku": product.sku,
-                "name": product.name,
-                "type": product.type,
-                "cost_price": float(product.cost_price) if product.cost_price else 0,
-                "selling_price": float(product.selling_price) if product.selling_price else 0,
-                "current_stock": product.current_stock,
-                "minimum_stock": product.minimum_stock,
-                "is_active": product.is_active
-            }
-            for product in products
-        ],
-        "total": total
-    }
+    return FastJSONResponse({"products": page.items, **page.meta()})
 
 @router.post("/products")
 async def create_product(
     product_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new product"""
     new_product = Product(
@@ -69,20 +74,33 @@ async def create_product(
     )
     
     db.add(new_product)
-    db.commit()
-    db.refresh(new_product)
+    await db.commit()
+    await db.refresh(new_product)
     
     return {"message": "Product created successfully", "product_id": new_product.id}
 
+@router.post("/products/bulk")
+async def create_products_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_MAX_ITEMS products in one transaction, with a result per item"""
+    return await bulk_create(db, BULK_SPECS["products"], items, current_user.id)
+
 @router.get("/categories")
 async def get_categories(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cache: CachedResponse = Depends(cached_response(Category.__tablename__))
 ):
     """Get all product categories"""
-    categories = db.query(Category).filter(Category.is_active == True).all()
+    if (cached := await cache.lookup()) is not None:
+        return cached
+    
+    categories = (await db.scalars(select(Category).where(Category.is_active == True))).all()
     
-    return {
+    return await cache.store({
         "categories": [
             {
                 "id": category.id,
@@ -92,13 +110,13 @@ async def get_categories(
             }
             for category in categories
         ]
-    }
+    })
 
 @router.post("/categories")
 async def create_category(
     category_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new category"""
     new_category = Category(
@@ -108,20 +126,24 @@ async def create_category(
     )
     
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    await db.refresh(new_category)
     
     return {"message": "Category created successfully", "category_id": new_category.id}
 
 @router.get("/warehouses")
 async def get_warehouses(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    cache: CachedResponse = Depends(cached_response(Warehouse.__tablename__))
 ):
     """Get all warehouses"""
-    warehouses = db.query(Warehouse).filter(Warehouse.is_active == True).all()
+    if (cached := await cache.lookup()) is not None:
+        return cached
+    
+    warehouses = (await db.scalars(select(Warehouse).where(Warehouse.is_active == True))).all()
     
-    return {
+    return await cache.store({
         "warehouses": [
             {
                 "id": warehouse.id,
@@ -133,36 +155,123 @@ async def get_warehouses(
             }
             for warehouse in warehouses
         ]
-    }
+    })
+
+STOCK_MOVEMENT_LIST_COLUMNS = (
+    StockMovement.id, StockMovement.product_id, StockMovement.warehouse_id,
+    StockMovement.movement_type, StockMovement.quantity, StockMovement.reference_number,
+    StockMovement.reason, StockMovement.created_at,
+)
 
 @router.get("/stock-movements")
 async def get_stock_movements(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    product_id: Optional[int] = None
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
+    product_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
 ):
-    """Get stock movements"""
-    query = db.query(StockMovement)
+    """Get stock movements, optionally between two dates (inclusive)"""
+    query = select(*select_fields(STOCK_MOVEMENT_LIST_COLUMNS, fields))
     
     if product_id:
-        query = query.filter(StockMovement.product_id == product_id)
+        query = query.where(StockMovement.product_id == product_id)
+    # Bounds on created_at limit the scan to those months' partitions
+    if date_from:
+        query = query.where(StockMovement.created_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        query = query.where(StockMovement.created_at < datetime.combine(date_to + timedelta(days=1), time.min))
     
-    movements = query.order_by(StockMovement.created_at.desc()).offset(skip).limit(limit).all()
+    page = await paginate(
+        db, query, (StockMovement.created_at, StockMovement.id),
+        skip=skip, limit=limit, cursor=cursor, total=total, count=False
+    )
     
-    return {
-        "movements": [
-            {
-                "id": movement.id,
-                "product_id": movement.product_id,
-                "warehouse_id": movement.warehouse_id,
-                "movement_type": movement.movement_type,
-                "quantity": movement.quantity,
-                "reference_number": movement.reference_number,
-                "reason": movement.reason,
-                "created_at": movement.created_at
-            }
-            for movement in movements
-        ]
-    }
+    return FastJSONResponse({"movements": page.items, **page.meta()})
+
+@router.post("/stock-movements")
+async def post_stock_movements(
+    movements: List[MovementLine] = Body(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Post up to BULK_MAX_ITEMS stock movements in one transaction: all of them apply, or none"""
+    return {"movements": await post_movements(db, movements, current_user.id)}
+
+@router.get("/reorder-suggestions")
+async def get_reorder_suggestions(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    limit: int = Query(100, ge=1, le=1000),
+    category_id: Optional[int] = None
+):
+    """Products due for reordering and how many to order, most urgent first"""
+    suggestions = await reorder_suggestions(db, category_id)
+    return FastJSONResponse({"suggestions": suggestions[:limit], "total": len(suggestions)})
+
+@router.get("/products/export")
+async def export_products(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    category_id: Optional[int] = None
+):
+    """Export active products as CSV or XLSX"""
+    query = select(
+        Product.id, Product.sku, Product.name, Product.type, Product.category_id, Product.cost_price,
+        Product.selling_price, Product.current_stock, Product.minimum_stock
+    ).where(Product.is_active == True).order_by(Product.id)
+    
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    
+    return export_response(db, query, "products", format)
+
+@router.get("/categories/export")
+async def export_categories(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export product categories as CSV or XLSX"""
+    query = select(
+        Category.id, Category.name, Category.description, Category.parent_id
+    ).where(Category.is_active == True).order_by(Category.id)
+    
+    return export_response(db, query, "categories", format)
+
+@router.get("/warehouses/export")
+async def export_warehouses(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export warehouses as CSV or XLSX"""
+    query = select(
+        Warehouse.id, Warehouse.name, Warehouse.code, Warehouse.address, Warehouse.city, Warehouse.manager_name
+    ).where(Warehouse.is_active == True).order_by(Warehouse.id)
+    
+    return export_response(db, query, "warehouses", format)
+
+@router.get("/stock-movements/export")
+async def export_stock_movements(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    product_id: Optional[int] = None
+):
+    """Export stock movements as CSV or XLSX"""
+    query = select(
+        StockMovement.id, StockMovement.product_id, StockMovement.warehouse_id, StockMovement.movement_type,
+        StockMovement.quantity, StockMovement.reference_number, StockMovement.reason, StockMovement.created_at
+    ).order_by(StockMovement.created_at.desc(), StockMovement.id.desc())
+    
+    if product_id:
+        query = query.where(StockMovement.product_id == product_id)
+    
+    return export_response(db, query, "stock-movements", format)
@@ -1,55 +1,56 @@
 """
 Sales API Routes
 """
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, Body, Depends, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 
-from ..core.database import get_db
-from ..core.models import User
+from ..core.bulk import bulk_create, BULK_SPECS
+from ..core.database import get_async_db
+from ..core.export import export_response, ExportFormat
+from ..core.fields import select_fields
+from ..core.pagination import paginate, TotalMode
+from ..core.responses import FastJSONResponse
 from ..modules.sales.models import Quote, SalesOrder, Shipment
-from .auth import get_current_user
+from .auth import get_current_user, CurrentUser
 
 router = APIRouter()
 
+QUOTE_LIST_COLUMNS = (
+    Quote.id, Quote.quote_number, Quote.customer_id, Quote.quote_date, Quote.valid_until,
+    Quote.total_amount, Quote.status,
+)
+
 @router.get("/quotes")
 async def get_quotes(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     status: Optional[str] = None
 ):
     """Get all quotes"""
-    query = db.query(Quote)
+    query = select(*select_fields(QUOTE_LIST_COLUMNS, fields))
     
     if status:
-        query = query.filter(Quote.status == status)
-    
-    quotes = query.order_by(Quote.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
-    
-    return {
-        "quotes": [
-            {
-                "id": quote.id,
-                "quote_number": quote.quote_number,
-                "customer_id": quote.customer_id,
-                "quote_date": quote.quote_date,
-                "valid_until": quote.valid_until,
-                "total_amount": float(quote.total_amount),
-                "status": quote.status
-            }
-            for quote in quotes
-        ],
-        "total": total
-    }
+        query = query.where(Quote.status == status)
+    
+    page = await paginate(
+        db, query, (Quote.created_at, Quote.id),
+        skip=skip, limit=limit, cursor=cursor, total=total
+    )
+    
+    return FastJSONResponse({"quotes": page.items, **page.meta()})
 
 @router.post("/quotes")
 async def create_quote(
     quote_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new quote"""
     new_quote = Quote(
@@ -66,49 +67,45 @@ async def create_quote(
     )
     
     db.add(new_quote)
-    db.commit()
-    db.refresh(new_quote)
+    await db.commit()
+    await db.refresh(new_quote)
     
     return {"message": "Quote created successfully", "quote_id": new_quote.id}
 
+SALES_ORDER_LIST_COLUMNS = (
+    SalesOrder.id, SalesOrder.order_number, SalesOrder.customer_id, SalesOrder.order_date,
+    SalesOrder.required_date, SalesOrder.total_amount, SalesOrder.status,
+)
+
 @router.get("/orders")
 async def get_orders(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None,
     status: Optional[str] = None
 ):
     """Get all sales orders"""
-    query = db.query(SalesOrder)
+    query = select(*select_fields(SALES_ORDER_LIST_COLUMNS, fields))
     
     if status:
-        query = query.filter(SalesOrder.status == status)
-    
-    orders = query.order_by(SalesOrder.created_at.desc()).offset(skip).limit(limit).all()
-    total = query.count()
-    
-    return {
-        "orders": [
-            {
-                "id": order.id,
-                "order_number": order.order_number,
-                "customer_id": order.customer_id,
-                "order_date": order.order_date,
-                "required_date": order.required_date,
-                "total_amount": float(order.total_amount),
-                "status": order.status
-            }
-            for order in orders
-        ],
-        "total": total
-    }
+        query = query.where(SalesOrder.status == status)
+    
+    page = await paginate(
+        db, query, (SalesOrder.created_at, SalesOrder.id),
+        skip=skip, limit=limit, cursor=cursor, total=total
+    )
+    
+    return FastJSONResponse({"orders": page.items, **page.meta()})
 
 @router.post("/orders")
 async def create_order(
     order_data: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new sales order"""
     new_order = SalesOrder(
@@ -126,32 +123,90 @@ async def create_order(
     )
     
     db.add(new_order)
-    db.commit()
-    db.refresh(new_order)
+    await db.commit()
+    await db.refresh(new_order)
     
     return {"message": "Sales order created successfully", "order_id": new_order.id}
 
+@router.post("/orders/bulk")
+async def create_orders_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create up to BULK_MAX_ITEMS sales orders in one transaction, with a result per item"""
+    return await bulk_create(db, BULK_SPECS["orders"], items, current_user.id)
+
+SHIPMENT_LIST_COLUMNS = (
+    Shipment.id, Shipment.shipment_number, Shipment.order_id, Shipment.ship_date, Shipment.carrier,
+    Shipment.tracking_number, func.coalesce(Shipment.shipping_cost, 0).label("shipping_cost"),
+)
+
 @router.get("/shipments")
 async def get_shipments(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    total: Optional[TotalMode] = None,
+    fields: Optional[str] = None
 ):
     """Get all shipments"""
-    shipments = db.query(Shipment).order_by(Shipment.created_at.desc()).offset(skip).limit(limit).all()
-    
-    return {
-        "shipments": [
-            {
-                "id": shipment.id,
-                "shipment_number": shipment.shipment_number,
-                "order_id": shipment.order_id,
-                "ship_date": shipment.ship_date,
-                "carrier": shipment.carrier,
-                "tracking_number": shipment.tracking_number,
-                "shipping_cost": float(shipment.shipping_cost) if shipment.shipping_cost else 0
-            }
-            for shipment in shipments
-        ]
-    }
+    query = select(*select_fields(SHIPMENT_LIST_COLUMNS, fields))
+    page = await paginate(
+        db, query, (Shipment.created_at, Shipment.id),
+        skip=skip, limit=limit, cursor=cursor, total=total, count=False
+    )
+    
+    return FastJSONResponse({"shipments": page.items, **page.meta()})
+
+@router.get("/quotes/export")
+async def export_quotes(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[str] = None
+):
+    """Export quotes as CSV or XLSX"""
+    query = select(
+        Quote.id, Quote.quote_number, Quote.customer_id, Quote.quote_date, Quote.valid_until,
+        Quote.total_amount, Quote.status
+    ).order_by(Quote.created_at.desc(), Quote.id.desc())
+    
+    if status:
+        query = query.where(Quote.status == status)
+    
+    return export_response(db, query, "quotes", format)
+
+@router.get("/orders/export")
+async def export_orders(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[str] = None
+):
+    """Export sales orders as CSV or XLSX"""
+    query = select(
+        SalesOrder.id, SalesOrder.order_number, SalesOrder.customer_id, SalesOrder.order_date,
+        SalesOrder.required_date, SalesOrder.total_amount, SalesOrder.status
+    ).order_by(SalesOrder.created_at.desc(), SalesOrder.id.desc())
+    
+    if status:
+        query = query.where(SalesOrder.status == status)
+    
+    return export_response(db, query, "orders", format)
+
+@router.get("/shipments/export")
+async def export_shipments(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    format: ExportFormat = ExportFormat.CSV
+):
+    """Export shipments as CSV or XLSX"""
+    query = select(
+        Shipment.id, Shipment.shipment_number, Shipment.order_id, Shipment.ship_date, Shipment.carrier,
+        Shipment.tracking_number, Shipment.shipping_cost
+    ).order_by(Shipment.created_at.desc(), Shipment.id.desc())
+    
+    return export_response(db, query, "shipments", format)
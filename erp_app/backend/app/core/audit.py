@@ -0,0 +1,458 @@
+"""
+Audit log of changes to module models, written in batches off the request path
+
+Every flush records a CREATE, UPDATE or DELETE entry per object it writes
+whose model mixes in ``Audited`` (the CRM, inventory, accounting, HR and
+sales models), with the changed columns' old and new values and the user,
+IP and user agent of the request that made it.
+
+Entries are kept on the session until commit (a rollback drops them) and
+handed to audit_writer, which inserts up to AUDIT_BATCH_SIZE rows per
+statement. Mutating requests wait while AUDIT_QUEUE_SIZE entries are queued.
+AUDIT_MODE picks where they wait:
+
+* "async" - in memory. Entries still queued when the process dies are lost.
+* "spool" - in AUDIT_SPOOL_PATH, a local SQLite file, synced to disk before
+  the commit returns. A restarted worker, or any other worker on the host,
+  writes what a dead one left behind.
+
+Core writes (imports, bulk create, stock postings) bypass the unit of work
+and record their own entries with core_entry() and record_core_changes().
+"""
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, insert, inspect
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.orm import Mapper, Session
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import orjson
+
+from .config import settings
+from .database import async_engine
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+_MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+@dataclass(frozen=True)
+class AuditActor:
+    """Who is making the changes of the current request"""
+    user_id: Optional[int]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+
+_actor: ContextVar[Optional[AuditActor]] = ContextVar("audit_actor", default=None)
+
+def set_audit_actor(user_id: Optional[int], request: Optional[Request] = None):
+    """Attribute the changes flushed from here on (in this request) to ``user_id``"""
+    ip_address = user_agent = None
+    if request is not None:
+        ip_address = request.client.host if request.client else None
+        user_agent = (request.headers.get("user-agent") or "")[:500] or None
+    _actor.set(AuditActor(user_id, ip_address, user_agent))
+
+# Column attribute keys and primary key attribute keys per audited class (None: not audited)
+_audited: Dict[type, Optional[Tuple[List[str], List[str]]]] = {}
+
+def _audited_columns(cls: type) -> Optional[Tuple[List[str], List[str]]]:
+    if cls not in _audited:
+        if getattr(cls, "__audited__", False):
+            mapper = inspect(cls)
+            columns = [attr.key for attr in mapper.column_attrs]
+            primary_key = [mapper.get_property_by_column(column).key for column in mapper.primary_key]
+            _audited[cls] = (columns, primary_key)
+        else:
+            _audited[cls] = None
+    return _audited[cls]
+
+@event.listens_for(Mapper, "mapper_configured")
+def _keep_old_values(mapper, cls):
+    # Setting an expired (e.g. just committed) column loads its value first,
+    # so an UPDATE entry always has the old value to diff against
+    audited = _audited_columns(cls)
+    if audited is not None:
+        for key in audited[0]:
+            mapper.class_manager[key].impl.active_history = True
+
+def _changes(instance: Any, action: str, columns: List[str]) -> Tuple[Optional[dict], Optional[dict]]:
+    """(old values, new values) of ``instance``'s columns, from what the flush already has"""
+    state = inspect(instance)
+    if action == "CREATE":
+        return None, {key: state.dict[key] for key in columns if key in state.dict}
+    if action == "DELETE":
+        return {key: state.dict[key] for key in columns if key in state.dict}, None
+    old, new = {}, {}
+    for key in columns:
+        history = state.attrs[key].history
+        if history.has_changes():
+            old[key] = history.deleted[0] if history.deleted else None
+            new[key] = history.added[0] if history.added else None
+    return old, new
+
+def _entries(session: Session) -> List[Dict[str, Any]]:
+    actor = _actor.get() or AuditActor(None, None, None)
+    now = datetime.utcnow()
+    entries = []
+    for action, instances in (("CREATE", session.new), ("UPDATE", session.dirty), ("DELETE", session.deleted)):
+        for instance in instances:
+            audited = _audited_columns(type(instance))
+            if audited is None:
+                continue
+            columns, primary_key = audited
+            old, new = _changes(instance, action, columns)
+            if action == "UPDATE" and not new:
+                continue
+            state = inspect(instance)
+            entries.append({
+                "user_id": actor.user_id,
+                "action": action,
+                "table_name": instance.__tablename__,
+                "record_id": ",".join(str(state.dict.get(key)) for key in primary_key),
+                "old_values": old,
+                "new_values": new,
+                "ip_address": actor.ip_address,
+                "user_agent": actor.user_agent,
+                "timestamp": now,
+            })
+    return entries
+
+def _json(values: Optional[dict]) -> Optional[str]:
+    # Decimals as strings, so amounts keep their exact value
+    return orjson.dumps(values, default=str).decode() if values is not None else None
+
+def _rows(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {**entry, "old_values": _json(entry["old_values"]), "new_values": _json(entry["new_values"])}
+        for entry in entries
+    ]
+
+def core_entry(
+    action: str, table_name: str, record_id: Any, old: Optional[dict] = None, new: Optional[dict] = None
+) -> Dict[str, Any]:
+    """An entry for a change written with a Core statement, attributed like a flushed one"""
+    actor = _actor.get() or AuditActor(None, None, None)
+    return {
+        "user_id": actor.user_id,
+        "action": action,
+        "table_name": table_name,
+        "record_id": str(record_id),
+        "old_values": old,
+        "new_values": new,
+        "ip_address": actor.ip_address,
+        "user_agent": actor.user_agent,
+        "timestamp": datetime.utcnow(),
+    }
+
+def record_core_changes(conn: AsyncConnection, entries: List[Dict[str, Any]]):
+    """Hand the entries of Core writes made in ``conn``'s transaction to audit_writer once it commits
+
+    A rollback drops them, like a session's.
+    """
+    if not settings.AUDIT_ENABLED or not entries:
+        return
+    # Whichever of the two fires first decides; the other is a no-op when the
+    # connection's next transaction ends
+    pending = [entries]
+
+    def committed(_):
+        if pending:
+            audit_writer.submit(pending.pop())
+
+    def rolled_back(_):
+        pending.clear()
+
+    event.listen(conn.sync_connection, "commit", committed, once=True)
+    event.listen(conn.sync_connection, "rollback", rolled_back, once=True)
+
+@event.listens_for(Session, "after_flush")
+def _record_changes(session, flush_context):
+    if not settings.AUDIT_ENABLED:
+        return
+    entries = _entries(session)
+    if entries:
+        session.info.setdefault("audit_entries", []).extend(entries)
+
+@event.listens_for(Session, "after_commit")
+def _submit_changes(session):
+    entries = session.info.pop("audit_entries", None)
+    if entries:
+        audit_writer.submit(entries)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("audit_entries", None)
+
+def _load(entry: str) -> Dict[str, Any]:
+    row = orjson.loads(entry)
+    if row.get("timestamp"):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+class AuditSpool:
+    """Committed audit entries waiting for audit_logs, in a local SQLite file
+
+    Every worker on the host can share the file. append() syncs it to disk
+    before returning. claim() marks a batch as taken by this process, remove()
+    deletes it once written and release() hands it back after a failed write.
+    A claim older than AUDIT_SPOOL_CLAIM_SECONDS is taken over, because its
+    writer died before removing the batch. Those entries can be written twice,
+    but they are never lost.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit: every transaction below is explicit
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS audit_spool "
+            "(id INTEGER PRIMARY KEY, entry TEXT NOT NULL, claimed_by TEXT, claimed_at REAL)"
+        )
+        self._lock = threading.Lock()
+        self._owner = f"{os.getpid()}:{id(self)}"
+
+    def _transaction(self, statements: Iterable[Tuple[str, Any]], many: bool = False):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for sql, parameters in statements:
+                    (self._conn.executemany if many else self._conn.execute)(sql, parameters)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def append(self, entries: List[Dict[str, Any]]):
+        rows = [(orjson.dumps(row, default=str).decode(),) for row in _rows(entries)]
+        self._transaction([("INSERT INTO audit_spool (entry) VALUES (?)", rows)], many=True)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM audit_spool").fetchone()[0]
+
+    def claim(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Up to ``limit`` unclaimed (or abandoned) entries, oldest first, now claimed by this process"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, entry FROM audit_spool WHERE claimed_by IS NULL OR claimed_at < ? ORDER BY id LIMIT ?",
+                    (now - settings.AUDIT_SPOOL_CLAIM_SECONDS, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE audit_spool SET claimed_by = ?, claimed_at = ? WHERE id = ?",
+                    [(self._owner, now, id) for id, _ in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [(id, _load(entry)) for id, entry in rows]
+
+    def remove(self, ids: List[int]):
+        self._transaction([("DELETE FROM audit_spool WHERE id = ?", [(id,) for id in ids])], many=True)
+
+    def release(self, ids: List[int]):
+        self._transaction([(
+            "UPDATE audit_spool SET claimed_by = NULL, claimed_at = NULL WHERE id = ? AND claimed_by = ?",
+            [(id, self._owner) for id in ids],
+        )], many=True)
+
+    def clear(self):
+        self._transaction([("DELETE FROM audit_spool", ())])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class AuditWriter:
+    """Background task that bulk-inserts committed audit entries
+
+    submit() only appends to a queue (in memory, or the spool in spool
+    mode), so commits never wait on audit_logs.
+    The writer inserts AUDIT_BATCH_SIZE rows per statement, and at least
+    every AUDIT_FLUSH_SECONDS; a failed batch goes back to the front of the
+    queue and is retried. The queue is bounded by admission rather than by
+    dropping entries: wait_for_capacity() holds mutating requests back while
+    AUDIT_QUEUE_SIZE entries are queued.
+
+    AUDIT_QUEUE_SIZE is a soft limit. Requests admitted just below it still
+    commit, and so do writes that don't go through the module routers, so
+    the queue can grow past it. submit() never refuses entries, because
+    their changes are already committed.
+    """
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        self.engine = engine  # None: the application's async engine
+        self._pending: deque = deque()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._spool: Optional[AuditSpool] = None
+        self.submitted = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.rejected = 0
+
+    def spool(self) -> Optional[AuditSpool]:
+        """The spool at AUDIT_SPOOL_PATH in spool mode, None in async mode"""
+        if settings.AUDIT_MODE != "spool":
+            return None
+        with self._lock:
+            if self._spool is None or self._spool.path != settings.AUDIT_SPOOL_PATH:
+                if self._spool is not None:
+                    self._spool.close()
+                self._spool = AuditSpool(settings.AUDIT_SPOOL_PATH)
+            return self._spool
+
+    def submit(self, entries: List[Dict[str, Any]]):
+        """Queue ``entries``, even past AUDIT_QUEUE_SIZE; safe from any thread"""
+        spool = self.spool()
+        if spool is not None:
+            spool.append(entries)
+        with self._lock:
+            if spool is None:
+                self._pending.extend(entries)
+            self.submitted += len(entries)
+        if self._loop is not None and self.queued() >= settings.AUDIT_BATCH_SIZE:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def queued(self) -> int:
+        spool = self.spool()
+        return spool.count() if spool is not None else len(self._pending)
+
+    def clear(self):
+        """Forget queued entries (tests recreate the tables under them)"""
+        with self._lock:
+            self._pending.clear()
+        spool = self.spool()
+        if spool is not None:
+            spool.clear()
+
+    async def wait_for_capacity(self) -> bool:
+        """Wait up to AUDIT_BACKPRESSURE_SECONDS for the queue to drop below AUDIT_QUEUE_SIZE"""
+        if self.queued() < settings.AUDIT_QUEUE_SIZE:
+            return True
+        deadline = time.monotonic() + settings.AUDIT_BACKPRESSURE_SECONDS
+        while time.monotonic() < deadline:
+            self._wakeup.set()
+            await asyncio.sleep(0.05)
+            if self.queued() < settings.AUDIT_QUEUE_SIZE:
+                return True
+        self.rejected += 1
+        return False
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            count = min(len(self._pending), settings.AUDIT_BATCH_SIZE)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _put_back(self, batch: List[Dict[str, Any]]):
+        with self._lock:
+            self._pending.extendleft(reversed(batch))
+
+    async def _flush_spool(self, spool: AuditSpool) -> bool:
+        engine = self.engine or async_engine
+        while claimed := spool.claim(settings.AUDIT_BATCH_SIZE):
+            ids = [id for id, _ in claimed]
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(AuditLog), [row for _, row in claimed])
+            except Exception as e:
+                logger.error(f"Audit log write of {len(claimed)} spooled entries failed: {str(e)}")
+                spool.release(ids)
+                self.failed_batches += 1
+                return False
+            spool.remove(ids)
+            self.written += len(claimed)
+            self.batches += 1
+        return True
+
+    async def flush(self) -> bool:
+        """Write everything queued; False if a batch failed (it stays queued)"""
+        spool = self.spool()
+        if spool is not None:
+            return await self._flush_spool(spool)
+        engine = self.engine or async_engine
+        while batch := self._take():
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(AuditLog), _rows(batch))
+            except Exception as e:
+                logger.error(f"Audit log write of {len(batch)} entries failed: {str(e)}")
+                self._put_back(batch)
+                self.failed_batches += 1
+                return False
+            self.written += len(batch)
+            self.batches += 1
+        return True
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.AUDIT_FLUSH_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Write queued entries on the running event loop"""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            # A fresh event pair for this event loop (tests and reloads start more than one)
+            self._wakeup = asyncio.Event()
+            self._stopping = asyncio.Event()
+            self._task = self._loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop after writing what is queued"""
+        if self._task is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+            self._loop = None
+            if not await self.flush():
+                logger.error(f"{self.queued()} audit entries were not written")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": settings.AUDIT_MODE,
+            "queued": self.queued(),
+            "submitted": self.submitted,
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "rejected": self.rejected,
+        }
+
+audit_writer = AuditWriter()
+
+async def audit_backpressure(request: Request):
+    """Router dependency: 503 for writes while the audit writer is too far behind"""
+    if request.method in _MUTATING_METHODS and not await audit_writer.wait_for_capacity():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many pending changes, please retry",
+            headers={"Retry-After": "1"},
+        )
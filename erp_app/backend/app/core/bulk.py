@@ -0,0 +1,89 @@
+"""
+Bulk create endpoints
+
+A batch of items is validated with the import row schemas, checked for
+unique values already taken, then inserted with one executemany ... RETURNING
+in a single transaction. Each item gets its own result, by position in the
+request: the new id, or why it was rejected.
+"""
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException, status
+from pydantic import model_validator
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+
+from .cache import notify_table_write
+from .config import settings
+from .imports import IMPORT_SPECS, ImportRow, ImportSpec, drop_duplicates, insert_batch, validate_batch
+from ..modules.accounting.models import Invoice
+from ..modules.sales.models import SalesOrder
+
+class InvoiceRow(ImportRow):
+    invoice_number: str
+    customer_id: int
+    issue_date: datetime
+    due_date: datetime
+    subtotal: Decimal = Decimal(0)
+    tax_amount: Decimal = Decimal(0)
+    total_amount: Decimal = Decimal(0)
+    balance_due: Optional[Decimal] = None
+    notes: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _balance_due(self):
+        # A new invoice owes its total, as POST /api/accounting/invoices records it
+        if self.balance_due is None:
+            self.balance_due = self.total_amount
+        return self
+
+class SalesOrderRow(ImportRow):
+    order_number: str
+    customer_id: int
+    order_date: datetime
+    required_date: Optional[datetime] = None
+    subtotal: Decimal = Decimal(0)
+    tax_amount: Decimal = Decimal(0)
+    total_amount: Decimal = Decimal(0)
+    shipping_address: Optional[str] = None
+    notes: Optional[str] = None
+    sales_rep_id: Optional[int] = None
+
+BULK_SPECS = {
+    "products": IMPORT_SPECS["products"],
+    "leads": IMPORT_SPECS["leads"],
+    "employees": IMPORT_SPECS["employees"],
+    "invoices": ImportSpec("invoices", Invoice, InvoiceRow, unique=("invoice_number",), owner_column="created_by"),
+    "orders": ImportSpec("orders", SalesOrder, SalesOrderRow, unique=("order_number",), owner_column="created_by"),
+}
+
+async def bulk_create(
+    db: AsyncSession, spec: ImportSpec, items: List[Dict[str, Any]], owner_id: Optional[int]
+) -> Dict[str, Any]:
+    """Insert the valid items in one transaction; returns a result per item, in request order
+
+    The statements run on the session's connection and the session commits
+    them, so a request never holds two pooled connections.
+    """
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Bulk requests are limited to {settings.BULK_MAX_ITEMS} items"
+        )
+    # Explicit nulls fall back to the schema defaults, like missing keys
+    batch = [
+        (index, {key: value for key, value in item.items() if value is not None})
+        for index, item in enumerate(items)
+    ]
+    valid, errors = validate_batch(spec, batch, owner_id, datetime.utcnow())
+    conn = await db.connection()
+    valid = await drop_duplicates(conn, spec, valid, errors)
+    stored = await insert_batch(conn, spec, valid, errors)
+    await db.commit()
+    if stored:
+        notify_table_write([spec.table.name])
+
+    results = [{"index": index, "id": id} for index, id in stored]
+    results += [{"index": index, "error": message} for index, message in errors]
+    results.sort(key=lambda result: result["index"])
+    return {"created": len(stored), "failed": len(errors), "results": results}
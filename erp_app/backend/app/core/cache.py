@@ -0,0 +1,107 @@
+"""
+In-process caching utilities
+"""
+from collections import OrderedDict, defaultdict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+# Callbacks to run after a commit that wrote to a table, keyed by table name
+_write_listeners: Dict[str, List[Callable[[Set[str]], None]]] = defaultdict(list)
+
+def on_table_write(tables: Iterable[str], callback: Callable[[Set[str]], None]):
+    """Call ``callback(written_tables)`` after any commit that touched one of ``tables``"""
+    for table in tables:
+        _write_listeners[table].append(callback)
+
+def notify_table_write(tables: Iterable[str]):
+    """Fire write callbacks directly (for Core/bulk writes that bypass the unit of work)"""
+    written = set(tables)
+    callbacks = {id(cb): cb for table in written for cb in _write_listeners.get(table, ())}
+    for callback in callbacks.values():
+        try:
+            callback(written)
+        except Exception as e:
+            logger.error(f"Cache invalidation callback failed: {str(e)}")
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session, flush_context):
+    written = session.info.setdefault("written_tables", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(instance, "__tablename__", None)
+        if table is not None:
+            written.add(table)
+
+@event.listens_for(Session, "after_commit")
+def _notify_written_tables(session):
+    written = session.info.pop("written_tables", None)
+    if written:
+        notify_table_write(written)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    session.info.pop("written_tables", None)
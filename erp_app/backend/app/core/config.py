@@ -14,11 +14,93 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./database/erp.db"
+    ASYNC_DATABASE_URL: Optional[str] = None  # derived from DATABASE_URL when unset
+    
+    # Database connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # Postgres statement_timeout, 0 disables
     
     # Security
     SECRET_KEY: str = "your-secret-key-here-change-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    PASSWORD_HASH_WORKERS: int = 0  # 0 = min(4, cpu count)
+    PASSWORD_HASH_QUEUE_DEPTH: int = 64
+    
+    # Caching
+    DASHBOARD_CACHE_TTL_SECONDS: int = 30
+    
+    # Shared cache (auth, dashboard, reference data): "memory" (per worker) or "redis" (REDIS_URL, all workers)
+    CACHE_BACKEND: str = "memory"
+    CACHE_LOCK_SECONDS: float = 10  # single-flight: how long other workers wait for the one loading a value
+    
+    # Conditional GET for reference data and charts (ETags from table versions)
+    RESPONSE_CACHE_SIZE: int = 256  # bodies kept per worker by the memory backend
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+    
+    # Pagination (total=estimate)
+    PAGINATION_COUNT_CACHE_SIZE: int = 1024
+    PAGINATION_COUNT_CACHE_TTL_SECONDS: int = 60
+    PAGINATION_ESTIMATE_THRESHOLD: int = 1000  # Postgres estimates below this are counted exactly
+    
+    # Query instrumentation (per-request SQL counts, N+1 and slow-query logging)
+    QUERY_INSTRUMENTATION: bool = True
+    SLOW_QUERY_MS: int = 200  # log statements slower than this, 0 disables
+    SLOW_QUERY_EXPLAIN: bool = True  # attach the EXPLAIN plan to slow-query log lines
+    N_PLUS_ONE_THRESHOLD: int = 10  # same statement this many times in one request
+    
+    # Prometheus (/metrics); set PROMETHEUS_MULTIPROC_DIR in the environment for multiple workers
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_SECONDS: float = 5.0  # how often caches, bcrypt pool and process stats are copied
+    
+    # Health probes (served from a background sample)
+    HEALTH_SAMPLE_SECONDS: float = 10.0
+    HEALTH_DB_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_READY_MAX_AGE_SECONDS: float = 5.0  # readiness reuses a DB ping this recent
+    
+    # Exports (/export endpoints stream from a server-side cursor)
+    EXPORT_BATCH_SIZE: int = 2000  # rows fetched and written per batch
+    
+    # Imports (/api/imports background jobs)
+    IMPORT_BATCH_SIZE: int = 1000  # rows validated and inserted per transaction
+    IMPORT_MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    IMPORT_MAX_ERRORS: int = 1000  # row errors kept on the job; later ones are only counted
+    IMPORT_HEARTBEAT_SECONDS: float = 15.0  # running jobs refresh heartbeat_at this often...
+    IMPORT_STALE_SECONDS: float = 120.0  # ...and are failed by any worker once it is older than this
+    
+    # Bulk create (POST .../bulk endpoints)
+    BULK_MAX_ITEMS: int = 1000  # items accepted per request
+    
+    # Audit log of changes to module models, bulk-inserted after commit by a background writer.
+    # AUDIT_MODE is where committed entries wait for it: "async" (in memory; lost if the process
+    # dies) or "spool" (AUDIT_SPOOL_PATH, a local SQLite file synced before the commit returns)
+    AUDIT_ENABLED: bool = True
+    AUDIT_MODE: str = "async"
+    AUDIT_SPOOL_PATH: str = "./database/audit_spool.db"
+    AUDIT_SPOOL_CLAIM_SECONDS: float = 60.0  # a batch claimed this long ago by a writer that died is retaken
+    AUDIT_BATCH_SIZE: int = 500  # rows per INSERT
+    AUDIT_FLUSH_SECONDS: float = 1.0  # longest an entry waits for a batch to fill
+    AUDIT_QUEUE_SIZE: int = 10000  # with this many queued, writes wait for the writer...
+    AUDIT_BACKPRESSURE_SECONDS: float = 5.0  # ...and get a 503 after this long
+    
+    # Monthly partitions (Postgres) and archival of stock_movements, audit_logs, attendance,
+    # notifications and transactions: "file" writes a month to ARCHIVE_DIR as gzipped CSV and
+    # removes it, "table" detaches the partition into the archive schema (Postgres only)
+    PARTITION_PREMAKE_MONTHS: int = 3  # partitions created ahead of the current month
+    ARCHIVE_AFTER_MONTHS: int = 0  # months older than this are archived, 0 keeps everything
+    ARCHIVE_MODE: str = "file"
+    ARCHIVE_DIR: str = "archive"
+    
+    # Reorder suggestions: daily demand is the stock issued over the last REORDER_VELOCITY_DAYS
+    REORDER_VELOCITY_DAYS: int = 30
+    REORDER_LEAD_TIME_DAYS: int = 7  # demand to cover while an order is on its way
+    REORDER_COVER_DAYS: int = 30  # demand an order covers for products without a maximum_stock
     
     # Email
     SMTP_SERVER: Optional[str] = None
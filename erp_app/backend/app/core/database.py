@@ -2,32 +2,176 @@
 Database configuration and connection management
 """
 from sqlalchemy import create_engine, MetaData
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import StaticPool, QueuePool, AsyncAdaptedQueuePool
+from contextvars import ContextVar
+from typing import AsyncGenerator, Any, Dict, Optional
 import os
+import threading
+import time
 
 from .config import settings
+from . import instrumentation
 
 # Create database directory if it doesn't exist
 os.makedirs("database", exist_ok=True)
 
-# Create SQLAlchemy engine
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-    )
-else:
-    engine = create_engine(settings.DATABASE_URL)
+class PoolMonitor:
+    """Process-wide connection pool checkout statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.requests = 0
+            self.total_request_wait = 0.0
+            self.max_request_wait = 0.0
+
+    def record_checkout(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+        request_wait = _request_checkout_wait.get()
+        if request_wait is not None:
+            request_wait[0] += seconds
+
+    def record_request(self, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.total_request_wait += seconds
+            self.max_request_wait = max(self.max_request_wait, seconds)
+
+    def snapshot(self, pool) -> Dict[str, Any]:
+        """Pool occupancy plus checkout wait statistics"""
+        stats: Dict[str, Any] = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            checked_out = pool.checkedout()
+            capacity = pool.size() + max(settings.DB_MAX_OVERFLOW, 0)
+            stats.update({
+                "size": pool.size(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "saturation": round(checked_out / capacity, 4) if capacity else None,
+            })
+        with self._lock:
+            stats.update({
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "requests": self.requests,
+                "avg_request_wait_ms": round(self.total_request_wait / self.requests * 1000, 3) if self.requests else 0.0,
+                "max_request_wait_ms": round(self.max_request_wait * 1000, 3),
+            })
+        return stats
+
+pool_monitor = PoolMonitor()
+
+# Checkout wait accumulated by the current request (a one-item list so greenlets can add to it)
+_request_checkout_wait: ContextVar[Optional[list]] = ContextVar("request_checkout_wait", default=None)
+
+class _TimedCheckoutMixin:
+    """Times every checkout, including queueing for a free slot and pre-ping"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            pool_monitor.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_monitor.record_checkout(time.perf_counter() - start)
+        return connection
+
+class MonitoredQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class MonitoredAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+def _engine_options(url: str, is_async: bool) -> Dict[str, Any]:
+    """Pool and connection options for an engine, driven by Settings"""
+    if url.startswith("sqlite") and ":memory:" in url:
+        # An in-memory database only exists on its one connection
+        options: Dict[str, Any] = {"poolclass": StaticPool}
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        return options
+
+    options = {
+        "poolclass": MonitoredAsyncQueuePool if is_async else MonitoredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.startswith("sqlite"):
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+    elif settings.DB_STATEMENT_TIMEOUT_MS and url.startswith("postgres"):
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite / asyncpg)"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    if url.startswith("sqlite:"):
+        return url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if url.startswith("postgresql+psycopg2:"):
+        return url.replace("postgresql+psycopg2:", "postgresql+asyncpg:", 1)
+    if url.startswith("postgresql:") or url.startswith("postgres:"):
+        return "postgresql+asyncpg:" + url.split(":", 1)[1]
+    return url
+
+# Create SQLAlchemy engine (sync - used by scripts such as init_db)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL, is_async=False))
+
+if settings.QUERY_INSTRUMENTATION:
+    instrumentation.install()
+
+# Create async engine (used by the API routers)
+ASYNC_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, is_async=True))
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Create Base class for models
 Base = declarative_base()
 
+class Audited:
+    """Mixin for models whose inserts, updates and deletes are recorded in audit_logs"""
+    __audited__ = True
+
 # Metadata for reflecting tables
 metadata = MetaData()
 
@@ -39,13 +183,35 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get an async database session"""
+    request_wait = [0.0]
+    token = _request_checkout_wait.set(request_wait)
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
+    finally:
+        _request_checkout_wait.reset(token)
+        pool_monitor.record_request(request_wait[0])
+
+def import_all_models():
+    """Import all models so they are registered on Base.metadata"""
+    from . import models  # noqa: F401
+    from ..modules.crm import models as crm_models  # noqa: F401
+    from ..modules.crm import search as crm_search  # noqa: F401
+    from ..modules.inventory import models as inventory_models  # noqa: F401
+    from ..modules.accounting import models as accounting_models  # noqa: F401
+    from ..modules.hr import models as hr_models  # noqa: F401
+    from ..modules.sales import models as sales_models  # noqa: F401
+    from . import partitions  # noqa: F401
+
 async def create_all_tables():
     """Create all database tables"""
-    # Import all models to register them
-    from ..modules.crm.models import *
-    from ..modules.inventory.models import *
-    from ..modules.accounting.models import *
-    from ..modules.hr.models import *
-    from ..modules.sales.models import *
-    
-    Base.metadata.create_all(bind=engine)
+    import_all_models()
+
+    from .partitions import create_partitions
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # Next months' partitions on Postgres (nothing to do elsewhere)
+        await conn.run_sync(create_partitions)
@@ -0,0 +1,27 @@
+"""
+Sparse fieldsets for list endpoints
+
+A listing declares the columns it can return; ``?fields=id,invoice_number,total_amount``
+narrows the SELECT to those, so columns nobody asked for are neither read
+from the database nor serialized.
+"""
+from fastapi import HTTPException, status
+from typing import Any, List, Optional, Sequence
+
+def select_fields(columns: Sequence[Any], fields: Optional[str]) -> List[Any]:
+    """The entries of ``columns`` named in a comma-separated ``fields``, in listing order
+
+    All of them when ``fields`` is not given or blank; 400 naming any field
+    the listing does not have.
+    """
+    if fields is None or not fields.strip():
+        return list(columns)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    available = [column.key for column in columns]
+    unknown = sorted(requested.difference(available))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+        )
+    return [column for column in columns if column.key in requested]
@@ -0,0 +1,140 @@
+"""
+Background health sampling so probes are answered from a snapshot
+"""
+from datetime import datetime
+from sqlalchemy import text
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import os
+import sys
+import time
+import psutil
+
+from .config import settings
+from .database import async_engine
+
+logger = logging.getLogger(__name__)
+
+class HealthSampler:
+    """Refreshes system and database health every HEALTH_SAMPLE_SECONDS
+
+    Probes read the last snapshot instead of touching psutil or the database
+    themselves. Readiness may ping the database on demand, but only when the
+    last ping is older than HEALTH_READY_MAX_AGE_SECONDS, and concurrent
+    probes share a single ping.
+    """
+
+    def __init__(self):
+        self.system: Optional[Dict[str, Any]] = None
+        self.database = "unknown"
+        self.database_latency_ms: Optional[float] = None
+        self.database_checked_at = 0.0  # time.monotonic() of the last ping
+        self.sampled_at: Optional[datetime] = None
+        self._ping_lock = asyncio.Lock()
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.Task] = None  # the ping in flight, if any
+
+    @staticmethod
+    def _read_system() -> Dict[str, Any]:
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        return {
+            "python_version": sys.version,
+            "platform": sys.platform,
+            "cpu_count": os.cpu_count(),
+            "memory_usage": {
+                "total": memory.total,
+                "available": memory.available,
+                "percent": memory.percent
+            },
+            "disk_usage": {
+                "total": disk.total,
+                "free": disk.free,
+                "percent": disk.percent
+            }
+        }
+
+    @staticmethod
+    async def _select_one():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _ping(self):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        # A ping that outlived its timeout is still running; wait on it rather than start another
+        if self._pending is None or self._pending.done() or self._pending.get_loop() is not loop:
+            self._pending = loop.create_task(self._select_one())
+            self._pending.add_done_callback(lambda task: task.cancelled() or task.exception())
+        # Never cancelled: interrupting a connect midway can leak a half-open
+        # connection or wedge aiosqlite's thread, so a slow ping is abandoned
+        # and its result dropped when it finishes
+        done, _ = await asyncio.wait({self._pending}, timeout=settings.HEALTH_DB_TIMEOUT_SECONDS)
+        if not done:
+            self.database = f"unhealthy: no response within {settings.HEALTH_DB_TIMEOUT_SECONDS}s"
+            self.database_latency_ms = None
+        elif self._pending.exception() is not None:
+            self.database = f"unhealthy: {str(self._pending.exception())}"
+            self.database_latency_ms = None
+        else:
+            self.database = "healthy"
+            self.database_latency_ms = round((time.perf_counter() - start) * 1000, 3)
+        self.database_checked_at = time.monotonic()
+
+    async def ping_database(self, max_age: float = 0.0) -> bool:
+        """Whether the database answered a ping no older than ``max_age`` seconds"""
+        if time.monotonic() - self.database_checked_at > max_age:
+            async with self._ping_lock:
+                # Another probe may have pinged while this one waited for the lock
+                if time.monotonic() - self.database_checked_at > max_age:
+                    await self._ping()
+        return self.database == "healthy"
+
+    async def sample(self):
+        self.system = await asyncio.to_thread(self._read_system)
+        await self.ping_database()
+        self.sampled_at = datetime.utcnow()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "status": "healthy" if self.database == "healthy" else "degraded",
+            "sampled_at": self.sampled_at.isoformat() if self.sampled_at else None,
+            "database": self.database,
+            "database_latency_ms": self.database_latency_ms,
+            "system": self.system,
+        }
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.sample()
+            except Exception as e:
+                logger.error(f"Health sampling failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.HEALTH_SAMPLE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Sample every HEALTH_SAMPLE_SECONDS on the running event loop"""
+        if self._task is None:
+            # A fresh lock and event for this event loop (tests and reloads start more than one)
+            self._ping_lock = asyncio.Lock()
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop after the sample in progress, if any
+
+        The task is not cancelled: cancelling an aiosqlite connect midway can
+        leave shutdown waiting forever. A sample ends within
+        HEALTH_DB_TIMEOUT_SECONDS anyway, leaving a hung ping behind.
+        """
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+health_sampler = HealthSampler()
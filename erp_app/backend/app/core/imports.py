@@ -0,0 +1,422 @@
+"""
+Bulk CSV/XLSX imports, run as background jobs
+
+Rows are streamed from the file (openpyxl read-only mode for XLSX), validated
+in batches of IMPORT_BATCH_SIZE and inserted with one executemany per batch.
+Rows that fail validation or reuse a unique value are reported by row number
+and skipped; every other row is committed, batch by batch.
+
+A job runs in the process that accepted the upload, which refreshes its
+heartbeat_at every IMPORT_HEARTBEAT_SECONDS. import_reaper, running in every
+worker, fails pending or running jobs whose heartbeat is older than
+IMPORT_STALE_SECONDS: their process is gone. Progress updates only apply
+while a job is pending or running, so a failed job stays failed.
+"""
+from contextvars import Context
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from openpyxl import load_workbook
+from pydantic import BaseModel, ConfigDict, EmailStr, ValidationError
+from sqlalchemy import DateTime, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
+import asyncio
+import csv
+import enum
+import itertools
+import json
+import logging
+import os
+import socket
+import uuid
+
+from .audit import core_entry, record_core_changes, set_audit_actor
+from .cache import notify_table_write
+from .config import settings
+from .database import async_engine
+from .models import ImportJob, ImportStatus
+from .rollups import record_rows
+from ..modules.accounting.models import Customer
+from ..modules.crm.models import Lead, LeadStatus
+from ..modules.hr.models import Employee
+from ..modules.inventory.models import Product, ProductType
+
+logger = logging.getLogger(__name__)
+
+class ImportFormat(str, enum.Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+# Row schemas: one field per accepted column, named like the header (case and spaces ignored)
+class ImportRow(BaseModel):
+    # Spreadsheets hand over SKUs, phone numbers and postcodes as numbers
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+class ProductRow(ImportRow):
+    sku: str
+    name: str
+    description: Optional[str] = None
+    type: ProductType = ProductType.GOODS
+    category_id: Optional[int] = None
+    brand: Optional[str] = None
+    cost_price: Optional[Decimal] = None
+    selling_price: Optional[Decimal] = None
+    track_inventory: bool = True
+    minimum_stock: int = 0
+    reorder_level: int = 0
+    barcode: Optional[str] = None
+
+class CustomerRow(ImportRow):
+    name: str
+    customer_number: Optional[str] = None
+    email: Optional[EmailStr] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    country: Optional[str] = None
+    postal_code: Optional[str] = None
+    tax_number: Optional[str] = None
+    credit_limit: Optional[Decimal] = None
+    payment_terms: Optional[str] = None
+
+class LeadRow(ImportRow):
+    first_name: str
+    last_name: str
+    email: EmailStr
+    phone: Optional[str] = None
+    company: Optional[str] = None
+    job_title: Optional[str] = None
+    status: LeadStatus = LeadStatus.NEW
+    source: Optional[str] = None
+    notes: Optional[str] = None
+
+class EmployeeRow(ImportRow):
+    employee_id: str
+    first_name: str
+    last_name: str
+    email: EmailStr
+    phone: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    hire_date: date
+    department_id: Optional[int] = None
+    position_id: Optional[int] = None
+    salary: Optional[Decimal] = None
+    address: Optional[str] = None
+
+@dataclass(frozen=True)
+class ImportSpec:
+    """How the rows of one resource are validated and stored"""
+    resource: str
+    model: Any
+    schema: Type[ImportRow]
+    unique: Tuple[str, ...] = ()  # checked against the table and the rest of the batch
+    owner_column: Optional[str] = None  # set to the importing user's id
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+IMPORT_SPECS = {
+    spec.resource: spec
+    for spec in (
+        ImportSpec("products", Product, ProductRow, unique=("sku",)),
+        ImportSpec("customers", Customer, CustomerRow, unique=("customer_number",)),
+        ImportSpec("leads", Lead, LeadRow, unique=("email",), owner_column="assigned_to"),
+        ImportSpec("employees", Employee, EmployeeRow, unique=("employee_id", "email")),
+    )
+}
+
+def _header(value: Any) -> str:
+    return str(value or "").strip().lower().replace(" ", "_").replace("-", "_")
+
+def _records(rows: Iterator[Tuple[Any, ...]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(spreadsheet row number, {column: value}) for each non-blank row under the header"""
+    header = [_header(value) for value in next(rows, ())]
+    for number, values in enumerate(rows, start=2):
+        record = {}
+        for name, value in zip(header, values):
+            if isinstance(value, str):
+                value = value.strip()
+            if name and value is not None and value != "":
+                record[name] = value
+        if record:
+            yield number, record
+
+def _read_xlsx(workbook) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        yield from _records(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+def _read_csv(path: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from _records(csv.reader(f))
+
+def open_rows(path: str, format: ImportFormat) -> Tuple[Optional[int], Iterator[Tuple[int, Dict[str, Any]]]]:
+    """(row count if the file declares it, row iterator) - blocking, run it in a thread"""
+    if format == ImportFormat.XLSX:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        max_row = workbook.active.max_row
+        return (max_row - 1 if max_row else None), _read_xlsx(workbook)
+    return None, _read_csv(path)
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+    )
+
+def _defaults(table, now: datetime) -> Dict[str, Any]:
+    """Column defaults as concrete values, so rollups see exactly what is stored"""
+    values = {}
+    for column in table.columns:
+        default = column.default
+        if default is None:
+            continue
+        if default.is_scalar:
+            values[column.key] = default.arg
+        elif default.is_clause_element and isinstance(column.type, DateTime):
+            values[column.key] = now
+    return values
+
+def validate_batch(
+    spec: ImportSpec, batch: List[Tuple[int, Dict[str, Any]]], owner_id: Optional[int], now: datetime
+) -> Tuple[List[Tuple[int, Dict[str, Any]]], List[Tuple[int, str]]]:
+    """Split a batch into insertable (row number, values) pairs and (row number, error) pairs"""
+    defaults = _defaults(spec.table, now)
+    valid, errors = [], []
+    for number, record in batch:
+        try:
+            values = spec.schema.model_validate(record).model_dump()
+        except ValidationError as e:
+            errors.append((number, _describe(e)))
+            continue
+        if spec.owner_column:
+            values[spec.owner_column] = owner_id
+        valid.append((number, {**defaults, **values}))
+    return valid, errors
+
+async def drop_duplicates(conn: AsyncConnection, spec: ImportSpec, rows: List[Tuple[int, Dict[str, Any]]], errors):
+    """Rows whose unique values are not already taken, by the table or an earlier row of the batch"""
+    taken: Dict[str, Set[Any]] = {}
+    for column in spec.unique:
+        values = {row[column] for _, row in rows if row.get(column) is not None}
+        if values:
+            existing = await conn.scalars(select(spec.table.c[column]).where(spec.table.c[column].in_(values)))
+            taken[column] = set(existing)
+
+    kept = []
+    for number, row in rows:
+        duplicate = next(
+            (column for column in spec.unique if row.get(column) is not None and row[column] in taken[column]), None
+        )
+        if duplicate:
+            errors.append((number, f"{duplicate}: {row[duplicate]} already exists"))
+            continue
+        for column in spec.unique:
+            if row.get(column) is not None:
+                taken[column].add(row[column])
+        kept.append((number, row))
+    return kept
+
+async def _write(conn: AsyncConnection, spec: ImportSpec, rows: List[Dict[str, Any]]) -> List[int]:
+    result = await conn.execute(
+        insert(spec.table).returning(spec.table.c.id, sort_by_parameter_order=True), rows
+    )
+    ids = list(result.scalars())
+    # Core inserts bypass the ORM flush hooks that keep the dashboard rollups current and audit changes
+    await conn.run_sync(record_rows, spec.model, rows)
+    record_core_changes(conn, [
+        core_entry("CREATE", spec.table.name, id, new={"id": id, **row}) for id, row in zip(ids, rows)
+    ])
+    return ids
+
+async def insert_batch(
+    conn: AsyncConnection, spec: ImportSpec, rows: List[Tuple[int, Dict[str, Any]]], errors
+) -> List[Tuple[int, int]]:
+    """Insert the rows with one executemany in ``conn``'s transaction; returns (row number, new id) for each stored row
+
+    The caller commits.
+    """
+    if not rows:
+        return []
+    try:
+        async with conn.begin_nested():
+            ids = await _write(conn, spec, [row for _, row in rows])
+        return [(number, id) for (number, _), id in zip(rows, ids)]
+    except IntegrityError:
+        pass
+    # A constraint the checks above can't see (a foreign key, a concurrent writer): find the rows
+    # one by one, each in a savepoint of the same transaction
+    stored = []
+    for number, row in rows:
+        try:
+            async with conn.begin_nested():
+                stored.append((number, (await _write(conn, spec, [row]))[0]))
+        except IntegrityError as e:
+            errors.append((number, f"rejected by the database: {e.orig}"))
+    return stored
+
+# Names this process on the jobs it runs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_ACTIVE = (ImportStatus.PENDING, ImportStatus.RUNNING)
+
+class ImportAbandoned(Exception):
+    """The job was failed by another worker, which took its process for gone"""
+
+async def _update_job(engine: AsyncEngine, job_id: int, **values):
+    jobs = ImportJob.__table__
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            update(jobs)
+            .where(jobs.c.id == job_id, jobs.c.status.in_(_ACTIVE))
+            .values(heartbeat_at=datetime.utcnow(), **values)
+        )
+    if not result.rowcount:
+        raise ImportAbandoned(f"Import {job_id} was failed by another worker")
+
+async def _heartbeat(engine: AsyncEngine, job_id: int, done: asyncio.Event):
+    """Refresh the job's heartbeat_at until ``done`` is set
+
+    Not cancelled but stopped through ``done``, so no write is interrupted midway.
+    """
+    while True:
+        try:
+            await asyncio.wait_for(done.wait(), timeout=settings.IMPORT_HEARTBEAT_SECONDS)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await _update_job(engine, job_id)
+        except ImportAbandoned:
+            return
+        except Exception as e:
+            logger.error(f"Heartbeat of import {job_id} failed: {str(e)}")
+
+async def run_import(
+    engine: AsyncEngine, spec: ImportSpec, job_id: int, path: str, format: ImportFormat, owner_id: Optional[int]
+):
+    """Import ``path`` into ``spec``'s table, recording progress on the ImportJob after every batch"""
+    # The job runs in its own context, so this attributes the rows to the uploader
+    set_audit_actor(owner_id)
+    processed = inserted = failed = 0
+    errors: List[Dict[str, Any]] = []
+    rows = None
+    done = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(engine, job_id, done))
+    try:
+        total, rows = await asyncio.to_thread(open_rows, path, format)
+        await _update_job(engine, job_id, status=ImportStatus.RUNNING, started_at=datetime.utcnow(), total_rows=total)
+
+        while batch := await asyncio.to_thread(list, itertools.islice(rows, settings.IMPORT_BATCH_SIZE)):
+            now = datetime.utcnow()
+            valid, batch_errors = await asyncio.to_thread(validate_batch, spec, batch, owner_id, now)
+            async with engine.begin() as conn:
+                valid = await drop_duplicates(conn, spec, valid, batch_errors)
+                stored = await insert_batch(conn, spec, valid, batch_errors)
+            notify_table_write([spec.table.name])
+
+            processed += len(batch)
+            inserted += len(stored)
+            failed += len(batch_errors)
+            room = settings.IMPORT_MAX_ERRORS - len(errors)
+            errors.extend({"row": number, "error": message} for number, message in sorted(batch_errors)[:room])
+            await _update_job(
+                engine, job_id, processed_rows=processed, inserted_rows=inserted, failed_rows=failed,
+                errors=json.dumps(errors),
+            )
+
+        await _update_job(engine, job_id, status=ImportStatus.COMPLETED, finished_at=datetime.utcnow())
+        logger.info(f"Import {job_id} into {spec.resource}: {inserted} inserted, {failed} failed")
+    except ImportAbandoned as e:
+        logger.warning(f"{str(e)}; stopped after {processed} rows")
+    except Exception as e:
+        logger.error(f"Import {job_id} into {spec.resource} failed: {str(e)}")
+        try:
+            await _update_job(
+                engine, job_id, status=ImportStatus.FAILED, finished_at=datetime.utcnow(), message=str(e),
+            )
+        except ImportAbandoned:
+            pass
+    finally:
+        done.set()
+        await heartbeat
+        if rows is not None:
+            rows.close()
+        os.remove(path)
+
+async def fail_abandoned_imports(engine: AsyncEngine, now: Optional[datetime] = None) -> int:
+    """Fail pending or running jobs whose heartbeat is older than IMPORT_STALE_SECONDS
+
+    Their process stopped without finishing them (a restart, a crash). Jobs
+    this process is running are never touched.
+    """
+    jobs = ImportJob.__table__
+    now = now or datetime.utcnow()
+    stale = now - timedelta(seconds=settings.IMPORT_STALE_SECONDS)
+    query = (
+        update(jobs)
+        .where(jobs.c.status.in_(_ACTIVE), func.coalesce(jobs.c.heartbeat_at, jobs.c.created_at) < stale)
+        .values(status=ImportStatus.FAILED, finished_at=now, message="Its worker stopped before it finished")
+    )
+    if _running:
+        query = query.where(jobs.c.id.notin_(list(_running)))
+    async with engine.begin() as conn:
+        result = await conn.execute(query)
+    if result.rowcount:
+        logger.warning(f"Marked {result.rowcount} abandoned imports as failed")
+    return result.rowcount
+
+class ImportReaper:
+    """Background task that fails abandoned imports, at start and every IMPORT_HEARTBEAT_SECONDS"""
+
+    def __init__(self, engine: Optional[AsyncEngine] = None):
+        self.engine = engine  # None: the application's async engine
+        self._stopping = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await fail_abandoned_imports(self.engine or async_engine)
+            except Exception as e:
+                logger.error(f"Failing abandoned imports failed: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=settings.IMPORT_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            # A fresh event for this event loop (tests and reloads start more than one)
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+import_reaper = ImportReaper()
+
+# Jobs running in this process, by id; also keeps their tasks referenced until they finish
+_running: Dict[int, asyncio.Task] = {}
+
+def start_import(
+    engine: AsyncEngine, spec: ImportSpec, job_id: int, path: str, format: ImportFormat, owner_id: Optional[int]
+) -> asyncio.Task:
+    """Run the import in the background on the running event loop
+
+    The task starts from an empty context, so its SQL is not counted against
+    the request that started it.
+    """
+    task = asyncio.get_running_loop().create_task(
+        run_import(engine, spec, job_id, path, format, owner_id), context=Context()
+    )
+    _running[job_id] = task
+    task.add_done_callback(lambda _: _running.pop(job_id, None))
+    return task
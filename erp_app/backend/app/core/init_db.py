@@ -8,7 +8,9 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from app.core.database import Base, engine, SessionLocal
 from app.core.models import User, SystemSetting
 from app.core.security import get_password_hash
+from app.core import rollups  # noqa: F401 - keeps daily_rollups in step with the sample data
 from app.modules.crm.models import Lead, Contact, Deal
+from app.modules.crm import search  # noqa: F401 - full-text index tables and triggers
 from app.modules.inventory.models import Product, Category, Warehouse
 from app.modules.accounting.models import Customer, Invoice
 from app.modules.hr.models import Employee, Department
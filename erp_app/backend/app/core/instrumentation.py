@@ -0,0 +1,207 @@
+"""
+Per-request SQL instrumentation: statement counts, DB time, N+1 and slow-query detection
+"""
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from .config import settings
+from .sql import explain
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+class RequestQueryStats:
+    """SQL issued while handling one request"""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.slow = 0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.statements += 1
+        self.db_time += seconds
+        self.shapes[statement] += 1
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Statements run at least ``threshold`` times - one per row of an outer query, usually"""
+        threshold = threshold or settings.N_PLUS_ONE_THRESHOLD
+        return [(statement, count) for statement, count in self.shapes.most_common() if count >= threshold]
+
+_request_queries: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_queries", default=None)
+
+# Called with (statement, seconds) after every cursor execution, e.g. to feed Prometheus
+statement_observers: List[Callable[[str, float], None]] = []
+
+def current_queries() -> Optional[RequestQueryStats]:
+    """Stats of the request being handled, if the middleware is tracking one"""
+    return _request_queries.get()
+
+class QueryMetrics:
+    """Process-wide per-route aggregates of RequestQueryStats"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes: Dict[str, Dict[str, Any]] = {}
+
+    def record_request(self, route: str, stats: RequestQueryStats, n_plus_one: List[Tuple[str, int]]):
+        with self._lock:
+            entry = self.routes.setdefault(route, {
+                "requests": 0, "statements": 0, "max_statements": 0, "db_time": 0.0,
+                "max_db_time": 0.0, "slow_queries": 0, "n_plus_one_requests": 0, "n_plus_one_example": None,
+            })
+            entry["requests"] += 1
+            entry["statements"] += stats.statements
+            entry["max_statements"] = max(entry["max_statements"], stats.statements)
+            entry["db_time"] += stats.db_time
+            entry["max_db_time"] = max(entry["max_db_time"], stats.db_time)
+            entry["slow_queries"] += stats.slow
+            if n_plus_one:
+                entry["n_plus_one_requests"] += 1
+                entry["n_plus_one_example"] = {"statement": n_plus_one[0][0], "count": n_plus_one[0][1]}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-route statement counts and DB time, busiest route first"""
+        with self._lock:
+            routes = {
+                route: {
+                    "requests": entry["requests"],
+                    "avg_statements": round(entry["statements"] / entry["requests"], 2),
+                    "max_statements": entry["max_statements"],
+                    "avg_db_ms": round(entry["db_time"] / entry["requests"] * 1000, 3),
+                    "max_db_ms": round(entry["max_db_time"] * 1000, 3),
+                    "slow_queries": entry["slow_queries"],
+                    "n_plus_one_requests": entry["n_plus_one_requests"],
+                    "n_plus_one_example": entry["n_plus_one_example"],
+                }
+                for route, entry in sorted(self.routes.items(), key=lambda item: -item[1]["db_time"])
+            }
+        return {
+            "enabled": settings.QUERY_INSTRUMENTATION,
+            "slow_query_ms": settings.SLOW_QUERY_MS,
+            "n_plus_one_threshold": settings.N_PLUS_ONE_THRESHOLD,
+            "routes": routes,
+        }
+
+query_metrics = QueryMetrics()
+
+@contextmanager
+def track_queries() -> Iterator[RequestQueryStats]:
+    """Collect the SQL run inside the block (on any engine) into a RequestQueryStats"""
+    stats = RequestQueryStats()
+    token = _request_queries.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_queries.reset(token)
+
+# What explain() puts in front of a statement, per dialect name
+_explain_prefixes: Dict[str, str] = {}
+
+def _explain_prefix(dialect) -> str:
+    if dialect.name not in _explain_prefixes:
+        _explain_prefixes[dialect.name] = str(explain(text("")).compile(dialect=dialect))
+    return _explain_prefixes[dialect.name]
+
+def _explain(conn, statement: str, parameters) -> str:
+    """The plan of a statement that just ran on ``conn``, in a savepoint of its transaction
+
+    On Postgres a failed statement aborts the transaction; rolling back to the
+    savepoint keeps a failing EXPLAIN from breaking the request.
+    """
+    conn.info["explaining"] = True
+    try:
+        with conn.begin_nested() if conn.in_transaction() else nullcontext():
+            rows = conn.exec_driver_sql(_explain_prefix(conn.dialect) + statement, parameters).all()
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        conn.info["explaining"] = False
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - context._query_start
+    if conn.info.get("explaining"):
+        return
+    for observer in statement_observers:
+        observer(statement, seconds)
+    if not settings.QUERY_INSTRUMENTATION:
+        # Installed for the observers (Prometheus) alone
+        return
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+    if settings.SLOW_QUERY_MS and seconds * 1000 >= settings.SLOW_QUERY_MS:
+        if stats is not None:
+            stats.slow += 1
+        plan = ""
+        if settings.SLOW_QUERY_EXPLAIN and not executemany and statement.lstrip().upper().startswith(_EXPLAINABLE):
+            plan = "\nPlan:\n" + _explain(conn, statement, parameters)
+        logger.warning("Slow query (%.1f ms): %s%s", seconds * 1000, statement, plan)
+
+def install():
+    """Listen to cursor executions on every engine (sync and async alike)"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+def route_template(scope) -> Optional[str]:
+    """Full route template of a handled request, e.g. ``/api/crm/leads/{lead_id}``
+
+    Included routers only expose their own part of the path, so the prefix is
+    recovered from the concrete path in front of the rendered route.
+    """
+    route = scope.get("route")
+    if route is None:
+        return None
+    concrete = route.path_format
+    for name, value in scope.get("path_params", {}).items():
+        concrete = concrete.replace("{" + name + "}", str(value))
+    path = scope["path"]
+    prefix = path[:len(path) - len(concrete)] if path.endswith(concrete) else ""
+    return prefix + route.path
+
+class QueryInstrumentationMiddleware:
+    """ASGI middleware giving each HTTP request its own RequestQueryStats
+
+    When the request finishes its totals are added to ``query_metrics`` under
+    the route template (e.g. ``GET /api/crm/leads/{lead_id}``), and any
+    statement repeated N_PLUS_ONE_THRESHOLD times is logged as a likely N+1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                template = route_template(scope)
+                if template is not None:
+                    name = f"{scope['method']} {template}"
+                    n_plus_one = stats.repeated()
+                    for statement, count in n_plus_one:
+                        logger.warning("Possible N+1 on %s: %d runs of %s", name, count, statement)
+                    query_metrics.record_request(name, stats, n_plus_one)
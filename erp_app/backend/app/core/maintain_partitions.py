@@ -0,0 +1,36 @@
+"""
+Create upcoming monthly partitions and archive old months
+
+Run daily, e.g. from cron, so next month's partitions exist before rows arrive
+(rows without one land in the DEFAULT partition) and months older than
+ARCHIVE_AFTER_MONTHS are archived.
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.core.config import settings
+from app.core.database import engine, import_all_models
+from app.core.partitions import archive_partitions, create_partitions
+
+def main():
+    """Create missing partitions (Postgres), then archive cold months (ARCHIVE_MODE)"""
+    print("=== Maintaining partitions ===")
+    
+    try:
+        import_all_models()
+        with engine.begin() as conn:
+            for name in create_partitions(conn):
+                print(f"Partition created: {name}")
+        
+        archived = archive_partitions(engine)
+        for name, rows in archived.items():
+            print(f"Archived {name}: {rows} rows ({settings.ARCHIVE_MODE})")
+        print(f"Done: {len(archived)} months archived")
+        
+    except Exception as e:
+        print(f"Maintenance failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
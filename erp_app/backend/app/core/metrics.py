@@ -0,0 +1,216 @@
+"""
+Prometheus metrics: request latency, DB timings, caches, bcrypt pool and worker processes
+
+Under several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty,
+writable directory before starting the server. Every worker then writes its
+samples there and /metrics aggregates all of them, whichever worker answers.
+"""
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, REGISTRY, generate_latest, multiprocess,
+)
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+import psutil
+
+from .config import settings
+from . import instrumentation
+from .instrumentation import current_queries, route_template, statement_observers
+from .security import PasswordHasherPool
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+HTTP_REQUESTS = Counter(
+    "erp_http_requests_total", "HTTP requests handled", ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "erp_http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_PROGRESS = Gauge(
+    "erp_http_requests_in_progress", "HTTP requests being handled", ["method"], multiprocess_mode="livesum",
+)
+HTTP_DB_TIME = Histogram(
+    "erp_http_request_db_seconds", "Time spent in SQL per request", ["method", "route"], buckets=DB_BUCKETS,
+)
+HTTP_DB_STATEMENTS = Histogram(
+    "erp_http_request_db_statements", "SQL statements per request", ["method", "route"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_QUERY_LATENCY = Histogram(
+    "erp_db_query_duration_seconds", "SQL statement latency", ["operation"], buckets=DB_BUCKETS,
+)
+
+CACHE_HITS = Counter("erp_cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("erp_cache_misses_total", "Cache misses", ["cache"])
+CACHE_EVICTIONS = Counter("erp_cache_evictions_total", "Cache evictions", ["cache"])
+CACHE_SIZE = Gauge("erp_cache_entries", "Entries held in a cache", ["cache"], multiprocess_mode="livesum")
+
+HASHER_IN_FLIGHT = Gauge(
+    "erp_password_hasher_in_flight", "bcrypt jobs running or queued", multiprocess_mode="livesum",
+)
+HASHER_QUEUED = Gauge(
+    "erp_password_hasher_queued", "bcrypt jobs waiting for a worker thread", multiprocess_mode="livesum",
+)
+HASHER_COMPLETED = Counter("erp_password_hasher_completed_total", "bcrypt jobs completed")
+HASHER_FAILED = Counter("erp_password_hasher_failed_total", "bcrypt jobs that raised")
+HASHER_REJECTED = Counter("erp_password_hasher_rejected_total", "bcrypt jobs rejected with 503")
+
+# Per worker (multiprocess "liveall" adds a pid label and drops dead workers)
+PROCESS_MEMORY = Gauge("erp_process_resident_memory_bytes", "Worker resident memory", multiprocess_mode="liveall")
+PROCESS_CPU = Gauge("erp_process_cpu_seconds", "Worker CPU time (user + system)", multiprocess_mode="liveall")
+PROCESS_THREADS = Gauge("erp_process_threads", "Worker OS threads", multiprocess_mode="liveall")
+PROCESS_OPEN_FDS = Gauge("erp_process_open_fds", "Worker open file descriptors", multiprocess_mode="liveall")
+PROCESS_START = Gauge("erp_process_start_time_seconds", "Worker start time (unix)", multiprocess_mode="liveall")
+
+def _operation(statement: str) -> str:
+    verb = statement.lstrip()[:6].upper()
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+def _observe_statement(statement: str, seconds: float):
+    DB_QUERY_LATENCY.labels(_operation(statement)).observe(seconds)
+
+class MetricsSampler:
+    """Copies in-process stats (caches, bcrypt pool, this worker) into the metrics above
+
+    The caches and the hasher keep plain counters; the sampler adds what
+    changed since its last run, so the Prometheus counters stay cumulative
+    and sum correctly across workers.
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, Any] = {}  # TTLCache or shared_cache.Cache
+        self.hasher: Optional[PasswordHasherPool] = None
+        self._seen: Dict[Tuple[str, str], int] = {}
+        self._process = psutil.Process()
+        self._task: Optional[asyncio.Task] = None
+
+    def track_cache(self, name: str, cache: Any):
+        self.caches[name] = cache
+
+    def track_hasher(self, hasher: PasswordHasherPool):
+        self.hasher = hasher
+
+    def _add_delta(self, counter, key: Tuple[str, str], value: int):
+        delta = value - self._seen.get(key, 0)
+        if delta > 0:
+            counter.inc(delta)
+        self._seen[key] = value
+
+    def sample(self):
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            self._add_delta(CACHE_HITS.labels(name), (name, "hits"), stats["hits"])
+            self._add_delta(CACHE_MISSES.labels(name), (name, "misses"), stats["misses"])
+            self._add_delta(CACHE_EVICTIONS.labels(name), (name, "evictions"), stats["evictions"])
+            CACHE_SIZE.labels(name).set(stats["size"])
+
+        if self.hasher is not None:
+            stats = self.hasher.stats()
+            HASHER_IN_FLIGHT.set(stats["in_flight"])
+            HASHER_QUEUED.set(stats["queued"])
+            self._add_delta(HASHER_COMPLETED, ("hasher", "completed"), stats["completed"])
+            self._add_delta(HASHER_FAILED, ("hasher", "failed"), stats["failed"])
+            self._add_delta(HASHER_REJECTED, ("hasher", "rejected"), stats["rejected"])
+
+        with self._process.oneshot():
+            cpu = self._process.cpu_times()
+            PROCESS_MEMORY.set(self._process.memory_info().rss)
+            PROCESS_CPU.set(cpu.user + cpu.system)
+            PROCESS_THREADS.set(self._process.num_threads())
+            if hasattr(self._process, "num_fds"):
+                PROCESS_OPEN_FDS.set(self._process.num_fds())
+            PROCESS_START.set(self._process.create_time())
+
+    async def _run(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Metrics sampling failed: {str(e)}")
+            await asyncio.sleep(settings.METRICS_SAMPLE_SECONDS)
+
+    def start(self):
+        """Sample every METRICS_SAMPLE_SECONDS on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if MULTIPROCESS:
+            multiprocess.mark_process_dead(os.getpid())
+
+sampler = MetricsSampler()
+
+def install():
+    """Time every SQL statement into erp_db_query_duration_seconds
+
+    Installs the cursor hooks too: observers only run behind them, and
+    database.py leaves them out when QUERY_INSTRUMENTATION is off.
+    """
+    instrumentation.install()
+    if _observe_statement not in statement_observers:
+        statement_observers.append(_observe_statement)
+
+def render() -> Tuple[bytes, str]:
+    """Exposition of all workers' metrics (or this process's, outside multiprocess mode)"""
+    sampler.sample()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+class PrometheusMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests per route
+
+    Add it before QueryInstrumentationMiddleware so it runs inside the
+    request's query tracking and can report SQL time per route too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            route = route_template(scope) or "unmatched"
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            stats = current_queries()
+            if stats is not None:
+                HTTP_DB_TIME.labels(method, route).observe(stats.db_time)
+                HTTP_DB_STATEMENTS.labels(method, route).observe(stats.statements)
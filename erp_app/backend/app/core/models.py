@@ -1,13 +1,13 @@
 """
 Core Models - User Management and Base Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text, Boolean, ForeignKey, Enum, Numeric, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
 
-from ..database import Base
+from .database import Base
 
 class UserRole(str, enum.Enum):
     SUPER_ADMIN = "super_admin"
@@ -157,3 +157,45 @@ class FileUpload(Base):
     # Access control
     is_public = Column(Boolean, default=False)
     is_deleted = Column(Boolean, default=False)
+
+class DailyRollup(Base):
+    __tablename__ = "daily_rollups"
+    __table_args__ = (UniqueConstraint("metric", "day", name="uq_daily_rollups_metric_day"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    module = Column(String(50), nullable=False)  # crm, accounting, sales
+    metric = Column(String(50), nullable=False)  # leads, paid_invoices, orders
+    day = Column(Date, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(15, 2), nullable=False, default=0)
+
+class ImportStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    resource = Column(String(50), nullable=False)  # products, customers, leads, employees
+    filename = Column(String(255), nullable=False)
+    status = Column(Enum(ImportStatus), default=ImportStatus.PENDING)
+    
+    # Progress
+    total_rows = Column(Integer, nullable=True)  # known up front for XLSX only
+    processed_rows = Column(Integer, default=0)
+    inserted_rows = Column(Integer, default=0)
+    failed_rows = Column(Integer, default=0)
+    errors = Column(Text)  # JSON list of {"row": n, "error": "..."}, the first IMPORT_MAX_ERRORS
+    message = Column(Text)  # why a failed job stopped
+    
+    # The process running the job, and when it last confirmed it still is
+    worker_id = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
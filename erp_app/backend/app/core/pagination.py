@@ -0,0 +1,183 @@
+"""
+Offset and keyset (cursor) pagination for list endpoints
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, literal, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import NullType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import base64
+import binascii
+import enum
+import json
+
+from .cache import TTLCache
+from .config import settings
+from .sql import explain
+
+@dataclass
+class Page:
+    """One page of rows plus the fields list endpoints return alongside them
+
+    Items are ORM objects for an entity select(), and dicts keyed by column
+    for a select() of columns.
+    """
+    items: List[Any]
+    total: Optional[int]
+    total_is_exact: bool
+    skip: int
+    limit: int
+    next_cursor: Optional[str]
+
+    def meta(self) -> Dict[str, Any]:
+        meta = {"skip": self.skip, "limit": self.limit, "next_cursor": self.next_cursor}
+        if self.total is not None:
+            meta["total"] = self.total
+            meta["total_is_exact"] = self.total_is_exact
+        return meta
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque token for the sort key of the last row on a page"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values from a cursor token; 400 if it is malformed or for another ordering"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = [_decode_value(v) for v in json.loads(payload)]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+class TotalMode(str, enum.Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+# Exact counts reused for total=estimate, keyed by the compiled count statement
+count_cache = TTLCache(
+    maxsize=settings.PAGINATION_COUNT_CACHE_SIZE,
+    ttl=settings.PAGINATION_COUNT_CACHE_TTL_SECONDS,
+)
+
+async def _exact_count(db: AsyncSession, query) -> int:
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+async def _planner_estimate(db: AsyncSession, query) -> int:
+    """Row estimate from the Postgres planner for ``query`` (no rows are read)"""
+    plan = await db.scalar(explain(query))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def count_total(db: AsyncSession, query, mode: TotalMode) -> Tuple[Optional[int], bool]:
+    """(total, is_exact) for ``query`` under the requested total mode"""
+    if mode == TotalMode.NONE:
+        return None, False
+    if mode == TotalMode.EXACT:
+        return await _exact_count(db, query), True
+
+    if db.bind.dialect.name == "postgresql":
+        estimate = await _planner_estimate(db, query)
+        if estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+            return estimate, False
+        return await _exact_count(db, query), True
+
+    count_query = select(func.count()).select_from(query.subquery())
+    compiled = count_query.compile(dialect=db.bind.dialect)
+    key = (str(compiled), tuple(sorted((k, repr(v)) for k, v in compiled.params.items())))
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached, False
+    total = await db.scalar(count_query)
+    count_cache.set(key, total)
+    return total, True
+
+def _selects_entity(query) -> bool:
+    descriptions = query.column_descriptions
+    return len(descriptions) == 1 and descriptions[0]["expr"] is descriptions[0]["entity"]
+
+async def paginate(
+    db: AsyncSession,
+    query,
+    keys: Sequence[Any],
+    *,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    descending: bool = True,
+    total: Optional[TotalMode] = None,
+    count: bool = True,
+) -> Page:
+    """Run ``query`` ordered by ``keys`` (unique together, e.g. (created_at, id) or (id,))
+
+    Without a cursor this is plain OFFSET/LIMIT paging. With one, rows are
+    seeked past the cursor's key with a row-value comparison, so every page
+    costs the same however deep it is. Either way ``next_cursor`` points at
+    the page after this one.
+
+    ``total`` picks how the total is produced (see count_total); when it is
+    not given, offset pages of endpoints that ``count`` get an exact total
+    and cursor pages get none.
+
+    Select columns rather than an entity where the rows are only serialized:
+    items are then plain dicts and no ORM objects are built.
+    """
+    if total is None:
+        total = TotalMode.EXACT if count and cursor is None else TotalMode.NONE
+    ordering = [key.desc() if descending else key.asc() for key in keys]
+    # Sort keys travel as the raw driver values, so the seek compares exactly like ORDER BY
+    raw_keys = [type_coerce(key, NullType()) for key in keys]
+    if cursor is not None:
+        values = [literal(v, NullType()) for v in decode_cursor(cursor, len(keys))]
+        key = tuple_(*raw_keys) if len(keys) > 1 else raw_keys[0]
+        bound = tuple_(*values) if len(keys) > 1 else values[0]
+        page_query = query.where(key < bound if descending else key > bound)
+        if len(keys) > 1:
+            # Implied by the row comparison, but a plain bound on the leading key is what the
+            # planner uses to prune partitions and bound index range scans
+            page_query = page_query.where(raw_keys[0] <= values[0] if descending else raw_keys[0] >= values[0])
+        skip = 0
+    else:
+        page_query = query.offset(skip)
+    row_count, total_is_exact = await count_total(db, query, total)
+
+    # One row past the page tells us whether there is a next one
+    page_query = page_query.add_columns(*(key.label(f"cursor_{i}") for i, key in enumerate(raw_keys)))
+    rows = (await db.execute(page_query.order_by(*ordering).limit(limit + 1))).all()
+    if _selects_entity(query):
+        items = [row[0] for row in rows[:limit]]
+    else:
+        # The cursor columns come last, so zip() leaves them out
+        names = query.selected_columns.keys()
+        items = [dict(zip(names, row)) for row in rows[:limit]]
+    next_cursor = encode_cursor(rows[limit - 1][-len(keys):]) if len(rows) > limit else None
+    return Page(
+        items=items, total=row_count, total_is_exact=total_is_exact,
+        skip=skip, limit=limit, next_cursor=next_cursor,
+    )
@@ -0,0 +1,300 @@
+"""
+Monthly partitions for the tables that only grow, and archival of old months
+
+stock_movements, audit_logs, attendance and notifications are appended to
+forever and read newest first. On Postgres each one is PARTITION BY RANGE
+over its date column: one partition per month, plus a DEFAULT partition for
+rows outside them. A query that bounds the date column only scans the months
+it can match. Postgres requires unique constraints on a partitioned table to
+include the partition key, so their primary keys are (id, <key>). Tables
+with other unique columns cannot be partitioned without weakening them, so
+transactions (whose transaction numbers are unique across all dates) stays
+a plain table, and register() refuses such a table.
+
+Other databases keep plain tables. Archival works on both: a month older than
+ARCHIVE_AFTER_MONTHS is written to ARCHIVE_DIR as gzipped CSV and then
+removed (the partition is dropped on Postgres, the rows deleted elsewhere).
+With ARCHIVE_MODE=table it is instead detached into the ``archive`` schema,
+where it can still be queried (Postgres only).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from sqlalchemy import DateTime, and_, delete, event, func, select, sql, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import PrimaryKeyConstraint, UniqueConstraint
+from typing import Any, Dict, List, Optional
+import csv
+import enum
+import gzip
+import logging
+import os
+
+from .config import settings
+from .models import AuditLog, Notification
+from ..modules.hr.models import Attendance
+from ..modules.inventory.models import StockMovement
+
+logger = logging.getLogger(__name__)
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    """A table range-partitioned by month over its ``key`` column"""
+    model: Any
+    key: str
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def column(self):
+        return self.model.__table__.c[self.key]
+
+    @property
+    def default_partition(self) -> str:
+        return f"{self.table_name}_default"
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.table_name}_p{month:%Y%m}"
+
+    def _bound(self, day: date):
+        # DateTime columns are compared with datetimes (SQLite's bind processor needs one)
+        return datetime.combine(day, time.min) if isinstance(self.column.type, DateTime) else day
+
+    def _in_month(self, month: date):
+        return and_(self.column >= self._bound(month), self.column < self._bound(add_months(month, 1)))
+
+    def is_partitioned(self, connection: Connection) -> bool:
+        if connection.dialect.name != "postgresql":
+            return False
+        kind = connection.scalar(
+            text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": self.table_name}
+        )
+        return kind == "p"
+
+    def create_partitions(self, connection: Connection, first: date, last: date) -> List[str]:
+        """Create the missing monthly partitions from ``first``'s month through ``last``'s"""
+        created = []
+        month, last = month_start(first), month_start(last)
+        while month <= last:
+            name = self.partition_name(month)
+            if connection.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is None:
+                self._create_partition(connection, name, month)
+                created.append(name)
+            month = add_months(month, 1)
+        return created
+
+    def _create_partition(self, connection: Connection, name: str, month: date):
+        base, default = self.table_name, self.default_partition
+        bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        in_month = f"{self.key} >= :lo AND {self.key} < :hi"
+        params = {"lo": self._bound(month), "hi": self._bound(add_months(month, 1))}
+        if not connection.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_month})"), params):
+            connection.execute(text(f"CREATE TABLE {name} PARTITION OF {base} {bounds}"))
+            return
+        # The month already has rows in the DEFAULT partition, which must not overlap a new
+        # partition: take it out, move those rows across, and put it back
+        connection.execute(text(f"ALTER TABLE {base} DETACH PARTITION {default}"))
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {base} {bounds}"))
+        connection.execute(text(f"INSERT INTO {name} SELECT * FROM {default} WHERE {in_month}"), params)
+        connection.execute(text(f"DELETE FROM {default} WHERE {in_month}"), params)
+        connection.execute(text(f"ALTER TABLE {base} ATTACH PARTITION {default} DEFAULT"))
+
+    def convert(self, connection: Connection):
+        """Rebuild an existing plain table as a partitioned one, keeping its rows and ids (Postgres)"""
+        if connection.dialect.name != "postgresql" or self.is_partitioned(connection):
+            return
+        base, old = self.table_name, f"{self.table_name}_unpartitioned"
+        if connection.scalar(text("SELECT to_regclass(:name)"), {"name": base}) is None:
+            return
+        # Move the old table, its indexes and its id sequence out of the way of the new names
+        indexes = connection.scalars(
+            text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :name"),
+            {"name": base},
+        ).all()
+        sequence = connection.scalar(text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": base})
+        connection.execute(text(f"ALTER TABLE {base} RENAME TO {old}"))
+        for index in indexes:
+            connection.execute(text(f'ALTER INDEX "{index}" RENAME TO "{index[:48]}_unpartitioned"'))
+        if sequence:
+            connection.execute(text(f"ALTER SEQUENCE {sequence} RENAME TO {base}_id_seq_unpartitioned"))
+
+        self.model.__table__.create(connection, checkfirst=True)
+        oldest, newest = connection.execute(text(f"SELECT MIN({self.key}), MAX({self.key}) FROM {old}")).one()
+        if oldest is not None:
+            self.create_partitions(connection, oldest, newest)
+        columns = ", ".join(column.name for column in self.model.__table__.columns)
+        connection.execute(text(f"INSERT INTO {base} ({columns}) SELECT {columns} FROM {old}"))
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{base}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {base}"
+        ))
+        connection.execute(text(f"DROP TABLE {old}"))
+
+    def _months_with_rows(self, connection: Connection, column, cutoff: date) -> List[date]:
+        """Months ending on or before ``cutoff`` with rows in ``column``'s table, oldest first"""
+        # Step from each month that has rows to the next one that does
+        months = []
+        oldest = connection.scalar(select(func.min(column)))
+        while oldest is not None and add_months(month_start(oldest), 1) <= cutoff:
+            months.append(month_start(oldest))
+            oldest = connection.scalar(select(func.min(column)).where(column >= self._bound(add_months(months[-1], 1))))
+        return months
+
+    def partition_default_rows(self, connection: Connection, cutoff: date) -> List[str]:
+        """Give the months ending on or before ``cutoff`` that have rows in DEFAULT a partition of their own
+
+        Rows land in DEFAULT when their month had no partition yet, e.g.
+        back-dated rows. Archival goes partition by partition, so without this
+        they would never be archived.
+        """
+        default = sql.table(self.default_partition, sql.column(self.key, self.column.type))
+        created = []
+        for month in self._months_with_rows(connection, default.c[self.key], cutoff):
+            created += self.create_partitions(connection, month, month)
+        return created
+
+    def cold_months(self, connection: Connection, cutoff: date) -> List[date]:
+        """Months that end on or before ``cutoff`` and are still in the table
+
+        On Postgres these are the monthly partitions; call partition_default_rows()
+        first so that old rows in DEFAULT are among them.
+        """
+        if self.is_partitioned(connection):
+            names = connection.scalars(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:name)"
+            ), {"name": self.table_name})
+            prefix = f"{self.table_name}_p"
+            months = [datetime.strptime(name[len(prefix):], "%Y%m").date() for name in names if name.startswith(prefix)]
+        else:
+            months = self._months_with_rows(connection, self.column, cutoff)
+        return sorted(month for month in months if add_months(month, 1) <= cutoff)
+
+    def archive_month(self, connection: Connection, month: date, mode: str) -> int:
+        """Take ``month`` out of the table, returning how many rows it held"""
+        name = self.partition_name(month)
+        partitioned = self.is_partitioned(connection)
+        if mode == "table":
+            if not partitioned:
+                raise ValueError("ARCHIVE_MODE=table needs partitioned tables (Postgres)")
+            rows = connection.scalar(text(f"SELECT COUNT(*) FROM {name}"))
+            connection.execute(text("CREATE SCHEMA IF NOT EXISTS archive"))
+            connection.execute(text(f"ALTER TABLE {self.table_name} DETACH PARTITION {name}"))
+            connection.execute(text(f"ALTER TABLE {name} SET SCHEMA archive"))
+            return rows
+
+        rows = self._write_file(connection, name, month)
+        if partitioned:
+            connection.execute(text(f"ALTER TABLE {self.table_name} DETACH PARTITION {name}"))
+            connection.execute(text(f"DROP TABLE {name}"))
+        else:
+            connection.execute(delete(self.model.__table__).where(self._in_month(month)))
+        return rows
+
+    def _write_file(self, connection: Connection, name: str, month: date) -> int:
+        """Write the month to ARCHIVE_DIR/<partition>.csv.gz; the file only appears once complete"""
+        os.makedirs(settings.ARCHIVE_DIR, exist_ok=True)
+        path = os.path.join(settings.ARCHIVE_DIR, f"{name}.csv.gz")
+        table = self.model.__table__
+        query = (
+            select(table).where(self._in_month(month)).order_by(self.column, table.c.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        rows = 0
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(table.columns.keys())
+            for batch in connection.execute(query).partitions():
+                writer.writerows([_cell(value) for value in row] for row in batch)
+                rows += len(batch)
+        os.replace(path + ".tmp", path)
+        return rows
+
+    def _after_create(self, target, connection: Connection, **kw):
+        if connection.dialect.name == "postgresql":
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.default_partition} PARTITION OF {self.table_name} DEFAULT"
+            ))
+            first = month_start(date.today())
+            self.create_partitions(connection, first, add_months(first, settings.PARTITION_PREMAKE_MONTHS))
+
+    def register(self):
+        """Partition the table, with its DEFAULT and upcoming partitions, when create_all creates it on Postgres"""
+        table = self.model.__table__
+        unique = [c for c in table.constraints if isinstance(c, UniqueConstraint)] + [i for i in table.indexes if i.unique]
+        for constraint in unique:
+            if self.key not in constraint.columns:
+                columns = ", ".join(constraint.columns.keys())
+                raise ValueError(
+                    f"{self.table_name} cannot be partitioned by {self.key}: "
+                    f"Postgres would only enforce UNIQUE ({columns}) within each partition"
+                )
+        table.dialect_options["postgresql"]["partition_by"] = f"RANGE ({self.key})"
+        event.listen(table, "after_create", self._after_create)
+
+def _cell(value: Any) -> Any:
+    return value.value if isinstance(value, enum.Enum) else value
+
+PARTITIONED_TABLES = (
+    PartitionedTable(StockMovement, "created_at"),
+    PartitionedTable(AuditLog, "timestamp"),
+    PartitionedTable(Attendance, "date"),
+    PartitionedTable(Notification, "created_at"),
+)
+
+_PARTITION_KEYS = {table.table_name: table.key for table in PARTITIONED_TABLES}
+
+for _table in PARTITIONED_TABLES:
+    _table.register()
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _primary_key(constraint, compiler, **kw):
+    """Partitioned tables' primary keys are (id, <key>); register() keeps other unique constraints off them"""
+    if constraint.table.name not in _PARTITION_KEYS or not constraint.columns:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = [column.name for column in constraint.columns]
+    key = _PARTITION_KEYS[constraint.table.name]
+    if key not in columns:
+        columns.append(key)
+    name = f"CONSTRAINT {compiler.preparer.format_constraint(constraint)} " if constraint.name else ""
+    return f"{name}PRIMARY KEY ({', '.join(compiler.preparer.quote(column) for column in columns)})"
+
+def create_partitions(connection: Connection, today: Optional[date] = None) -> List[str]:
+    """Partitions from this month to PARTITION_PREMAKE_MONTHS ahead, on every partitioned table"""
+    first = month_start(today or date.today())
+    last = add_months(first, settings.PARTITION_PREMAKE_MONTHS)
+    created = []
+    for table in PARTITIONED_TABLES:
+        if table.is_partitioned(connection):
+            created += table.create_partitions(connection, first, last)
+    return created
+
+def archive_partitions(engine: Engine, today: Optional[date] = None, mode: Optional[str] = None) -> Dict[str, int]:
+    """Archive every month older than ARCHIVE_AFTER_MONTHS, one transaction per month
+
+    Returns the rows archived per partition name.
+    """
+    if settings.ARCHIVE_AFTER_MONTHS <= 0:
+        return {}
+    mode = mode or settings.ARCHIVE_MODE
+    cutoff = add_months(month_start(today or date.today()), -settings.ARCHIVE_AFTER_MONTHS)
+    archived = {}
+    for table in PARTITIONED_TABLES:
+        with engine.begin() as connection:
+            if table.is_partitioned(connection):
+                table.partition_default_rows(connection, cutoff)
+            months = table.cold_months(connection, cutoff)
+        for month in months:
+            name = table.partition_name(month)
+            with engine.begin() as connection:
+                archived[name] = table.archive_month(connection, month, mode)
+            logger.info(f"Archived {name}: {archived[name]} rows")
+    return archived
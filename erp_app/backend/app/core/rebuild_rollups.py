@@ -0,0 +1,31 @@
+"""
+Rebuild the dashboard rollup table from the source tables
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from sqlalchemy import select, func
+
+from app.core.database import engine, import_all_models
+from app.core.models import DailyRollup
+from app.core.rollups import rebuild_rollups
+
+def main():
+    """Recompute daily_rollups in one transaction"""
+    print("=== Rebuilding dashboard rollups ===")
+    
+    try:
+        import_all_models()
+        DailyRollup.__table__.create(bind=engine, checkfirst=True)
+        with engine.begin() as conn:
+            rebuild_rollups(conn)
+            rows = conn.scalar(select(func.count()).select_from(DailyRollup.__table__))
+        print(f"Rollups rebuilt: {rows} metric-days")
+        
+    except Exception as e:
+        print(f"Rebuild failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Create the CRM search indexes on an existing database and (re)fill them
+"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.core.database import engine, import_all_models
+from app.modules.crm.search import SEARCH_INDEXES
+
+def main():
+    """Create missing FTS5 tables/triggers (SQLite) or GIN indexes (Postgres) for leads and contacts"""
+    print("=== Rebuilding CRM search indexes ===")
+    
+    try:
+        import_all_models()
+        with engine.begin() as conn:
+            for index in SEARCH_INDEXES:
+                index.create(conn, rebuild=True)
+                print(f"Search index ready: {index.table_name}")
+        
+    except Exception as e:
+        print(f"Rebuild failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
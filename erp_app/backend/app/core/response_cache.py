@@ -0,0 +1,87 @@
+"""
+Conditional GET for reference data and charts
+
+Each cached endpoint names the tables its response is built from. Every table
+has a version counter, bumped after any commit that writes to it; the ETag is
+a hash of the URL and those versions. A request whose If-None-Match matches
+gets a 304 without touching the database, and the serialized body of each
+ETag is kept so other clients get it without a query either.
+
+Versions are the shared cache's table tags and bodies live in its "response"
+namespace, so with CACHE_BACKEND=redis every worker agrees on both.
+"""
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Any, Callable, Dict, Hashable, Optional
+import hashlib
+import logging
+
+from .config import settings
+from .shared_cache import Cache, table_tags, tag_versions
+
+logger = logging.getLogger(__name__)
+
+# Serialized bodies keyed by ETag
+response_cache = Cache(
+    "response", ttl=settings.RESPONSE_CACHE_TTL_SECONDS, maxsize=settings.RESPONSE_CACHE_SIZE
+)
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class CachedResponse:
+    """The ETag of one request, and its cached body if there is one"""
+
+    def __init__(self, etag: Optional[str], if_none_match: Optional[str]):
+        self.etag = etag
+        self.if_none_match = if_none_match
+
+    def _headers(self) -> Dict[str, str]:
+        # Clients may keep the body but must revalidate it on every use
+        return {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+
+    def _response(self, body: bytes) -> Response:
+        return Response(content=body, media_type="application/json", headers=self._headers())
+
+    async def lookup(self) -> Optional[Response]:
+        """304 if the client's copy is current, else the cached body, else None"""
+        if self.etag is None:
+            return None
+        if _matches(self.if_none_match, self.etag):
+            return Response(status_code=304, headers=self._headers())
+        body = await response_cache.get(self.etag)
+        return self._response(body) if body is not None else None
+
+    async def store(self, payload: Any) -> Response:
+        """Serialize ``payload`` once, keep it under the ETag and return it"""
+        body = JSONResponse(jsonable_encoder(payload)).body
+        if self.etag is None:
+            return Response(content=body, media_type="application/json")
+        await response_cache.set(self.etag, body)
+        return self._response(body)
+
+def cached_response(*tables: str, vary: Optional[Callable[[], Hashable]] = None):
+    """Dependency giving a handler a CachedResponse for its URL and the versions of ``tables``
+
+    ``vary`` adds anything else the response depends on, such as the current
+    month for a chart of the last N months.
+    """
+    tags = table_tags(*tables)
+
+    async def dependency(request: Request) -> CachedResponse:
+        if_none_match = request.headers.get("if-none-match")
+        try:
+            versions = await tag_versions(tags)
+        except Exception as e:
+            # Serve uncached rather than fail while the store is unreachable
+            logger.error(f"Response cache unavailable: {str(e)}")
+            return CachedResponse(None, if_none_match)
+        key = repr((request.url.path, sorted(request.query_params.multi_items()), versions, vary() if vary else None))
+        etag = '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+        return CachedResponse(etag, if_none_match)
+
+    return dependency
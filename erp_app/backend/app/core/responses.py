@@ -0,0 +1,24 @@
+"""
+orjson-backed JSON responses for list endpoints
+
+List handlers select columns, not entities, so paginate() hands back plain
+dicts of driver values, and return them in a FastJSONResponse. A returned
+Response skips FastAPI's jsonable_encoder pass over every value, and orjson
+serializes dates, datetimes and enums natively.
+"""
+from decimal import Decimal
+from fastapi.responses import JSONResponse
+from typing import Any
+import orjson
+
+def _default(value: Any) -> Any:
+    # Numeric columns come back as Decimal; the API has always sent them as numbers
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson, with Decimal sent as float"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,188 @@
+"""
+Incrementally maintained per-day rollups behind the dashboard
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import event, select, delete, update, insert, func, literal, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, attributes
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .models import DailyRollup
+from ..modules.crm.models import Lead, Contact, Deal
+from ..modules.accounting.models import Customer, Invoice
+from ..modules.sales.models import SalesOrder
+
+@dataclass(frozen=True)
+class RollupMetric:
+    """A count (and optional sum) of rows in one table, bucketed by a date column"""
+    module: str
+    metric: str
+    model: Any
+    day_column: str
+    amount_column: Optional[str] = None
+    filter_column: Optional[str] = None
+    filter_values: Tuple[Any, ...] = ()
+
+    def matches(self, row: Mapping[str, Any]) -> bool:
+        return self.filter_column is None or row.get(self.filter_column) in self.filter_values
+
+    def contribution(self, row: Mapping[str, Any]) -> Optional[Tuple[date, Decimal]]:
+        """(day, amount) this row adds to the metric, or None if it doesn't count"""
+        day = _to_day(row.get(self.day_column))
+        if day is None or not self.matches(row):
+            return None
+        amount = row.get(self.amount_column) if self.amount_column else None
+        return day, Decimal(str(amount)) if amount is not None else Decimal(0)
+
+    def rebuild_query(self):
+        """INSERT ... SELECT recomputing this metric from its source table"""
+        table = self.model.__table__
+        day = func.date(table.c[self.day_column])
+        amount = func.coalesce(func.sum(table.c[self.amount_column]), 0) if self.amount_column else literal(0)
+        query = select(
+            literal(self.module), literal(self.metric), day, func.count(), amount
+        ).where(table.c[self.day_column].is_not(None)).group_by(day)
+        if self.filter_column is not None:
+            query = query.where(table.c[self.filter_column].in_(self.filter_values))
+        return insert(DailyRollup.__table__).from_select(
+            ["module", "metric", "day", "count", "amount"], query
+        )
+
+ROLLUP_METRICS: List[RollupMetric] = [
+    RollupMetric("crm", "leads", Lead, "created_at"),
+    RollupMetric("crm", "contacts", Contact, "created_at"),
+    RollupMetric("crm", "deals", Deal, "created_at", amount_column="amount"),
+    RollupMetric("accounting", "active_customers", Customer, "created_at",
+                 filter_column="is_active", filter_values=(True,)),
+    RollupMetric("accounting", "invoices", Invoice, "issue_date"),
+    RollupMetric("accounting", "paid_invoices", Invoice, "issue_date", amount_column="total_amount",
+                 filter_column="status", filter_values=("paid",)),
+    RollupMetric("accounting", "outstanding_invoices", Invoice, "issue_date", amount_column="balance_due",
+                 filter_column="status", filter_values=("sent", "overdue")),
+    RollupMetric("sales", "orders", SalesOrder, "order_date"),
+]
+
+def _to_day(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
+
+def _columns(metrics: Iterable[RollupMetric]) -> set:
+    return {c for m in metrics for c in (m.day_column, m.amount_column, m.filter_column) if c}
+
+def _current_row(instance, columns) -> Dict[str, Any]:
+    return {column: getattr(instance, column) for column in columns}
+
+def _previous_row(instance, columns) -> Dict[str, Any]:
+    row = {}
+    for column in columns:
+        history = attributes.get_history(instance, column, passive=attributes.PASSIVE_NO_INITIALIZE)
+        if history.deleted:
+            row[column] = history.deleted[0]
+        elif history.unchanged:
+            row[column] = history.unchanged[0]
+        else:
+            row[column] = getattr(instance, column)
+    return row
+
+def _add(deltas, metric: RollupMetric, row: Mapping[str, Any], sign: int):
+    contribution = metric.contribution(row)
+    if contribution is None:
+        return
+    day, amount = contribution
+    entry = deltas[(metric.module, metric.metric, day)]
+    entry[0] += sign
+    entry[1] += sign * amount
+
+def apply_deltas(connection, deltas: Mapping[Tuple[str, str, date], List]):
+    """Upsert (module, metric, day) -> [count, amount] deltas into daily_rollups"""
+    rows = [
+        {"module": module, "metric": metric, "day": day, "count": count, "amount": amount}
+        for (module, metric, day), (count, amount) in deltas.items()
+        if count or amount
+    ]
+    if not rows:
+        return
+    table = DailyRollup.__table__
+    dialect_insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}.get(connection.dialect.name)
+    if dialect_insert is not None:
+        statement = dialect_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.metric, table.c.day],
+            set_={
+                "count": table.c.count + statement.excluded.count,
+                "amount": table.c.amount + statement.excluded.amount,
+            },
+        )
+        connection.execute(statement, rows)
+        return
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(and_(table.c.metric == row["metric"], table.c.day == row["day"]))
+            .values(count=table.c.count + row["count"], amount=table.c.amount + row["amount"])
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table), row)
+
+def record_rows(connection, model, rows: Iterable[Mapping[str, Any]], sign: int = 1):
+    """Apply rollups for rows written through Core (bulk inserts/deletes bypass the ORM events)"""
+    metrics = _metrics_by_model.get(model)
+    if not metrics:
+        return
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for row in rows:
+        for metric in metrics:
+            _add(deltas, metric, row, sign)
+    apply_deltas(connection, deltas)
+
+def rebuild_rollups(connection):
+    """Recompute daily_rollups from the source tables"""
+    connection.execute(delete(DailyRollup.__table__))
+    for metric in ROLLUP_METRICS:
+        connection.execute(metric.rebuild_query())
+
+_metrics_by_model: Dict[Any, List[RollupMetric]] = defaultdict(list)
+for _metric in ROLLUP_METRICS:
+    _metrics_by_model[_metric.model].append(_metric)
+
+def _load_previous_value(target, value, oldvalue, initiator):
+    return value
+
+# Fetch SQL-default day columns (created_at) in the INSERT's RETURNING, so
+# after_flush reads them from the instance instead of lazy-loading each one
+for _model in _metrics_by_model:
+    _model.__mapper__.eager_defaults = True
+
+# Load the pre-change value even when the attribute was expired, so updates can be diffed
+for _model, _metrics in _metrics_by_model.items():
+    for _column in _columns(_metrics):
+        event.listen(getattr(_model, _column), "set", _load_previous_value, active_history=True, retval=True)
+
+@event.listens_for(Session, "after_flush")
+def _update_rollups(session, flush_context):
+    deltas = defaultdict(lambda: [0, Decimal(0)])
+    for instance in session.new:
+        for metric in _metrics_by_model.get(type(instance), ()):
+            _add(deltas, metric, _current_row(instance, _columns([metric])), 1)
+    for instance in session.deleted:
+        for metric in _metrics_by_model.get(type(instance), ()):
+            _add(deltas, metric, _previous_row(instance, _columns([metric])), -1)
+    for instance in session.dirty:
+        metrics = _metrics_by_model.get(type(instance))
+        if not metrics or not session.is_modified(instance, include_collections=False):
+            continue
+        columns = _columns(metrics)
+        previous, current = _previous_row(instance, columns), _current_row(instance, columns)
+        if previous == current:
+            continue
+        for metric in metrics:
+            _add(deltas, metric, previous, -1)
+            _add(deltas, metric, current, 1)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
@@ -1,18 +1,79 @@
 """
 Authentication and security utilities
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Dict
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from passlib.hash import bcrypt
 from fastapi import HTTPException, status
+import asyncio
+import os
+import threading
 
 from .config import settings
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordHasherPool:
+    """Bounded worker pool for bcrypt so hashing never blocks the event loop.
+
+    bcrypt releases the GIL, so threads give real parallelism. At most
+    ``workers + queue_depth`` jobs may be in flight; beyond that callers get a
+    503 instead of piling up behind a login storm.
+    """
+
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = max(workers, 1)
+        self.queue_depth = max(queue_depth, 0)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hasher")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.in_flight >= self.workers + self.queue_depth:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication is busy, please retry",
+                    headers={"Retry-After": "1"},
+                )
+            self.in_flight += 1
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+                self.failed += 1
+            raise
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queue_depth,
+                "in_flight": self.in_flight,
+                "queued": max(self.in_flight - self.workers, 0),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1),
+    queue_depth=settings.PASSWORD_HASH_QUEUE_DEPTH,
+)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,6 +82,14 @@ def get_password_hash(password: str) -> str:
     """Generate password hash"""
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hasher pool"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate a password hash on the hasher pool"""
+    return await password_hasher.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
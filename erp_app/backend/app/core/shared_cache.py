@@ -0,0 +1,360 @@
+"""
+Cache shared by every worker: Redis, or an in-process LRU that behaves the same
+
+A Cache is a namespace ("auth_user", "dashboard", ...) with its own TTL. Values
+are pickled in both backends, so callers always get a copy. Entries can carry
+tags; invalidating a tag bumps its version and every entry stored under an
+older version becomes a miss. table_tags() ties tags to database tables, so a
+commit that writes to a table invalidates everything built from it.
+
+get_or_set() is single-flight: concurrent misses for the same key in one
+worker wait for a single loader call, and with Redis a short lock makes other
+workers wait for it too instead of all recomputing the value.
+
+CACHE_BACKEND picks the backend: "memory" (per worker, the default and what
+the tests use) or "redis" (REDIS_URL). If Redis is unreachable, reads miss
+and writes are dropped, so requests fall back to the database.
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import asyncio
+import logging
+import pickle
+import secrets
+import threading
+import time
+
+from .cache import TTLCache, on_table_write
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def _initial_version() -> int:
+    # Tag versions start at a random value, so entries (and ETags) from before a
+    # restart or a Redis flush can't match the versions seen after it
+    return secrets.randbits(48)
+
+class MemoryBackend:
+    """One TTLCache per namespace, tag versions in a dict - all per worker"""
+
+    def __init__(self):
+        self._namespaces: Dict[str, TTLCache] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def register(self, namespace: str, maxsize: int, ttl: float):
+        self._namespaces[namespace] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self._namespaces[namespace].get(key)
+
+    async def set(self, namespace: str, key: str, data: bytes, ttl: float):
+        self._namespaces[namespace].set(key, data, ttl)
+
+    async def delete(self, namespace: str, keys: Iterable[str]):
+        self.delete_nowait(namespace, keys)
+
+    def delete_nowait(self, namespace: str, keys: Iterable[str]):
+        for key in keys:
+            self._namespaces[namespace].delete(key)
+
+    def clear_nowait(self, namespace: str):
+        self._namespaces[namespace].clear()
+
+    async def tag_versions(self, tags: Tuple[str, ...]) -> List[int]:
+        with self._lock:
+            return [self._versions.setdefault(tag, _initial_version()) for tag in tags]
+
+    async def bump(self, tags: Iterable[str]):
+        self.bump_nowait(tags)
+
+    def bump_nowait(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, _initial_version()) + 1
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        # Callers in this worker already share one loader call
+        return True
+
+    async def release(self, key: str):
+        pass
+
+    def stats(self, namespace: str) -> Dict[str, Any]:
+        stats = self._namespaces[namespace].stats()
+        return {"size": stats["size"], "maxsize": stats["maxsize"], "evictions": stats["evictions"]}
+
+class RedisBackend:
+    """Entries, tag versions and single-flight locks in Redis, shared by every worker and pod"""
+
+    PREFIX = "erp:"
+
+    def __init__(self, url: str):
+        import redis
+        import redis.asyncio
+
+        self.redis = redis.asyncio.Redis.from_url(url)
+        # For invalidations fired outside an event loop (scripts, the test thread)
+        self.sync_redis = redis.Redis.from_url(url)
+        self._ttls: Dict[str, float] = {}
+        self._pending: Set[asyncio.Task] = set()
+
+    def register(self, namespace: str, maxsize: int, ttl: float):
+        # Redis' own maxmemory policy bounds the size
+        self._ttls[namespace] = ttl
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.PREFIX}{namespace}:{key}"
+
+    def _tag(self, tag: str) -> str:
+        return f"{self.PREFIX}tag:{tag}"
+
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return await self.redis.get(self._key(namespace, key))
+
+    async def set(self, namespace: str, key: str, data: bytes, ttl: float):
+        await self.redis.set(self._key(namespace, key), data, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, namespace: str, keys: Iterable[str]):
+        keys = [self._key(namespace, key) for key in keys]
+        if keys:
+            await self.redis.delete(*keys)
+
+    def _run_soon(self, coroutine_function, fallback: Callable[[], Any]):
+        # Write hooks run synchronously after commit, normally inside the request's event loop
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            fallback()
+            return
+
+        async def run():
+            try:
+                await coroutine_function()
+            except Exception as e:
+                logger.error(f"Cache invalidation failed: {str(e)}")
+
+        task = loop.create_task(run())
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def delete_nowait(self, namespace: str, keys: Iterable[str]):
+        keys = list(keys)
+        self._run_soon(
+            lambda: self.delete(namespace, keys),
+            lambda: self.sync_redis.delete(*[self._key(namespace, key) for key in keys]) if keys else None,
+        )
+
+    def clear_nowait(self, namespace: str):
+        keys = list(self.sync_redis.scan_iter(match=self._key(namespace, "*"), count=1000))
+        if keys:
+            self.sync_redis.delete(*keys)
+
+    async def tag_versions(self, tags: Tuple[str, ...]) -> List[int]:
+        keys = [self._tag(tag) for tag in tags]
+        values = await self.redis.mget(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key in missing:
+                    pipe.set(key, _initial_version(), nx=True)
+                await pipe.execute()
+            values = await self.redis.mget(keys)
+        return [int(value) for value in values]
+
+    async def bump(self, tags: Iterable[str]):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(self._tag(tag))
+            await pipe.execute()
+
+    def bump_nowait(self, tags: Iterable[str]):
+        tags = list(tags)
+
+        def bump_sync():
+            for tag in tags:
+                self.sync_redis.incr(self._tag(tag))
+
+        self._run_soon(lambda: self.bump(tags), bump_sync)
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        return bool(await self.redis.set(f"{self.PREFIX}lock:{key}", 1, nx=True, px=max(1, int(ttl * 1000))))
+
+    async def release(self, key: str):
+        await self.redis.delete(f"{self.PREFIX}lock:{key}")
+
+    def stats(self, namespace: str) -> Dict[str, Any]:
+        return {"size": 0, "maxsize": None, "evictions": 0}
+
+def _create_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisBackend(settings.REDIS_URL)
+    return MemoryBackend()
+
+default_backend = _create_backend()
+
+class Cache:
+    """One namespace of the shared cache, in ``backend`` or the one CACHE_BACKEND picks"""
+
+    def __init__(self, namespace: str, ttl: float, maxsize: int = 1024, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend or default_backend
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.backend.register(namespace, maxsize, ttl)
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return key if isinstance(key, str) else repr(key)
+
+    async def _read(self, key: str) -> Any:
+        try:
+            data = await self.backend.get(self.namespace, key)
+            if data is None:
+                return _MISSING
+            value, tags, versions = pickle.loads(data)
+            if tags and await self.backend.tag_versions(tags) != versions:
+                return _MISSING
+            return value
+        except Exception as e:
+            logger.error(f"Cache read from {self.namespace} failed: {str(e)}")
+            return _MISSING
+
+    async def _write(self, key: str, value: Any, ttl: Optional[float], tags: Tuple[str, ...], versions: List[int]):
+        try:
+            data = pickle.dumps((value, tags, versions), protocol=pickle.HIGHEST_PROTOCOL)
+            await self.backend.set(self.namespace, key, data, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            logger.error(f"Cache write to {self.namespace} failed: {str(e)}")
+
+    async def _versions(self, tags: Tuple[str, ...]) -> Optional[List[int]]:
+        try:
+            return await self.backend.tag_versions(tags) if tags else []
+        except Exception as e:
+            logger.error(f"Cache tag lookup failed: {str(e)}")
+            return None
+
+    async def get(self, key: Hashable, default: Any = None) -> Any:
+        value = await self._read(self._key(key))
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    async def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[str] = ()):
+        """Store ``value``; prefer get_or_set, which reads tag versions before computing it"""
+        tags = tuple(tags)
+        versions = await self._versions(tags)
+        if versions is not None:
+            await self._write(self._key(key), value, ttl, tags, versions)
+
+    async def get_or_set(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """The cached value, or ``await loader()`` stored under ``tags``, computed once per key at a time"""
+        key = self._key(key)
+        value = await self._read(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        self.misses += 1
+
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, loader, ttl, tuple(tags))
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, so nobody waiting is not an error
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load(self, key: str, loader, ttl: Optional[float], tags: Tuple[str, ...]) -> Any:
+        # Versions are read before the value is built, so a write during the load invalidates it
+        versions = await self._versions(tags)
+        lock = f"{self.namespace}:{key}"
+        try:
+            locked = await self.backend.acquire(lock, settings.CACHE_LOCK_SECONDS)
+        except Exception as e:
+            logger.error(f"Cache lock on {self.namespace} failed: {str(e)}")
+            locked = True
+        if not locked:
+            # Another worker is loading it: wait for its result rather than stampede the database
+            deadline = time.monotonic() + settings.CACHE_LOCK_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+                value = await self._read(key)
+                if value is not _MISSING:
+                    return value
+        try:
+            value = await loader()
+            if versions is not None:
+                await self._write(key, value, ttl, tags, versions)
+            return value
+        finally:
+            if locked:
+                try:
+                    await self.backend.release(lock)
+                except Exception as e:
+                    logger.error(f"Cache unlock on {self.namespace} failed: {str(e)}")
+
+    async def delete(self, *keys: Hashable):
+        await self.backend.delete(self.namespace, [self._key(key) for key in keys])
+
+    def delete_nowait(self, *keys: Hashable):
+        """Delete from synchronous code such as ORM event hooks"""
+        try:
+            self.backend.delete_nowait(self.namespace, [self._key(key) for key in keys])
+        except Exception as e:
+            logger.error(f"Cache delete from {self.namespace} failed: {str(e)}")
+
+    def clear(self):
+        self.backend.clear_nowait(self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis" if isinstance(self.backend, RedisBackend) else "memory",
+            **self.backend.stats(self.namespace),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+async def invalidate_tags(tags: Iterable[str]):
+    await default_backend.bump(tags)
+
+def invalidate_tags_nowait(tags: Iterable[str]):
+    """Invalidate from synchronous code such as commit hooks"""
+    try:
+        default_backend.bump_nowait(tags)
+    except Exception as e:
+        logger.error(f"Cache tag invalidation failed: {str(e)}")
+
+async def tag_versions(tags: Tuple[str, ...]) -> List[int]:
+    return await default_backend.tag_versions(tags)
+
+_watched_tables: Set[str] = set()
+
+def _invalidate_written_tables(written: Set[str]):
+    invalidate_tags_nowait(f"table:{table}" for table in written & _watched_tables)
+
+def table_tags(*tables: str) -> Tuple[str, ...]:
+    """Tags invalidated by any commit that writes to ``tables``"""
+    new = [table for table in tables if table not in _watched_tables]
+    _watched_tables.update(new)
+    on_table_write(new, _invalidate_written_tables)
+    return tuple(f"table:{table}" for table in tables)
@@ -0,0 +1,58 @@
+"""
+Dialect-aware SQL expressions
+"""
+from datetime import date, datetime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import String
+from typing import Any
+
+class month_bucket(FunctionElement):
+    """First day of the month of a date/datetime column, usable in SELECT and GROUP BY
+
+    Postgres gets ``date_trunc('month', col)`` (a timestamp), SQLite gets
+    ``strftime('%Y-%m-01', col)`` (an ISO date string); use month_label() to
+    read either back.
+    """
+    type = String()
+    name = "month_bucket"
+    inherit_cache = True
+
+@compiles(month_bucket)
+def _month_bucket_default(element, compiler, **kw):
+    return "date_trunc('month', %s)" % compiler.process(element.clauses, **kw)
+
+@compiles(month_bucket, "sqlite")
+def _month_bucket_sqlite(element, compiler, **kw):
+    return "strftime('%%Y-%%m-01', %s)" % compiler.process(element.clauses, **kw)
+
+def month_label(value: Any) -> str:
+    """'YYYY-MM' for a month_bucket() result from any dialect"""
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m")
+    return str(value)[:7]
+
+class explain(Executable, ClauseElement):
+    """EXPLAIN for a statement, keeping its bound parameters
+
+    Postgres returns the plan as JSON (one row, one column); SQLite returns
+    EXPLAIN QUERY PLAN rows.
+    """
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+@compiles(explain)
+def _explain_default(element, compiler, **kw):
+    return "EXPLAIN " + compiler.process(element.statement, **kw)
+
+@compiles(explain, "postgresql")
+def _explain_postgresql(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+@compiles(explain, "sqlite")
+def _explain_sqlite(element, compiler, **kw):
+    return "EXPLAIN QUERY PLAN " + compiler.process(element.statement, **kw)
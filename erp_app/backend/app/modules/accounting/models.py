@@ -1,13 +1,13 @@
 """
 Accounting Module Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
 
-from ...core.database import Base
+from ...core.database import Audited, Base
 
 class InvoiceStatus(str, enum.Enum):
     DRAFT = "draft"
@@ -26,7 +26,7 @@ class TransactionType(str, enum.Enum):
     INCOME = "income"
     EXPENSE = "expense"
 
-class Account(Base):
+class Account(Audited, Base):
     __tablename__ = "accounts"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -42,7 +42,7 @@ class Account(Base):
     # Self-referential relationship
     parent = relationship("Account", remote_side=[id], backref="sub_accounts")
 
-class Customer(Base):
+class Customer(Audited, Base):
     __tablename__ = "customers"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -65,8 +65,14 @@ class Customer(Base):
     # Relationships
     invoices = relationship("Invoice", back_populates="customer")
 
-class Invoice(Base):
+class Invoice(Audited, Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Covering index for revenue by month: range scan on (status, issue_date), sum from the index
+        Index("ix_invoices_status_issue_date_total", "status", "issue_date", "total_amount"),
+        # List endpoint: WHERE status = ? ORDER BY created_at DESC, id DESC
+        Index("ix_invoices_status_created_at", "status", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String(50), unique=True, nullable=False)
@@ -98,7 +104,7 @@ class Invoice(Base):
     items = relationship("InvoiceItem", back_populates="invoice")
     payments = relationship("Payment", back_populates="invoice")
 
-class InvoiceItem(Base):
+class InvoiceItem(Audited, Base):
     __tablename__ = "invoice_items"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -114,7 +120,7 @@ class InvoiceItem(Base):
     # Relationships
     invoice = relationship("Invoice", back_populates="items")
 
-class Payment(Base):
+class Payment(Audited, Base):
     __tablename__ = "payments"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -133,7 +139,7 @@ class Payment(Base):
     # Relationships
     invoice = relationship("Invoice", back_populates="payments")
 
-class Expense(Base):
+class Expense(Audited, Base):
     __tablename__ = "expenses"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -158,7 +164,7 @@ class Expense(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
-class Transaction(Base):
+class Transaction(Audited, Base):
     __tablename__ = "transactions"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -1,13 +1,13 @@
 """
 CRM (Customer Relationship Management) Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
 
-from ...core.database import Base
+from ...core.database import Audited, Base
 
 class LeadStatus(str, enum.Enum):
     NEW = "new"
@@ -28,8 +28,12 @@ class DealStage(str, enum.Enum):
     CLOSED_WON = "closed_won"
     CLOSED_LOST = "closed_lost"
 
-class Lead(Base):
+class Lead(Audited, Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        # List endpoint: WHERE status = ? ORDER BY id
+        Index("ix_leads_status", "status", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(50), nullable=False)
@@ -48,7 +52,7 @@ class Lead(Base):
     # Relationships
     activities = relationship("Activity", back_populates="lead")
 
-class Contact(Base):
+class Contact(Audited, Base):
     __tablename__ = "contacts"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -76,8 +80,12 @@ class Contact(Base):
     deals = relationship("Deal", back_populates="contact")
     activities = relationship("Activity", back_populates="contact")
 
-class Deal(Base):
+class Deal(Audited, Base):
     __tablename__ = "deals"
+    __table_args__ = (
+        # Pipeline chart: GROUP BY stage with SUM(amount), answered from the index alone
+        Index("ix_deals_stage_amount", "stage", "amount"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
@@ -96,7 +104,7 @@ class Deal(Base):
     contact = relationship("Contact", back_populates="deals")
     activities = relationship("Activity", back_populates="deal")
 
-class Activity(Base):
+class Activity(Audited, Base):
     __tablename__ = "activities"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,120 @@
+"""
+CRM full-text search - FTS5 on SQLite, tsvector + pg_trgm on Postgres
+"""
+from dataclasses import dataclass
+from sqlalchemy import DDL, event, false, func, literal_column, or_, table, column, text
+from typing import Any, List, Optional, Tuple
+import re
+
+from .models import Lead, Contact
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+def search_terms(search: str) -> List[str]:
+    """Words of a search box entry, split the way both tokenizers split documents"""
+    return _TOKEN.findall(search.lower())
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """Ranked prefix search over some text columns of one table"""
+    model: Any
+    columns: Tuple[str, ...]
+    weights: Tuple[float, ...]
+
+    @property
+    def table_name(self) -> str:
+        return self.model.__tablename__
+
+    @property
+    def fts_name(self) -> str:
+        return f"{self.table_name}_fts"
+
+    def sqlite_ddl(self) -> List[str]:
+        """FTS5 external-content table plus the triggers that keep it in step with the base table"""
+        cols = ", ".join(self.columns)
+        new_cols = ", ".join(f"new.{c}" for c in self.columns)
+        old_cols = ", ".join(f"old.{c}" for c in self.columns)
+        fts, base = self.fts_name, self.table_name
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, content='{base}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {base} BEGIN "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {base} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {base} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); "
+            f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols}); END",
+        ]
+
+    def postgresql_ddl(self) -> List[str]:
+        """GIN indexes over the concatenated columns: tsvector for words, trigrams for substrings"""
+        document = " || ' ' || ".join(f"coalesce({c}, '')" for c in self.columns)
+        base = self.table_name
+        return [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            f"CREATE INDEX IF NOT EXISTS ix_{base}_search_tsv ON {base} "
+            f"USING gin (to_tsvector('simple', {document}))",
+            f"CREATE INDEX IF NOT EXISTS ix_{base}_search_trgm ON {base} "
+            f"USING gin (({document}) gin_trgm_ops)",
+        ]
+
+    def _document(self):
+        # Built from literal_column so it matches the indexed expression, not a bound parameter
+        parts = [func.coalesce(getattr(self.model, c), literal_column("''")) for c in self.columns]
+        document = parts[0]
+        for part in parts[1:]:
+            document = document.op("||")(literal_column("' '")).op("||")(part)
+        return document
+
+    def apply(self, query, search: str, dialect: str) -> Tuple[Any, Optional[Any]]:
+        """Filter ``query`` to rows matching ``search``; returns (query, rank) with lower rank first"""
+        terms = search_terms(search)
+        if not terms:
+            return query.where(false()), None
+
+        if dialect == "sqlite":
+            fts = table(self.fts_name, column("rowid"))
+            match = " ".join(f'"{term}"*' for term in terms)
+            query = query.join(fts, fts.c.rowid == self.model.id).where(
+                literal_column(self.fts_name).op("MATCH")(match)
+            )
+            return query, func.bm25(literal_column(self.fts_name), *self.weights)
+
+        if dialect == "postgresql":
+            document = self._document()
+            vector = func.to_tsvector(literal_column("'simple'"), document)
+            tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+            query = query.where(or_(vector.op("@@")(tsquery), document.ilike(f"%{search}%")))
+            return query, -func.ts_rank(vector, tsquery)
+
+        pattern = f"%{search}%"
+        return query.where(or_(*(getattr(self.model, c).ilike(pattern) for c in self.columns))), None
+
+    def create(self, connection, rebuild: bool = False):
+        """Create the index objects on an existing table (new tables get them from create_all)"""
+        if connection.dialect.name == "sqlite":
+            for statement in self.sqlite_ddl():
+                connection.execute(text(statement))
+            if rebuild:
+                connection.execute(text(f"INSERT INTO {self.fts_name}({self.fts_name}) VALUES ('rebuild')"))
+        elif connection.dialect.name == "postgresql":
+            for statement in self.postgresql_ddl():
+                connection.execute(text(statement))
+
+    def register(self):
+        """Emit the DDL whenever create_all creates the table, and drop the FTS table with it"""
+        base = self.model.__table__
+        for statement in self.sqlite_ddl():
+            event.listen(base, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+        for statement in self.postgresql_ddl():
+            event.listen(base, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+        event.listen(base, "after_drop", DDL(f"DROP TABLE IF EXISTS {self.fts_name}").execute_if(dialect="sqlite"))
+
+lead_search = SearchIndex(Lead, ("first_name", "last_name", "email", "company"), (10.0, 10.0, 5.0, 3.0))
+contact_search = SearchIndex(Contact, ("first_name", "last_name", "email", "company_name"), (10.0, 10.0, 5.0, 3.0))
+
+SEARCH_INDEXES = (lead_search, contact_search)
+
+for _index in SEARCH_INDEXES:
+    _index.register()
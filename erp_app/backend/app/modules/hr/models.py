@@ -1,13 +1,13 @@
 """
 Human Resources Module Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric, Date
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric, Date, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime, date
 
-from ...core.database import Base
+from ...core.database import Audited, Base
 
 class EmployeeStatus(str, enum.Enum):
     ACTIVE = "active"
@@ -35,7 +35,7 @@ class LeaveType(str, enum.Enum):
     PATERNITY = "paternity"
     EMERGENCY = "emergency"
 
-class Department(Base):
+class Department(Audited, Base):
     __tablename__ = "departments"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -48,9 +48,9 @@ class Department(Base):
     created_at = Column(DateTime, default=func.now())
     
     # Relationships
-    employees = relationship("Employee", back_populates="department")
+    employees = relationship("Employee", back_populates="department", foreign_keys="Employee.department_id")
 
-class Position(Base):
+class Position(Audited, Base):
     __tablename__ = "positions"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -66,7 +66,7 @@ class Position(Base):
     # Relationships
     employees = relationship("Employee", back_populates="position")
 
-class Employee(Base):
+class Employee(Audited, Base):
     __tablename__ = "employees"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -108,15 +108,19 @@ class Employee(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    department = relationship("Department", back_populates="employees")
+    department = relationship("Department", back_populates="employees", foreign_keys=[department_id])
     position = relationship("Position", back_populates="employees")
-    manager = relationship("Employee", remote_side=[id], backref="subordinates")
+    manager = relationship("Employee", remote_side=[id], foreign_keys=[manager_id], backref="subordinates")
     attendance_records = relationship("Attendance", back_populates="employee")
-    leave_requests = relationship("LeaveRequest", back_populates="employee")
+    leave_requests = relationship("LeaveRequest", back_populates="employee", foreign_keys="LeaveRequest.employee_id")
     payroll_records = relationship("Payroll", back_populates="employee")
 
-class Attendance(Base):
+class Attendance(Audited, Base):
     __tablename__ = "attendance"
+    __table_args__ = (
+        # List endpoint: WHERE employee_id = ? ORDER BY date DESC, id DESC
+        Index("ix_attendance_employee_date", "employee_id", "date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"))
@@ -139,8 +143,12 @@ class Attendance(Base):
     # Relationships
     employee = relationship("Employee", back_populates="attendance_records")
 
-class LeaveRequest(Base):
+class LeaveRequest(Audited, Base):
     __tablename__ = "leave_requests"
+    __table_args__ = (
+        # List endpoint: WHERE status = ? ORDER BY created_at DESC, id DESC
+        Index("ix_leave_requests_status_created_at", "status", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     employee_id = Column(Integer, ForeignKey("employees.id"))
@@ -160,9 +168,9 @@ class LeaveRequest(Base):
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
     # Relationships
-    employee = relationship("Employee", back_populates="leave_requests")
+    employee = relationship("Employee", back_populates="leave_requests", foreign_keys=[employee_id])
 
-class Payroll(Base):
+class Payroll(Audited, Base):
     __tablename__ = "payroll"
     
     id = Column(Integer, primary_key=True, index=True)
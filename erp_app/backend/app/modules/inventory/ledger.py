@@ -0,0 +1,213 @@
+"""
+Stock ledger - posts stock movements with atomic, consistently ordered updates
+
+post_movements() applies a batch of movements in one transaction:
+
+1. The products and warehouses are checked to exist (404 otherwise).
+2. Lines are netted per (product, warehouse). Stock rows are then updated in
+   (product_id, warehouse_id) order, and products in id order. Every posting
+   takes its row locks in that same global order, so concurrent postings wait
+   for each other instead of deadlocking.
+3. Each change is a single UPDATE ... RETURNING, or an upsert for a receipt
+   into a warehouse that has no stock row yet. No quantity is read and then
+   written back, so concurrent postings cannot overwrite each other. Issues
+   carry their guard (available_quantity stays >= 0) in the same statement.
+   Rows whose lines net to zero are only locked and read.
+4. The quantity before and after each line is worked out from there; a line
+   that would take it below zero is a 409, even when the net change is not.
+5. The StockMovement rows are inserted with one executemany.
+
+Product.current_stock moves by the same deltas, so it stays the sum of the
+product's warehouse quantities. A batch applies entirely or not at all. The
+stock, product and movement changes are audited like ORM writes; a stock row
+the first receipt creates is recorded as an UPDATE from zero.
+"""
+from collections import defaultdict
+from fastapi import HTTPException, status
+from pydantic import BaseModel, model_validator
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ...core.audit import core_entry, record_core_changes
+from ...core.cache import notify_table_write
+from ...core.config import settings
+from .models import Product, StockMovement, StockMovementType, Warehouse, WarehouseStock
+
+class MovementLine(BaseModel):
+    """One stock movement to post; ``quantity`` is signed for adjustments"""
+    product_id: int
+    warehouse_id: int
+    movement_type: StockMovementType
+    quantity: int
+    reference_number: Optional[str] = None
+    reason: Optional[str] = None
+    notes: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _quantity(self):
+        if self.movement_type == StockMovementType.ADJUSTMENT:
+            if self.quantity == 0:
+                raise ValueError("an adjustment needs a non-zero quantity")
+        elif self.quantity <= 0:
+            raise ValueError(f"a stock {self.movement_type.value} needs a positive quantity")
+        return self
+
+    @property
+    def delta(self) -> int:
+        return -self.quantity if self.movement_type == StockMovementType.OUT else self.quantity
+
+async def _apply_stock_delta(
+    conn: AsyncConnection, product_id: int, warehouse_id: int, delta: int
+) -> Optional[Tuple[int, int, int]]:
+    """Add ``delta`` to one warehouse stock row; returns its id, quantity and available quantity afterwards
+
+    A zero ``delta`` only locks the row and reads it, and returns None when there is no row.
+    """
+    stocks = WarehouseStock.__table__
+    key = and_(stocks.c.product_id == product_id, stocks.c.warehouse_id == warehouse_id)
+    returned = (stocks.c.id, stocks.c.quantity, stocks.c.available_quantity)
+    if delta == 0:
+        # An UPDATE that changes nothing, rather than SELECT ... FOR UPDATE, which SQLite ignores:
+        # it takes the same write lock as the other rows, so the quantities read stay current
+        row = (await conn.execute(
+            update(stocks).where(key).values(quantity=stocks.c.quantity).returning(*returned)
+        )).first()
+        return tuple(row) if row is not None else None
+    if delta < 0:
+        # The guard is part of the UPDATE, so no concurrent issue can slip in between check and write
+        row = (await conn.execute(
+            update(stocks)
+            .where(key, stocks.c.available_quantity + delta >= 0)
+            .values(
+                quantity=stocks.c.quantity + delta,
+                available_quantity=stocks.c.available_quantity + delta,
+                updated_at=func.now(),
+            )
+            .returning(*returned)
+        )).first()
+        if row is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Insufficient stock of product {product_id} in warehouse {warehouse_id}"
+            )
+        return tuple(row)
+
+    dialect_insert = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}.get(conn.dialect.name)
+    if dialect_insert is None:
+        raise RuntimeError(f"The stock ledger needs SQLite or Postgres, not {conn.dialect.name}")
+    statement = dialect_insert(stocks).values(
+        product_id=product_id, warehouse_id=warehouse_id,
+        quantity=delta, reserved_quantity=0, available_quantity=delta,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[stocks.c.warehouse_id, stocks.c.product_id],
+        set_={
+            "quantity": stocks.c.quantity + statement.excluded.quantity,
+            "available_quantity": stocks.c.available_quantity + statement.excluded.available_quantity,
+            "updated_at": func.now(),
+        },
+    )
+    return tuple((await conn.execute(statement.returning(*returned))).one())
+
+async def _check_exists(conn: AsyncConnection, model, ids, label: str):
+    """404 for the lowest of ``ids`` with no ``model`` row"""
+    missing = set(ids) - set(await conn.scalars(select(model.id).where(model.id.in_(ids))))
+    if missing:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{label} {min(missing)} not found")
+
+async def post_movements(
+    db: AsyncSession, lines: Sequence[MovementLine], user_id: Optional[int]
+) -> List[Dict[str, Any]]:
+    """Post ``lines`` in one transaction; returns each movement's id and quantities, in order
+
+    The statements run on the session's connection, in its transaction, so a
+    request never holds two pooled connections. The session is committed,
+    or rolled back if the posting fails.
+    """
+    if not lines:
+        return []
+    if len(lines) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Stock postings are limited to {settings.BULK_MAX_ITEMS} movements"
+        )
+    stock_deltas: Dict[Tuple[int, int], int] = defaultdict(int)
+    product_deltas: Dict[int, int] = defaultdict(int)
+    for line in lines:
+        stock_deltas[(line.product_id, line.warehouse_id)] += line.delta
+        product_deltas[line.product_id] += line.delta
+
+    conn = await db.connection()
+    try:
+        # Plain reads, before any write: a missing product or warehouse is a 404, not a foreign key error
+        await _check_exists(conn, Product, product_deltas, "Product")
+        await _check_exists(conn, Warehouse, {warehouse_id for _, warehouse_id in stock_deltas}, "Warehouse")
+
+        # Writes come first and in key order: the transaction's locks are always taken in the same order
+        stocks = WarehouseStock.__tablename__
+        entries = []
+        running: Dict[Tuple[int, int], int] = {}
+        for (product_id, warehouse_id), delta in sorted(stock_deltas.items()):
+            row = await _apply_stock_delta(conn, product_id, warehouse_id, delta)
+            stock_id, quantity, available = row if row is not None else (None, 0, 0)
+            running[(product_id, warehouse_id)] = quantity - delta
+            if delta:
+                entries.append(core_entry(
+                    "UPDATE", stocks, stock_id,
+                    {"quantity": quantity - delta, "available_quantity": available - delta},
+                    {"quantity": quantity, "available_quantity": available},
+                ))
+
+        # The net change of each row was checked; every line on the way there must keep it >= 0 as well
+        rows = []
+        for line in lines:
+            key = (line.product_id, line.warehouse_id)
+            before = running[key]
+            running[key] = before + line.delta
+            if running[key] < 0:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Insufficient stock of product {line.product_id} in warehouse {line.warehouse_id}"
+                )
+            rows.append({
+                **line.model_dump(), "quantity_before": before, "quantity_after": running[key], "created_by": user_id,
+            })
+
+        products = Product.__table__
+        for product_id, delta in sorted(product_deltas.items()):
+            if not delta:
+                continue
+            current = await conn.scalar(
+                update(products)
+                .where(products.c.id == product_id)
+                .values(current_stock=func.coalesce(products.c.current_stock, 0) + delta)
+                .returning(products.c.current_stock)
+            )
+            entries.append(core_entry(
+                "UPDATE", Product.__tablename__, product_id, {"current_stock": current - delta}, {"current_stock": current},
+            ))
+
+        result = await conn.execute(
+            insert(StockMovement).returning(StockMovement.id, sort_by_parameter_order=True), rows
+        )
+        ids = list(result.scalars())
+        entries += [
+            core_entry("CREATE", StockMovement.__tablename__, id, new={"id": id, **row})
+            for id, row in zip(ids, rows)
+        ]
+        record_core_changes(conn, entries)
+    except BaseException:
+        await db.rollback()
+        raise
+    await db.commit()
+
+    notify_table_write([StockMovement.__tablename__, WarehouseStock.__tablename__, Product.__tablename__])
+    return [
+        {
+            "id": id, "product_id": row["product_id"], "warehouse_id": row["warehouse_id"],
+            "quantity_before": row["quantity_before"], "quantity_after": row["quantity_after"],
+        }
+        for id, row in zip(ids, rows)
+    ]
@@ -1,13 +1,13 @@
 """
 Inventory Management Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric, Index, and_
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
 
-from ...core.database import Base
+from ...core.database import Audited, Base
 
 class ProductType(str, enum.Enum):
     GOODS = "goods"
@@ -19,7 +19,7 @@ class StockMovementType(str, enum.Enum):
     OUT = "out"
     ADJUSTMENT = "adjustment"
 
-class Category(Base):
+class Category(Audited, Base):
     __tablename__ = "categories"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -33,8 +33,12 @@ class Category(Base):
     parent = relationship("Category", remote_side=[id], backref="subcategories")
     products = relationship("Product", back_populates="category")
 
-class Product(Base):
+class Product(Audited, Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # List endpoint: WHERE is_active AND category_id = ? ORDER BY id
+        Index("ix_products_category_active", "category_id", "is_active", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sku = Column(String(50), unique=True, nullable=False, index=True)
@@ -76,7 +80,12 @@ class Product(Base):
     stock_movements = relationship("StockMovement", back_populates="product")
     warehouse_stocks = relationship("WarehouseStock", back_populates="product")
 
-class Warehouse(Base):
+# Products at or below their reorder level. The partial index holds just those rows, so the
+# dashboard's low-stock count reads a handful of index entries instead of the whole table
+LOW_STOCK = and_(Product.track_inventory == True, Product.current_stock <= Product.reorder_level)
+Index("ix_products_low_stock", Product.id, sqlite_where=LOW_STOCK, postgresql_where=LOW_STOCK)
+
+class Warehouse(Audited, Base):
     __tablename__ = "warehouses"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -97,8 +106,12 @@ class Warehouse(Base):
     stocks = relationship("WarehouseStock", back_populates="warehouse")
     stock_movements = relationship("StockMovement", back_populates="warehouse")
 
-class WarehouseStock(Base):
+class WarehouseStock(Audited, Base):
     __tablename__ = "warehouse_stocks"
+    __table_args__ = (
+        # One stock row per product and warehouse; the stock ledger upserts on it
+        Index("ix_warehouse_stocks_warehouse_product", "warehouse_id", "product_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     warehouse_id = Column(Integer, ForeignKey("warehouses.id"))
@@ -113,8 +126,12 @@ class WarehouseStock(Base):
     warehouse = relationship("Warehouse", back_populates="stocks")
     product = relationship("Product", back_populates="warehouse_stocks")
 
-class StockMovement(Base):
+class StockMovement(Audited, Base):
     __tablename__ = "stock_movements"
+    __table_args__ = (
+        # List endpoint: WHERE product_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_stock_movements_product_created_at", "product_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
@@ -136,7 +153,7 @@ class StockMovement(Base):
     product = relationship("Product", back_populates="stock_movements")
     warehouse = relationship("Warehouse", back_populates="stock_movements")
 
-class Supplier(Base):
+class Supplier(Audited, Base):
     __tablename__ = "suppliers"
     
     id = Column(Integer, primary_key=True, index=True)
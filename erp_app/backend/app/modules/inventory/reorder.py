@@ -0,0 +1,94 @@
+"""
+Reorder suggestions - how much of each SKU to order, computed for all SKUs at once
+
+Daily demand is the stock issued over the last REORDER_VELOCITY_DAYS. A
+product is due for reordering when its stock is at or below its reorder
+point, which is the larger of:
+
+* its ``reorder_level``
+* ``minimum_stock`` plus the demand expected during REORDER_LEAD_TIME_DAYS
+
+An order brings the stock up to ``maximum_stock``. Products without one are
+brought up to the reorder point plus REORDER_COVER_DAYS of demand.
+
+Two queries load the product levels and the issued quantities. The rest is
+NumPy arithmetic over whole columns, with no Python loop per SKU.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from ...core.config import settings
+from .models import Product, StockMovement, StockMovementType
+
+async def _issued_since(db: AsyncSession, since: datetime):
+    """(product ids, units issued) since ``since``"""
+    rows = (await db.execute(
+        select(StockMovement.product_id, func.sum(StockMovement.quantity))
+        .where(StockMovement.movement_type == StockMovementType.OUT, StockMovement.created_at >= since)
+        .group_by(StockMovement.product_id)
+    )).all()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    product_ids, issued = zip(*rows)
+    return np.array(product_ids, dtype=np.int64), np.array(issued, dtype=float)
+
+async def reorder_suggestions(
+    db: AsyncSession, category_id: Optional[int] = None, now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Products due for reordering, fewest days of stock left first"""
+    query = (
+        select(
+            Product.id, Product.sku, Product.name, Product.current_stock,
+            Product.minimum_stock, Product.maximum_stock, Product.reorder_level,
+        )
+        .where(Product.is_active == True, Product.track_inventory == True)
+        .order_by(Product.id)
+    )
+    if category_id:
+        query = query.where(Product.category_id == category_id)
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return []
+    ids, skus, names, stock, minimum, maximum, reorder_level = zip(*rows)
+    ids = np.array(ids, dtype=np.int64)
+    # None becomes NaN in a float array; missing levels count as 0, a missing maximum as unset
+    stock = np.nan_to_num(np.array(stock, dtype=float))
+    minimum = np.nan_to_num(np.array(minimum, dtype=float))
+    reorder_level = np.nan_to_num(np.array(reorder_level, dtype=float))
+    maximum = np.array(maximum, dtype=float)
+
+    days = settings.REORDER_VELOCITY_DAYS
+    issued_ids, issued = await _issued_since(db, (now or datetime.now()) - timedelta(days=days))
+    # ids is sorted, so each issued product's row is found by binary search
+    positions = np.searchsorted(ids, issued_ids)
+    found = positions < len(ids)
+    found[found] = ids[positions[found]] == issued_ids[found]
+    demand = np.zeros(len(ids))
+    demand[positions[found]] = issued[found] / days
+
+    reorder_point = np.ceil(np.maximum(reorder_level, minimum + demand * settings.REORDER_LEAD_TIME_DAYS))
+    target = np.where(maximum > 0, maximum, reorder_point + np.ceil(demand * settings.REORDER_COVER_DAYS))
+    target = np.maximum(target, reorder_point)
+    suggested = np.maximum(target - stock, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cover = np.where(demand > 0, stock / demand, np.inf)
+
+    due = np.flatnonzero((stock <= reorder_point) & (suggested > 0))
+    due = due[np.lexsort((ids[due], cover[due]))]
+    return [
+        {
+            "product_id": int(ids[i]),
+            "sku": skus[i],
+            "name": names[i],
+            "current_stock": int(stock[i]),
+            "reorder_point": int(reorder_point[i]),
+            "daily_demand": round(float(demand[i]), 2),
+            "days_of_cover": round(float(cover[i]), 1) if np.isfinite(cover[i]) else None,
+            "suggested_quantity": int(suggested[i]),
+        }
+        for i in due
+    ]
@@ -1,13 +1,13 @@
 """
 Sales Module Models
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
 
-from ...core.database import Base
+from ...core.database import Audited, Base
 
 class QuoteStatus(str, enum.Enum):
     DRAFT = "draft"
@@ -24,7 +24,7 @@ class OrderStatus(str, enum.Enum):
     DELIVERED = "delivered"
     CANCELLED = "cancelled"
 
-class Quote(Base):
+class Quote(Audited, Base):
     __tablename__ = "quotes"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -60,7 +60,7 @@ class Quote(Base):
     items = relationship("QuoteItem", back_populates="quote")
     orders = relationship("SalesOrder", back_populates="quote")
 
-class QuoteItem(Base):
+class QuoteItem(Audited, Base):
     __tablename__ = "quote_items"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -78,8 +78,12 @@ class QuoteItem(Base):
     # Relationships
     quote = relationship("Quote", back_populates="items")
 
-class SalesOrder(Base):
+class SalesOrder(Audited, Base):
     __tablename__ = "sales_orders"
+    __table_args__ = (
+        # List endpoint: WHERE status = ? ORDER BY created_at DESC, id DESC
+        Index("ix_sales_orders_status_created_at", "status", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     order_number = Column(String(50), unique=True, nullable=False)
@@ -127,7 +131,7 @@ class SalesOrder(Base):
     items = relationship("SalesOrderItem", back_populates="order")
     shipments = relationship("Shipment", back_populates="order")
 
-class SalesOrderItem(Base):
+class SalesOrderItem(Audited, Base):
     __tablename__ = "sales_order_items"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -147,7 +151,7 @@ class SalesOrderItem(Base):
     # Relationships
     order = relationship("SalesOrder", back_populates="items")
 
-class Shipment(Base):
+class Shipment(Audited, Base):
     __tablename__ = "shipments"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -181,7 +185,7 @@ class Shipment(Base):
     order = relationship("SalesOrder", back_populates="shipments")
     items = relationship("ShipmentItem", back_populates="shipment")
 
-class ShipmentItem(Base):
+class ShipmentItem(Audited, Base):
     __tablename__ = "shipment_items"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -192,7 +196,7 @@ class ShipmentItem(Base):
     # Relationships
     shipment = relationship("Shipment", back_populates="items")
 
-class SalesTarget(Base):
+class SalesTarget(Audited, Base):
     __tablename__ = "sales_targets"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -206,7 +210,7 @@ class SalesTarget(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
-class Commission(Base):
+class Commission(Audited, Base):
     __tablename__ = "commissions"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -204,20 +204,6 @@ class DataUtils:
         """Generate unique code"""
         unique_part = str(uuid.uuid4()).replace('-', '')[:length]
         return f"{prefix}{unique_part}".upper()
-    
-    @staticmethod
-    def paginate_results(query, page: int, per_page: int):
-        """Paginate database query results"""
-        total = query.count()
-        items = query.offset((page - 1) * per_page).limit(per_page).all()
-        
-        return {
-            'items': items,
-            'total': total,
-            'page': page,
-            'per_page': per_page,
-            'pages': (total + per_page - 1) // per_page
-        }
 
 
 class SecurityUtils:
@@ -6,11 +6,21 @@ from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 
 from app.core.config import settings
+from app.core.audit import audit_writer
 from app.core.database import engine, create_all_tables
+from app.core.imports import import_reaper
+from app.core.instrumentation import QueryInstrumentationMiddleware
+from app.core import metrics
+from app.core.health import health_sampler
+from app.core.pagination import count_cache
+from app.core.response_cache import response_cache
+from app.core.security import password_hasher
 from app.api.routes import api_router
+from app.api.auth import user_cache
+from app.api.dashboard import dashboard_cache
 
 # Create FastAPI application
 app = FastAPI(
@@ -30,6 +40,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency and DB histograms for Prometheus; runs inside the query tracking below
+if settings.METRICS_ENABLED:
+    metrics.install()
+    metrics.sampler.track_cache("auth_user", user_cache)
+    metrics.sampler.track_cache("dashboard", dashboard_cache)
+    metrics.sampler.track_cache("pagination_count", count_cache)
+    metrics.sampler.track_cache("response", response_cache)
+    metrics.sampler.track_hasher(password_hasher)
+    app.add_middleware(metrics.PrometheusMiddleware)
+
+# Per-request SQL counts, DB time and N+1 detection (see /api/metrics)
+if settings.QUERY_INSTRUMENTATION:
+    app.add_middleware(QueryInstrumentationMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="frontend/static"), name="static")
 
@@ -43,6 +67,20 @@ app.include_router(api_router, prefix="/api")
 async def startup_event():
     """Initialize database on startup"""
     await create_all_tables()
+    health_sampler.start()
+    import_reaper.start()
+    audit_writer.start()
+    if settings.METRICS_ENABLED:
+        metrics.sampler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background work"""
+    await health_sampler.stop()
+    await import_reaper.stop()
+    await audit_writer.stop()
+    if settings.METRICS_ENABLED:
+        await metrics.sampler.stop()
 
 @app.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
@@ -59,6 +97,14 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus exposition (all workers in multiprocess mode)"""
+    if not settings.METRICS_ENABLED:
+        return Response(status_code=404)
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
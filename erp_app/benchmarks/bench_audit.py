@@ -0,0 +1,93 @@
+"""
+Audit log benchmark
+
+Commits leads one at a time, as create requests do, from a number of
+concurrent workers and reports the commit latency of each audit mode:
+
+- off:    AUDIT_ENABLED=False
+- async:  entries are queued in memory on commit and bulk-inserted by the writer
+- spool:  entries are appended to the local spool file on commit, then bulk-inserted
+
+The time the writer needs to drain the queue afterwards is shown
+separately, with the number of INSERT statements it took.
+
+Usage:
+    python benchmarks/bench_audit.py [--commits 2000] [--workers 10]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Point the app at a throwaway database before it reads its settings
+WORKDIR = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(WORKDIR, "bench_audit.db"))
+os.environ.setdefault("AUDIT_SPOOL_PATH", os.path.join(WORKDIR, "audit_spool.db"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from sqlalchemy import delete
+
+from app.core.audit import audit_writer
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine, create_all_tables
+from app.core.models import AuditLog
+from app.modules.crm.models import Lead
+
+
+async def worker(name: int, commits: int, samples: list):
+    async with AsyncSessionLocal() as db:
+        for i in range(commits):
+            db.add(Lead(first_name=f"Lead {name}", last_name=str(i), email=f"lead-{name}-{i}@example.com"))
+            start = time.perf_counter()
+            await db.commit()
+            samples.append((time.perf_counter() - start) * 1000)
+
+
+async def run_mode(mode: str, commits: int, workers: int):
+    settings.AUDIT_ENABLED = mode != "off"
+    settings.AUDIT_MODE = mode
+    async with async_engine.begin() as conn:
+        await conn.execute(delete(Lead))
+        await conn.execute(delete(AuditLog))
+
+    audit_writer.start()
+    batches = audit_writer.batches
+    samples = []
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(w, commits // workers, samples) for w in range(workers)))
+    elapsed = time.perf_counter() - start
+    drain_start = time.perf_counter()
+    await audit_writer.stop()
+    drain = (time.perf_counter() - drain_start) * 1000 if mode != "off" else 0
+
+    print(
+        f"{mode:<15}{len(samples) / elapsed:>10.0f}{statistics.median(samples):>9.2f}"
+        f"{statistics.quantiles(samples, n=100)[98]:>9.2f}{drain:>10.1f}{audit_writer.batches - batches:>9}"
+    )
+
+
+async def run(commits: int, workers: int):
+    await create_all_tables()
+    print(f"{'mode':<15}{'commits/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'drain ms':>10}{'inserts':>9}")
+    for mode in ("off", "async", "spool"):
+        await run_mode(mode, commits, workers)
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commits", type=int, default=2000, help="leads to commit per mode")
+    parser.add_argument("--workers", type=int, default=10, help="concurrent sessions")
+    args = parser.parse_args()
+
+    settings.SLOW_QUERY_MS = 0
+    # Long enough that the writer only flushes on full batches while the workers run
+    settings.AUDIT_FLUSH_SECONDS = 5.0
+    asyncio.run(run(args.commits, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Bulk create benchmark
+
+Creates the same invoices in a fresh database two ways:
+
+- per-row: what a client does today - one POST /api/accounting/invoices per
+  invoice, i.e. one ORM insert, commit and refresh each
+- bulk: bulk_create(), as POST /api/accounting/invoices/bulk does, with
+  BULK_MAX_ITEMS invoices per request
+
+Usage:
+    python benchmarks/bench_bulk.py [--rows 20000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.bulk import BULK_SPECS, bulk_create
+from app.core.config import settings
+from app.core.database import Base, import_all_models
+from app.modules.accounting.models import Customer, Invoice
+
+
+def invoice(i: int):
+    issued = datetime(2024, 1, 1) + timedelta(minutes=i)
+    return {
+        "invoice_number": f"INV-{i:07d}",
+        "customer_id": 1,
+        "issue_date": issued,
+        "due_date": issued + timedelta(days=30),
+        "subtotal": 100 + i % 900,
+        "tax_amount": 20,
+        "total_amount": 120 + i % 900,
+    }
+
+
+async def fresh_engine(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as db:
+        db.add(Customer(name="Acme"))
+        await db.commit()
+    return engine
+
+
+async def per_row(engine, rows: int):
+    for i in range(rows):
+        data = invoice(i)
+        async with AsyncSession(engine) as db:
+            new_invoice = Invoice(**data, balance_due=data["total_amount"])
+            db.add(new_invoice)
+            await db.commit()
+            await db.refresh(new_invoice)
+
+
+async def bulk(engine, rows: int):
+    for offset in range(0, rows, settings.BULK_MAX_ITEMS):
+        items = [invoice(i) for i in range(offset, min(offset + settings.BULK_MAX_ITEMS, rows))]
+        async with AsyncSession(engine) as db:
+            result = await bulk_create(db, BULK_SPECS["invoices"], items, None)
+        assert result["failed"] == 0, result["results"][:3]
+
+
+async def main(rows: int):
+    settings.SLOW_QUERY_MS = 0
+    import_all_models()
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench_bulk.db")
+        print(f"{'path':<8} {'seconds':>9} {'rows/s':>9}")
+        for name, run in (("per-row", per_row), ("bulk", bulk)):
+            engine = await fresh_engine(database)
+            start = time.perf_counter()
+            await run(engine, rows)
+            elapsed = time.perf_counter() - start
+            async with engine.connect() as conn:
+                created = await conn.scalar(select(func.count(Invoice.id)))
+            await engine.dispose()
+            assert created == rows, (name, created)
+            print(f"{name:<8} {elapsed:>9.2f} {rows / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,124 @@
+"""
+Stock movement export benchmark
+
+Seeds stock movements, then exports all of them three ways, each in a fresh
+process so its peak RSS is its own:
+
+- orm:  what a naive export does - load every StockMovement, then write CSV
+- csv:  export_response() CSV, streamed from a server-side cursor
+- xlsx: export_response() XLSX, write-only workbook
+
+The response body is consumed and discarded, so the numbers are the
+server's share of the work.
+
+Usage:
+    python benchmarks/bench_export.py [--rows 1000000]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base, import_all_models
+from app.core.export import ExportFormat, export_response
+from app.modules.inventory.models import StockMovement, StockMovementType
+
+COLUMNS = (
+    StockMovement.id, StockMovement.product_id, StockMovement.warehouse_id, StockMovement.movement_type,
+    StockMovement.quantity, StockMovement.reference_number, StockMovement.reason, StockMovement.created_at,
+)
+
+
+def seed(path: str, rows: int):
+    settings.SLOW_QUERY_MS = 0  # 50k-row insert batches are slow by design
+    engine = create_engine(f"sqlite:///{path}")
+    import_all_models()
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2020, 1, 1)
+    types = list(StockMovementType)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 50000):
+            conn.execute(insert(StockMovement), [
+                {
+                    "product_id": i % 5000 + 1,
+                    "warehouse_id": i % 10 + 1,
+                    "movement_type": types[i % len(types)],
+                    "quantity": i % 100 + 1,
+                    "reference_number": f"PO-{i:08d}",
+                    "reason": "Purchase order receipt",
+                    "created_at": start + timedelta(minutes=i),
+                }
+                for i in range(offset, min(offset + 50000, rows))
+            ])
+    engine.dispose()
+
+
+async def run(path: str, mode: str) -> int:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    size = 0
+    async with AsyncSession(engine) as db:
+        if mode == "orm":
+            movements = (await db.scalars(select(StockMovement).order_by(StockMovement.id))).all()
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow([column.key for column in COLUMNS])
+            for movement in movements:
+                writer.writerow([getattr(movement, column.key) for column in COLUMNS])
+            size = len(buffer.getvalue().encode("utf-8"))
+        else:
+            query = select(*COLUMNS).order_by(StockMovement.id)
+            response = export_response(db, query, "stock-movements", ExportFormat(mode))
+            async for chunk in response.body_iterator:
+                size += len(chunk)
+    await engine.dispose()
+    return size
+
+
+def child(path: str, mode: str):
+    start = time.perf_counter()
+    size = asyncio.run(run(path, mode))
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_mb:.1f} {size}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench_export.db")
+        print(f"Seeding {args.rows:,} stock movements...")
+        seed(path, args.rows)
+
+        print(f"{'mode':<6} {'seconds':>9} {'peak RSS MB':>12} {'output MB':>10}")
+        for mode in ("orm", "csv", "xlsx"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", path, mode],
+                check=True, capture_output=True, text=True,
+            ).stdout.split()
+            elapsed, peak_mb, size = float(out[0]), float(out[1]), int(out[2])
+            print(f"{mode:<6} {elapsed:>9.2f} {peak_mb:>12.1f} {size / 1024 / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Product catalog import benchmark
+
+Writes a CSV (and the same rows as an XLSX) of products, then loads it into a
+fresh database two ways:
+
+- per-row: what a client does today - one ORM insert, commit and refresh per
+  row, as POST /api/inventory/products does
+- pipeline: run_import(), validating and inserting IMPORT_BATCH_SIZE rows at a time
+
+Usage:
+    python benchmarks/bench_import.py [--rows 20000]
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from openpyxl import Workbook
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.core.database import Base, import_all_models
+from app.core.imports import IMPORT_SPECS, ImportFormat, run_import
+from app.core.models import ImportJob
+from app.modules.inventory.models import Product
+
+HEADER = ("sku", "name", "brand", "cost_price", "selling_price", "minimum_stock")
+
+
+def product(i: int):
+    return (f"SKU-{i:07d}", f"Product {i}", f"Brand {i % 50}", f"{i % 500 + 1}.25", f"{i % 500 + 3}.99", i % 20)
+
+
+def write_files(directory: str, rows: int):
+    csv_path = os.path.join(directory, "catalog.csv")
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(product(i) for i in range(rows))
+
+    xlsx_path = os.path.join(directory, "catalog.xlsx")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(HEADER)
+    for i in range(rows):
+        sku, name, brand, cost, price, minimum = product(i)
+        sheet.append((sku, name, brand, float(cost), float(price), minimum))
+    workbook.save(xlsx_path)
+    return csv_path, xlsx_path
+
+
+async def fresh_engine(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+async def per_row(engine, csv_path: str) -> int:
+    with open(csv_path, newline="") as f:
+        for record in csv.DictReader(f):
+            async with AsyncSession(engine) as db:
+                new_product = Product(
+                    sku=record["sku"],
+                    name=record["name"],
+                    brand=record["brand"],
+                    cost_price=record["cost_price"],
+                    selling_price=record["selling_price"],
+                    minimum_stock=int(record["minimum_stock"]),
+                )
+                db.add(new_product)
+                await db.commit()
+                await db.refresh(new_product)
+    async with engine.connect() as conn:
+        return await conn.scalar(select(func.count(Product.id)))
+
+
+async def pipeline(engine, path: str, format: ImportFormat) -> int:
+    async with AsyncSession(engine) as db:
+        job = ImportJob(resource="products", filename=os.path.basename(path))
+        db.add(job)
+        await db.flush()
+        job_id = job.id
+        await db.commit()
+    # run_import deletes its input, as it does with uploads
+    directory, name = os.path.split(path)
+    copy = os.path.join(directory, "upload-" + name)
+    with open(path, "rb") as src, open(copy, "wb") as dst:
+        dst.write(src.read())
+    await run_import(engine, IMPORT_SPECS["products"], job_id, copy, format, None)
+    async with AsyncSession(engine) as db:
+        job = await db.get(ImportJob, job_id)
+        assert job.status.value == "completed", job.message
+        return job.inserted_rows
+
+
+async def main(rows: int):
+    settings.SLOW_QUERY_MS = 0
+    import_all_models()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Writing {rows:,} products...")
+        csv_path, xlsx_path = write_files(tmp, rows)
+        database = os.path.join(tmp, "bench_import.db")
+
+        runs = [
+            ("per-row POST", lambda engine: per_row(engine, csv_path)),
+            ("pipeline csv", lambda engine: pipeline(engine, csv_path, ImportFormat.CSV)),
+            ("pipeline xlsx", lambda engine: pipeline(engine, xlsx_path, ImportFormat.XLSX)),
+        ]
+        print(f"{'path':<14} {'seconds':>9} {'rows/s':>9}")
+        for name, run in runs:
+            engine = await fresh_engine(database)
+            start = time.perf_counter()
+            inserted = await run(engine)
+            elapsed = time.perf_counter() - start
+            await engine.dispose()
+            assert inserted == rows, (name, inserted)
+            print(f"{name:<14} {elapsed:>9.2f} {rows / elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows))
@@ -0,0 +1,189 @@
+"""
+List serialization benchmark
+
+Seeds invoices and products, then times a 1000-row page of each listing:
+
+- entities: select the ORM entity, build a dict per row converting Numeric
+            to float, then jsonable_encoder and JSONResponse (the old handlers)
+- columns:  select the listed columns and render the row dicts with
+            FastJSONResponse (orjson), as the handlers now do
+- endpoint: GET /api/accounting/invoices and /api/inventory/products through
+            the app, auth and middleware included
+- sparse:   the same request with ?fields= asking for id, number and amount
+
+The first two run the handler bodies directly on one session.
+
+Usage:
+    python benchmarks/bench_list_serialization.py [--rows 5000] [--limit 1000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before it reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_list_serialization.db"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert, select
+
+from app.api.accounting import INVOICE_LIST_COLUMNS
+from app.api.inventory import PRODUCT_LIST_COLUMNS
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine, create_all_tables
+from app.core.pagination import paginate
+from app.core.responses import FastJSONResponse
+from app.modules.accounting.models import Invoice, InvoiceStatus
+from app.modules.inventory.models import Product
+from main import app
+
+
+async def seed(rows: int):
+    await create_all_tables()
+    now = datetime.now()
+    statuses = list(InvoiceStatus)
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(Invoice), [
+            {
+                "invoice_number": f"INV-{i:08d}",
+                "issue_date": now - timedelta(minutes=i),
+                "due_date": now + timedelta(days=30),
+                "total_amount": i % 1000 + 0.99,
+                "paid_amount": i % 100,
+                "balance_due": i % 1000 - i % 100 + 0.99,
+                "status": statuses[i % len(statuses)],
+                "created_at": now - timedelta(minutes=i),
+            }
+            for i in range(rows)
+        ])
+        await conn.execute(insert(Product), [
+            {
+                "sku": f"SKU-{i:08d}",
+                "name": f"Product {i}",
+                "cost_price": i % 500 + 0.25,
+                "selling_price": i % 500 + 9.99 if i % 10 else None,
+                "current_stock": i % 300,
+                "minimum_stock": 10,
+                "is_active": True,
+            }
+            for i in range(rows)
+        ])
+
+
+async def invoices_entities(db, limit):
+    page = await paginate(db, select(Invoice), (Invoice.created_at, Invoice.id), limit=limit, count=False)
+    return JSONResponse(jsonable_encoder({
+        "invoices": [
+            {
+                "id": invoice.id,
+                "invoice_number": invoice.invoice_number,
+                "customer_id": invoice.customer_id,
+                "issue_date": invoice.issue_date,
+                "due_date": invoice.due_date,
+                "total_amount": float(invoice.total_amount),
+                "paid_amount": float(invoice.paid_amount),
+                "balance_due": float(invoice.balance_due),
+                "status": invoice.status
+            }
+            for invoice in page.items
+        ],
+        **page.meta()
+    }))
+
+
+async def invoices_columns(db, limit):
+    query = select(*INVOICE_LIST_COLUMNS)
+    page = await paginate(db, query, (Invoice.created_at, Invoice.id), limit=limit, count=False)
+    return FastJSONResponse({"invoices": page.items, **page.meta()})
+
+
+async def products_entities(db, limit):
+    query = select(Product).where(Product.is_active == True)
+    page = await paginate(db, query, (Product.id,), limit=limit, count=False, descending=False)
+    return JSONResponse(jsonable_encoder({
+        "products": [
+            {
+                "id": product.id,
+                "sku": product.sku,
+                "name": product.name,
+                "type": product.type,
+                "cost_price": float(product.cost_price) if product.cost_price else 0,
+                "selling_price": float(product.selling_price) if product.selling_price else 0,
+                "current_stock": product.current_stock,
+                "minimum_stock": product.minimum_stock,
+                "is_active": product.is_active
+            }
+            for product in page.items
+        ],
+        **page.meta()
+    }))
+
+
+async def products_columns(db, limit):
+    query = select(*PRODUCT_LIST_COLUMNS).where(Product.is_active == True)
+    page = await paginate(db, query, (Product.id,), limit=limit, count=False, descending=False)
+    return FastJSONResponse({"products": page.items, **page.meta()})
+
+
+def report(name: str, mode: str, samples, size: int):
+    print(f"{name:<10}{mode:<10}{statistics.median(samples):>9.2f}{max(samples):>9.2f}{size:>10}")
+
+
+async def run(limit: int, repeat: int):
+    print(f"{'listing':<10}{'mode':<10}{'p50 ms':>9}{'max ms':>9}{'bytes':>10}")
+    paths = (
+        ("invoices", invoices_entities, invoices_columns, "/api/accounting/invoices", "id,invoice_number,total_amount"),
+        ("products", products_entities, products_columns, "/api/inventory/products", "id,sku,selling_price"),
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "full_name": "Bench", "password": "bench-password",
+        })
+        response = await client.post("/api/auth/login", json={"username": "bench", "password": "bench-password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        for name, entities, columns, url, fields in paths:
+            async with AsyncSessionLocal() as db:
+                for mode, fn in (("entities", entities), ("columns", columns)):
+                    await fn(db, limit)
+                    samples = []
+                    for _ in range(repeat):
+                        start = time.perf_counter()
+                        response = await fn(db, limit)
+                        samples.append((time.perf_counter() - start) * 1000)
+                        db.expunge_all()
+                    report(name, mode, samples, len(response.body))
+
+            for mode, query in (("endpoint", ""), ("sparse", f"&fields={fields}")):
+                samples = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    response = await client.get(f"{url}?limit={limit}&total=none{query}", headers=headers)
+                    samples.append((time.perf_counter() - start) * 1000)
+                report(name, mode, samples, len(response.content))
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="invoices and products to seed")
+    parser.add_argument("--limit", type=int, default=1000, help="page size")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    settings.SLOW_QUERY_MS = 0
+    print(f"Seeding {args.rows} invoices and products ...")
+    asyncio.run(seed(args.rows))
+    asyncio.run(run(args.limit, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Login storm benchmark
+
+Measures GET /api/dashboard/stats latency while many users log in at once (the
+9 AM shift start), with bcrypt run inline on the event loop versus on the
+password hasher pool.
+
+Usage:
+    python benchmarks/bench_login_storm.py [--logins 200] [--login-concurrency 50] [--polls 200]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Point the app at a throwaway database before it reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_login_storm.db"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import httpx
+
+from app.core import security
+from app.core.database import async_engine, create_all_tables
+from app.api import auth
+from main import app
+
+
+async def _inline_hash(password):
+    return security.get_password_hash(password)
+
+
+async def _inline_verify(plain_password, hashed_password):
+    return security.verify_password(plain_password, hashed_password)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run(mode: str, logins: int, login_concurrency: int, polls: int, users: int):
+    if mode == "inline":
+        auth.get_password_hash_async = _inline_hash
+        auth.verify_password_async = _inline_verify
+    else:
+        auth.get_password_hash_async = security.get_password_hash_async
+        auth.verify_password_async = security.verify_password_async
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/auth/login", json={"username": "bench0", "password": "bench-password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        semaphore = asyncio.Semaphore(login_concurrency)
+        failed_logins = []
+
+        async def login(i: int):
+            async with semaphore:
+                response = await client.post("/api/auth/login", json={"username": f"bench{i % users}", "password": "bench-password"})
+                if response.status_code != 200:
+                    failed_logins.append(response.status_code)
+
+        latencies = []
+
+        async def poll():
+            for _ in range(polls):
+                start = time.perf_counter()
+                await client.get("/api/dashboard/stats", headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        start = time.perf_counter()
+        await asyncio.gather(poll(), *(login(i) for i in range(logins)))
+        elapsed = time.perf_counter() - start
+
+    # Pooled connections belong to this run's event loop
+    await async_engine.dispose()
+    return {
+        "elapsed": elapsed,
+        "p50": statistics.median(latencies),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies),
+        "failed_logins": len(failed_logins),
+    }
+
+
+async def seed(users: int):
+    await create_all_tables()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(users):
+            await client.post("/api/auth/register", json={
+                "username": f"bench{i}",
+                "email": f"bench{i}@example.com",
+                "full_name": f"Bench User {i}",
+                "password": "bench-password",
+            })
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Seeding {args.users} users ...")
+    asyncio.run(seed(args.users))
+
+    print(f"{'bcrypt':<10}{'elapsed s':>11}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'failed logins':>15}")
+    for mode in ("inline", "pool"):
+        result = asyncio.run(run(mode, args.logins, args.login_concurrency, args.polls, args.users))
+        print(f"{mode:<10}{result['elapsed']:>11.2f}{result['p50']:>10.1f}{result['p99']:>10.1f}{result['max']:>10.1f}"
+              f"{result['failed_logins']:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Low-stock count and reorder suggestion benchmark
+
+Seeds a catalog in which a small share of products is low on stock, plus
+issue movements, then times:
+
+- low-stock scan:   the old dashboard aggregate, a CASE count over every product
+- low-stock index:  COUNT(*) with the LOW_STOCK predicate, read from the
+                    ix_products_low_stock partial index
+- reorder python:   the two reorder queries, then the suggestion math in a
+                    per-SKU Python loop
+- reorder numpy:    reorder_suggestions(), the same queries and vectorized math
+
+Usage:
+    python benchmarks/bench_reorder.py [--products 200000] [--movements 500000] [--repeat 10]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before it reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_reorder.db"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from sqlalchemy import and_, case, func, insert, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine, create_all_tables
+from app.modules.inventory.models import LOW_STOCK, Product, StockMovement, StockMovementType
+from app.modules.inventory.reorder import _issued_since, reorder_suggestions
+
+
+async def seed(products: int, movements: int):
+    await create_all_tables()
+    rng = random.Random(1)
+    now = datetime.now()
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(Product), [
+            {
+                "sku": f"SKU-{i:08d}", "name": f"Product {i}", "is_active": True, "track_inventory": True,
+                # About 2% at or below their reorder level
+                "current_stock": rng.randint(0, 20) if i % 50 == 0 else rng.randint(50, 1000),
+                "minimum_stock": 10, "reorder_level": 20,
+                "maximum_stock": 1200 if i % 2 else None,
+            }
+            for i in range(products)
+        ])
+        await conn.execute(insert(StockMovement), [
+            {
+                "product_id": rng.randint(1, products), "movement_type": StockMovementType.OUT,
+                "quantity": rng.randint(1, 10), "created_at": now - timedelta(minutes=rng.randint(0, 60 * 24 * 60)),
+            }
+            for _ in range(movements)
+        ])
+
+
+def old_low_stock_query():
+    return select(func.count(case((and_(
+        Product.track_inventory == True, Product.current_stock <= Product.reorder_level
+    ), 1))))
+
+
+async def reorder_python(db):
+    """The same suggestions, one SKU at a time"""
+    rows = (await db.execute(
+        select(
+            Product.id, Product.sku, Product.name, Product.current_stock,
+            Product.minimum_stock, Product.maximum_stock, Product.reorder_level,
+        ).where(Product.is_active == True, Product.track_inventory == True).order_by(Product.id)
+    )).all()
+    days = settings.REORDER_VELOCITY_DAYS
+    issued_ids, issued = await _issued_since(db, datetime.now() - timedelta(days=days))
+    demand_by_id = {int(id): float(units) / days for id, units in zip(issued_ids, issued)}
+    due = []
+    for id, sku, name, stock, minimum, maximum, reorder_level in rows:
+        stock, demand = stock or 0, demand_by_id.get(id, 0.0)
+        reorder_point = math.ceil(max(reorder_level or 0, (minimum or 0) + demand * settings.REORDER_LEAD_TIME_DAYS))
+        target = maximum if maximum and maximum > 0 else reorder_point + math.ceil(demand * settings.REORDER_COVER_DAYS)
+        suggested = max(max(target, reorder_point) - stock, 0)
+        if stock <= reorder_point and suggested > 0:
+            cover = stock / demand if demand > 0 else math.inf
+            due.append((cover, id, sku, name, suggested))
+    due.sort()
+    return due
+
+
+async def timed(fn, repeat: int):
+    await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, result
+
+
+async def run(repeat: int):
+    print(f"{'mode':<18}{'p50 ms':>9}{'max ms':>9}{'result':>9}")
+    async with AsyncSessionLocal() as db:
+        modes = (
+            ("low-stock scan", lambda: db.scalar(old_low_stock_query())),
+            ("low-stock index", lambda: db.scalar(select(func.count()).select_from(Product).where(LOW_STOCK))),
+            ("reorder python", lambda: reorder_python(db)),
+            ("reorder numpy", lambda: reorder_suggestions(db)),
+        )
+        for name, fn in modes:
+            samples, result = await timed(fn, repeat)
+            size = result if isinstance(result, int) else len(result)
+            print(f"{name:<18}{statistics.median(samples):>9.2f}{max(samples):>9.2f}{size:>9}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=200000)
+    parser.add_argument("--movements", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    settings.SLOW_QUERY_MS = 0
+    print(f"Seeding {args.products} products and {args.movements} movements ...")
+    asyncio.run(seed(args.products, args.movements))
+    asyncio.run(run(args.repeat))
+
+
+if __name__ == "__main__":
+    main()
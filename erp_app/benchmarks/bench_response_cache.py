@@ -0,0 +1,106 @@
+"""
+Conditional GET benchmark
+
+Seeds categories and paid invoices, then times GET /api/inventory/categories
+and GET /api/dashboard/charts/revenue three ways:
+
+- uncached:  the store is emptied before every request, so each one queries
+             and serializes, as before ETags
+- cached:    no If-None-Match; the body stored for the current ETag is sent
+- 304:       the client revalidates with the ETag it holds; no body at all
+
+Usage:
+    python benchmarks/bench_response_cache.py [--categories 500] [--invoices 200000] [--requests 300]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before it reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_response_cache.db"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import httpx
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.database import async_engine, create_all_tables
+from app.core.response_cache import response_cache
+from app.modules.accounting.models import Invoice, InvoiceStatus
+from app.modules.inventory.models import Category
+from main import app
+
+URLS = ("/api/inventory/categories", "/api/dashboard/charts/revenue?months=24")
+
+
+async def seed(categories: int, invoices: int):
+    await create_all_tables()
+    start = datetime.now() - timedelta(days=700)
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(Category), [
+            {"name": f"Category {i}", "description": f"Products of kind {i}", "is_active": True}
+            for i in range(categories)
+        ])
+        for offset in range(0, invoices, 50000):
+            await conn.execute(insert(Invoice), [
+                {
+                    "invoice_number": f"INV-{i:08d}",
+                    "issue_date": start + timedelta(minutes=5 * i % (700 * 24 * 60)),
+                    "due_date": start,
+                    "total_amount": i % 1000 + 1,
+                    "status": InvoiceStatus.PAID,
+                }
+                for i in range(offset, min(offset + 50000, invoices))
+            ])
+
+
+async def run(requests: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/auth/register", json={
+            "username": "bench", "email": "bench@example.com", "full_name": "Bench", "password": "bench-password",
+        })
+        response = await client.post("/api/auth/login", json={"username": "bench", "password": "bench-password"})
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        print(f"{'endpoint':<38}{'mode':<10}{'mean ms':>9}{'p99 ms':>9}{'bytes':>9}")
+        for url in URLS:
+            for mode in ("uncached", "cached", "304"):
+                request_headers = headers
+                if mode == "304":
+                    etag = (await client.get(url, headers=headers)).headers["etag"]
+                    request_headers = {**headers, "If-None-Match": etag}
+                latencies, size = [], 0
+                for _ in range(requests):
+                    if mode == "uncached":
+                        response_cache.clear()
+                    start = time.perf_counter()
+                    response = await client.get(url, headers=request_headers)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    size = len(response.content)
+                latencies.sort()
+                p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+                print(f"{url.split('?')[0]:<38}{mode:<10}{statistics.mean(latencies):>9.2f}{p99:>9.2f}{size:>9}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--categories", type=int, default=500)
+    parser.add_argument("--invoices", type=int, default=200000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    settings.SLOW_QUERY_MS = 0
+    print(f"Seeding {args.categories} categories and {args.invoices:,} paid invoices ...")
+    asyncio.run(seed(args.categories, args.invoices))
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Shared cache stampede benchmark
+
+Seeds the dashboard tables, then fires N concurrent requests for one cold
+cache key whose value takes the old per-metric dashboard queries to build:
+
+* get-then-set - each caller misses, runs the queries and stores the result
+* get_or_set   - single-flight: one caller runs the queries, the rest wait for it
+
+Each caller gets its own session, as concurrent requests would. Uses the
+backend CACHE_BACKEND selects (CACHE_BACKEND=redis to measure Redis).
+
+Usage:
+    python benchmarks/bench_shared_cache.py [--rows 100000] [--callers 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.core.database import get_async_database_url
+from app.core.shared_cache import Cache
+from bench_dashboard_stats import per_metric_queries, seed
+
+
+async def run(database_url: str, callers: int):
+    engine = create_async_engine(get_async_database_url(database_url))
+    AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+    month_start = datetime.combine(datetime.now().date().replace(day=1), datetime.min.time())
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        async with AsyncSessionLocal() as db:
+            return [await db.scalar(statement) for statement in per_metric_queries(month_start)]
+
+    async def get_then_set(cache: Cache):
+        value = await cache.get("stats")
+        if value is None:
+            value = await load()
+            await cache.set("stats", value)
+        return value
+
+    async def single_flight(cache: Cache):
+        return await cache.get_or_set("stats", load)
+
+    await load()
+    results = {}
+    for name, fn in (("get-then-set", get_then_set), ("get_or_set", single_flight)):
+        cache = Cache(f"bench_{name}", ttl=60)
+        calls = 0
+        start = time.perf_counter()
+        await asyncio.gather(*(fn(cache) for _ in range(callers)))
+        results[name] = ((time.perf_counter() - start) * 1000, calls)
+        await cache.delete("stats")
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="sync SQLAlchemy URL (default: temp SQLite file)")
+    parser.add_argument("--rows", type=int, default=100000, help="rows per seeded table")
+    parser.add_argument("--callers", type=int, default=50, help="concurrent requests for the cold key")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_shared_cache.db")
+
+    print(f"Seeding {args.rows} leads, invoices and sales orders into {database_url} ...")
+    seed(database_url, args.rows)
+
+    results = asyncio.run(run(database_url, args.callers))
+    print(f"{'path':<14}{'wall ms':>10}{'loads':>8}")
+    for name, (elapsed, calls) in results.items():
+        print(f"{name:<14}{elapsed:>10.1f}{calls:>8}")
+
+
+if __name__ == "__main__":
+    main()
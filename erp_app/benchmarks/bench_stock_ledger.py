@@ -0,0 +1,153 @@
+"""
+Stock ledger benchmark
+
+Concurrent workers post random receipts and issues against a few hot
+products in two warehouses, and report postings (movements) per second:
+
+- naive:    read the stock row with the ORM, change it, write a movement and
+            commit, one movement per transaction (what a handler would do
+            without the ledger)
+- ledger:   post_movements() with one movement per transaction
+- batched:  post_movements() with --batch movements per transaction
+
+Afterwards each mode is checked: "lost" counts units that disappeared (the
+sum of the movements no longer matches the stock rows), "failed" counts
+transactions the database refused (e.g. SQLite's "database is locked" when a
+read transaction tries to upgrade to a write).
+
+Usage:
+    python benchmarks/bench_stock_ledger.py [--workers 20] [--postings 2000] [--batch 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Point the app at a throwaway database before it reads its settings
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench_stock_ledger.db"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine, create_all_tables
+from app.modules.inventory.ledger import MovementLine, post_movements
+from app.modules.inventory.models import Product, StockMovement, StockMovementType, Warehouse, WarehouseStock
+
+PRODUCTS = 5
+
+
+async def seed():
+    await create_all_tables()
+    async with async_engine.begin() as conn:
+        await conn.execute(insert(Product), [{"sku": f"SKU-{i}", "name": f"Product {i}"} for i in range(PRODUCTS)])
+        await conn.execute(insert(Warehouse), [{"name": f"Warehouse {i}", "code": f"W{i}"} for i in range(2)])
+
+
+async def reset():
+    async with async_engine.begin() as conn:
+        await conn.execute(delete(StockMovement))
+        await conn.execute(delete(WarehouseStock))
+        await conn.execute(update(Product).values(current_stock=0))
+        # Opening stock, so most issues have something to take
+        await conn.execute(insert(WarehouseStock), [
+            {"product_id": p, "warehouse_id": w, "quantity": 1000, "reserved_quantity": 0, "available_quantity": 1000}
+            for p in range(1, PRODUCTS + 1) for w in (1, 2)
+        ])
+        await conn.execute(update(Product).values(current_stock=2000))
+
+
+def random_lines(rng: random.Random, count: int):
+    return [
+        MovementLine(
+            product_id=rng.randint(1, PRODUCTS), warehouse_id=rng.randint(1, 2),
+            movement_type=rng.choice([StockMovementType.IN, StockMovementType.OUT]), quantity=rng.randint(1, 10),
+        )
+        for _ in range(count)
+    ]
+
+
+async def naive_post(lines):
+    async with AsyncSessionLocal() as db:
+        for line in lines:
+            stock = (await db.execute(
+                select(WarehouseStock).where(
+                    WarehouseStock.product_id == line.product_id, WarehouseStock.warehouse_id == line.warehouse_id
+                )
+            )).scalar_one()
+            product = await db.get(Product, line.product_id)
+            if stock.available_quantity + line.delta < 0:
+                raise HTTPException(status_code=409)
+            before = stock.quantity
+            stock.quantity += line.delta
+            stock.available_quantity += line.delta
+            product.current_stock += line.delta
+            db.add(StockMovement(
+                product_id=line.product_id, warehouse_id=line.warehouse_id, movement_type=line.movement_type,
+                quantity=line.quantity, quantity_before=before, quantity_after=stock.quantity,
+            ))
+        await db.commit()
+
+
+async def worker(mode: str, rng: random.Random, transactions: int, batch: int, counts: dict):
+    for _ in range(transactions):
+        lines = random_lines(rng, batch)
+        try:
+            if mode == "naive":
+                await naive_post(lines)
+            else:
+                async with AsyncSessionLocal() as db:
+                    await post_movements(db, lines, None)
+            counts["posted"] += len(lines)
+        except HTTPException:
+            counts["rejected"] += len(lines)
+        except Exception:
+            counts["failed"] += 1
+
+
+async def lost_units() -> int:
+    """Units the stock rows are missing compared with opening stock plus every movement posted"""
+    async with async_engine.connect() as conn:
+        on_hand = await conn.scalar(select(func.sum(WarehouseStock.quantity)))
+        movements = (await conn.execute(select(StockMovement.movement_type, StockMovement.quantity))).all()
+    expected = 1000 * PRODUCTS * 2 + sum(-q if t == StockMovementType.OUT else q for t, q in movements)
+    return abs(expected - on_hand)
+
+
+async def run(workers: int, postings: int, batch: int):
+    await seed()
+    print(f"{'mode':<10}{'batch':>6}{'postings/s':>12}{'posted':>8}{'rejected':>10}{'failed':>8}{'lost':>6}")
+    for mode, size in (("naive", 1), ("ledger", 1), ("batched", batch)):
+        await reset()
+        counts = {"posted": 0, "rejected": 0, "failed": 0}
+        transactions = max(1, postings // workers // size)
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(mode, random.Random(seed), transactions, size, counts) for seed in range(workers)
+        ))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{mode:<10}{size:>6}{counts['posted'] / elapsed:>12.0f}{counts['posted']:>8}"
+            f"{counts['rejected']:>10}{counts['failed']:>8}{await lost_units():>6}"
+        )
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=20, help="concurrent posting tasks")
+    parser.add_argument("--postings", type=int, default=2000, help="movements per mode")
+    parser.add_argument("--batch", type=int, default=50, help="movements per transaction in batched mode")
+    args = parser.parse_args()
+
+    settings.SLOW_QUERY_MS = 0
+    settings.AUDIT_ENABLED = False
+    asyncio.run(run(args.workers, args.postings, args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,34 +6,36 @@ import asyncio
 from typing import Generator
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
 
-from backend.app.core.database import Base, get_db
-from backend.main import app
+# Keep the app's own engine (startup, health pings) out of the working tree as well
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "erp.db"))
 
-# Test database URL (SQLite in memory)
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+from app.api.auth import user_cache
+from app.api.dashboard import dashboard_cache
+from app.core.audit import audit_writer
+from app.core.database import Base, get_async_db, import_all_models
+from app.core.response_cache import response_cache
+from main import app
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+import_all_models()
 
+# Bound to the session's test database by the test_database fixture
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncTestingSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
-def override_get_db():
+
+async def override_get_async_db():
     """Override database dependency for testing"""
-    try:
-        db = TestingSessionLocal()
+    async with AsyncTestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 @pytest.fixture(scope="session")
@@ -44,10 +46,31 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(scope="session")
+def test_database(tmp_path_factory):
+    """SQLite file shared by the sync fixtures and the async app session, in a temporary directory"""
+    path = tmp_path_factory.mktemp("database") / "test_erp.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False}, poolclass=NullPool)
+    # NullPool: the TestClient runs the app on its own event loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    TestingSessionLocal.configure(bind=engine)
+    AsyncTestingSessionLocal.configure(bind=async_engine)
+    # Audit entries go to the test database as well
+    audit_writer.engine = async_engine
+    yield engine
+    engine.dispose()
+
+
 @pytest.fixture(scope="function")
-def db_session():
+def db_session(test_database):
     """Create a fresh database session for each test"""
+    engine = test_database
     Base.metadata.create_all(bind=engine)
+    # Tables are recreated behind the write hooks, so cached users, responses and queued audit entries are stale
+    user_cache.clear()
+    dashboard_cache.clear()
+    response_cache.clear()
+    audit_writer.clear()
     db = TestingSessionLocal()
     try:
         yield db
@@ -59,12 +82,30 @@ def db_session():
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client"""
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
 
+@pytest.fixture
+def single_connection(client, test_database, monkeypatch):
+    """Serve requests from a pool of one connection: a request that checks out a second one times out"""
+    url = test_database.url.set(drivername="sqlite+aiosqlite")
+    engine = create_async_engine(url, pool_size=1, max_overflow=0, pool_timeout=2)
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    monkeypatch.setitem(app.dependency_overrides, get_async_db, get_db)
+    # Resolving the user through the session makes it hold its connection before the endpoint runs
+    user_cache.clear()
+    yield
+    engine.sync_engine.dispose()
+
+
 @pytest.fixture
 def sample_user_data():
     """Sample user data for testing"""
@@ -76,6 +117,18 @@ def sample_user_data():
     }
 
 
+@pytest.fixture
+def auth_headers(client: TestClient, sample_user_data):
+    """Register and log in the sample user, returning bearer headers"""
+    client.post("/api/auth/register", json=sample_user_data)
+    login_response = client.post("/api/auth/login", json={
+        "username": sample_user_data["username"],
+        "password": sample_user_data["password"]
+    })
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
 @pytest.fixture
 def sample_customer_data():
     """Sample customer data for testing"""
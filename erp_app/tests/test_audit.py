@@ -0,0 +1,212 @@
+"""
+Tests for the audit log pipeline
+"""
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.audit import AuditSpool, AuditWriter, audit_writer
+from app.core.config import settings
+from app.core.database import Audited, Base
+from app.core.models import AuditLog, User
+from app.modules.crm.models import Lead
+from app.modules.inventory.models import Product
+
+
+@pytest.fixture(autouse=True)
+def fast_audit(monkeypatch):
+    """Flush queued entries every few milliseconds instead of every second"""
+    monkeypatch.setattr(settings, "AUDIT_FLUSH_SECONDS", 0.02)
+
+
+def audit_rows(db_session, count: int, timeout: float = 5.0):
+    """Audit rows once at least ``count`` have been written (or the timeout passes)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = db_session.query(AuditLog).order_by(AuditLog.id).all()
+        if len(rows) >= count or time.monotonic() > deadline:
+            return rows
+        db_session.rollback()
+        time.sleep(0.02)
+
+
+class TestAuditEntries:
+    """Test what each change records"""
+
+    def test_create_is_attributed_to_the_request(self, client: TestClient, auth_headers, db_session, sample_user_data):
+        """An API create records the new values, user, IP and user agent"""
+        response = client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"
+        })
+        assert response.status_code in (200, 201)
+
+        [row] = audit_rows(db_session, 1)
+        user = db_session.query(User).filter(User.username == sample_user_data["username"]).one()
+        assert row.action == "CREATE"
+        assert row.table_name == "leads"
+        assert row.record_id == str(db_session.query(Lead).one().id)
+        assert row.user_id == user.id
+        assert row.ip_address == "testclient"
+        assert row.user_agent == "testclient"
+        assert row.old_values is None
+        assert json.loads(row.new_values)["email"] == "ada@example.com"
+
+    def test_update_records_only_changed_columns(self, client: TestClient, db_session):
+        """An update stores the old and new value of each changed column"""
+        product = Product(sku="P-1", name="Widget", selling_price=10)
+        db_session.add(product)
+        db_session.commit()
+        product.name = "Gadget"
+        product.selling_price = 12.5
+        db_session.commit()
+
+        create, update = audit_rows(db_session, 2)
+        assert (create.action, update.action) == ("CREATE", "UPDATE")
+        assert json.loads(update.old_values) == {"name": "Widget", "selling_price": "10.00"}
+        assert json.loads(update.new_values) == {"name": "Gadget", "selling_price": 12.5}
+        assert update.user_id is None
+
+    def test_delete_records_old_values(self, client: TestClient, db_session):
+        """A delete stores the row as it was"""
+        lead = Lead(first_name="Ada", last_name="Lovelace", email="ada@example.com")
+        db_session.add(lead)
+        db_session.commit()
+        lead_id = lead.id
+        db_session.delete(lead)
+        db_session.commit()
+
+        delete = audit_rows(db_session, 2)[-1]
+        assert delete.action == "DELETE"
+        assert delete.record_id == str(lead_id)
+        assert json.loads(delete.old_values)["last_name"] == "Lovelace"
+        assert delete.new_values is None
+
+    def test_rollback_discards_entries(self, db_session):
+        """Changes that are rolled back are never queued"""
+        submitted = audit_writer.submitted
+        db_session.add(Lead(first_name="Ada", last_name="Lovelace", email="ada@example.com"))
+        db_session.flush()
+        db_session.rollback()
+        assert audit_writer.submitted == submitted
+
+    def test_core_models_are_not_audited(self, client: TestClient, auth_headers, db_session):
+        """Users, rollups and the audit log itself are outside the module models"""
+        client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"
+        })
+        assert {row.table_name for row in audit_rows(db_session, 1)} == {"leads"}
+
+    def test_module_models_are_marked(self):
+        """Every module model opts in with the Audited mixin, and no core model does"""
+        for mapper in Base.registry.mappers:
+            in_module = mapper.class_.__module__.startswith("app.modules.")
+            assert issubclass(mapper.class_, Audited) == in_module, mapper.class_.__name__
+
+class TestAuditWriter:
+    """Test batching, retries and backpressure"""
+
+    def test_entries_are_inserted_in_batches(self, db_session, monkeypatch):
+        """A flush writes AUDIT_BATCH_SIZE rows per INSERT"""
+        monkeypatch.setattr(settings, "AUDIT_BATCH_SIZE", 100)
+        writer = AuditWriter(engine=audit_writer.engine)
+        audit_writer.clear()
+        db_session.add_all([Product(sku=f"P-{i}", name=f"Widget {i}") for i in range(250)])
+        db_session.commit()
+        writer.submit(list(audit_writer._pending))
+        audit_writer.clear()
+
+        assert asyncio.run(writer.flush())
+        assert writer.batches == 3
+        assert writer.written == 250
+        assert db_session.query(AuditLog).count() == 250
+
+    def test_failed_batches_stay_queued(self, db_session):
+        """A batch the database rejects is kept for the next attempt"""
+        writer = AuditWriter(engine=audit_writer.engine)
+        writer.submit([{"action": None, "old_values": None, "new_values": None}])
+
+        assert not asyncio.run(writer.flush())
+        assert writer.failed_batches == 1
+        assert writer.queued() == 1
+
+    def test_submit_never_drops_entries(self, monkeypatch):
+        """Committed entries are queued even past AUDIT_QUEUE_SIZE"""
+        monkeypatch.setattr(settings, "AUDIT_QUEUE_SIZE", 2)
+        writer = AuditWriter()
+        writer.submit([{"action": "CREATE"}] * 5)
+        assert writer.queued() == 5
+        assert writer.submitted == 5
+
+    def test_full_queue_rejects_writes(self, client: TestClient, auth_headers, monkeypatch):
+        """Writes get a 503 while the writer is too far behind; reads are unaffected"""
+        monkeypatch.setattr(settings, "AUDIT_QUEUE_SIZE", 0)
+        monkeypatch.setattr(settings, "AUDIT_BACKPRESSURE_SECONDS", 0.05)
+
+        response = client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"
+        })
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert client.get("/api/crm/leads", headers=auth_headers).status_code == 200
+
+
+@pytest.fixture
+def spool_mode(tmp_path, monkeypatch):
+    """AUDIT_MODE=spool with a spool file of the test's own"""
+    monkeypatch.setattr(settings, "AUDIT_MODE", "spool")
+    monkeypatch.setattr(settings, "AUDIT_SPOOL_PATH", str(tmp_path / "audit_spool.db"))
+    yield settings.AUDIT_SPOOL_PATH
+    audit_writer.clear()
+
+
+class TestAuditSpool:
+    """Test the durable spool mode"""
+
+    def test_committed_entries_survive_the_writer(self, db_session, spool_mode):
+        """Entries are on disk at commit, and a writer started later inserts them"""
+        db_session.add(Lead(first_name="Ada", last_name="Lovelace", email="ada@example.com"))
+        db_session.commit()
+        assert db_session.query(AuditLog).count() == 0
+
+        # A new writer, like the one of a restarted worker
+        writer = AuditWriter(engine=audit_writer.engine)
+        assert writer.queued() == 1
+        assert asyncio.run(writer.flush())
+        [row] = db_session.query(AuditLog).all()
+        assert (row.action, row.table_name) == ("CREATE", "leads")
+        assert json.loads(row.new_values)["email"] == "ada@example.com"
+        assert row.timestamp is not None
+        assert writer.queued() == 0
+
+    def test_rollback_spools_nothing(self, db_session, spool_mode):
+        """Only committed changes reach the spool"""
+        db_session.add(Lead(first_name="Ada", last_name="Lovelace", email="ada@example.com"))
+        db_session.flush()
+        db_session.rollback()
+        assert audit_writer.queued() == 0
+
+    def test_claims_of_a_dead_writer_are_taken_over(self, spool_mode, monkeypatch):
+        """A claimed batch is left alone until AUDIT_SPOOL_CLAIM_SECONDS have passed"""
+        entry = {"action": "CREATE", "table_name": "leads", "record_id": "1", "old_values": None, "new_values": {}}
+        dead, alive = AuditSpool(spool_mode), AuditSpool(spool_mode)
+        dead.append([entry])
+        assert len(dead.claim(10)) == 1
+        assert alive.claim(10) == []
+
+        monkeypatch.setattr(settings, "AUDIT_SPOOL_CLAIM_SECONDS", 0)
+        [(id, claimed)] = alive.claim(10)
+        assert claimed["record_id"] == "1"
+        alive.remove([id])
+        assert alive.count() == 0
+
+    def test_failed_batches_stay_spooled(self, db_session, spool_mode):
+        """A batch the database rejects is released for the next attempt"""
+        writer = AuditWriter(engine=audit_writer.engine)
+        writer.submit([{"action": None, "old_values": None, "new_values": None}])
+
+        assert not asyncio.run(writer.flush())
+        assert writer.failed_batches == 1
+        assert len(writer.spool().claim(10)) == 1
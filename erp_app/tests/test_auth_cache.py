@@ -0,0 +1,65 @@
+"""
+Tests for cached authenticated-user resolution
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.auth import user_cache
+from app.core.models import User
+from app.core.security import PasswordHasherPool
+
+
+class TestAuthUserCache:
+    """Test the TTL cache in front of get_current_user"""
+
+    def test_repeated_requests_hit_cache(self, client: TestClient, auth_headers):
+        """Only the first authenticated request resolves the user from the database"""
+        misses_before = user_cache.misses
+        hits_before = user_cache.hits
+
+        for _ in range(3):
+            assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+
+        assert user_cache.misses - misses_before == 1
+        assert user_cache.hits - hits_before == 2
+
+    def test_deactivation_invalidates_cache(self, client: TestClient, auth_headers, db_session, sample_user_data):
+        """Deactivating a user takes effect on the next request"""
+        assert client.get("/api/auth/me", headers=auth_headers).status_code == 200
+
+        user = db_session.query(User).filter(User.username == sample_user_data["username"]).first()
+        user.is_active = False
+        db_session.commit()
+
+        response = client.get("/api/auth/me", headers=auth_headers)
+        assert response.status_code == 401
+        assert "deactivated" in response.json()["detail"].lower()
+
+    def test_role_change_is_visible(self, client: TestClient, auth_headers, db_session, sample_user_data):
+        """A role change replaces the cached principal"""
+        assert client.get("/api/auth/me", headers=auth_headers).json()["role"] == "employee"
+
+        user = db_session.query(User).filter(User.username == sample_user_data["username"]).first()
+        user.role = "manager"
+        db_session.commit()
+
+        assert client.get("/api/auth/me", headers=auth_headers).json()["role"] == "manager"
+
+
+class TestPasswordHasherPool:
+    """Test the bcrypt pool's counters"""
+
+    def test_failed_jobs_are_not_completed(self):
+        """A job that raises counts as failed and frees its slot"""
+        pool = PasswordHasherPool(workers=1, queue_depth=0)
+
+        async def run():
+            assert await pool.run(len, "secret") == 6
+            with pytest.raises(ValueError):
+                await pool.run(int, "not a number")
+
+        asyncio.run(run())
+        stats = pool.stats()
+        assert (stats["completed"], stats["failed"], stats["in_flight"]) == (1, 1, 0)
@@ -0,0 +1,200 @@
+"""
+Tests for the bulk create endpoints
+"""
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import bulk
+from app.core.config import settings
+from app.core.models import AuditLog, DailyRollup
+from app.modules.accounting.models import Invoice
+from app.modules.crm.models import Lead
+from app.modules.inventory.models import Product
+from app.modules.sales.models import SalesOrder
+
+
+@pytest.fixture
+def customer_id(client: TestClient, auth_headers):
+    response = client.post("/api/accounting/customers", headers=auth_headers, json={"name": "Acme"})
+    return response.json()["customer_id"]
+
+
+def audit_rows(db_session, count: int, timeout: float = 5.0):
+    """Audit rows, oldest first, once at least ``count`` have been written (or the timeout passes)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = db_session.query(AuditLog).order_by(AuditLog.id).all()
+        if len(rows) >= count or time.monotonic() > deadline:
+            return rows
+        db_session.rollback()
+        time.sleep(0.02)
+
+
+class TestBulkCreate:
+    """Test POST .../bulk"""
+
+    def test_products_created_with_ids_in_order(self, client: TestClient, auth_headers, db_session):
+        """Every item is stored and its result carries the new id"""
+        items = [{"sku": f"B-{i}", "name": f"Bolt {i}", "selling_price": 1.5 + i} for i in range(5)]
+        response = client.post("/api/inventory/products/bulk", headers=auth_headers, json=items)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 5
+        assert data["failed"] == 0
+        assert [result["index"] for result in data["results"]] == [0, 1, 2, 3, 4]
+
+        products = {p.id: p for p in db_session.query(Product).all()}
+        for i, result in enumerate(data["results"]):
+            assert products[result["id"]].sku == f"B-{i}"
+        assert products[data["results"][0]["id"]].is_active is True
+
+    def test_invalid_and_duplicate_items_reported(self, client: TestClient, auth_headers, db_session):
+        """Bad items are rejected by position, the rest are created"""
+        client.post("/api/inventory/products", headers=auth_headers, json={"sku": "B-0", "name": "Existing"})
+        items = [
+            {"sku": "B-0", "name": "Taken"},
+            {"sku": "B-1", "name": "Fine"},
+            {"name": "No SKU"},
+            {"sku": "B-1", "name": "Repeated"},
+            {"sku": "B-2", "name": "Bad price", "cost_price": "abc"},
+        ]
+        data = client.post("/api/inventory/products/bulk", headers=auth_headers, json=items).json()
+
+        assert data["created"] == 1
+        assert data["failed"] == 4
+        results = data["results"]
+        assert results[0] == {"index": 0, "error": "sku: B-0 already exists"}
+        assert "id" in results[1]
+        assert results[2]["error"].startswith("sku:")
+        assert results[3] == {"index": 3, "error": "sku: B-1 already exists"}
+        assert results[4]["error"].startswith("cost_price:")
+        assert db_session.query(Product).count() == 2
+
+    def test_leads_owned_and_counted(self, client: TestClient, auth_headers, db_session):
+        """Bulk leads are assigned to the caller and reach the dashboard rollups"""
+        items = [
+            {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"},
+            {"first_name": "Alan", "last_name": "Turing", "email": "alan@example.com", "status": None},
+        ]
+        data = client.post("/api/crm/leads/bulk", headers=auth_headers, json=items).json()
+        assert data["created"] == 2
+
+        leads = db_session.query(Lead).all()
+        assert all(lead.assigned_to is not None for lead in leads)
+        rollup = db_session.query(DailyRollup).filter(DailyRollup.metric == "leads").one()
+        assert rollup.count == 2
+
+    def test_invoices(self, client: TestClient, auth_headers, customer_id, db_session):
+        """Invoices owe their total and are visible to the list endpoint"""
+        items = [
+            {
+                "invoice_number": f"INV-{i}", "customer_id": customer_id,
+                "issue_date": "2024-05-01T00:00:00", "due_date": "2024-05-31T00:00:00", "total_amount": 100 + i
+            }
+            for i in range(3)
+        ]
+        data = client.post("/api/accounting/invoices/bulk", headers=auth_headers, json=items).json()
+        assert data["created"] == 3
+
+        invoice = db_session.query(Invoice).filter(Invoice.invoice_number == "INV-2").one()
+        assert float(invoice.balance_due) == 102
+        assert invoice.created_by is not None
+        response = client.get("/api/accounting/invoices", headers=auth_headers)
+        assert len(response.json()["invoices"]) == 3
+
+    def test_orders_and_employees(self, client: TestClient, auth_headers, customer_id, db_session):
+        orders = [{"order_number": "SO-1", "customer_id": customer_id, "order_date": "2024-05-01T09:30:00"}]
+        assert client.post("/api/sales/orders/bulk", headers=auth_headers, json=orders).json()["created"] == 1
+        assert db_session.query(SalesOrder).one().order_number == "SO-1"
+
+        employees = [
+            {"employee_id": "E-1", "first_name": "Ada", "last_name": "L", "email": "ada@corp.example.com",
+             "hire_date": "2024-03-01"},
+            {"employee_id": "E-2", "first_name": "Alan", "last_name": "T", "email": "ada@corp.example.com",
+             "hire_date": "2024-03-01"},
+        ]
+        data = client.post("/api/hr/employees/bulk", headers=auth_headers, json=employees).json()
+        assert data["created"] == 1
+        assert data["results"][1]["error"] == "email: ada@corp.example.com already exists"
+
+    def test_database_rejections_keep_the_other_items(self, client: TestClient, auth_headers, db_session, monkeypatch):
+        """An item only the database rejects is retried alone; the rest commit in the same transaction"""
+        client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"
+        })
+
+        # As if a concurrent request took the email between the check and the insert
+        async def no_check(engine, spec, rows, errors):
+            return rows
+        monkeypatch.setattr(bulk, "drop_duplicates", no_check)
+        statements, commits = [], []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        count = lambda conn: commits.append(conn)
+        event.listen(Engine, "before_cursor_execute", record)
+        event.listen(Engine, "commit", count)
+        try:
+            items = [
+                {"first_name": "Alan", "last_name": "Turing", "email": "alan@example.com"},
+                {"first_name": "Ada", "last_name": "Again", "email": "ada@example.com"},
+                {"first_name": "Grace", "last_name": "Hopper", "email": "grace@example.com"},
+            ]
+            data = client.post("/api/crm/leads/bulk", headers=auth_headers, json=items).json()
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+            event.remove(Engine, "commit", count)
+
+        assert (data["created"], data["failed"]) == (2, 1)
+        assert data["results"][1]["error"].startswith("rejected by the database:")
+        assert len(commits) == 1
+        assert sum(statement.startswith("SAVEPOINT") for statement in statements) == 4
+        assert {lead.email for lead in db_session.query(Lead)} == {"ada@example.com", "alan@example.com", "grace@example.com"}
+        rollup = db_session.query(DailyRollup).filter(DailyRollup.metric == "leads").one()
+        assert rollup.count == 3
+
+    def test_created_rows_are_audited(self, client: TestClient, auth_headers, db_session, monkeypatch):
+        """Each stored item gets a CREATE entry attributed to the caller; rejected ones get none"""
+        monkeypatch.setattr(settings, "AUDIT_FLUSH_SECONDS", 0.02)
+        items = [{"sku": "B-1", "name": "Bolt"}, {"sku": "B-1", "name": "Duplicate"}, {"sku": "B-2", "name": "Nut"}]
+        results = client.post("/api/inventory/products/bulk", headers=auth_headers, json=items).json()["results"]
+
+        rows = audit_rows(db_session, 2)
+        assert [(row.action, row.table_name) for row in rows] == [("CREATE", "products")] * 2
+        assert [row.record_id for row in rows] == [str(results[0]["id"]), str(results[2]["id"])]
+        assert json.loads(rows[1].new_values)["name"] == "Nut"
+        assert all(row.user_id is not None for row in rows)
+
+    def test_runs_on_the_request_connection(self, client: TestClient, auth_headers, db_session, single_connection):
+        """The insert shares the session's connection instead of checking out another one"""
+        items = [{"sku": f"B-{i}", "name": f"Bolt {i}"} for i in range(3)]
+        response = client.post("/api/inventory/products/bulk", headers=auth_headers, json=items)
+        assert response.status_code == 200
+        assert response.json()["created"] == 3
+        assert db_session.query(Product).count() == 3
+
+
+class TestBulkRequests:
+    """Test validation of bulk requests"""
+
+    def test_requires_authentication(self, client: TestClient):
+        response = client.post("/api/inventory/products/bulk", json=[{"sku": "B-0", "name": "Bolt"}])
+        assert response.status_code in (401, 403)
+
+    def test_body_must_be_a_list(self, client: TestClient, auth_headers):
+        response = client.post("/api/inventory/products/bulk", headers=auth_headers, json={"sku": "B-0"})
+        assert response.status_code == 422
+
+    def test_empty_batch(self, client: TestClient, auth_headers):
+        response = client.post("/api/inventory/products/bulk", headers=auth_headers, json=[])
+        assert response.json() == {"created": 0, "failed": 0, "results": []}
+
+    def test_batch_size_limit(self, client: TestClient, auth_headers, monkeypatch):
+        monkeypatch.setattr(settings, "BULK_MAX_ITEMS", 2)
+        items = [{"sku": f"B-{i}", "name": "Bolt"} for i in range(3)]
+        response = client.post("/api/inventory/products/bulk", headers=auth_headers, json=items)
+        assert response.status_code == 413
@@ -0,0 +1,147 @@
+"""
+Tests for dashboard statistics
+"""
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.api.dashboard import dashboard_cache
+from app.core.models import DailyRollup
+from app.core.rollups import rebuild_rollups
+from app.modules.accounting.models import Invoice
+from app.modules.crm.models import Lead
+
+
+class TestDashboardStats:
+    """Test the single-query, cached dashboard statistics"""
+
+    def test_stats_shape(self, client: TestClient, auth_headers):
+        """Every module section is present with zeroed aggregates on an empty database"""
+        response = client.get("/api/dashboard/stats", headers=auth_headers)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["crm"]["total_leads"] == 0
+        assert data["crm"]["total_deal_value"] == 0.0
+        assert data["inventory"]["low_stock_products"] == 0
+        assert data["accounting"]["outstanding_amount"] == 0.0
+        assert data["hr"]["total_employees"] == 0
+        assert data["sales"]["this_month_orders"] == 0
+
+    def test_repeated_requests_hit_cache(self, client: TestClient, auth_headers):
+        """Only the first request computes the aggregates"""
+        hits_before = dashboard_cache.hits
+
+        for _ in range(3):
+            assert client.get("/api/dashboard/stats", headers=auth_headers).status_code == 200
+
+        assert dashboard_cache.hits - hits_before == 2
+
+    def test_write_invalidates_cache(self, client: TestClient, auth_headers):
+        """Creating a lead is reflected on the next request"""
+        before = client.get("/api/dashboard/stats", headers=auth_headers).json()
+
+        response = client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Jane",
+            "last_name": "Doe",
+            "email": "jane@example.com"
+        })
+        assert response.status_code == 201
+
+        after = client.get("/api/dashboard/stats", headers=auth_headers).json()
+        assert after["crm"]["total_leads"] == before["crm"]["total_leads"] + 1
+        assert after["crm"]["new_leads_this_month"] == before["crm"]["new_leads_this_month"] + 1
+
+    def test_invoice_status_change_moves_revenue(self, client: TestClient, auth_headers, db_session):
+        """Paying an invoice moves its amount from outstanding to revenue"""
+        invoice = Invoice(
+            invoice_number="INV-ROLLUP-1",
+            issue_date=datetime.now(),
+            due_date=datetime.now() + timedelta(days=30),
+            total_amount=250,
+            balance_due=250,
+            status="sent"
+        )
+        db_session.add(invoice)
+        db_session.commit()
+
+        accounting = client.get("/api/dashboard/stats", headers=auth_headers).json()["accounting"]
+        assert accounting["outstanding_amount"] == 250.0
+        assert accounting["total_revenue"] == 0.0
+
+        invoice.status = "paid"
+        invoice.balance_due = 0
+        db_session.commit()
+
+        accounting = client.get("/api/dashboard/stats", headers=auth_headers).json()["accounting"]
+        assert accounting["outstanding_amount"] == 0.0
+        assert accounting["total_revenue"] == 250.0
+        assert accounting["this_month_revenue"] == 250.0
+
+    def test_rebuild_matches_incremental_rollups(self, client: TestClient, auth_headers, db_session):
+        """Recomputing daily_rollups from scratch gives the same dashboard"""
+        for i in range(3):
+            client.post("/api/crm/leads", headers=auth_headers, json={
+                "first_name": f"Lead{i}",
+                "last_name": "Rollup",
+                "email": f"lead{i}@example.com"
+            })
+        lead = db_session.query(Lead).first()
+        db_session.delete(lead)
+        db_session.commit()
+
+        before = client.get("/api/dashboard/stats", headers=auth_headers).json()
+        assert before["crm"]["total_leads"] == 2
+
+        rebuild_rollups(db_session.connection())
+        db_session.commit()
+        dashboard_cache.clear()
+
+        assert client.get("/api/dashboard/stats", headers=auth_headers).json() == before
+
+    def test_flush_does_not_load_created_at(self, db_session):
+        """New rows' SQL-default created_at comes back with the INSERT, not one SELECT per row"""
+        selects = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                selects.append(statement)
+
+        connection = db_session.connection()
+        event.listen(connection, "before_cursor_execute", capture)
+        try:
+            db_session.add_all([Lead(first_name=f"Lead{i}", last_name="Flush") for i in range(5)])
+            db_session.flush()
+        finally:
+            event.remove(connection, "before_cursor_execute", capture)
+        assert selects == []
+
+        rollup = db_session.query(DailyRollup).filter(DailyRollup.metric == "leads").one()
+        assert rollup.count == 5
+
+
+class TestRevenueChart:
+    """Test monthly revenue bucketing"""
+
+    def test_paid_revenue_grouped_by_month(self, client: TestClient, auth_headers, db_session):
+        """Paid invoices are summed per calendar month, oldest first"""
+        this_month = datetime.now().replace(day=1, hour=12, minute=0, second=0, microsecond=0)
+        last_month = (this_month - timedelta(days=1)).replace(day=1)
+        db_session.add_all([
+            Invoice(invoice_number="INV-CHART-1", issue_date=last_month, due_date=this_month,
+                    total_amount=100, status="paid"),
+            Invoice(invoice_number="INV-CHART-2", issue_date=this_month, due_date=this_month,
+                    total_amount=40, status="paid"),
+            Invoice(invoice_number="INV-CHART-3", issue_date=this_month + timedelta(days=1), due_date=this_month,
+                    total_amount=60, status="paid"),
+            Invoice(invoice_number="INV-CHART-4", issue_date=this_month, due_date=this_month,
+                    total_amount=999, status="sent"),
+        ])
+        db_session.commit()
+
+        response = client.get("/api/dashboard/charts/revenue?months=2", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == {
+            "labels": [last_month.strftime("%Y-%m"), this_month.strftime("%Y-%m")],
+            "data": [100.0, 100.0]
+        }
@@ -0,0 +1,165 @@
+"""
+Tests for streaming CSV/XLSX exports of list resources
+"""
+import csv
+import io
+import pytest
+from datetime import datetime
+from fastapi.testclient import TestClient
+from openpyxl import load_workbook
+
+from app.core.config import settings
+from app.modules.inventory.models import StockMovement, StockMovementType
+
+
+@pytest.fixture
+def movements(db_session):
+    """Seven stock movements over two products, oldest first"""
+    db_session.add_all([
+        StockMovement(
+            product_id=1 if i % 2 else 2,
+            movement_type=StockMovementType.IN,
+            quantity=i,
+            reason=f"restock, batch {i}",
+            created_at=datetime(2024, 1, 1 + i, 9, 0, 0),
+        )
+        for i in range(7)
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def formula_movements(db_session):
+    """Movements whose free-text reason a spreadsheet would evaluate"""
+    db_session.add_all([
+        StockMovement(
+            product_id=1, movement_type=StockMovementType.IN, quantity=i,
+            reason=reason, created_at=datetime(2024, 1, 1 + i, 9, 0, 0),
+        )
+        for i, reason in enumerate(FORMULAS)
+    ])
+    db_session.commit()
+
+
+FORMULAS = ["=1+1", "+1", "-1", "@SUM(A1)", "\tx", "\rx", "plain - text"]
+ESCAPED = ["'=1+1", "'+1", "'-1", "'@SUM(A1)", "'\tx", "'\rx", "plain - text"]
+
+
+def read_csv(response):
+    return list(csv.reader(io.StringIO(response.text)))
+
+
+class TestCsvExport:
+    """Test format=csv (the default) on /export endpoints"""
+
+    def test_header_and_rows_in_list_order(self, client: TestClient, auth_headers, movements, monkeypatch):
+        """Every row is streamed, newest first like the list, across several batches"""
+        monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+        response = client.get("/api/inventory/stock-movements/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment; filename=\"stock-movements-" in response.headers["content-disposition"]
+
+        rows = read_csv(response)
+        assert rows[0] == [
+            "id", "product_id", "warehouse_id", "movement_type", "quantity",
+            "reference_number", "reason", "created_at",
+        ]
+        assert [int(row[4]) for row in rows[1:]] == [6, 5, 4, 3, 2, 1, 0]
+        assert rows[1][3] == "in"
+        assert rows[1][6] == "restock, batch 6"
+
+    def test_formulas_are_escaped(self, client: TestClient, auth_headers, formula_movements):
+        """Text starting with a formula character is prefixed with a quote; numbers are kept"""
+        rows = read_csv(client.get("/api/inventory/stock-movements/export", headers=auth_headers))
+        assert [row[6] for row in rows[:0:-1]] == ESCAPED
+        assert [int(row[4]) for row in rows[:0:-1]] == list(range(len(FORMULAS)))
+
+    def test_list_filters_apply(self, client: TestClient, auth_headers, movements):
+        """The export takes the same filters as the list endpoint"""
+        response = client.get("/api/inventory/stock-movements/export?product_id=1", headers=auth_headers)
+        rows = read_csv(response)
+        assert [int(row[4]) for row in rows[1:]] == [5, 3, 1]
+
+    def test_search_applies_to_leads(self, client: TestClient, auth_headers):
+        """Lead exports honour search= like the list"""
+        for first_name, last_name in [("John", "Smith"), ("Grace", "Hopper")]:
+            client.post("/api/crm/leads", headers=auth_headers, json={
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": f"{first_name}@example.com".lower()
+            })
+
+        response = client.get("/api/crm/leads/export?search=smi", headers=auth_headers)
+        rows = read_csv(response)
+        assert len(rows) == 2
+        assert rows[1][1:3] == ["John", "Smith"]
+
+    def test_empty_export_has_header(self, client: TestClient, auth_headers):
+        """An empty resource still exports its header row"""
+        response = client.get("/api/accounting/invoices/export", headers=auth_headers)
+        assert response.status_code == 200
+        assert read_csv(response) == [[
+            "id", "invoice_number", "customer_id", "issue_date", "due_date",
+            "total_amount", "paid_amount", "balance_due", "status",
+        ]]
+
+
+class TestXlsxExport:
+    """Test format=xlsx on /export endpoints"""
+
+    def test_workbook_holds_every_row(self, client: TestClient, auth_headers, movements, monkeypatch):
+        """The streamed file opens as a workbook with a header and one row per record"""
+        monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 3)
+        response = client.get("/api/inventory/stock-movements/export?format=xlsx", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/vnd.openxmlformats")
+        assert response.headers["content-disposition"].endswith('.xlsx"')
+
+        sheet = load_workbook(io.BytesIO(response.content), read_only=True).active
+        rows = list(sheet.values)
+        assert sheet.title == "stock-movements"
+        assert rows[0][:5] == ("id", "product_id", "warehouse_id", "movement_type", "quantity")
+        assert [row[4] for row in rows[1:]] == [6, 5, 4, 3, 2, 1, 0]
+        assert rows[1][3] == "in"
+        assert rows[1][7] == datetime(2024, 1, 7, 9, 0, 0)
+
+    def test_formulas_are_escaped(self, client: TestClient, auth_headers, formula_movements):
+        """Text cells that would be evaluated are written with a leading quote"""
+        response = client.get("/api/inventory/stock-movements/export?format=xlsx", headers=auth_headers)
+        rows = list(load_workbook(io.BytesIO(response.content), read_only=True).active.values)
+        # XML reads a carriage return back as a newline
+        assert [row[6] for row in rows[:0:-1]] == [value.replace("\r", "\n") for value in ESCAPED]
+
+
+class TestExportAccess:
+    """Test validation and authentication of /export endpoints"""
+
+    def test_requires_authentication(self, client: TestClient):
+        response = client.get("/api/hr/employees/export")
+        assert response.status_code in (401, 403)
+
+    def test_unknown_format_is_rejected(self, client: TestClient, auth_headers):
+        response = client.get("/api/sales/orders/export?format=pdf", headers=auth_headers)
+        assert response.status_code == 422
+
+    @pytest.mark.parametrize("path", [
+        "/api/accounting/customers/export",
+        "/api/accounting/payments/export",
+        "/api/accounting/expenses/export",
+        "/api/crm/contacts/export",
+        "/api/crm/deals/export",
+        "/api/hr/departments/export",
+        "/api/hr/attendance/export",
+        "/api/hr/leave-requests/export",
+        "/api/inventory/products/export",
+        "/api/inventory/categories/export",
+        "/api/inventory/warehouses/export",
+        "/api/sales/quotes/export",
+        "/api/sales/shipments/export",
+    ])
+    def test_every_resource_exports(self, client: TestClient, auth_headers, path):
+        response = client.get(f"{path}?format=xlsx", headers=auth_headers)
+        assert response.status_code == 200
+        rows = list(load_workbook(io.BytesIO(response.content), read_only=True).active.values)
+        assert len(rows) == 1 and rows[0][0] == "id"
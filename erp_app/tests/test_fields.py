@@ -0,0 +1,114 @@
+"""
+Tests for sparse fieldsets (?fields=) on list endpoints
+"""
+import pytest
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.modules.accounting.models import Invoice
+from app.modules.crm.models import Lead
+
+
+@pytest.fixture
+def invoices(db_session):
+    db_session.add_all([
+        Invoice(
+            invoice_number=f"INV-{i}", issue_date=datetime(2024, 3, i + 1), due_date=datetime(2024, 4, 1),
+            total_amount=Decimal(100 + i), terms_and_conditions="Net 30 " * 50,
+        )
+        for i in range(5)
+    ])
+    db_session.commit()
+
+
+@contextmanager
+def captured_selects():
+    """Collect the SQL of every SELECT executed while the block runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+
+
+class TestSparseFieldsets:
+    """Test narrowing list responses and their SELECTs with ?fields="""
+
+    def test_only_requested_fields_are_returned(self, client: TestClient, auth_headers, invoices):
+        """Rows carry just the requested fields, in listing order"""
+        response = client.get(
+            "/api/accounting/invoices?fields=total_amount,id,invoice_number", headers=auth_headers
+        )
+        assert response.status_code == 200
+        rows = response.json()["invoices"]
+        assert len(rows) == 5
+        assert list(rows[0]) == ["id", "invoice_number", "total_amount"]
+        assert rows[0] == {"id": rows[0]["id"], "invoice_number": "INV-4", "total_amount": 104.0}
+        assert response.json()["total"] == 5
+
+    def test_unrequested_columns_are_not_selected(self, client: TestClient, auth_headers, db_session):
+        """Wide columns outside the fieldset never appear in the page query"""
+        db_session.add(Lead(first_name="Ada", last_name="Lovelace", email="ada@example.com", notes="x" * 5000))
+        db_session.commit()
+
+        with captured_selects() as statements:
+            response = client.get("/api/crm/leads?fields=id,email", headers=auth_headers)
+        assert response.json()["leads"][0] == {"id": response.json()["leads"][0]["id"], "email": "ada@example.com"}
+
+        page_query = next(sql for sql in statements if "FROM leads" in sql and "LIMIT" in sql)
+        assert "leads.email" in page_query
+        assert "leads.notes" not in page_query
+        assert "leads.first_name" not in page_query
+
+    def test_cursor_paging_with_fieldset(self, client: TestClient, auth_headers, invoices):
+        """Cursors keep working when the sort keys are not among the fields"""
+        url = "/api/accounting/invoices?fields=invoice_number&limit=2"
+        page = client.get(url, headers=auth_headers).json()
+        numbers = [row["invoice_number"] for row in page["invoices"]]
+        while page["next_cursor"]:
+            page = client.get(f"{url}&cursor={page['next_cursor']}", headers=auth_headers).json()
+            numbers += [row["invoice_number"] for row in page["invoices"]]
+        assert numbers == [f"INV-{i}" for i in reversed(range(5))]
+
+    def test_computed_fields_can_be_requested(self, client: TestClient, auth_headers, db_session):
+        """Fields backed by an expression are selectable by their name"""
+        response = client.post("/api/inventory/products", headers=auth_headers, json={"sku": "P-1", "name": "Widget"})
+        assert response.status_code == 200
+
+        rows = client.get("/api/inventory/products?fields=sku,selling_price", headers=auth_headers).json()["products"]
+        assert rows == [{"sku": "P-1", "selling_price": 0}]
+
+    def test_unknown_field_is_rejected(self, client: TestClient, auth_headers):
+        """A field the listing does not have is a 400 naming it"""
+        response = client.get("/api/hr/employees?fields=id,salary", headers=auth_headers)
+        assert response.status_code == 400
+        assert "salary" in response.json()["detail"]
+
+    @pytest.mark.parametrize("url,key", [
+        ("/api/crm/contacts", "contacts"),
+        ("/api/crm/deals", "deals"),
+        ("/api/accounting/customers", "customers"),
+        ("/api/accounting/payments", "payments"),
+        ("/api/accounting/expenses", "expenses"),
+        ("/api/inventory/stock-movements", "movements"),
+        ("/api/hr/attendance", "attendance"),
+        ("/api/hr/leave-requests", "leave_requests"),
+        ("/api/sales/quotes", "quotes"),
+        ("/api/sales/orders", "orders"),
+        ("/api/sales/shipments", "shipments"),
+    ])
+    def test_every_listing_accepts_fields(self, client: TestClient, auth_headers, url, key):
+        """Every list endpoint takes ?fields=id"""
+        response = client.get(f"{url}?fields=id", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()[key] == []
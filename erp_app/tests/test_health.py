@@ -0,0 +1,119 @@
+"""
+Tests for liveness, readiness and the sampled detailed health check
+"""
+import asyncio
+import time
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.health import health_sampler
+
+
+class TestHealthProbes:
+    """Test probe endpoints served from the background sampler"""
+
+    def test_liveness(self, client: TestClient):
+        """Liveness answers without touching the database"""
+        response = client.get("/api/health/live")
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+
+    def test_readiness_reuses_a_recent_ping(self, client: TestClient, monkeypatch):
+        """Readiness pings the database at most once per HEALTH_READY_MAX_AGE_SECONDS"""
+        pings = []
+        original = health_sampler._ping
+
+        async def counting_ping():
+            pings.append(1)
+            await original()
+
+        monkeypatch.setattr(health_sampler, "_ping", counting_ping)
+        monkeypatch.setattr(health_sampler, "database_checked_at", 0.0)
+        monkeypatch.setattr(settings, "HEALTH_READY_MAX_AGE_SECONDS", 60.0)
+
+        for _ in range(3):
+            response = client.get("/api/health/ready")
+            assert response.status_code == 200
+            assert response.json()["status"] == "ready"
+        assert len(pings) == 1
+
+    def test_readiness_fails_when_the_ping_times_out(self, client: TestClient, monkeypatch):
+        """A database that does not answer in time makes the pod unready"""
+        async def hanging_connect():
+            await asyncio.sleep(10)
+
+        class HangingEngine:
+            def connect(self):
+                return self
+
+            async def __aenter__(self):
+                await hanging_connect()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        monkeypatch.setattr("app.core.health.async_engine", HangingEngine())
+        monkeypatch.setattr(settings, "HEALTH_DB_TIMEOUT_SECONDS", 0.05)
+        monkeypatch.setattr(health_sampler, "database_checked_at", 0.0)
+        monkeypatch.setattr(health_sampler, "database", health_sampler.database)
+        # Ping on every probe, even right after the background sample's own ping
+        monkeypatch.setattr(settings, "HEALTH_READY_MAX_AGE_SECONDS", 0.0)
+
+        response = client.get("/api/health/ready")
+        assert response.status_code == 503
+        assert "no response within" in response.json()["database"]
+
+    def test_a_timed_out_ping_is_not_cancelled(self, client: TestClient, monkeypatch):
+        """A hung ping keeps running after its timeout and later probes wait on it instead of piling up"""
+        connects, finished, cancelled = [], [], []
+
+        class SlowEngine:
+            delay = 0.3
+
+            def connect(self):
+                return self
+
+            async def __aenter__(self):
+                connects.append(1)
+                try:
+                    await asyncio.sleep(self.delay)
+                except asyncio.CancelledError:
+                    cancelled.append(1)
+                    raise
+                finished.append(1)
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+            async def execute(self, statement):
+                return None
+
+        engine = SlowEngine()
+        monkeypatch.setattr("app.core.health.async_engine", engine)
+        monkeypatch.setattr(settings, "HEALTH_DB_TIMEOUT_SECONDS", 0.05)
+        monkeypatch.setattr(settings, "HEALTH_READY_MAX_AGE_SECONDS", 0.0)
+        monkeypatch.setattr(health_sampler, "database", health_sampler.database)
+
+        assert [client.get("/api/health/ready").status_code for _ in range(2)] == [503, 503]
+        time.sleep(0.4)
+        assert (len(connects), len(finished), cancelled) == (1, 1, [])
+
+        # The late result was dropped; the next probe pings again
+        engine.delay = 0
+        assert client.get("/api/health/ready").status_code == 200
+        assert len(connects) == 2
+
+    def test_detailed_is_served_from_the_snapshot(self, client: TestClient, monkeypatch):
+        """Detailed health reads the last sample instead of calling psutil per probe"""
+        monkeypatch.setattr(health_sampler, "sampled_at", None)
+        monkeypatch.setattr(health_sampler, "database_checked_at", 0.0)
+        client.get("/api/health/detailed")
+        calls = []
+        monkeypatch.setattr(health_sampler, "_read_system", lambda: calls.append(1) or {})
+
+        body = client.get("/api/health/detailed").json()
+        assert calls == []
+        assert body["database"] == "healthy"
+        assert body["system"]["memory_usage"]["total"] > 0
+        assert body["sampled_at"] is not None
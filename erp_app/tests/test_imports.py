@@ -0,0 +1,290 @@
+"""
+Tests for background CSV/XLSX imports
+"""
+import asyncio
+import io
+import time
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from openpyxl import Workbook
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+from app.core import imports
+from app.core.models import AuditLog, DailyRollup, ImportJob, ImportStatus, User
+from app.modules.crm.models import Lead, LeadStatus
+from app.modules.inventory.models import Product
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    """Keep uploaded files out of the working directory"""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
+def xlsx_file(rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def run_import(client: TestClient, headers, resource: str, filename: str, content: bytes):
+    """Upload a file and wait for its import job to finish"""
+    response = client.post(f"/api/imports/{resource}", headers=headers, files={"file": (filename, content)})
+    assert response.status_code == 202
+    status_url = response.json()["status_url"]
+    for _ in range(100):
+        job = client.get(status_url, headers=headers).json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Import did not finish: {job}")
+
+
+PRODUCTS_CSV = b"""SKU,Name,Cost Price,Selling Price,Type
+P-1,Widget,2.50,4.99,goods
+P-2,Gadget,,12,
+,Missing SKU,1,2,goods
+P-3,Bad price,abc,1,goods
+P-1,Duplicate in file,1,2,goods
+P-4,Gizmo,3,5,service
+"""
+
+
+class TestCsvImport:
+    """Test CSV imports through /api/imports"""
+
+    def test_valid_rows_inserted_and_errors_reported(self, client: TestClient, auth_headers, db_session):
+        """Good rows are stored, bad ones are reported by spreadsheet row number"""
+        job = run_import(client, auth_headers, "products", "catalog.csv", PRODUCTS_CSV)
+
+        assert job["status"] == "completed"
+        assert job["processed_rows"] == 6
+        assert job["inserted_rows"] == 3
+        assert job["failed_rows"] == 3
+        assert [error["row"] for error in job["errors"]] == [4, 5, 6]
+        assert job["errors"][0]["error"].startswith("sku:")
+        assert job["errors"][1]["error"].startswith("cost_price:")
+        assert job["errors"][2]["error"] == "sku: P-1 already exists"
+
+        products = {p.sku: p for p in db_session.query(Product).all()}
+        assert sorted(products) == ["P-1", "P-2", "P-4"]
+        assert products["P-1"].name == "Widget"
+        assert float(products["P-2"].selling_price) == 12
+        assert products["P-4"].type.value == "service"
+        assert products["P-2"].is_active is True
+
+    def test_existing_rows_are_not_duplicated(self, client: TestClient, auth_headers, db_session):
+        """A row whose unique value is already in the table is rejected"""
+        client.post("/api/inventory/products", headers=auth_headers, json={"sku": "P-2", "name": "Existing"})
+        job = run_import(client, auth_headers, "products", "catalog.csv", PRODUCTS_CSV)
+        assert job["inserted_rows"] == 2
+        assert {"row": 3, "error": "sku: P-2 already exists"} in job["errors"]
+
+    def test_imported_rows_are_audited(self, client: TestClient, auth_headers, db_session, monkeypatch, sample_user_data):
+        """Each stored row gets a CREATE entry attributed to the uploader"""
+        monkeypatch.setattr(settings, "AUDIT_FLUSH_SECONDS", 0.02)
+        run_import(client, auth_headers, "products", "catalog.csv", PRODUCTS_CSV)
+
+        deadline = time.monotonic() + 5
+        while len(rows := db_session.query(AuditLog).all()) < 3 and time.monotonic() < deadline:
+            db_session.rollback()
+            time.sleep(0.02)
+        user = db_session.query(User).filter(User.username == sample_user_data["username"]).one()
+        products = {str(p.id): p.sku for p in db_session.query(Product).all()}
+        assert sorted(products[row.record_id] for row in rows) == ["P-1", "P-2", "P-4"]
+        assert {(row.action, row.table_name, row.user_id) for row in rows} == {("CREATE", "products", user.id)}
+
+    def test_small_batches(self, client: TestClient, auth_headers, db_session, monkeypatch):
+        """Rows split across batches are all imported and duplicates across batches still caught"""
+        monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+        job = run_import(client, auth_headers, "products", "catalog.csv", PRODUCTS_CSV)
+        assert job["inserted_rows"] == 3
+        assert job["failed_rows"] == 3
+
+    def test_error_list_is_capped(self, client: TestClient, auth_headers, monkeypatch):
+        """Only the first IMPORT_MAX_ERRORS errors are kept, all are counted"""
+        monkeypatch.setattr(settings, "IMPORT_MAX_ERRORS", 1)
+        job = run_import(client, auth_headers, "products", "catalog.csv", PRODUCTS_CSV)
+        assert job["failed_rows"] == 3
+        assert len(job["errors"]) == 1
+
+
+class TestXlsxImport:
+    """Test XLSX imports through /api/imports"""
+
+    def test_leads_feed_search_and_rollups(self, client: TestClient, auth_headers, db_session):
+        """Imported leads are owned by the importer, searchable and counted on the dashboard"""
+        content = xlsx_file([
+            ("First Name", "Last Name", "Email", "Company", "Status"),
+            ("Ada", "Lovelace", "ada@example.com", "Analytical Engines", "qualified"),
+            (None, None, None, None, None),
+            ("Grace", "Hopper", "not-an-email", "Navy", None),
+            ("Alan", "Turing", "alan@example.com", None, None),
+        ])
+        job = run_import(client, auth_headers, "leads", "leads.xlsx", content)
+
+        assert job["status"] == "completed"
+        assert job["total_rows"] == 4
+        assert job["inserted_rows"] == 2
+        assert job["errors"][0]["row"] == 4
+        assert job["errors"][0]["error"].startswith("email:")
+
+        leads = {lead.email: lead for lead in db_session.query(Lead).all()}
+        assert leads["ada@example.com"].status == LeadStatus.QUALIFIED
+        assert leads["alan@example.com"].status == LeadStatus.NEW
+        assert leads["ada@example.com"].assigned_to is not None
+
+        response = client.get("/api/crm/leads?search=lovel", headers=auth_headers)
+        assert [lead["email"] for lead in response.json()["leads"]] == ["ada@example.com"]
+
+        rollup = db_session.query(DailyRollup).filter(DailyRollup.metric == "leads").one()
+        assert rollup.count == 2
+
+    def test_employees_with_dates(self, client: TestClient, auth_headers, db_session):
+        """Date cells and numeric ids are accepted"""
+        content = xlsx_file([
+            ("Employee ID", "First Name", "Last Name", "Email", "Hire Date", "Salary"),
+            (1001, "Ada", "Lovelace", "ada@corp.example.com", datetime(2024, 3, 1), 85000),
+            (1001, "Ada", "Again", "ada2@corp.example.com", datetime(2024, 3, 1), 85000),
+            (1002, "Alan", "Turing", "alan@corp.example.com", "not a date", 85000),
+        ])
+        job = run_import(client, auth_headers, "employees", "staff.xlsx", content)
+        assert job["inserted_rows"] == 1
+        assert [error["row"] for error in job["errors"]] == [3, 4]
+        assert job["errors"][0]["error"] == "employee_id: 1001 already exists"
+
+
+class TestImportRequests:
+    """Test validation of import uploads"""
+
+    def test_requires_authentication(self, client: TestClient):
+        response = client.post("/api/imports/products", files={"file": ("a.csv", b"sku,name\n")})
+        assert response.status_code in (401, 403)
+
+    def test_unknown_resource(self, client: TestClient, auth_headers):
+        response = client.post("/api/imports/invoices", headers=auth_headers, files={"file": ("a.csv", b"x\n")})
+        assert response.status_code == 404
+
+    def test_unsupported_file_type(self, client: TestClient, auth_headers):
+        response = client.post("/api/imports/products", headers=auth_headers, files={"file": ("a.txt", b"x\n")})
+        assert response.status_code == 400
+
+    def test_file_size_limit(self, client: TestClient, auth_headers, monkeypatch, upload_dir):
+        monkeypatch.setattr(settings, "IMPORT_MAX_FILE_SIZE", 10)
+        response = client.post("/api/imports/products", headers=auth_headers, files={"file": ("a.csv", PRODUCTS_CSV)})
+        assert response.status_code == 413
+        assert list((upload_dir / "imports").iterdir()) == []
+
+    def test_unreadable_file_fails_the_job(self, client: TestClient, auth_headers):
+        job = run_import(client, auth_headers, "products", "broken.xlsx", b"not a workbook")
+        assert job["status"] == "failed"
+        assert job["message"]
+
+    def test_unknown_job(self, client: TestClient, auth_headers):
+        assert client.get("/api/imports/999", headers=auth_headers).status_code == 404
+
+    def test_other_users_jobs_are_hidden(self, client: TestClient, auth_headers, db_session):
+        """Only the user who started an import, or a super admin, can read it"""
+        job_id = client.post(
+            "/api/imports/products", headers=auth_headers, files={"file": ("a.csv", PRODUCTS_CSV)}
+        ).json()["job_id"]
+        other = {"username": "other", "email": "other@example.com", "password": "otherpassword123", "full_name": "Other"}
+        client.post("/api/auth/register", json=other)
+        token = client.post("/api/auth/login", json={"username": "other", "password": other["password"]}).json()["access_token"]
+        other_headers = {"Authorization": f"Bearer {token}"}
+        assert client.get(f"/api/imports/{job_id}", headers=other_headers).status_code == 404
+
+        db_session.query(User).filter(User.username == "other").update({"role": User.role.type.enum_class.SUPER_ADMIN})
+        db_session.commit()
+        # Roles are part of the cached principal; log in again to pick up the change
+        token = client.post("/api/auth/login", json={"username": "other", "password": other["password"]}).json()["access_token"]
+        other_headers = {"Authorization": f"Bearer {token}"}
+        assert client.get(f"/api/imports/{job_id}", headers=other_headers).json()["id"] == job_id
+
+
+class TestAbandonedImports:
+    """Test failing the jobs whose worker stopped, and only those"""
+
+    @staticmethod
+    def run(test_database, coroutine_function, *args, **kwargs):
+        async def run():
+            engine = create_async_engine(test_database.url.set(drivername="sqlite+aiosqlite"))
+            try:
+                return await coroutine_function(engine, *args, **kwargs)
+            finally:
+                await engine.dispose()
+        return asyncio.run(run())
+
+    def test_only_stale_jobs_fail(self, db_session, test_database, monkeypatch):
+        """Jobs with a fresh heartbeat keep running, whichever worker owns them"""
+        now = datetime(2026, 10, 17, 12, 0, 0)
+        stale, fresh = now - timedelta(minutes=10), now - timedelta(seconds=5)
+        db_session.add_all([
+            ImportJob(resource="products", filename="stale.csv", status=ImportStatus.RUNNING,
+                      worker_id="gone", heartbeat_at=stale),
+            ImportJob(resource="products", filename="never-started.csv", status=ImportStatus.PENDING,
+                      created_at=stale),
+            ImportJob(resource="products", filename="other-worker.csv", status=ImportStatus.RUNNING,
+                      worker_id="alive", heartbeat_at=fresh),
+            ImportJob(resource="products", filename="completed.csv", status=ImportStatus.COMPLETED,
+                      heartbeat_at=stale),
+            ImportJob(resource="products", filename="this-process.csv", status=ImportStatus.RUNNING,
+                      worker_id=imports.WORKER_ID, heartbeat_at=stale),
+        ])
+        db_session.commit()
+        own = db_session.query(ImportJob).filter(ImportJob.filename == "this-process.csv").one().id
+        monkeypatch.setitem(imports._running, own, None)
+
+        assert self.run(test_database, imports.fail_abandoned_imports, now) == 2
+        db_session.expire_all()
+        jobs = {job.filename: job for job in db_session.query(ImportJob)}
+        assert {name: job.status for name, job in jobs.items()} == {
+            "stale.csv": ImportStatus.FAILED, "never-started.csv": ImportStatus.FAILED,
+            "other-worker.csv": ImportStatus.RUNNING, "completed.csv": ImportStatus.COMPLETED,
+            "this-process.csv": ImportStatus.RUNNING,
+        }
+        assert jobs["stale.csv"].message == "Its worker stopped before it finished"
+        assert jobs["stale.csv"].finished_at == now
+
+    def test_failed_job_is_not_overwritten(self, db_session, test_database):
+        """A worker whose job was failed by another one stops updating it"""
+        job = ImportJob(resource="products", filename="a.csv", status=ImportStatus.FAILED, message="gone")
+        db_session.add(job)
+        db_session.commit()
+
+        with pytest.raises(imports.ImportAbandoned):
+            self.run(test_database, imports._update_job, job.id, status=ImportStatus.COMPLETED)
+        db_session.expire_all()
+        assert (job.status, job.message) == (ImportStatus.FAILED, "gone")
+
+    def test_heartbeat_is_refreshed(self, db_session, test_database, monkeypatch):
+        """A running job's heartbeat_at moves forward until the job is done"""
+        monkeypatch.setattr(settings, "IMPORT_HEARTBEAT_SECONDS", 0.01)
+        job = ImportJob(resource="products", filename="a.csv", status=ImportStatus.RUNNING,
+                        heartbeat_at=datetime(2020, 1, 1))
+        db_session.add(job)
+        db_session.commit()
+
+        async def beat(engine):
+            done = asyncio.Event()
+            task = asyncio.create_task(imports._heartbeat(engine, job.id, done))
+            await asyncio.sleep(0.1)
+            done.set()
+            await task
+
+        self.run(test_database, beat)
+        db_session.expire_all()
+        assert job.heartbeat_at > datetime(2026, 1, 1)
+
+    def test_uploads_record_their_worker(self, client: TestClient, auth_headers, db_session):
+        job = run_import(client, auth_headers, "products", "products.csv", PRODUCTS_CSV)
+        db_session.expire_all()
+        row = db_session.get(ImportJob, job["id"])
+        assert row.worker_id == imports.WORKER_ID
+        assert row.heartbeat_at is not None
@@ -0,0 +1,98 @@
+"""
+Tests for per-request SQL instrumentation
+"""
+import logging
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+
+from app.core import instrumentation
+from app.core.config import settings
+from app.core.instrumentation import QueryInstrumentationMiddleware, query_metrics, track_queries
+from app.modules.crm.models import Lead
+
+
+class TestQueryInstrumentation:
+    """Test statement counting, N+1 and slow-query detection"""
+
+    def test_metrics_aggregate_per_route_template(self, client: TestClient, auth_headers):
+        """Requests are grouped under their route template, not the concrete URL"""
+        query_metrics.reset()
+        client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Metric", "last_name": "Lead", "email": "metric@example.com"
+        })
+        client.get("/api/crm/leads", headers=auth_headers)
+        client.get("/api/crm/leads?status=new", headers=auth_headers)
+
+        routes = client.get("/api/metrics").json()["queries"]["routes"]
+        assert routes["GET /api/crm/leads"]["requests"] == 2
+        assert routes["GET /api/crm/leads"]["avg_statements"] >= 2
+        assert "POST /api/crm/leads" in routes
+
+    def test_path_parameters_keep_the_template(self):
+        """Routes inside prefixed routers are reported with their full template"""
+        query_metrics.reset()
+        inner, outer = APIRouter(), APIRouter()
+
+        @inner.get("/items/{item_id}")
+        async def get_item(item_id: int):
+            return {"id": item_id}
+
+        outer.include_router(inner, prefix="/shop")
+        app = FastAPI()
+        app.include_router(outer, prefix="/api")
+        app.add_middleware(QueryInstrumentationMiddleware)
+
+        with TestClient(app) as test_client:
+            test_client.get("/api/shop/items/1")
+            test_client.get("/api/shop/items/22")
+
+        assert query_metrics.snapshot()["routes"]["GET /api/shop/items/{item_id}"]["requests"] == 2
+
+    def test_repeated_statement_is_flagged(self, db_session):
+        """The same statement run once per row shows up as an N+1 candidate"""
+        db_session.add_all([Lead(first_name=f"N{i}", last_name="Plus", email=f"n{i}@example.com") for i in range(4)])
+        db_session.commit()
+
+        with track_queries() as stats:
+            ids = db_session.scalars(select(Lead.id)).all()
+            for lead_id in ids:
+                db_session.execute(select(Lead).where(Lead.id == lead_id)).one()
+
+        assert stats.statements == 5
+        assert stats.repeated(threshold=4) == [(stats.shapes.most_common(1)[0][0], 4)]
+        assert stats.repeated(threshold=5) == []
+
+    def test_slow_query_is_logged_with_plan(self, db_session, monkeypatch, caplog):
+        """Statements over SLOW_QUERY_MS are logged with their EXPLAIN plan"""
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.000001)
+        with caplog.at_level(logging.WARNING, logger="app.core.instrumentation"):
+            with track_queries() as stats:
+                db_session.execute(select(Lead).where(Lead.last_name == "Slow")).all()
+
+        assert stats.slow == 1
+        message = next(record.getMessage() for record in caplog.records if "Slow query" in record.getMessage())
+        assert "FROM leads" in message
+        assert "Plan:" in message and "SCAN" in message
+
+    def test_explain_runs_in_a_savepoint(self, db_session, monkeypatch, caplog):
+        """A failing EXPLAIN is rolled back to its savepoint and the transaction carries on"""
+        monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.000001)
+        monkeypatch.setattr(instrumentation, "_explain_prefix", lambda dialect: "EXPLAIN NONSENSE ")
+        issued = []
+        engine = db_session.get_bind()
+        listener = lambda conn, cursor, statement, *args: issued.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            with caplog.at_level(logging.WARNING, logger="app.core.instrumentation"):
+                db_session.add(Lead(first_name="Ada", last_name="Lovelace", email="ada@example.com"))
+                db_session.flush()
+                assert db_session.execute(select(Lead.last_name)).scalar_one() == "Lovelace"
+            db_session.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert any(statement.startswith("SAVEPOINT") for statement in issued)
+        assert any(statement.startswith("ROLLBACK TO SAVEPOINT") for statement in issued)
+        assert "EXPLAIN failed" in caplog.text
+        assert db_session.query(Lead).count() == 1
@@ -0,0 +1,80 @@
+"""
+Tests for column-select list responses rendered with orjson
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.responses import FastJSONResponse
+from app.modules.accounting.models import Invoice, InvoiceStatus
+from app.modules.inventory.models import Product
+
+
+class TestFastJSONResponse:
+    """Test the orjson response class"""
+
+    def test_renders_decimals_dates_and_enums(self):
+        """Decimal becomes a float, datetimes ISO 8601 and enums their value"""
+        response = FastJSONResponse({
+            "amount": Decimal("12.50"),
+            "issued": datetime(2024, 3, 1, 9, 30),
+            "status": InvoiceStatus.PAID,
+        })
+        assert response.body == b'{"amount":12.5,"issued":"2024-03-01T09:30:00","status":"paid"}'
+        assert response.media_type == "application/json"
+
+    def test_unknown_types_are_rejected(self):
+        """Values orjson cannot represent fail loudly instead of being stringified"""
+        with pytest.raises(TypeError):
+            FastJSONResponse({"value": object()})
+
+
+class TestListRows:
+    """Test list endpoints built from column selects"""
+
+    def test_invoice_rows(self, client: TestClient, auth_headers, db_session):
+        """Invoice rows carry exactly the listed fields, amounts as numbers"""
+        db_session.add(Invoice(
+            invoice_number="INV-1", issue_date=datetime(2024, 3, 1), due_date=datetime(2024, 3, 31),
+            total_amount=Decimal("100.25"), paid_amount=Decimal("40"), balance_due=Decimal("60.25"),
+            status=InvoiceStatus.SENT,
+        ))
+        db_session.commit()
+
+        response = client.get("/api/accounting/invoices", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        body = response.json()
+        assert body["total"] == 1
+        row = body["invoices"][0]
+        assert set(row) == {
+            "id", "invoice_number", "customer_id", "issue_date", "due_date",
+            "total_amount", "paid_amount", "balance_due", "status",
+        }
+        assert row["total_amount"] == 100.25
+        assert row["balance_due"] == 60.25
+        assert row["issue_date"].startswith("2024-03-01T00:00:00")
+        assert row["status"] == "sent"
+
+    def test_missing_prices_are_zero(self, client: TestClient, auth_headers, db_session):
+        """Products without prices list them as 0, as before"""
+        db_session.add(Product(sku="P-1", name="Widget", cost_price=Decimal("2.5"), selling_price=None))
+        db_session.commit()
+
+        row = client.get("/api/inventory/products", headers=auth_headers).json()["products"][0]
+        assert row["cost_price"] == 2.5
+        assert row["selling_price"] == 0
+
+    def test_cursor_pages_of_column_rows(self, client: TestClient, auth_headers, db_session):
+        """Cursor tokens come from the sort key columns, not the selected ones"""
+        db_session.add_all([Product(sku=f"P-{i}", name=f"Widget {i}") for i in range(5)])
+        db_session.commit()
+
+        first = client.get("/api/inventory/products?limit=3", headers=auth_headers).json()
+        second = client.get(
+            f"/api/inventory/products?limit=3&cursor={first['next_cursor']}", headers=auth_headers
+        ).json()
+        assert [row["sku"] for row in first["products"] + second["products"]] == [f"P-{i}" for i in range(5)]
+        assert second["next_cursor"] is None
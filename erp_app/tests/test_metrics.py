@@ -0,0 +1,94 @@
+"""
+Tests for the Prometheus /metrics exposition
+"""
+import os
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+
+def sample_value(exposition: str, prefix: str) -> float:
+    """Value of the first sample line starting with ``prefix``"""
+    line = next(line for line in exposition.splitlines() if line.startswith(prefix))
+    return float(line.rsplit(" ", 1)[1])
+
+
+class TestPrometheusMetrics:
+    """Test /metrics content"""
+
+    def test_request_and_db_metrics(self, client: TestClient, auth_headers):
+        """Requests are labelled by route template and their SQL is timed"""
+        client.get("/api/crm/leads?status=new", headers=auth_headers)
+        client.get("/api/dashboard/stats", headers=auth_headers)
+        client.get("/api/dashboard/stats", headers=auth_headers)
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+
+        assert sample_value(body, 'erp_http_requests_total{method="GET",route="/api/crm/leads",status="200"}') >= 1
+        assert sample_value(body, 'erp_http_request_duration_seconds_count{method="GET",route="/api/crm/leads"}') >= 1
+        assert sample_value(body, 'erp_db_query_duration_seconds_count{operation="SELECT"}') > 0
+        assert 'erp_http_request_db_statements_count{method="GET",route="/api/crm/leads"}' in body
+        assert sample_value(body, 'erp_cache_hits_total{cache="dashboard"}') >= 1
+        assert "erp_password_hasher_in_flight" in body
+        assert sample_value(body, "erp_process_resident_memory_bytes") > 0
+
+    def test_unmatched_paths_share_a_label(self, client: TestClient):
+        """404s do not create one series per URL"""
+        client.get("/no/such/page-1")
+        client.get("/no/such/page-2")
+        body = client.get("/metrics").text
+        assert sample_value(body, 'erp_http_requests_total{method="GET",route="unmatched",status="404"}') >= 2
+        assert "page-1" not in body
+
+
+WORKER = """
+import sys
+sys.path.insert(0, {backend!r})
+from app.core import metrics
+metrics.HTTP_REQUESTS.labels("GET", "/api/x", "200").inc({count})
+"""
+
+
+INSTRUMENTATION_OFF = """
+import sys
+sys.path.insert(0, {backend!r})
+from sqlalchemy import create_engine, text
+from app.core import metrics
+metrics.install()
+with create_engine("sqlite://").connect() as conn:
+    conn.execute(text("SELECT 1"))
+print(metrics.render()[0].decode())
+"""
+
+
+class TestDbMetricsInstall:
+    """Test that SQL is timed however the app is configured"""
+
+    def test_statements_timed_without_query_instrumentation(self):
+        """metrics.install() hooks the engines itself when QUERY_INSTRUMENTATION is off"""
+        env = dict(os.environ, QUERY_INSTRUMENTATION="False")
+        env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+        body = subprocess.run(
+            [sys.executable, "-c", INSTRUMENTATION_OFF.format(backend=BACKEND)],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        assert sample_value(body, 'erp_db_query_duration_seconds_count{operation="SELECT"}') >= 1
+
+
+class TestMultiprocessMode:
+    """Test aggregation across worker processes"""
+
+    def test_counters_sum_across_processes(self, tmp_path):
+        """Two workers' samples are summed by whichever process renders /metrics"""
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+        for count in (2, 3):
+            subprocess.run([sys.executable, "-c", WORKER.format(backend=BACKEND, count=count)], env=env, check=True)
+
+        render = f"import sys; sys.path.insert(0, {BACKEND!r}); from app.core import metrics; print(metrics.render()[0].decode())"
+        body = subprocess.run([sys.executable, "-c", render], env=env, check=True, capture_output=True, text=True).stdout
+        assert sample_value(body, 'erp_http_requests_total{method="GET",route="/api/x",status="200"}') == 5
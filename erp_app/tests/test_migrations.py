@@ -0,0 +1,72 @@
+"""
+Tests for the Alembic migrations
+"""
+import ast
+import pathlib
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, inspect
+
+from app.core.database import Base
+from app.modules.crm.search import SEARCH_INDEXES
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+VERSIONS = ROOT / "backend" / "alembic" / "versions"
+SEARCH_TABLES = tuple(index.fts_name for index in SEARCH_INDEXES)
+
+
+def upgrade(engine):
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "backend" / "alembic"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+
+
+def schema_diff(engine):
+    """What autogenerate would change to make the database match the models"""
+    def include_name(name, type_, parent_names):
+        return not (type_ == "table" and name.startswith(SEARCH_TABLES))
+
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"include_name": include_name})
+        return compare_metadata(context, Base.metadata)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    yield engine
+    engine.dispose()
+
+
+class TestMigrations:
+    """Upgrade throwaway databases and compare them with the models"""
+
+    @pytest.mark.parametrize("path", sorted(VERSIONS.glob("*.py")), ids=lambda path: path.name)
+    def test_revisions_do_not_import_the_app(self, path):
+        """A revision builds the schema of its time, not whatever the models say today"""
+        modules = set()
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Import):
+                modules.update(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                modules.add(node.module or "")
+        assert not [module for module in modules if module.split(".")[0] in ("app", "main")]
+
+    def test_empty_database_matches_the_models(self, engine):
+        """upgrade head on an empty database builds the schema the models describe"""
+        upgrade(engine)
+        assert schema_diff(engine) == []
+        tables = inspect(engine).get_table_names()
+        assert "alembic_version" in tables
+        assert set(SEARCH_TABLES) <= set(tables)
+
+    def test_create_all_database_upgrades(self, engine):
+        """A database created at startup upgrades without errors or changes"""
+        Base.metadata.create_all(engine)
+        upgrade(engine)
+        assert schema_diff(engine) == []
@@ -0,0 +1,100 @@
+"""
+Tests for offset and cursor pagination on list endpoints
+"""
+from datetime import datetime
+from fastapi.testclient import TestClient
+
+from app.core.pagination import count_cache
+from app.modules.inventory.models import StockMovement
+
+
+def collect_pages(client: TestClient, url: str, key: str, headers, limit: int):
+    """Follow next_cursor from the first page to the last, returning every id seen"""
+    response = client.get(f"{url}?limit={limit}", headers=headers)
+    ids = [item["id"] for item in response.json()[key]]
+    while response.json()["next_cursor"]:
+        response = client.get(f"{url}?limit={limit}&cursor={response.json()['next_cursor']}", headers=headers)
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.json()[key]]
+    return ids
+
+
+class TestCursorPagination:
+    """Test keyset pagination through next_cursor"""
+
+    def test_leads_cursor_walks_every_row_once(self, client: TestClient, auth_headers):
+        """Cursor pages over (id) return each lead once, in id order"""
+        for i in range(7):
+            client.post("/api/crm/leads", headers=auth_headers, json={
+                "first_name": f"Lead{i}",
+                "last_name": "Paged",
+                "email": f"paged{i}@example.com"
+            })
+
+        first_page = client.get("/api/crm/leads?limit=3", headers=auth_headers).json()
+        assert first_page["total"] == 7
+        assert first_page["next_cursor"] is not None
+
+        ids = collect_pages(client, "/api/crm/leads", "leads", auth_headers, limit=3)
+        assert ids == sorted(ids)
+        assert len(ids) == len(set(ids)) == 7
+
+    def test_created_at_ties_are_broken_by_id(self, client: TestClient, auth_headers, db_session):
+        """Rows sharing created_at are neither skipped nor repeated across pages"""
+        same_time = datetime(2024, 1, 1, 9, 0, 0)
+        db_session.add_all([StockMovement(quantity=i, created_at=same_time) for i in range(5)])
+        # Server-side now() defaults are stored in a different text format on SQLite
+        db_session.add_all([StockMovement(quantity=i) for i in range(4)])
+        db_session.commit()
+
+        ids = collect_pages(client, "/api/inventory/stock-movements", "movements", auth_headers, limit=2)
+        assert len(ids) == len(set(ids)) == 9
+
+    def test_invalid_cursor_is_rejected(self, client: TestClient, auth_headers):
+        """A malformed cursor is a client error, not a server error"""
+        response = client.get("/api/crm/leads?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invalid cursor"
+
+
+class TestTotalModes:
+    """Test total=exact|estimate|none on list endpoints"""
+
+    def test_total_modes(self, client: TestClient, auth_headers):
+        """Each mode reports whether its total is exact"""
+        client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Total",
+            "last_name": "Mode",
+            "email": "total@example.com"
+        })
+
+        exact = client.get("/api/crm/leads?total=exact", headers=auth_headers).json()
+        assert exact["total"] == 1
+        assert exact["total_is_exact"] is True
+
+        none = client.get("/api/crm/leads?total=none", headers=auth_headers).json()
+        assert "total" not in none
+        assert len(none["leads"]) == 1
+
+        assert client.get("/api/crm/leads?total=bogus", headers=auth_headers).status_code == 422
+
+    def test_estimate_reuses_cached_count(self, client: TestClient, auth_headers):
+        """On SQLite the first estimate counts exactly, later ones come from the cache"""
+        count_cache.clear()
+        url = "/api/crm/leads?total=estimate&company=EstimateCo"
+
+        first = client.get(url, headers=auth_headers).json()
+        assert first["total"] == 0
+        assert first["total_is_exact"] is True
+
+        client.post("/api/crm/leads", headers=auth_headers, json={
+            "first_name": "Est",
+            "last_name": "Imate",
+            "email": "estimate@example.com",
+            "company": "EstimateCo"
+        })
+
+        second = client.get(url, headers=auth_headers).json()
+        assert second["total"] == 0
+        assert second["total_is_exact"] is False
+        assert len(second["leads"]) == 1
@@ -0,0 +1,291 @@
+"""
+Tests for monthly partitioning, archival and date-bounded reads of high-growth tables
+"""
+import csv
+import gzip
+import os
+import pytest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from datetime import date, datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, UniqueConstraint, event
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateTable
+
+from app.core.config import settings
+from app.core.partitions import PARTITIONED_TABLES, PartitionedTable, add_months, archive_partitions
+from app.modules.accounting.models import Transaction
+from app.modules.hr.models import Attendance
+from app.modules.inventory.models import Product, StockMovement, StockMovementType
+
+
+@pytest.fixture
+def movements(db_session):
+    """Two stock movements in each month from January to June 2024"""
+    product = Product(sku="P-1", name="Widget")
+    db_session.add(product)
+    db_session.flush()
+    db_session.add_all([
+        StockMovement(
+            product_id=product.id, movement_type=StockMovementType.IN, quantity=month * 10 + day,
+            created_at=datetime(2024, month, day * 14, 12, 0),
+        )
+        for month in range(1, 7) for day in (1, 2)
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_MONTHS", 3)
+    return tmp_path
+
+
+@contextmanager
+def captured_selects():
+    """Collect the SQL of every SELECT executed while the block runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", capture)
+
+
+class TestPostgresDDL:
+    """Test the CREATE TABLE emitted for partitioned tables on Postgres"""
+
+    @pytest.mark.parametrize("table", PARTITIONED_TABLES, ids=lambda table: table.table_name)
+    def test_tables_are_range_partitioned_by_month_key(self, table):
+        """The partition key is part of the primary key, as Postgres requires"""
+        ddl = str(CreateTable(table.model.__table__).compile(dialect=postgresql.dialect()))
+        assert f"PARTITION BY RANGE ({table.key})" in ddl
+        assert f"PRIMARY KEY (id, {table.key})" in ddl
+
+    def test_transaction_numbers_stay_globally_unique(self):
+        """transactions is not partitioned, so its transaction numbers are unique across all dates"""
+        ddl = str(CreateTable(Transaction.__table__).compile(dialect=postgresql.dialect()))
+        assert "PARTITION BY" not in ddl
+        assert "UNIQUE (transaction_number)" in ddl
+
+    @pytest.mark.parametrize("unique", [
+        {"constraint": UniqueConstraint("number")},
+        {"index": Index("ix_ledger_number", "number", unique=True)},
+    ], ids=["constraint", "index"])
+    def test_unique_columns_cannot_be_partitioned(self, unique):
+        """Partitioning a table with a unique key that lacks the partition key is refused"""
+        table = Table(
+            "ledger", MetaData(), Column("id", Integer, primary_key=True), Column("number", String(20)),
+            Column("created_at", DateTime), *unique.values(),
+        )
+        with pytest.raises(ValueError, match="UNIQUE \\(number\\)"):
+            PartitionedTable(SimpleNamespace(__tablename__="ledger", __table__=table), "created_at").register()
+
+    def test_other_tables_are_unchanged(self):
+        """Tables outside the partitioned set keep their plain primary key"""
+        ddl = str(CreateTable(Product.__table__).compile(dialect=postgresql.dialect()))
+        assert "PARTITION BY" not in ddl
+        assert "PRIMARY KEY (id)" in ddl
+
+    def test_month_arithmetic_crosses_years(self):
+        """add_months steps over year boundaries in both directions"""
+        assert add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+        assert add_months(date(2024, 2, 1), -3) == date(2023, 11, 1)
+
+
+class RecordingConnection:
+    """Stands in for a Postgres connection: records each statement's SQL and answers the catalog queries"""
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, relkind="r", default_has_rows=False, oldest=None, newest=None, default_rows=()):
+        self.relkind, self.default_has_rows = relkind, default_has_rows
+        self.oldest, self.newest = oldest, newest
+        self.default_rows = sorted(default_rows)  # partition keys of the rows in DEFAULT
+        self.statements = []
+
+    def _record(self, statement, params=None):
+        self.statements.append(" ".join(str(statement.compile(dialect=self.dialect)).split()))
+        return self.statements[-1], params or {}
+
+    def scalar(self, statement, params=None):
+        sql, params = self._record(statement, params)
+        if "relkind" in sql:
+            return self.relkind
+        if "pg_get_serial_sequence" in sql:
+            return "stock_movements_id_seq"
+        if "EXISTS" in sql:
+            return self.default_has_rows
+        if sql.startswith("SELECT min("):
+            # The oldest DEFAULT row at or after the query's bound
+            bounds = statement.compile(dialect=self.dialect).params.values()
+            return next((key for key in self.default_rows if all(key >= bound for bound in bounds)), None)
+        # to_regclass: only the table itself exists
+        return params["name"] if params.get("name") == "stock_movements" else None
+
+    def scalars(self, statement, params=None):
+        self._record(statement, params)
+        return SimpleNamespace(all=lambda: ["ix_stock_movements_id", "ix_stock_movements_product_created_at"])
+
+    def execute(self, statement, params=None):
+        self._record(statement, params)
+        return SimpleNamespace(one=lambda: (self.oldest, self.newest))
+
+    def schema_for_object(self, obj):
+        return obj.schema
+
+    def _run_ddl_visitor(self, visitorcallable, element, **kwargs):
+        # What Table.create(connection) calls; nothing exists yet, so skip the existence checks
+        kwargs["checkfirst"] = False
+        visitorcallable(self.dialect, self, **kwargs).traverse_single(element)
+
+
+class TestPostgresConversion:
+    """Test the statements convert() and partition creation run on Postgres"""
+
+    table = PARTITIONED_TABLES[0]
+
+    def test_convert_copies_into_a_partitioned_table(self):
+        """The plain table is renamed aside, recreated partitioned, copied with its ids, and dropped"""
+        connection = RecordingConnection(oldest=datetime(2024, 1, 5), newest=datetime(2024, 2, 20))
+        self.table.convert(connection)
+        statements = connection.statements
+
+        def position(prefix):
+            return next(i for i, sql in enumerate(statements) if sql.startswith(prefix))
+
+        order = [
+            position("ALTER TABLE stock_movements RENAME TO stock_movements_unpartitioned"),
+            position('ALTER INDEX "ix_stock_movements_product_created_at" RENAME TO'),
+            position("ALTER SEQUENCE stock_movements_id_seq RENAME TO stock_movements_id_seq_unpartitioned"),
+            position("CREATE TABLE stock_movements ("),
+            position("CREATE TABLE IF NOT EXISTS stock_movements_default PARTITION OF stock_movements DEFAULT"),
+            position("CREATE TABLE stock_movements_p202401 PARTITION OF stock_movements "
+                     "FOR VALUES FROM ('2024-01-01') TO ('2024-02-01')"),
+            position("CREATE TABLE stock_movements_p202402 PARTITION OF stock_movements"),
+            position("INSERT INTO stock_movements (id, product_id"),
+            position("SELECT setval(pg_get_serial_sequence('stock_movements', 'id')"),
+            position("DROP TABLE stock_movements_unpartitioned"),
+        ]
+        assert order == sorted(order)
+        create = statements[position("CREATE TABLE stock_movements (")]
+        assert "PRIMARY KEY (id, created_at)" in create
+        assert create.endswith("PARTITION BY RANGE (created_at)")
+        assert "FROM stock_movements_unpartitioned" in statements[position("INSERT INTO stock_movements (id")]
+
+    def test_convert_skips_partitioned_tables(self):
+        """A table that is already partitioned is left alone"""
+        connection = RecordingConnection(relkind="p")
+        self.table.convert(connection)
+        assert len(connection.statements) == 1
+
+    def test_new_month_takes_its_rows_from_default(self):
+        """Rows already in DEFAULT for the month move into the new partition"""
+        connection = RecordingConnection(default_has_rows=True)
+        assert self.table.create_partitions(connection, date(2024, 3, 10), date(2024, 3, 10)) == ["stock_movements_p202403"]
+        assert [sql.split(" WHERE")[0] for sql in connection.statements[2:]] == [
+            "ALTER TABLE stock_movements DETACH PARTITION stock_movements_default",
+            "CREATE TABLE stock_movements_p202403 PARTITION OF stock_movements "
+            "FOR VALUES FROM ('2024-03-01') TO ('2024-04-01')",
+            "INSERT INTO stock_movements_p202403 SELECT * FROM stock_movements_default",
+            "DELETE FROM stock_movements_default",
+            "ALTER TABLE stock_movements ATTACH PARTITION stock_movements_default DEFAULT",
+        ]
+
+
+    def test_old_default_rows_get_partitions_before_archival(self):
+        """Months before the cutoff with rows in DEFAULT get partitions of their own, so they can be archived"""
+        connection = RecordingConnection(
+            default_has_rows=True,
+            default_rows=[datetime(2023, 11, 3), datetime(2023, 11, 20), datetime(2024, 2, 1), datetime(2024, 6, 9)],
+        )
+        created = self.table.partition_default_rows(connection, date(2024, 5, 1))
+        assert created == ["stock_movements_p202311", "stock_movements_p202402"]
+        moved = [sql for sql in connection.statements if sql.startswith("INSERT INTO")]
+        assert [sql.split(" WHERE")[0] for sql in moved] == [
+            "INSERT INTO stock_movements_p202311 SELECT * FROM stock_movements_default",
+            "INSERT INTO stock_movements_p202402 SELECT * FROM stock_movements_default",
+        ]
+
+
+class TestArchival:
+    """Test moving months older than ARCHIVE_AFTER_MONTHS out of the tables"""
+
+    def test_cold_months_are_written_and_removed(self, db_session, movements, archive):
+        """Each cold month becomes a gzipped CSV and its rows leave the table"""
+        archived = archive_partitions(db_session.get_bind(), today=date(2024, 6, 20))
+
+        assert archived == {f"stock_movements_p2024{month:02d}": 2 for month in (1, 2)}
+        with gzip.open(archive / "stock_movements_p202401.csv.gz", "rt", newline="") as file:
+            rows = list(csv.DictReader(file))
+        assert [row["quantity"] for row in rows] == ["11", "12"]
+        assert rows[0]["movement_type"] == "in"
+        assert not [name for name in os.listdir(archive) if name.endswith(".tmp")]
+
+        db_session.expire_all()
+        remaining = db_session.query(StockMovement).order_by(StockMovement.created_at).all()
+        assert len(remaining) == 8
+        assert remaining[0].created_at == datetime(2024, 3, 14, 12, 0)
+
+    def test_rerun_archives_nothing_new(self, db_session, movements, archive):
+        """A second run in the same month finds no cold rows"""
+        archive_partitions(db_session.get_bind(), today=date(2024, 6, 20))
+        assert archive_partitions(db_session.get_bind(), today=date(2024, 6, 20)) == {}
+
+    def test_date_keyed_tables_are_archived(self, db_session, archive):
+        """Date columns (attendance.date) are bounded by month as well"""
+        db_session.add_all([Attendance(date=date(2024, 1, 31)), Attendance(date=date(2024, 5, 1))])
+        db_session.commit()
+
+        assert archive_partitions(db_session.get_bind(), today=date(2024, 6, 1)) == {"attendance_p202401": 1}
+        db_session.expire_all()
+        assert [row.date for row in db_session.query(Attendance).all()] == [date(2024, 5, 1)]
+
+    def test_disabled_by_default(self, db_session, movements):
+        """ARCHIVE_AFTER_MONTHS=0 keeps everything"""
+        assert archive_partitions(db_session.get_bind(), today=date(2030, 1, 1)) == {}
+        assert db_session.query(StockMovement).count() == 12
+
+    def test_table_mode_needs_partitions(self, db_session, movements, archive):
+        """ARCHIVE_MODE=table only exists for Postgres partitions"""
+        with pytest.raises(ValueError):
+            archive_partitions(db_session.get_bind(), today=date(2024, 6, 20), mode="table")
+
+
+class TestDateBoundedReads:
+    """Test the date bounds that let Postgres prune partitions"""
+
+    def test_stock_movements_between_dates(self, client: TestClient, auth_headers, movements):
+        """date_from and date_to are inclusive days on created_at"""
+        response = client.get(
+            "/api/inventory/stock-movements?date_from=2024-02-28&date_to=2024-03-14", headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert [row["quantity"] for row in response.json()["movements"]] == [31, 22]
+
+    def test_attendance_between_dates(self, client: TestClient, auth_headers, db_session):
+        """date_from and date_to bound attendance.date"""
+        db_session.add_all([Attendance(date=date(2024, month, 1)) for month in (1, 2, 3)])
+        db_session.commit()
+
+        response = client.get("/api/hr/attendance?date_from=2024-02-01&date_to=2024-02-29", headers=auth_headers)
+        assert [row["date"] for row in response.json()["attendance"]] == ["2024-02-01"]
+
+    def test_cursor_pages_bound_the_leading_key(self, client: TestClient, auth_headers, movements):
+        """Later pages carry a plain bound on created_at next to the row comparison"""
+        url = "/api/inventory/stock-movements?limit=5"
+        page = client.get(url, headers=auth_headers).json()
+        with captured_selects() as statements:
+            response = client.get(f"{url}&cursor={page['next_cursor']}", headers=auth_headers)
+        assert [row["quantity"] for row in response.json()["movements"]] == [41, 32, 31, 22, 21]
+
+        page_query = next(sql for sql in statements if "FROM stock_movements" in sql and "LIMIT" in sql)
+        assert "stock_movements.created_at <=" in page_query
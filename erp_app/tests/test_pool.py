@@ -0,0 +1,169 @@
+"""
+Tests for the configurable connection pool and its checkout telemetry
+"""
+import asyncio
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.config import settings
+from app.core.database import (
+    MonitoredAsyncQueuePool, MonitoredQueuePool, _engine_options, _request_checkout_wait, async_engine, get_async_db,
+    pool_monitor,
+)
+from main import app
+
+
+@pytest.fixture
+def small_pool(monkeypatch):
+    """Pool settings of one connection plus one overflow, with a short timeout"""
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 1)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 0.2)
+    pool_monitor.reset()
+    yield
+    pool_monitor.reset()
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'pool.db'}"
+
+
+class TestEngineOptions:
+    """Test the pool settings _engine_options derives from Settings"""
+
+    def test_file_database(self, small_pool):
+        """File databases get the monitored pools sized from the settings"""
+        options = _engine_options("sqlite:///erp.db", is_async=False)
+        assert options["poolclass"] is MonitoredQueuePool
+        assert (options["pool_size"], options["max_overflow"], options["pool_timeout"]) == (1, 1, 0.2)
+        assert (options["pool_recycle"], options["pool_pre_ping"]) == (settings.DB_POOL_RECYCLE, settings.DB_POOL_PRE_PING)
+        assert options["connect_args"] == {"check_same_thread": False}
+
+        options = _engine_options("sqlite+aiosqlite:///erp.db", is_async=True)
+        assert options["poolclass"] is MonitoredAsyncQueuePool
+        assert "connect_args" not in options
+
+    def test_memory_database(self):
+        """An in-memory database keeps its single connection"""
+        assert _engine_options("sqlite:///:memory:", is_async=True) == {"poolclass": StaticPool}
+
+    def test_postgres_statement_timeout(self, monkeypatch):
+        """DB_STATEMENT_TIMEOUT_MS becomes a server setting for either driver"""
+        monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+        sync = _engine_options("postgresql://erp@db/erp", is_async=False)
+        assert sync["connect_args"] == {"options": "-c statement_timeout=5000"}
+        asynchronous = _engine_options("postgresql+asyncpg://erp@db/erp", is_async=True)
+        assert asynchronous["connect_args"] == {"server_settings": {"statement_timeout": "5000"}}
+
+
+class TestCheckoutWaits:
+    """Check out past pool_size and assert on the recorded waits and overflow"""
+
+    def test_overflow_and_timeout(self, small_pool, database_url):
+        """pool_size + max_overflow connections check out; the next one waits DB_POOL_TIMEOUT and fails"""
+        engine = create_engine(database_url, **_engine_options(database_url, is_async=False))
+        try:
+            held = [engine.connect(), engine.connect()]
+            stats = pool_monitor.snapshot(engine.pool)
+            assert stats["pool_class"] == "MonitoredQueuePool"
+            assert (stats["size"], stats["checked_out"], stats["overflow"], stats["saturation"]) == (1, 2, 1, 1.0)
+
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+            stats = pool_monitor.snapshot(engine.pool)
+            assert (stats["checkouts"], stats["timeouts"]) == (3, 1)
+            assert stats["max_wait_ms"] >= 150
+
+            for connection in held:
+                connection.close()
+            stats = pool_monitor.snapshot(engine.pool)
+            assert (stats["checked_out"], stats["overflow"], stats["saturation"]) == (0, 0, 0.0)
+        finally:
+            engine.dispose()
+
+    def test_wait_for_a_released_connection(self, small_pool, database_url, monkeypatch):
+        """A checkout that queues until another one is returned records how long it waited"""
+        monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+        monkeypatch.setattr(settings, "DB_POOL_TIMEOUT", 5)
+        engine = create_engine(database_url, **_engine_options(database_url, is_async=False))
+        try:
+            held = engine.connect()
+            threading.Timer(0.2, held.close).start()
+            start = time.perf_counter()
+            engine.connect().close()
+            waited = (time.perf_counter() - start) * 1000
+
+            stats = pool_monitor.snapshot(engine.pool)
+            assert (stats["checkouts"], stats["timeouts"]) == (2, 0)
+            assert 150 <= stats["max_wait_ms"] <= waited + 1
+        finally:
+            engine.dispose()
+
+    def test_async_pool(self, small_pool, database_url):
+        """The async pool records waits the same way"""
+        url = database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+
+        async def run():
+            engine = create_async_engine(url, **_engine_options(url, is_async=True))
+            try:
+                held = [await engine.connect(), await engine.connect()]
+                stats = pool_monitor.snapshot(engine.pool)
+                assert (stats["pool_class"], stats["checked_out"], stats["overflow"]) == ("MonitoredAsyncQueuePool", 2, 1)
+
+                async def release():
+                    await asyncio.sleep(0.1)
+                    await held.pop().close()
+
+                releasing = asyncio.create_task(release())
+                async with engine.connect():
+                    pass
+                await releasing
+                await held.pop().close()
+                return pool_monitor.snapshot(engine.pool)
+            finally:
+                await engine.dispose()
+
+        stats = asyncio.run(run())
+        assert (stats["checkouts"], stats["timeouts"]) == (3, 0)
+        assert stats["max_wait_ms"] >= 50
+
+
+    def test_request_scope_ends_with_the_session(self, small_pool):
+        """get_async_db resets its per-request wait counter when the session closes"""
+        async def run():
+            sessions = get_async_db()
+            await sessions.__anext__()
+            inside = _request_checkout_wait.get()
+            await sessions.aclose()
+            return inside, _request_checkout_wait.get()
+
+        inside, after = asyncio.run(run())
+        assert inside == [0.0]
+        assert after is None
+        assert pool_monitor.snapshot(async_engine.pool)["requests"] == 1
+
+
+class TestMetricsEndpoint:
+    """Test the database_pool section of /api/metrics"""
+
+    def test_database_pool_section(self, client: TestClient, monkeypatch):
+        """The app's pool and its per-request checkout waits are reported"""
+        # Requests go through the app's own session and pool, not the test database
+        monkeypatch.delitem(app.dependency_overrides, get_async_db)
+        pool_monitor.reset()
+        client.get("/api/metrics")
+        pool = client.get("/api/metrics").json()["database_pool"]
+        assert pool["pool_class"] == "MonitoredAsyncQueuePool"
+        assert (pool["size"], pool["max_overflow"]) == (settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+        assert pool["checkouts"] >= 1
+        assert pool["requests"] == 1
+        assert pool["timeouts"] == 0
+        for key in ("avg_wait_ms", "max_wait_ms", "avg_request_wait_ms", "max_request_wait_ms", "saturation"):
+            assert pool[key] >= 0
@@ -0,0 +1,96 @@
+"""
+Tests for the low-stock index and reorder suggestions
+"""
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app.modules.inventory.models import LOW_STOCK, Category, Product, StockMovement, StockMovementType
+
+
+@pytest.fixture
+def catalog(db_session):
+    """Products at different stock levels, with issues inside and outside the demand window"""
+    category = Category(name="Fasteners")
+    db_session.add(category)
+    db_session.flush()
+    products = {
+        # 60 issued in the window: 2 a day; reorder point 5 + 2 * 7 = 19
+        "fast": Product(sku="FAST", name="Fast mover", current_stock=10, minimum_stock=5, maximum_stock=100,
+                        reorder_level=0, category_id=category.id),
+        # No demand, no maximum: ordered up to its reorder level
+        "idle": Product(sku="IDLE", name="Idle", current_stock=3, minimum_stock=0, reorder_level=5),
+        # Only old issues: outside the window, so no demand either
+        "old": Product(sku="OLD", name="Old demand", current_stock=1, minimum_stock=2, reorder_level=0),
+        "healthy": Product(sku="OK", name="Healthy", current_stock=500, minimum_stock=5, reorder_level=10),
+        "inactive": Product(sku="OFF", name="Inactive", current_stock=0, reorder_level=5, is_active=False),
+        "untracked": Product(sku="SVC", name="Service", current_stock=0, reorder_level=5, track_inventory=False),
+    }
+    db_session.add_all(products.values())
+    db_session.flush()
+    now = datetime.now()
+    db_session.add_all([
+        StockMovement(product_id=products["fast"].id, movement_type=StockMovementType.OUT, quantity=20,
+                      created_at=now - timedelta(days=day))
+        for day in (1, 10, 20)
+    ] + [
+        StockMovement(product_id=products["fast"].id, movement_type=StockMovementType.IN, quantity=50,
+                      created_at=now - timedelta(days=2)),
+        StockMovement(product_id=products["old"].id, movement_type=StockMovementType.OUT, quantity=900,
+                      created_at=now - timedelta(days=90)),
+    ])
+    db_session.commit()
+    return {name: product.id for name, product in products.items()}, category.id
+
+
+class TestReorderSuggestions:
+    """Test GET /api/inventory/reorder-suggestions"""
+
+    def test_suggested_quantities(self, client: TestClient, auth_headers, catalog):
+        """Due products, most urgent first, with order quantities from their levels and demand"""
+        ids, _ = catalog
+        response = client.get("/api/inventory/reorder-suggestions", headers=auth_headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 3
+        assert body["suggestions"] == [
+            {"product_id": ids["fast"], "sku": "FAST", "name": "Fast mover", "current_stock": 10,
+             "reorder_point": 19, "daily_demand": 2.0, "days_of_cover": 5.0, "suggested_quantity": 90},
+            {"product_id": ids["idle"], "sku": "IDLE", "name": "Idle", "current_stock": 3,
+             "reorder_point": 5, "daily_demand": 0.0, "days_of_cover": None, "suggested_quantity": 2},
+            {"product_id": ids["old"], "sku": "OLD", "name": "Old demand", "current_stock": 1,
+             "reorder_point": 2, "daily_demand": 0.0, "days_of_cover": None, "suggested_quantity": 1},
+        ]
+
+    def test_limit_and_category(self, client: TestClient, auth_headers, catalog):
+        """limit trims the list but not the total; category_id narrows the products"""
+        ids, category_id = catalog
+        body = client.get("/api/inventory/reorder-suggestions?limit=1", headers=auth_headers).json()
+        assert (len(body["suggestions"]), body["total"]) == (1, 3)
+
+        body = client.get(f"/api/inventory/reorder-suggestions?category_id={category_id}", headers=auth_headers).json()
+        assert [row["product_id"] for row in body["suggestions"]] == [ids["fast"]]
+
+    def test_no_products(self, client: TestClient, auth_headers):
+        """An empty catalog has nothing to reorder"""
+        body = client.get("/api/inventory/reorder-suggestions", headers=auth_headers).json()
+        assert body == {"suggestions": [], "total": 0}
+
+
+class TestLowStock:
+    """Test the low-stock partial index behind the dashboard count"""
+
+    def test_dashboard_count(self, client: TestClient, auth_headers, catalog):
+        """Tracked products at or below their reorder level, active or not"""
+        stats = client.get("/api/dashboard/stats", headers=auth_headers).json()
+        assert stats["inventory"]["low_stock_products"] == 2
+
+    def test_count_reads_the_partial_index(self, db_session, catalog):
+        """SQLite answers the low-stock count from ix_products_low_stock"""
+        query = select(func.count()).select_from(Product).where(LOW_STOCK)
+        compiled = query.compile(db_session.get_bind())
+        plan = db_session.connection().exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.params.values())
+        ).all()
+        assert "ix_products_low_stock" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,89 @@
+"""
+Tests for ETag / conditional GET on reference data and charts
+"""
+from fastapi.testclient import TestClient
+
+from app.core.response_cache import response_cache
+from app.modules.crm.models import Deal, DealStage
+from app.modules.hr.models import Department
+from app.modules.inventory.models import Category
+
+
+class TestConditionalGet:
+    """Test ETags and 304 responses"""
+
+    def test_etag_and_not_modified(self, client: TestClient, auth_headers, db_session):
+        """A matching If-None-Match gets an empty 304 with the same ETag"""
+        client.post("/api/inventory/categories", headers=auth_headers, json={"name": "Tools"})
+        first = client.get("/api/inventory/categories", headers=auth_headers)
+        assert first.status_code == 200
+        assert [c["name"] for c in first.json()["categories"]] == ["Tools"]
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "private, no-cache"
+
+        second = client.get("/api/inventory/categories", headers={**auth_headers, "If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        assert second.headers["etag"] == etag
+
+        stale = client.get("/api/inventory/categories", headers={**auth_headers, "If-None-Match": '"other"'})
+        assert stale.status_code == 200
+        assert stale.json() == first.json()
+
+    def test_write_changes_etag(self, client: TestClient, auth_headers, db_session):
+        """Committing to the table bumps its version, so old ETags stop matching"""
+        etag = client.get("/api/hr/departments", headers=auth_headers).headers["etag"]
+        db_session.add(Department(name="Finance", code="FIN"))
+        db_session.commit()
+
+        response = client.get("/api/hr/departments", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert [d["code"] for d in response.json()["departments"]] == ["FIN"]
+
+    def test_unrelated_write_keeps_etag(self, client: TestClient, auth_headers, db_session):
+        etag = client.get("/api/inventory/warehouses", headers=auth_headers).headers["etag"]
+        client.post("/api/inventory/categories", headers=auth_headers, json={"name": "Tools"})
+        response = client.get("/api/inventory/warehouses", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_query_string_is_part_of_the_etag(self, client: TestClient, auth_headers, db_session):
+        one = client.get("/api/dashboard/charts/revenue?months=1", headers=auth_headers).headers["etag"]
+        two = client.get("/api/dashboard/charts/revenue?months=2", headers=auth_headers).headers["etag"]
+        assert one != two
+
+    def test_requires_authentication(self, client: TestClient, auth_headers, db_session):
+        etag = client.get("/api/inventory/categories", headers=auth_headers).headers["etag"]
+        response = client.get("/api/inventory/categories", headers={"If-None-Match": etag})
+        assert response.status_code in (401, 403)
+
+
+class TestCachedBodies:
+    """Test the serialized bodies kept per ETag"""
+
+    def test_body_served_from_cache(self, client: TestClient, auth_headers, db_session):
+        """A second client without the ETag gets the stored body, even if the table changed behind the hooks"""
+        client.post("/api/inventory/categories", headers=auth_headers, json={"name": "Tools"})
+        first = client.get("/api/inventory/categories", headers=auth_headers)
+
+        # A bulk UPDATE skips the unit of work, so the version is not bumped
+        db_session.query(Category).update({Category.name: "Renamed"})
+        db_session.commit()
+
+        second = client.get("/api/inventory/categories", headers=auth_headers)
+        assert second.content == first.content
+        assert second.headers["etag"] == first.headers["etag"]
+
+    def test_orm_writes_invalidate(self, client: TestClient, auth_headers, db_session):
+        """ORM writes from any session bump the version, so the chart is rebuilt"""
+        assert client.get("/api/dashboard/charts/sales-pipeline", headers=auth_headers).json()["counts"] == []
+        db_session.add(Deal(name="Big one", amount=1000, stage=DealStage.PROSPECTING))
+        db_session.commit()
+        assert client.get("/api/dashboard/charts/sales-pipeline", headers=auth_headers).json()["counts"] == [1]
+
+    def test_memory_store_stats(self, client: TestClient, auth_headers, db_session):
+        client.get("/api/inventory/categories", headers=auth_headers)
+        client.get("/api/inventory/categories", headers=auth_headers)
+        stats = response_cache.stats()
+        assert stats["backend"] == "memory"
+        assert stats["hits"] >= 1
@@ -0,0 +1,94 @@
+"""
+Tests for ranked full-text search over leads and contacts
+"""
+from fastapi.testclient import TestClient
+
+from app.modules.crm.models import Lead
+from app.modules.crm.search import search_terms
+
+
+def create_lead(client: TestClient, headers, first_name: str, last_name: str, company: str = None):
+    response = client.post("/api/crm/leads", headers=headers, json={
+        "first_name": first_name,
+        "last_name": last_name,
+        "email": f"{first_name}.{last_name}@example.com".lower(),
+        "company": company
+    })
+    return response.json()["id"]
+
+
+class TestLeadSearch:
+    """Test search= on GET /api/crm/leads"""
+
+    def test_prefix_match_ranks_names_above_company(self, client: TestClient, auth_headers):
+        """A prefix finds every lead containing it, name matches first"""
+        by_company = create_lead(client, auth_headers, "Ada", "Lovelace", company="Smithfield Foods")
+        by_name = create_lead(client, auth_headers, "John", "Smith", company="Acme")
+        create_lead(client, auth_headers, "Grace", "Hopper", company="Navy")
+
+        response = client.get("/api/crm/leads?search=smi", headers=auth_headers)
+        assert response.status_code == 200
+        assert [lead["id"] for lead in response.json()["leads"]] == [by_name, by_company]
+        assert response.json()["total"] == 2
+
+    def test_every_term_must_match(self, client: TestClient, auth_headers):
+        """Terms are ANDed and matched against any column"""
+        wanted = create_lead(client, auth_headers, "John", "Smith", company="Acme")
+        create_lead(client, auth_headers, "John", "Doe", company="Acme")
+
+        response = client.get("/api/crm/leads?search=john%20smi", headers=auth_headers)
+        assert [lead["id"] for lead in response.json()["leads"]] == [wanted]
+
+    def test_index_follows_updates_and_deletes(self, client: TestClient, auth_headers, db_session):
+        """Changed and deleted leads stop matching their old text"""
+        lead_id = create_lead(client, auth_headers, "Marie", "Curie", company="Sorbonne")
+        lead = db_session.get(Lead, lead_id)
+        lead.last_name = "Sklodowska"
+        lead.email = "marie@example.com"
+        db_session.commit()
+
+        assert client.get("/api/crm/leads?search=curie", headers=auth_headers).json()["leads"] == []
+        assert len(client.get("/api/crm/leads?search=sklod", headers=auth_headers).json()["leads"]) == 1
+
+        db_session.delete(lead)
+        db_session.commit()
+        assert client.get("/api/crm/leads?search=sklod", headers=auth_headers).json()["leads"] == []
+
+    def test_cursor_pages_through_ranked_results(self, client: TestClient, auth_headers):
+        """next_cursor carries the rank, so ranked results page without gaps or repeats"""
+        for i in range(5):
+            create_lead(client, auth_headers, f"Pat{i}", "Searchable")
+
+        first = client.get("/api/crm/leads?search=search&limit=2", headers=auth_headers).json()
+        ids = [lead["id"] for lead in first["leads"]]
+        cursor = first["next_cursor"]
+        while cursor:
+            page = client.get(f"/api/crm/leads?search=search&limit=2&cursor={cursor}", headers=auth_headers).json()
+            ids += [lead["id"] for lead in page["leads"]]
+            cursor = page["next_cursor"]
+        assert len(ids) == len(set(ids)) == 5
+
+    def test_punctuation_only_search_matches_nothing(self, client: TestClient, auth_headers):
+        """Input without any word characters is not passed to the full-text engine"""
+        create_lead(client, auth_headers, "Quote", "Mark")
+        assert search_terms('"*-') == []
+
+        response = client.get('/api/crm/leads?search="*-', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["leads"] == []
+
+
+class TestContactSearch:
+    """Test search= on GET /api/crm/contacts"""
+
+    def test_contact_search(self, client: TestClient, auth_headers):
+        """Contacts are searchable by company name prefix"""
+        client.post("/api/crm/contacts", headers=auth_headers, json={
+            "type": "company", "company_name": "Globex Corporation", "email": "info@globex.example.com"
+        })
+        client.post("/api/crm/contacts", headers=auth_headers, json={
+            "first_name": "Hank", "last_name": "Scorpio", "email": "hank@example.com"
+        })
+
+        contacts = client.get("/api/crm/contacts?search=glob", headers=auth_headers).json()["contacts"]
+        assert [contact["company_name"] for contact in contacts] == ["Globex Corporation"]
@@ -0,0 +1,235 @@
+"""
+Tests for the shared cache and its backends
+"""
+import asyncio
+import itertools
+
+import pytest
+
+from app.core.config import settings
+from app.core.shared_cache import Cache, MemoryBackend, RedisBackend, invalidate_tags, table_tags
+from app.modules.hr.models import Department
+
+_namespaces = itertools.count()
+
+
+def _redis_backend():
+    try:
+        redis_backend = RedisBackend(settings.REDIS_URL)
+        redis_backend.sync_redis.ping()
+    except Exception:
+        pytest.skip("Redis is not reachable at REDIS_URL")
+    return redis_backend
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    """Each test runs against both backends; Redis only when a server is reachable"""
+    return MemoryBackend() if request.param == "memory" else _redis_backend()
+
+
+@pytest.fixture
+def make_cache(backend):
+    """Build caches in fresh namespaces so runs never see each other's entries"""
+    def make(ttl: float = 60, maxsize: int = 16) -> Cache:
+        return Cache(f"test_{next(_namespaces)}", ttl=ttl, maxsize=maxsize, backend=backend)
+    return make
+
+
+class TestCacheBasics:
+    """Test get, set, delete and TTL"""
+
+    def test_set_get_delete(self, make_cache):
+        """Values round-trip and deleted keys miss"""
+        cache = make_cache()
+
+        async def run():
+            await cache.set("a", {"value": 1})
+            await cache.set(("stats", 3), [1, 2, 3])
+            assert await cache.get("a") == {"value": 1}
+            assert await cache.get(("stats", 3)) == [1, 2, 3]
+            await cache.delete("a")
+            assert await cache.get("a") is None
+            assert await cache.get("a", default="gone") == "gone"
+
+        asyncio.run(run())
+        assert cache.hits == 2
+        assert cache.misses == 2
+
+    def test_values_are_copies(self, make_cache):
+        """Mutating a returned value does not change the cached one"""
+        cache = make_cache()
+
+        async def run():
+            await cache.set("a", {"items": [1]})
+            (await cache.get("a"))["items"].append(2)
+            return await cache.get("a")
+
+        assert asyncio.run(run()) == {"items": [1]}
+
+    def test_entries_expire(self, make_cache):
+        """Entries miss once their TTL has passed"""
+        cache = make_cache(ttl=0.05)
+
+        async def run():
+            await cache.set("a", 1)
+            await cache.set("b", 2, ttl=5)
+            await asyncio.sleep(0.1)
+            return await cache.get("a"), await cache.get("b")
+
+        assert asyncio.run(run()) == (None, 2)
+
+
+class TestTagInvalidation:
+    """Test invalidating entries by tag"""
+
+    def test_invalidating_a_tag_drops_its_entries(self, make_cache, backend):
+        """Only entries stored under the bumped tag miss afterwards"""
+        cache = make_cache()
+
+        async def run():
+            await cache.set("tagged", 1, tags=["t:a"])
+            await cache.set("other", 2, tags=["t:b"])
+            await cache.set("plain", 3)
+            await backend.bump(["t:a"])
+            return await cache.get("tagged"), await cache.get("other"), await cache.get("plain")
+
+        assert asyncio.run(run()) == (None, 2, 3)
+
+    def test_write_during_load_is_not_cached_as_current(self, make_cache, backend):
+        """A tag bumped while the loader runs makes its result stale straight away"""
+        cache = make_cache()
+
+        async def loader():
+            await backend.bump(["t:a"])
+            return "stale"
+
+        async def run():
+            assert await cache.get_or_set("a", loader, tags=["t:a"]) == "stale"
+            return await cache.get("a")
+
+        assert asyncio.run(run()) is None
+
+    def test_commit_invalidates_table_tags(self, db_session):
+        """A commit writing to a table invalidates entries tagged with it"""
+        cache = Cache(f"test_{next(_namespaces)}", ttl=60)
+        tags = table_tags(Department.__tablename__)
+
+        async def store():
+            await cache.set("departments", ["Sales"], tags=tags)
+            return await cache.get("departments")
+
+        assert asyncio.run(store()) == ["Sales"]
+
+        db_session.add(Department(name="Finance", code="FIN"))
+        db_session.commit()
+
+        assert asyncio.run(cache.get("departments")) is None
+
+    def test_module_invalidation_uses_default_backend(self):
+        """invalidate_tags bumps tags for caches on the default backend"""
+        cache = Cache(f"test_{next(_namespaces)}", ttl=60)
+
+        async def run():
+            await cache.set("a", 1, tags=["t:module"])
+            await invalidate_tags(["t:module"])
+            return await cache.get("a")
+
+        assert asyncio.run(run()) is None
+
+
+class TestSingleFlight:
+    """Test that concurrent misses share one loader call"""
+
+    def test_concurrent_misses_call_loader_once(self, make_cache):
+        """Every caller gets the value computed by a single loader call"""
+        cache = make_cache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return calls
+
+        async def run():
+            results = await asyncio.gather(*(cache.get_or_set("a", loader) for _ in range(20)))
+            return results, await cache.get_or_set("a", loader)
+
+        results, later = asyncio.run(run())
+        assert results == [1] * 20
+        assert later == 1
+        assert calls == 1
+
+    def test_loader_errors_are_not_cached(self, make_cache):
+        """Every waiter sees the error and the next call retries"""
+        cache = make_cache()
+        calls = 0
+
+        async def failing():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def loader():
+            return "ok"
+
+        async def run():
+            results = await asyncio.gather(*(cache.get_or_set("a", failing) for _ in range(5)), return_exceptions=True)
+            return results, await cache.get_or_set("a", loader)
+
+        results, retried = asyncio.run(run())
+        assert all(isinstance(result, ValueError) for result in results)
+        assert calls == 1
+        assert retried == "ok"
+
+    def test_other_workers_wait_for_the_lock_holder(self, make_cache, backend):
+        """A caller that cannot take the backend lock reads the holder's result"""
+        if isinstance(backend, MemoryBackend):
+            pytest.skip("The memory backend only coordinates callers within a worker")
+        cache = make_cache()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return "fresh"
+
+        async def run():
+            assert await backend.acquire(f"{cache.namespace}:a", 5)
+
+            async def holder():
+                await asyncio.sleep(0.1)
+                await cache.set("a", "from holder")
+                await backend.release(f"{cache.namespace}:a")
+
+            # A second Cache object over the same namespace stands in for another worker
+            other = Cache(cache.namespace, ttl=60, backend=backend)
+            result, _ = await asyncio.gather(other.get_or_set("a", loader), holder())
+            return result
+
+        assert asyncio.run(run()) == "from holder"
+        assert calls == 0
+
+
+class TestStats:
+    """Test the stats reported for /metrics and /health"""
+
+    def test_stats(self, make_cache):
+        """Stats count hits and misses per namespace"""
+        cache = make_cache()
+
+        async def run():
+            await cache.get("a")
+            await cache.set("a", 1)
+            await cache.get("a")
+            await cache.get("a")
+
+        asyncio.run(run())
+        stats = cache.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == round(2 / 3, 4)
+        assert stats["ttl_seconds"] == 60
+        assert stats["backend"] in ("memory", "redis")
@@ -0,0 +1,275 @@
+"""
+Tests for posting stock movements through the stock ledger
+"""
+import asyncio
+import json
+import random
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.audit import audit_writer
+from app.core.config import settings
+from app.core.models import AuditLog
+
+from app.modules.inventory.ledger import MovementLine, post_movements
+from app.modules.inventory.models import Product, StockMovement, StockMovementType, Warehouse, WarehouseStock
+
+
+@pytest.fixture
+def stock(db_session):
+    """Two products and two warehouses, with no stock anywhere"""
+    products = [Product(sku=f"P-{i}", name=f"Widget {i}", current_stock=0) for i in range(2)]
+    warehouses = [Warehouse(name=f"Warehouse {i}", code=f"W{i}") for i in range(2)]
+    db_session.add_all(products + warehouses)
+    db_session.commit()
+    return [product.id for product in products], [warehouse.id for warehouse in warehouses]
+
+
+def movement(product_id, warehouse_id, movement_type, quantity, **extra):
+    return {
+        "product_id": product_id, "warehouse_id": warehouse_id,
+        "movement_type": movement_type, "quantity": quantity, **extra,
+    }
+
+
+def audit_rows(db_session, count: int, timeout: float = 5.0):
+    """Audit rows, oldest first, once at least ``count`` have been written (or the timeout passes)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = db_session.query(AuditLog).order_by(AuditLog.id).all()
+        if len(rows) >= count or time.monotonic() > deadline:
+            return rows
+        db_session.rollback()
+        time.sleep(0.02)
+
+
+def levels(db_session, product_id):
+    """(product current_stock, {warehouse_id: (quantity, available_quantity)})"""
+    db_session.expire_all()
+    rows = db_session.query(WarehouseStock).filter(WarehouseStock.product_id == product_id).all()
+    current = db_session.get(Product, product_id).current_stock
+    return current, {row.warehouse_id: (row.quantity, row.available_quantity) for row in rows}
+
+
+class TestPosting:
+    """Test what a posting changes"""
+
+    def test_receipt_creates_the_stock_row(self, client: TestClient, auth_headers, db_session, stock):
+        """The first receipt into a warehouse creates its stock row"""
+        (product, _), (warehouse, _) = stock
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "in", 10, reference_number="PO-1")
+        ])
+        assert response.status_code == 200
+        [posted] = response.json()["movements"]
+        assert (posted["quantity_before"], posted["quantity_after"]) == (0, 10)
+
+        assert levels(db_session, product) == (10, {warehouse: (10, 10)})
+        row = db_session.get(StockMovement, posted["id"])
+        assert (row.reference_number, row.movement_type, row.quantity) == ("PO-1", StockMovementType.IN, 10)
+
+    def test_batch_records_running_quantities(self, client: TestClient, auth_headers, db_session, stock):
+        """Lines on one stock row record its quantity before and after each of them, in order"""
+        (product, other), (warehouse, second) = stock
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "in", 10),
+            movement(product, second, "in", 4),
+            movement(product, warehouse, "out", 3),
+            movement(other, warehouse, "in", 1),
+            movement(product, warehouse, "adjustment", -2),
+        ])
+        posted = response.json()["movements"]
+        assert [(m["quantity_before"], m["quantity_after"]) for m in posted] == [(0, 10), (0, 4), (10, 7), (0, 1), (7, 5)]
+        assert [m["id"] for m in posted] == sorted(m["id"] for m in posted)
+
+        assert levels(db_session, product) == (9, {warehouse: (5, 5), second: (4, 4)})
+        assert levels(db_session, other) == (1, {warehouse: (1, 1)})
+
+    def test_insufficient_stock_rejects_the_whole_batch(self, client: TestClient, auth_headers, db_session, stock):
+        """An issue beyond the available quantity is a 409 and nothing in the batch applies"""
+        (product, _), (warehouse, _) = stock
+        client.post("/api/inventory/stock-movements", headers=auth_headers, json=[movement(product, warehouse, "in", 5)])
+
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "in", 1),
+            movement(product, warehouse, "out", 7),
+        ])
+        assert response.status_code == 409
+        assert levels(db_session, product) == (5, {warehouse: (5, 5)})
+        assert db_session.query(StockMovement).count() == 1
+
+    def test_reserved_stock_cannot_be_issued(self, client: TestClient, auth_headers, db_session, stock):
+        """Issues are limited by available_quantity, not quantity"""
+        (product, _), (warehouse, _) = stock
+        client.post("/api/inventory/stock-movements", headers=auth_headers, json=[movement(product, warehouse, "in", 10)])
+        row = db_session.query(WarehouseStock).one()
+        row.reserved_quantity, row.available_quantity = 6, 4
+        db_session.commit()
+
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "out", 5)
+        ])
+        assert response.status_code == 409
+
+    def test_unknown_product_or_warehouse(self, client: TestClient, auth_headers, db_session, stock):
+        """Receipts for a product or warehouse that does not exist are a 404 before anything is written"""
+        (product, _), (warehouse, _) = stock
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            for line in (movement(9999, warehouse, "in", 1), movement(product, 9999, "in", 1)):
+                response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[line])
+                assert response.status_code == 404
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+        assert not [statement for statement in statements if "warehouse_stocks" in statement]
+        assert db_session.query(WarehouseStock).count() == 0
+        assert db_session.query(StockMovement).count() == 0
+
+    def test_every_line_keeps_the_stock_non_negative(self, client: TestClient, auth_headers, db_session, stock):
+        """An issue before the receipt that covers it is a 409, although the net change is zero"""
+        (product, _), (warehouse, _) = stock
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "out", 5),
+            movement(product, warehouse, "in", 5),
+        ])
+        assert response.status_code == 409
+        assert levels(db_session, product) == (0, {})
+        assert db_session.query(StockMovement).count() == 0
+
+    def test_lines_netting_to_zero_write_no_stock_row(self, client: TestClient, auth_headers, db_session, stock):
+        """A receipt and an equal issue record both movements but create no empty stock row"""
+        (product, _), (warehouse, _) = stock
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "in", 2),
+            movement(product, warehouse, "out", 2),
+        ])
+        posted = response.json()["movements"]
+        assert [(m["quantity_before"], m["quantity_after"]) for m in posted] == [(0, 2), (2, 0)]
+        assert levels(db_session, product) == (0, {})
+        assert db_session.query(StockMovement).count() == 2
+
+    def test_runs_on_the_request_connection(self, client: TestClient, auth_headers, db_session, stock, single_connection):
+        """The posting shares the session's connection instead of checking out another one"""
+        (product, _), (warehouse, _) = stock
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "in", 4)
+        ])
+        assert response.status_code == 200
+        assert levels(db_session, product) == (4, {warehouse: (4, 4)})
+
+
+class TestPostingAudit:
+    """Test the audit entries of a posting"""
+
+    def test_changes_are_audited(self, client: TestClient, auth_headers, db_session, stock, monkeypatch):
+        """Movements, stock rows and products get entries once the posting commits"""
+        monkeypatch.setattr(settings, "AUDIT_FLUSH_SECONDS", 0.02)
+        (product, _), (warehouse, _) = stock
+        client.post("/api/inventory/stock-movements", headers=auth_headers, json=[movement(product, warehouse, "in", 10)])
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "out", 3, reference_number="SO-1"),
+        ])
+        [posted] = response.json()["movements"]
+
+        # The fixture's four creates and three entries per posting, the later posting last for each record
+        rows = audit_rows(db_session, 10)
+        entries = {(row.table_name, row.action, row.record_id): row for row in rows}
+        stock_id = db_session.query(WarehouseStock).one().id
+        assert {
+            ("warehouse_stocks", "UPDATE", str(stock_id)),
+            ("products", "UPDATE", str(product)),
+            ("stock_movements", "CREATE", str(posted["id"])),
+        } <= set(entries)
+        stock_entry = entries[("warehouse_stocks", "UPDATE", str(stock_id))]
+        assert json.loads(stock_entry.old_values) == {"quantity": 10, "available_quantity": 10}
+        assert json.loads(stock_entry.new_values) == {"quantity": 7, "available_quantity": 7}
+        product_entry = entries[("products", "UPDATE", str(product))]
+        assert (json.loads(product_entry.old_values), json.loads(product_entry.new_values)) == (
+            {"current_stock": 10}, {"current_stock": 7}
+        )
+        created = json.loads(entries[("stock_movements", "CREATE", str(posted["id"]))].new_values)
+        assert (created["quantity_before"], created["quantity_after"], created["reference_number"]) == (10, 7, "SO-1")
+        assert all(row.user_id is not None for row in rows[4:])
+
+    def test_rejected_posting_queues_nothing(self, client: TestClient, auth_headers, stock):
+        """In async mode entries are only handed over when the posting commits"""
+        (product, _), (warehouse, _) = stock
+        submitted = audit_writer.submitted
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, "in", 1),
+            movement(product, warehouse, "out", 2),
+        ])
+        assert response.status_code == 409
+        assert audit_writer.submitted == submitted
+
+        client.post("/api/inventory/stock-movements", headers=auth_headers, json=[movement(product, warehouse, "in", 1)])
+        # A stock row, the product and the movement
+        assert audit_writer.submitted == submitted + 3
+
+    @pytest.mark.parametrize("movement_type,quantity", [("in", 0), ("out", -1), ("adjustment", 0)])
+    def test_invalid_quantities(self, client: TestClient, auth_headers, stock, movement_type, quantity):
+        """Receipts and issues need a positive quantity; adjustments a non-zero one"""
+        (product, _), (warehouse, _) = stock
+        response = client.post("/api/inventory/stock-movements", headers=auth_headers, json=[
+            movement(product, warehouse, movement_type, quantity)
+        ])
+        assert response.status_code == 422
+
+
+class TestConcurrentPosting:
+    """Stress the ledger with concurrent receipts and issues on the same rows"""
+
+    def test_no_update_is_lost(self, db_session, stock):
+        """Every movement starts where the previous one on its stock row ended"""
+        products, warehouses = stock
+        url = db_session.get_bind().url.set(drivername="sqlite+aiosqlite")
+        rng = random.Random(7)
+
+        async def worker(engine, postings):
+            rejected = 0
+            for _ in range(postings):
+                lines = [
+                    MovementLine(
+                        product_id=rng.choice(products), warehouse_id=rng.choice(warehouses),
+                        movement_type=rng.choice([StockMovementType.IN, StockMovementType.OUT]),
+                        quantity=rng.randint(1, 5),
+                    )
+                    for _ in range(rng.randint(1, 4))
+                ]
+                try:
+                    async with AsyncSession(engine) as db:
+                        await post_movements(db, lines, None)
+                except Exception as e:
+                    assert getattr(e, "status_code", None) == 409
+                    rejected += 1
+            return rejected
+
+        async def run():
+            engine = create_async_engine(url, poolclass=NullPool)
+            try:
+                return await asyncio.gather(*(worker(engine, 25) for _ in range(12)))
+            finally:
+                await engine.dispose()
+
+        rejected = sum(asyncio.run(run()))
+        movements = db_session.query(StockMovement).order_by(StockMovement.id).all()
+        assert len(movements) > 300
+        assert rejected < 12 * 25
+
+        last = {}
+        for row in movements:
+            key = (row.product_id, row.warehouse_id)
+            assert row.quantity_before == last.get(key, 0)
+            last[key] = row.quantity_after
+        for product in products:
+            current, rows = levels(db_session, product)
+            assert current == sum(quantity for quantity, _ in rows.values())
+            for warehouse, (quantity, available) in rows.items():
+                assert quantity == available == last[(product, warehouse)] >= 0